@@ -85,6 +85,12 @@ if __name__ == "__main__":
         args = parse_args()
         setup_logging()
 
+        # Lập chỉ mục trước các thư mục tài nguyên (config/assets/models/libs),
+        # các lần tìm kiếm sau không phải dò lại hệ thống tệp
+        from src.utils.resource_finder import warm_resource_cache
+
+        warm_resource_cache()
+
         # Phát hiện môi trường Wayland và thiết lập cấu hình plugin nền tảng Qt
         import os
 
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""日程数据库基准 对比旧的"每次操作新建连接"方式与长连接数据库线程.
+
+统计项:
+    - 批量写入（executemany 单事务）耗时
+    - 单条添加（含冲突检查）、按 ID 查询、按天范围查询的单次耗时
+    - 查询期间事件循环的最大阻塞时长（旧方式在事件循环上同步执行）
+    - 全文搜索（FTS5）与旧的全量读取后子串匹配对比
+    - 热点查询的 EXPLAIN QUERY PLAN，确认命中索引（未命中时退出码为 1）
+
+用法:
+    python scripts/calendar_benchmark.py --events 10000 100000
+    python scripts/calendar_benchmark.py --events 10000 --ops 500
+    python scripts/calendar_benchmark.py --events 1000 --explain-only
+"""
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# 添加项目根目录到Python路径 - 必须在导入src模块之前
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.mcp.tools.calendar.database import (  # noqa: E402
+    CalendarDatabase,
+    register_sql_functions,
+)
+
+# 生成数据的起始时间与每天的事件数
+BASE_TIME = datetime(2024, 1, 1, 8, 0, 0)
+EVENTS_PER_DAY = 8
+# 标题/描述词表，用于全文搜索
+TOPICS = (
+    ("项目周会", "同步进度与风险"),
+    ("牙医复诊", "带上医保卡"),
+    ("健身", "腿部训练"),
+    ("Dentist appointment", "Dr. Li, bring insurance card"),
+    ("Team sync", "weekly planning"),
+    ("买菜", "牛奶 鸡蛋 面包"),
+    ("家长会", "三年级二班"),
+)
+SEARCH_QUERY = "when is my meeting with the dentist 牙医"
+
+
+def make_event(index: int, start: datetime = None) -> Dict:
+    day, slot = divmod(index, EVENTS_PER_DAY)
+    topic, description = random.choice(TOPICS)
+    start = start or BASE_TIME + timedelta(days=day, hours=slot)
+    end = start + timedelta(minutes=45)
+    now = datetime.now().isoformat()
+    return {
+        "id": str(uuid.uuid4()),
+        "title": f"{topic} {index}",
+        "start_time": start.isoformat(),
+        "end_time": end.isoformat(),
+        "description": description,
+        "category": random.choice(["默认", "工作", "个人", "会议"]),
+        "reminder_minutes": 15,
+        "reminder_time": (start - timedelta(minutes=15)).isoformat(),
+        "reminder_sent": False,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+
+def summarize(values: List[float]) -> str:
+    return (
+        f"p50 {percentile(values, 0.5):8.3f}ms  "
+        f"p95 {percentile(values, 0.95):8.3f}ms  "
+        f"max {round(max(values), 3) if values else 0:8.3f}ms"
+    )
+
+
+class LegacyDatabase:
+    """
+    旧实现的访问方式：每次操作打开新连接、默认日志模式、在调用线程上同步执行.
+    """
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file)
+        conn.row_factory = sqlite3.Row
+        # 表上的全文索引触发器依赖该函数
+        register_sql_functions(conn)
+        return conn
+
+    def add_event(self, event: Dict) -> bool:
+        conn = self._connect()
+        try:
+            conflict = conn.execute(
+                "SELECT title FROM events WHERE id != ? AND ("
+                "(start_time < ? AND end_time > ?) OR "
+                "(start_time < ? AND end_time > ?))",
+                (
+                    event["id"],
+                    event["end_time"],
+                    event["start_time"],
+                    event["start_time"],
+                    event["end_time"],
+                ),
+            ).fetchall()
+            if conflict:
+                return False
+            conn.execute(
+                "INSERT INTO events (id, title, start_time, end_time, description,"
+                " category, reminder_minutes, reminder_time, reminder_sent,"
+                " created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                tuple(event.values()),
+            )
+            conn.commit()
+            return True
+        finally:
+            conn.close()
+
+    def get_event_by_id(self, event_id: str):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT * FROM events WHERE id = ?", (event_id,)
+            ).fetchone()
+            return dict(row) if row else None
+        finally:
+            conn.close()
+
+    def search_events(self, keyword: str):
+        """
+        旧的搜索方式：读出全部事件后在 Python 中做子串匹配.
+        """
+        keyword = keyword.lower()
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT * FROM events ORDER BY start_time").fetchall()
+        finally:
+            conn.close()
+        return [
+            dict(row)
+            for row in rows
+            if keyword in row["title"].lower()
+            or keyword in (row["description"] or "").lower()
+        ]
+
+    def get_events(self, start_date: str, end_date: str):
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT * FROM events WHERE 1=1 AND start_time >= ? "
+                "AND start_time <= ? ORDER BY start_time",
+                (start_date, end_date),
+            ).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+
+def check_query_plans(db: CalendarDatabase) -> bool:
+    """
+    打印热点查询的执行计划，任一查询出现全表扫描即判定失败.
+    """
+    ok = True
+    for name, details in db.query_plans().items():
+        # 全表扫描形如 "SCAN events"；全文索引与覆盖索引扫描不算
+        uses_index = not any(
+            d.startswith("SCAN") and "VIRTUAL TABLE" not in d and "INDEX" not in d
+            for d in details
+        )
+        ok = ok and uses_index
+        print(f"{'OK  ' if uses_index else 'FAIL'} {name}: {' | '.join(details)}")
+    return ok
+
+
+class LoopLagProbe:
+    """
+    记录事件循环的最大调度延迟.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.max_lag_ms = 0.0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = (time.perf_counter() - started - self.interval) * 1000
+            self.max_lag_ms = max(self.max_lag_ms, lag)
+
+    def __enter__(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+
+async def time_ops(ops: int, fn: Callable, *, is_async: bool) -> List[float]:
+    samples = []
+    for i in range(ops):
+        started = time.perf_counter()
+        if is_async:
+            await fn(i)
+        else:
+            fn(i)
+        samples.append((time.perf_counter() - started) * 1000)
+        # 给事件循环一个调度点，便于测量阻塞
+        await asyncio.sleep(0)
+    return samples
+
+
+async def bench(count: int, ops: int, workdir: Path, explain_only: bool) -> bool:
+    print(f"\n=== {count} 个事件，每项 {ops} 次操作 ===")
+    events = [make_event(i) for i in range(count)]
+    days = max(1, count // EVENTS_PER_DAY)
+    ids = [e["id"] for e in events]
+
+    # 新实现：长连接 + 数据库线程
+    db = CalendarDatabase(str(workdir / f"engine_{count}.db"))
+    started = time.perf_counter()
+    written = await db.add_events(events)
+    bulk_ms = (time.perf_counter() - started) * 1000
+    print(f"批量写入 {written} 条（单事务）: {bulk_ms:.1f}ms")
+
+    plans_ok = check_query_plans(db)
+    if explain_only:
+        db.close()
+        return plans_ok
+
+    # 旧实现：同样的数据，改回默认回滚日志
+    legacy_file = str(workdir / f"legacy_{count}.db")
+    seed = CalendarDatabase(legacy_file)
+    await seed.add_events(events)
+    seed.close()
+    conn = sqlite3.connect(legacy_file)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.close()
+    legacy = LegacyDatabase(legacy_file)
+
+    # 新增事件放在数据之后，避免冲突
+    tail = BASE_TIME + timedelta(days=days + 1)
+
+    def new_event(i):
+        return make_event(i, tail + timedelta(hours=i))
+
+    def day_range(i):
+        day = BASE_TIME + timedelta(days=random.randrange(days))
+        return day.isoformat(), (day + timedelta(days=1)).isoformat()
+
+    cases = [
+        (
+            "添加（含冲突检查）",
+            lambda i: legacy.add_event(new_event(i)),
+            lambda i: db.add_event(new_event(ops + i)),
+        ),
+        (
+            "按 ID 查询",
+            lambda i: legacy.get_event_by_id(random.choice(ids)),
+            lambda i: db.get_event_by_id(random.choice(ids)),
+        ),
+        (
+            "按天范围查询",
+            lambda i: legacy.get_events(*day_range(i)),
+            lambda i: db.get_events(*day_range(i)),
+        ),
+        (
+            "全文搜索",
+            lambda i: legacy.search_events("dentist"),
+            lambda i: db.search_events(SEARCH_QUERY),
+        ),
+    ]
+
+    for name, legacy_fn, engine_fn in cases:
+        with LoopLagProbe() as probe:
+            legacy_samples = await time_ops(ops, legacy_fn, is_async=False)
+        legacy_lag = probe.max_lag_ms
+        with LoopLagProbe() as probe:
+            engine_samples = await time_ops(ops, engine_fn, is_async=True)
+        engine_lag = probe.max_lag_ms
+        print(f"{name}:")
+        print(f"  旧实现  {summarize(legacy_samples)}  循环阻塞 max {legacy_lag:.1f}ms")
+        print(f"  新实现  {summarize(engine_samples)}  循环阻塞 max {engine_lag:.1f}ms")
+
+    # 并发查询：旧实现串行阻塞循环，新实现排队到数据库线程
+    started = time.perf_counter()
+    await asyncio.gather(*(db.get_events(*day_range(i)) for i in range(ops)))
+    print(
+        f"并发 {ops} 个范围查询（新实现）: "
+        f"{(time.perf_counter() - started) * 1000:.1f}ms"
+    )
+    db.close()
+    return plans_ok
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="日程数据库基准")
+    parser.add_argument(
+        "--events",
+        type=int,
+        nargs="+",
+        default=[10000, 100000],
+        help="数据规模（事件数），可给多个",
+    )
+    parser.add_argument("--ops", type=int, default=200, help="每项操作的次数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument(
+        "--explain-only", action="store_true", help="只写入数据并检查执行计划"
+    )
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    ok = True
+    with tempfile.TemporaryDirectory(prefix="calendar_bench_") as tmp:
+        for count in args.events:
+            ok = await bench(count, args.ops, Path(tmp), args.explain_only) and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
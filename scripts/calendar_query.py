@@ -94,7 +94,7 @@ class CalendarQueryScript:
         today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
         today_end = today_start + timedelta(days=1)
 
-        events = self.manager.get_events(
+        events = await self.manager.get_events(
             start_date=today_start.isoformat(), end_date=today_end.isoformat()
         )
 
@@ -121,7 +121,7 @@ class CalendarQueryScript:
         )
         tomorrow_end = tomorrow_start + timedelta(days=1)
 
-        events = self.manager.get_events(
+        events = await self.manager.get_events(
             start_date=tomorrow_start.isoformat(), end_date=tomorrow_end.isoformat()
         )
 
@@ -150,7 +150,7 @@ class CalendarQueryScript:
         )
         week_end = week_start + timedelta(days=7)
 
-        events = self.manager.get_events(
+        events = await self.manager.get_events(
             start_date=week_start.isoformat(), end_date=week_end.isoformat()
         )
 
@@ -189,7 +189,7 @@ class CalendarQueryScript:
         now = datetime.now()
         end_time = now + timedelta(hours=hours)
 
-        events = self.manager.get_events(
+        events = await self.manager.get_events(
             start_date=now.isoformat(), end_date=end_time.isoformat()
         )
 
@@ -211,7 +211,7 @@ class CalendarQueryScript:
             print(f"📅 【{category}】分类的日程")
             print("=" * 50)
 
-            events = self.manager.get_events(category=category)
+            events = await self.manager.get_events(category=category)
 
             if not events:
                 print(f"🎉 【{category}】分类下没有任何日程")
@@ -226,7 +226,7 @@ class CalendarQueryScript:
             print("📅 所有分类统计")
             print("=" * 50)
 
-            categories = self.manager.get_categories()
+            categories = await self.manager.get_categories()
 
             if not categories:
                 print("🎉 暂无任何分类")
@@ -235,7 +235,7 @@ class CalendarQueryScript:
             print("📊 分类列表:")
             for i, cat in enumerate(categories, 1):
                 # 统计每个分类的事件数量
-                events = self.manager.get_events(category=cat)
+                events = await self.manager.get_events(category=cat)
                 print(f"{i}. 【{cat}】- {len(events)} 个日程")
 
     async def query_all(self):
@@ -245,7 +245,7 @@ class CalendarQueryScript:
         print("📅 所有日程安排")
         print("=" * 50)
 
-        events = self.manager.get_events()
+        events = await self.manager.get_events()
 
         if not events:
             print("🎉 暂无任何日程安排")
@@ -304,16 +304,7 @@ class CalendarQueryScript:
         print(f"🔍 搜索包含 '{keyword}' 的日程")
         print("=" * 50)
 
-        all_events = self.manager.get_events()
-        matched_events = []
-
-        for event in all_events:
-            if (
-                keyword.lower() in event.title.lower()
-                or keyword.lower() in event.description.lower()
-                or keyword.lower() in event.category.lower()
-            ):
-                matched_events.append(event)
+        matched_events = await self.manager.search_events(keyword, limit=50)
 
         if not matched_events:
             print(f"🎉 没有找到包含 '{keyword}' 的日程")
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""无界面多客户端压测 在一个或多个进程中并发运行 N 个独立协议会话.
+
+每个会话直接使用 WebsocketProtocol / MqttProtocol（不经过 Application 单例、
+GUI 和真实音频设备）:
+    listen start -> 按实时节奏上行 WAV 编码的 Opus 帧 -> listen stop
+    -> 接收并解码 TTS -> 等待 tts stop，重复若干轮
+
+统计每会话与汇总的建连耗时、应答时延（listen stop -> 首个TTS帧）、
+每会话 CPU 时间与内存增量。
+
+用法:
+    # 本地模拟服务器，4 个进程共 200 个会话
+    python scripts/load_generator.py --sessions 200 --processes 4 --wav a.wav b.wav
+    # 外部服务器
+    python scripts/load_generator.py --url ws://host:8000/xiaozhi/v1/ --sessions 50
+
+未指定 --wav 时上行固定长度的合成负载，只压测传输层。
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import psutil
+
+# 添加项目根目录到Python路径 - 必须在导入src模块之前
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from protocol_benchmark import summarize  # noqa: E402
+from protocol_emulator import (  # noqa: E402
+    MqttUdpEmulator,
+    ProtocolEmulator,
+    ServerBehavior,
+    WebSocketEmulator,
+)
+
+INPUT_SAMPLE_RATE = 16000
+OUTPUT_SAMPLE_RATE = 24000
+FRAME_DURATION_MS = 60
+
+
+# ---------------------------------------------------------------------------
+# 上行音频
+# ---------------------------------------------------------------------------
+
+
+def load_wav_frames(path: str, frame_duration: int = FRAME_DURATION_MS) -> List[bytes]:
+    """
+    读取 WAV（任意采样率/声道）并编码为 16kHz 单声道 Opus 帧.
+    """
+    import opuslib
+    import soxr
+
+    with wave.open(path, "rb") as wf:
+        channels = wf.getnchannels()
+        rate = wf.getframerate()
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: 仅支持16位PCM")
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+
+    if channels > 1:
+        pcm = pcm.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    if rate != INPUT_SAMPLE_RATE:
+        pcm = soxr.resample(pcm, rate, INPUT_SAMPLE_RATE).astype(np.int16)
+
+    encoder = opuslib.Encoder(INPUT_SAMPLE_RATE, 1, opuslib.APPLICATION_AUDIO)
+    frame_size = INPUT_SAMPLE_RATE * frame_duration // 1000
+    return [
+        encoder.encode(pcm[i : i + frame_size].tobytes(), frame_size)
+        for i in range(0, len(pcm) - frame_size + 1, frame_size)
+    ]
+
+
+def synthetic_frames(count: int, size: int) -> List[bytes]:
+    return [os.urandom(size) for _ in range(count)]
+
+
+# ---------------------------------------------------------------------------
+# 单个会话
+# ---------------------------------------------------------------------------
+
+
+class LoadSession:
+    """
+    一个独立的协议会话.
+    """
+
+    def __init__(self, index: int, protocol, frames: List[bytes], decode: bool):
+        self.index = index
+        self.protocol = protocol
+        self.frames = frames
+        self.connect_ms: Optional[float] = None
+        self.response_ms: List[float] = []
+        self.turns_completed = 0
+        self.tts_frames = 0
+        self.decode_errors = 0
+        self.errors: List[str] = []
+
+        self._decoder = None
+        if decode:
+            import opuslib
+
+            self._decoder = opuslib.Decoder(OUTPUT_SAMPLE_RATE, 1)
+        self._decode_frame = OUTPUT_SAMPLE_RATE * FRAME_DURATION_MS // 1000
+        self._stop_sent_at: Optional[float] = None
+        self._tts_stopped = asyncio.Event()
+
+        protocol.on_incoming_json(self._on_json)
+        protocol.on_incoming_audio(self._on_audio)
+        protocol.on_audio_channel_opened(self._noop)
+        protocol.on_audio_channel_closed(self._noop)
+        protocol.on_network_error(self._on_network_error)
+
+    async def _noop(self):
+        pass
+
+    def _on_network_error(self, message=None):
+        self.errors.append(str(message))
+
+    def _on_json(self, data: dict):
+        if data.get("type") == "tts" and data.get("state") == "stop":
+            self._tts_stopped.set()
+
+    def _on_audio(self, data: bytes):
+        self.tts_frames += 1
+        if self._stop_sent_at is not None:
+            self.response_ms.append((time.perf_counter() - self._stop_sent_at) * 1000)
+            self._stop_sent_at = None
+        if self._decoder is not None:
+            try:
+                self._decoder.decode(data, self._decode_frame)
+            except Exception:
+                self.decode_errors += 1
+
+    async def run(self, turns: int, think_time: float, timeout: float):
+        started = time.perf_counter()
+        if not await self.protocol.open_audio_channel():
+            self.errors.append("连接失败")
+            return
+        self.connect_ms = (time.perf_counter() - started) * 1000
+
+        from src.constants.constants import ListeningMode
+
+        for _ in range(turns):
+            self._tts_stopped.clear()
+            await self.protocol.send_start_listening(ListeningMode.MANUAL)
+            # 按帧时长实时上行
+            turn_start = time.monotonic()
+            for idx, frame in enumerate(self.frames):
+                wait = turn_start + idx * FRAME_DURATION_MS / 1000 - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                await self.protocol.send_audio(frame)
+            self._stop_sent_at = time.perf_counter()
+            await self.protocol.send_stop_listening()
+            try:
+                await asyncio.wait_for(self._tts_stopped.wait(), timeout=timeout)
+                self.turns_completed += 1
+            except asyncio.TimeoutError:
+                self.errors.append("等待TTS结束超时")
+            self._stop_sent_at = None
+            await asyncio.sleep(think_time)
+
+    async def close(self):
+        try:
+            await self.protocol.close_audio_channel()
+        except Exception as e:
+            self.errors.append(f"关闭失败: {e}")
+
+    def report(self) -> Dict:
+        return {
+            "index": self.index,
+            "connect_ms": round(self.connect_ms, 3) if self.connect_ms else None,
+            "turns": self.turns_completed,
+            "response": summarize(self.response_ms),
+            "response_raw": self.response_ms,
+            "tts_frames": self.tts_frames,
+            "decode_errors": self.decode_errors,
+            "errors": self.errors[:3],
+        }
+
+
+# ---------------------------------------------------------------------------
+# 工作进程
+# ---------------------------------------------------------------------------
+
+
+def _make_protocol(target: Dict, index: int):
+    from src.protocols.mqtt_protocol import MqttProtocol
+    from src.protocols.websocket_protocol import WebsocketProtocol
+
+    device_id = f"load-{os.getpid()}-{index}"
+    if target["transport"] == "websocket":
+        protocol = WebsocketProtocol()
+        protocol.WEBSOCKET_URL = target["url"]
+        protocol.HEADERS = dict(protocol.HEADERS, **{"Device-Id": device_id})
+        return protocol
+
+    info = dict(target["mqtt_info"])
+    info["client_id"] = device_id
+    if info.get("subscribe_topic") not in (None, "null"):
+        info["subscribe_topic"] = f"devices/p2p/{device_id}"
+    return MqttProtocol(asyncio.get_running_loop(), mqtt_info=info)
+
+
+async def _run_sessions(job: Dict) -> Dict:
+    proc = psutil.Process()
+    cpu_before = sum(proc.cpu_times()[:2])
+    rss_before = proc.memory_info().rss
+
+    if job["wav"]:
+        frames = []
+        for path in job["wav"]:
+            frames.extend(load_wav_frames(path))
+    else:
+        frames = synthetic_frames(job["frames_per_turn"], job["frame_bytes"])
+
+    sessions = [
+        LoadSession(
+            job["first_index"] + i,
+            _make_protocol(job["target"], i),
+            frames,
+            job["decode"],
+        )
+        for i in range(job["sessions"])
+    ]
+
+    # 采样峰值内存
+    rss_peak = [proc.memory_info().rss]
+
+    async def sample_memory():
+        while True:
+            rss_peak[0] = max(rss_peak[0], proc.memory_info().rss)
+            await asyncio.sleep(0.5)
+
+    sampler = asyncio.create_task(sample_memory())
+    started = time.perf_counter()
+
+    async def run_one(session: LoadSession, delay: float):
+        await asyncio.sleep(delay)
+        try:
+            await session.run(job["turns"], job["think_time"], job["timeout"])
+        except Exception as e:
+            session.errors.append(str(e))
+        finally:
+            await session.close()
+
+    # 建连错峰，避免所有会话同一时刻握手
+    await asyncio.gather(
+        *(run_one(s, i * job["ramp_ms"] / 1000) for i, s in enumerate(sessions))
+    )
+    wall = time.perf_counter() - started
+    sampler.cancel()
+
+    cpu = sum(proc.cpu_times()[:2]) - cpu_before
+    count = max(1, len(sessions))
+    return {
+        "pid": os.getpid(),
+        "sessions": [s.report() for s in sessions],
+        "wall_s": round(wall, 3),
+        "cpu_s": round(cpu, 3),
+        "cpu_per_session_ms": round(cpu * 1000 / count, 3),
+        "rss_per_session_kb": round((rss_peak[0] - rss_before) / 1024 / count, 1),
+    }
+
+
+def run_worker(job: Dict) -> Dict:
+    """
+    进程池入口：屏蔽协议层的日志/打印，返回可序列化的结果.
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return asyncio.run(_run_sessions(job))
+
+
+# ---------------------------------------------------------------------------
+# 汇总
+# ---------------------------------------------------------------------------
+
+
+def aggregate(results: List[Dict], wall_s: float) -> Dict:
+    sessions = [s for r in results for s in r["sessions"]]
+    responses = [v for s in sessions for v in s.pop("response_raw")]
+    connects = [s["connect_ms"] for s in sessions if s["connect_ms"] is not None]
+    total_cpu = sum(r["cpu_s"] for r in results)
+    return {
+        "sessions": len(sessions),
+        "connected": len(connects),
+        "failed": sum(1 for s in sessions if s["errors"]),
+        "turns": sum(s["turns"] for s in sessions),
+        "connect": summarize(connects),
+        "response": summarize(responses),
+        "wall_s": round(wall_s, 3),
+        "cpu_s": round(total_cpu, 3),
+        "cpu_per_session_ms": round(total_cpu * 1000 / max(1, len(sessions)), 3),
+        "rss_per_session_kb": round(
+            sum(r["rss_per_session_kb"] * len(r["sessions"]) for r in results)
+            / max(1, len(sessions)),
+            1,
+        ),
+        "processes": [
+            {
+                k: r[k]
+                for k in (
+                    "pid",
+                    "wall_s",
+                    "cpu_s",
+                    "cpu_per_session_ms",
+                    "rss_per_session_kb",
+                )
+            }
+            for r in results
+        ],
+        "per_session": sessions,
+    }
+
+
+def print_summary(summary: Dict, verbose: bool):
+    print("\n===== 压测结果 =====")
+    print(
+        f"会话: {summary['sessions']}  已连接: {summary['connected']}  "
+        f"出错: {summary['failed']}  完成轮次: {summary['turns']}"
+    )
+    c, r = summary["connect"], summary["response"]
+    print(f"建连:   p50 {c['p50_ms']} / p95 {c['p95_ms']} / max {c['max_ms']} ms")
+    print(
+        f"应答:   p50 {r['p50_ms']} / p95 {r['p95_ms']} / p99 {r['p99_ms']} ms "
+        f"(n={r['count']})"
+    )
+    print(f"CPU:    共 {summary['cpu_s']} s，每会话 {summary['cpu_per_session_ms']} ms")
+    print(f"内存:   每会话约 {summary['rss_per_session_kb']} KB")
+    for p in summary["processes"]:
+        print(
+            f"  进程 {p['pid']}: 耗时 {p['wall_s']} s, CPU {p['cpu_s']} s, "
+            f"每会话 {p['cpu_per_session_ms']} ms / {p['rss_per_session_kb']} KB"
+        )
+    if verbose:
+        for s in summary["per_session"]:
+            print(
+                f"  #{s['index']}: 建连 {s['connect_ms']} ms, 轮次 {s['turns']}, "
+                f"应答 p50 {s['response']['p50_ms']} ms, 错误 {s['errors']}"
+            )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="小智协议多客户端压测")
+    parser.add_argument(
+        "--transport", choices=["websocket", "mqtt"], default="websocket"
+    )
+    parser.add_argument("--url", help="外部 WebSocket 服务器地址")
+    parser.add_argument(
+        "--mqtt-info", help="外部 MQTT 配置（JSON 文件，格式同 MQTT_INFO）"
+    )
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--think-time", type=float, default=1.0, help="轮次间隔（秒）")
+    parser.add_argument("--timeout", type=float, default=15.0)
+    parser.add_argument("--ramp-ms", type=float, default=20.0, help="会话启动间隔")
+    parser.add_argument("--wav", nargs="*", default=[], help="上行音频 WAV 文件")
+    parser.add_argument(
+        "--frames-per-turn", type=int, default=25, help="无WAV时每轮帧数"
+    )
+    parser.add_argument("--frame-bytes", type=int, default=120, help="无WAV时帧字节数")
+    parser.add_argument("--decode", action="store_true", help="用 Opus 解码收到的TTS")
+    parser.add_argument(
+        "--tts-frames", type=int, default=25, help="本地模拟服务器TTS帧数"
+    )
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    servers = []
+    if args.transport == "websocket" and args.url:
+        target = {"transport": "websocket", "url": args.url}
+    elif args.transport == "mqtt" and args.mqtt_info:
+        with open(args.mqtt_info, encoding="utf-8") as f:
+            target = {"transport": "mqtt", "mqtt_info": json.load(f)}
+    else:
+        # 本地模拟服务器跑在主进程，会话都在工作进程中，CPU 统计互不干扰
+        emulator = ProtocolEmulator(
+            ServerBehavior(echo_audio=False, tts_frames=args.tts_frames)
+        )
+        if args.transport == "websocket":
+            server = await WebSocketEmulator(emulator).start()
+            target = {"transport": "websocket", "url": server.url}
+        else:
+            server = await MqttUdpEmulator(emulator).start()
+            target = {"transport": "mqtt", "mqtt_info": server.client_config()}
+        servers.append(server)
+
+    processes = max(1, min(args.processes, args.sessions))
+    jobs, first = [], 0
+    for p in range(processes):
+        count = args.sessions // processes + (1 if p < args.sessions % processes else 0)
+        jobs.append(
+            {
+                "target": target,
+                "first_index": first,
+                "sessions": count,
+                "turns": args.turns,
+                "think_time": args.think_time,
+                "timeout": args.timeout,
+                "ramp_ms": args.ramp_ms,
+                "wav": args.wav,
+                "frames_per_turn": args.frames_per_turn,
+                "frame_bytes": args.frame_bytes,
+                "decode": args.decode,
+            }
+        )
+        first += count
+
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = await asyncio.gather(
+                *(loop.run_in_executor(pool, run_worker, job) for job in jobs)
+            )
+    finally:
+        for server in servers:
+            await server.stop()
+
+    summary = aggregate(list(results), time.perf_counter() - started)
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    else:
+        print_summary(summary, args.verbose)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""本地音乐搜索基准 对比旧的"逐首拼接后子串匹配"与 n-gram 倒排索引.
+
+统计项:
+    - 建索引耗时与单首增量加入耗时
+    - 各类查询（精确、错拼、去音调、拼音/同音字）的单次耗时与首条结果
+    - 索引查询 p50 超过 1ms 时退出码为 1
+
+用法:
+    python scripts/music_search_benchmark.py --tracks 10000
+    python scripts/music_search_benchmark.py --tracks 10000 50000 --ops 500
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+# 添加项目根目录到Python路径 - 必须在导入src模块之前
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.mcp.tools.music.library import MusicMetadata  # noqa: E402
+from src.mcp.tools.music.search_index import (  # noqa: E402
+    PYPINYIN_AVAILABLE,
+    MusicSearchIndex,
+)
+
+# 真实曲库里歌名基本各不相同：其余曲目由随机词/随机汉字生成，下面这些真实歌曲混入其中
+KNOWN_SONGS = (
+    ("七里香", "周杰伦", "七里香"),
+    ("晴天", "周杰伦", "叶惠美"),
+    ("夜曲", "周杰伦", "十一月的萧邦"),
+    ("红豆", "王菲", "唱游"),
+    ("光年之外", "邓紫棋", "光年之外"),
+    ("Yesterday", "The Beatles", "Help!"),
+    ("Halo", "Beyoncé", "I Am... Sasha Fierce"),
+    ("Hoppípolla", "Sigur Rós", "Takk..."),
+    ("Người Hãy Quên Em Đi", "Mỹ Tâm", "Tâm 9"),
+    ("Yellow", "Coldplay", "Parachutes"),
+    ("Fix You", "Coldplay", "X&Y"),
+    ("Clocks", "Coldplay", "A Rush of Blood to the Head"),
+)
+HANZI = (
+    "爱你我他她的是不了在人有这个上们来到时大地为子中你说生国年着就那和要"
+    "出也得里后自以会家可下而过天去能对小多然于心学么之都好看起发当没成只"
+    "如事把还用第样道想作种开美总从无情己面最女但现前些所同日手又行意动方"
+    "期它头经长儿回位分爱老因很给名法间斯知世什两次使身者被高已亲其进此话"
+    "常与活正感见明问力理尔点文几定本公特做外孩相西果走将月十实向声车全信"
+    "重三机工物气每并别真打太新比才便夫再书部水像眼等体却加电主界门利海受"
+    "听表德少克代员许稜先口由死安写性马光白或住难望教命花结乐色更拉东神记"
+)
+SYLLABLES = (
+    "la ri mo ka te su no an el vi ro sa de mi lu ne ta ko ha be ve li or us "
+    "ma pe ti gro sha ken dal fin wor lon ber mar cal ston ley win ter"
+).split()
+
+
+def random_word() -> str:
+    return "".join(random.choice(SYLLABLES) for _ in range(random.randint(2, 3)))
+
+
+def random_name() -> str:
+    if random.random() < 0.5:
+        return "".join(random.choice(HANZI) for _ in range(random.randint(2, 5)))
+    words = (random_word() for _ in range(random.randint(1, 4)))
+    return " ".join(words).title()
+
+
+# (说明, 查询)；同音字与拼音查询需要 pypinyin
+QUERIES = (
+    ("精确标题", "七里香"),
+    ("艺术家", "coldplay"),
+    ("错拼", "beatls yesterday"),
+    ("去音调", "beyonce halo"),
+    ("越南语无声调", "nguoi hay quen em di"),
+    ("冰岛语无声调", "hoppipolla"),
+    ("同音字", "周节伦 晴天"),
+    ("拼音", "zhoujielun"),
+    ("首字母", "zjl"),
+    ("无匹配", "xyzzy"),
+)
+
+
+def make_track(index: int, artists: List[str], albums: List[str]) -> MusicMetadata:
+    metadata = MusicMetadata(Path(f"{100000 + index}.mp3"), 0)
+    metadata.title = random_name()
+    metadata.artist = random.choice(artists)
+    metadata.album = random.choice(albums)
+    metadata.duration = random.randint(120, 360)
+    return metadata
+
+
+def make_library(count: int) -> List[MusicMetadata]:
+    artists = [random_name() for _ in range(max(1, count // 20))]
+    albums = [random_name() for _ in range(max(1, count // 10))]
+    playlist = [make_track(i, artists, albums) for i in range(count)]
+    for position, (title, artist, album) in enumerate(KNOWN_SONGS):
+        metadata = playlist[random.randrange(count)]
+        metadata.title, metadata.artist, metadata.album = title, artist, album
+    return playlist
+
+
+def legacy_search(playlist: List[MusicMetadata], query: str) -> List[MusicMetadata]:
+    """
+    旧实现：每次查询逐首拼接字段、小写后做子串匹配.
+    """
+    query = query.lower()
+    results = []
+    for metadata in playlist:
+        searchable_text = " ".join(
+            filter(
+                None,
+                [metadata.title, metadata.artist, metadata.album, metadata.filename],
+            )
+        ).lower()
+        if query in searchable_text:
+            results.append(metadata)
+    return results
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+
+def time_ops(ops: int, fn: Callable, *args) -> List[float]:
+    samples = []
+    for _ in range(ops):
+        started = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def describe(track) -> str:
+    if track is None:
+        return "-"
+    return f"{track.title} - {track.artist}"
+
+
+def bench(count: int, ops: int) -> bool:
+    print(
+        f"\n=== {count} 首曲目（pypinyin: {'有' if PYPINYIN_AVAILABLE else '无'}）==="
+    )
+    playlist = make_library(count)
+
+    started = time.perf_counter()
+    index = MusicSearchIndex(playlist)
+    print(f"建索引: {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    extra = make_library(ops)
+    for i, metadata in enumerate(extra):
+        metadata.file_id = str(count + 100000 + i)
+    add_samples = time_ops(1, lambda: [index.add(track) for track in extra])
+    print(f"增量加入: 平均 {add_samples[0] * 1000 / len(extra):.1f}µs/首")
+
+    medians = []
+    print(f"{'查询':<14}{'索引 p50':>10}{'p95':>9}{'旧实现 p50':>12}  首条结果")
+    for label, query in QUERIES:
+        samples = time_ops(ops, index.search, query)
+        legacy = time_ops(max(1, ops // 10), legacy_search, playlist, query)
+        results = index.search(query, limit=1)
+        medians.append(percentile(samples, 0.5))
+        print(
+            f"{label:<12}{percentile(samples, 0.5):>10.3f}ms"
+            f"{percentile(samples, 0.95):>7.3f}ms"
+            f"{percentile(legacy, 0.5):>10.3f}ms  "
+            f"{describe(results[0][0]) if results else '-'}"
+        )
+
+    worst = max(medians)
+    print(f"索引查询 p50 最大值: {worst:.3f}ms")
+    return worst < 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地音乐搜索基准")
+    parser.add_argument(
+        "--tracks",
+        type=int,
+        nargs="+",
+        default=[10000],
+        help="数据规模（曲目数），可给多个",
+    )
+    parser.add_argument("--ops", type=int, default=200, help="每个查询的次数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    ok = True
+    for count in args.tracks:
+        ok = bench(count, args.ops) and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Opus 原生采样率编解码 vs 固定采样率 + soxr 重采样 的 CPU 开销对比.
+
+用法:
+    python scripts/opus_rate_benchmark.py --device-rate 48000 --seconds 60
+
+输出每分钟音频消耗的 CPU 时间（process_time），分别统计播放路径
+（解码 + 重采样到设备采样率）与录音路径（设备采样率重采样到16kHz + 编码）。
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import soxr
+
+# 添加项目根目录到Python路径 - 必须在导入src模块之前
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.utils.opus_loader import setup_opus  # noqa: E402
+
+# opuslib 导入时即查找动态库，需先加载项目自带的 libopus
+setup_opus()
+
+import opuslib  # noqa: E402
+
+FRAME_DURATION_MS = 60
+CHANNELS = 1
+
+
+def make_signal(rate: int, seconds: float) -> np.ndarray:
+    """
+    生成测试信号：扫频正弦 + 少量噪声，接近语音的频谱占用.
+    """
+    t = np.arange(int(rate * seconds)) / rate
+    freq = 200 + 3000 * (0.5 + 0.5 * np.sin(2 * np.pi * 0.2 * t))
+    phase = 2 * np.pi * np.cumsum(freq) / rate
+    noise = np.random.default_rng(0).standard_normal(len(t))
+    sig = 0.4 * np.sin(phase) + 0.02 * noise
+    return (sig * 32767).astype(np.int16)
+
+
+def frames_of(pcm: np.ndarray, frame_size: int):
+    for i in range(0, len(pcm) - frame_size + 1, frame_size):
+        yield pcm[i : i + frame_size]
+
+
+def encode_packets(pcm: np.ndarray, rate: int) -> list:
+    encoder = opuslib.Encoder(rate, CHANNELS, opuslib.APPLICATION_AUDIO)
+    frame_size = rate * FRAME_DURATION_MS // 1000
+    return [encoder.encode(f.tobytes(), frame_size) for f in frames_of(pcm, frame_size)]
+
+
+def bench_playback(packets: list, stream_rate: int, device_rate: int) -> float:
+    """
+    解码到 stream_rate，必要时重采样到 device_rate，返回 CPU 秒数.
+    """
+    decoder = opuslib.Decoder(stream_rate, CHANNELS)
+    frame_size = stream_rate * FRAME_DURATION_MS // 1000
+    resampler = None
+    if stream_rate != device_rate:
+        resampler = soxr.ResampleStream(
+            stream_rate, device_rate, CHANNELS, dtype="int16", quality="QQ"
+        )
+
+    started = time.process_time()
+    for packet in packets:
+        pcm = np.frombuffer(decoder.decode(packet, frame_size), dtype=np.int16)
+        if resampler is not None:
+            resampler.resample_chunk(pcm, last=False)
+    return time.process_time() - started
+
+
+def bench_capture(pcm: np.ndarray, device_rate: int, encode_rate: int) -> float:
+    """
+    设备采样率录音，必要时重采样到 encode_rate 后编码，返回 CPU 秒数.
+    """
+    encoder = opuslib.Encoder(encode_rate, CHANNELS, opuslib.APPLICATION_AUDIO)
+    if encode_rate > 16000:
+        # 与客户端一致：高采样率输入限制为宽带编码
+        encoder.max_bandwidth = 1103
+    encode_frame = encode_rate * FRAME_DURATION_MS // 1000
+    device_frame = device_rate * FRAME_DURATION_MS // 1000
+    resampler = None
+    if encode_rate != device_rate:
+        resampler = soxr.ResampleStream(
+            device_rate, encode_rate, CHANNELS, dtype="int16", quality="QQ"
+        )
+
+    pending = np.zeros(0, dtype=np.int16)
+    started = time.process_time()
+    for frame in frames_of(pcm, device_frame):
+        if resampler is not None:
+            pending = np.concatenate([pending, resampler.resample_chunk(frame)])
+            while len(pending) >= encode_frame:
+                encoder.encode(pending[:encode_frame].tobytes(), encode_frame)
+                pending = pending[encode_frame:]
+        else:
+            encoder.encode(frame.tobytes(), encode_frame)
+    return time.process_time() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Opus 原生采样率编解码 CPU 对比")
+    parser.add_argument("--device-rate", type=int, default=48000)
+    parser.add_argument(
+        "--stream-rate", type=int, default=24000, help="协商的下行采样率"
+    )
+    parser.add_argument("--seconds", type=float, default=60.0)
+    args = parser.parse_args()
+
+    per_minute = 60.0 / args.seconds
+
+    print(f"\n===== 播放路径（{args.seconds:g}s 音频）=====")
+    speech = make_signal(args.stream_rate, args.seconds)
+    packets = encode_packets(speech, args.stream_rate)
+    resampled = bench_playback(packets, args.stream_rate, args.device_rate)
+    native = bench_playback(packets, args.device_rate, args.device_rate)
+    print(
+        f"解码{args.stream_rate}Hz + 重采样到{args.device_rate}Hz: "
+        f"{resampled * per_minute * 1000:.1f} ms CPU/分钟"
+    )
+    print(
+        f"直接解码到{args.device_rate}Hz:            "
+        f"{native * per_minute * 1000:.1f} ms CPU/分钟"
+    )
+    print(f"节省: {(resampled - native) * per_minute * 1000:.1f} ms CPU/分钟")
+
+    print(f"\n===== 录音路径（{args.seconds:g}s 音频）=====")
+    mic = make_signal(args.device_rate, args.seconds)
+    resampled = bench_capture(mic, args.device_rate, 16000)
+    native = bench_capture(mic, args.device_rate, args.device_rate)
+    print(
+        f"重采样到16kHz + 编码:        {resampled * per_minute * 1000:.1f} ms CPU/分钟"
+    )
+    print(
+        f"按{args.device_rate}Hz直接编码:        "
+        f"{native * per_minute * 1000:.1f} ms CPU/分钟"
+    )
+    print(f"节省: {(resampled - native) * per_minute * 1000:.1f} ms CPU/分钟")
+    print(
+        "\n注：录音路径在启用唤醒词或 macOS AEC 时仍需16kHz PCM，"
+        "客户端会保持重采样编码。"
+    )
+
+
+if __name__ == "__main__":
+    main()
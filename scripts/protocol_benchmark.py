@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""协议端到端基准 驱动 WebsocketProtocol / MqttProtocol 对接本地模拟服务器.
+
+统计项:
+    - 建连耗时（open_audio_channel）
+    - 音频往返时延（上行探测帧 -> 服务器回显 -> 下行）
+    - 首帧时延 TTFA（listen detect -> 第一个 TTS 音频帧）
+    - 吞吐（满速上行时的发送/回显帧率与码率）
+    - MCP 请求往返（服务器发起 tools/list / tools/call，由模拟服务器统计）
+
+用法:
+    python scripts/protocol_benchmark.py --transport both --jitter-ms 20 --loss 0.02
+    python scripts/protocol_benchmark.py --transport websocket --url ws://host:8765/
+"""
+
+import argparse
+import asyncio
+import json
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 添加项目根目录到Python路径 - 必须在导入src模块之前
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from protocol_emulator import (  # noqa: E402
+    MqttUdpEmulator,
+    ProtocolEmulator,
+    WebSocketEmulator,
+    add_behavior_arguments,
+    behavior_from_args,
+    percentile,
+)
+
+from src.protocols.mqtt_protocol import MqttProtocol  # noqa: E402
+from src.protocols.websocket_protocol import WebsocketProtocol  # noqa: E402
+
+# 探测帧: 魔数 + 序号 + 发送时间，其余填充到典型 Opus 帧大小
+PROBE_MAGIC = b"XZBM"
+PROBE_HEADER = struct.Struct("!4sId")
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "p50_ms": percentile(ordered, 0.5),
+        "p95_ms": percentile(ordered, 0.95),
+        "p99_ms": percentile(ordered, 0.99),
+        "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+    }
+
+
+class BenchmarkClient:
+    """
+    包装一个协议实例，挂接回调并记录时延.
+    """
+
+    def __init__(self, protocol, frame_bytes: int = 120):
+        self.protocol = protocol
+        self.frame_bytes = max(frame_bytes, PROBE_HEADER.size)
+        self.rtts_ms: List[float] = []
+        self.ttfa_ms: List[float] = []
+        self.connect_ms: Optional[float] = None
+        self.echo_frames = 0
+        self.echo_bytes = 0
+        self.tts_frames = 0
+        self.tts_bytes = 0
+        self.mcp_answered = 0
+        self.errors: List[str] = []
+
+        # 只在往返测量阶段记录 RTT，吞吐阶段的排队时延单独不计
+        self._record_rtt = False
+        self._ttfa_started: Optional[float] = None
+        self._tts_stopped = asyncio.Event()
+        self._seq = 0
+
+        protocol.on_incoming_json(self._on_json)
+        protocol.on_incoming_audio(self._on_audio)
+        protocol.on_audio_channel_opened(self._on_channel_opened)
+        protocol.on_audio_channel_closed(self._on_channel_closed)
+        protocol.on_network_error(self._on_network_error)
+
+    # -------- 回调 --------
+
+    async def _on_channel_opened(self):
+        pass
+
+    async def _on_channel_closed(self):
+        pass
+
+    def _on_network_error(self, message=None):
+        self.errors.append(str(message))
+
+    def _on_json(self, data: dict):
+        msg_type = data.get("type")
+        if msg_type == "tts" and data.get("state") == "stop":
+            self._tts_stopped.set()
+        elif msg_type == "mcp":
+            asyncio.get_running_loop().create_task(
+                self._answer_mcp(data.get("payload") or {})
+            )
+
+    def _on_audio(self, data: bytes):
+        now = time.perf_counter()
+        if data[:4] == PROBE_MAGIC and len(data) >= PROBE_HEADER.size:
+            _, _, sent_at = PROBE_HEADER.unpack_from(data)
+            if self._record_rtt:
+                self.rtts_ms.append((now - sent_at) * 1000)
+            self.echo_frames += 1
+            self.echo_bytes += len(data)
+            return
+        self.tts_frames += 1
+        self.tts_bytes += len(data)
+        if self._ttfa_started is not None:
+            self.ttfa_ms.append((now - self._ttfa_started) * 1000)
+            self._ttfa_started = None
+
+    async def _answer_mcp(self, payload: dict):
+        """
+        简单应答服务器的 MCP 请求（不经过 McpServer，只测传输往返）.
+        """
+        req_id = payload.get("id")
+        if req_id is None or "method" not in payload:
+            return
+        if payload["method"] == "tools/call":
+            result = {"content": [{"type": "text", "text": "ok"}], "isError": False}
+        elif payload["method"] == "tools/list":
+            result = {"tools": []}
+        else:
+            result = {}
+        await self.protocol.send_mcp_message(
+            {"jsonrpc": "2.0", "id": req_id, "result": result}
+        )
+        self.mcp_answered += 1
+
+    # -------- 探测 --------
+
+    def probe_frame(self) -> bytes:
+        self._seq += 1
+        header = PROBE_HEADER.pack(PROBE_MAGIC, self._seq, time.perf_counter())
+        return header + bytes(self.frame_bytes - len(header))
+
+    async def connect(self) -> bool:
+        started = time.perf_counter()
+        ok = await self.protocol.open_audio_channel()
+        if ok:
+            self.connect_ms = (time.perf_counter() - started) * 1000
+        return bool(ok)
+
+    async def measure_rtt(self, frames: int, interval_ms: float):
+        self._record_rtt = True
+        for _ in range(frames):
+            await self.protocol.send_audio(self.probe_frame())
+            await asyncio.sleep(interval_ms / 1000)
+        # 等待尾部回显
+        await asyncio.sleep(0.5)
+        self._record_rtt = False
+
+    async def measure_ttfa(self, rounds: int, timeout: float = 10.0):
+        for _ in range(rounds):
+            self._tts_stopped.clear()
+            self._ttfa_started = time.perf_counter()
+            await self.protocol.send_wake_word_detected("你好小智")
+            try:
+                await asyncio.wait_for(self._tts_stopped.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                self.errors.append("等待TTS结束超时")
+            self._ttfa_started = None
+            await asyncio.sleep(0.2)
+
+    async def measure_throughput(self, seconds: float) -> Dict[str, float]:
+        echo_before = self.echo_frames
+        sent = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            await self.protocol.send_audio(self.probe_frame())
+            sent += 1
+            if sent % 20 == 0:
+                await asyncio.sleep(0)
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(0.5)
+        echoed = self.echo_frames - echo_before
+        return {
+            "sent_fps": round(sent / elapsed, 1),
+            "echo_fps": round(echoed / elapsed, 1),
+            "sent_kbps": round(sent * self.frame_bytes * 8 / elapsed / 1000, 1),
+            "echo_ratio": round(echoed / sent, 4) if sent else 0.0,
+        }
+
+    async def close(self):
+        try:
+            await self.protocol.close_audio_channel()
+        except Exception as e:
+            self.errors.append(f"关闭失败: {e}")
+
+
+async def run_transport(transport: str, args, emulator: Optional[ProtocolEmulator]):
+    server = None
+    loop = asyncio.get_running_loop()
+    if transport == "websocket":
+        protocol = WebsocketProtocol()
+        if emulator is not None:
+            server = await WebSocketEmulator(emulator).start()
+            protocol.WEBSOCKET_URL = server.url
+        else:
+            protocol.WEBSOCKET_URL = args.url
+    else:
+        server = await MqttUdpEmulator(emulator).start()
+        protocol = MqttProtocol(loop, mqtt_info=server.client_config())
+
+    client = BenchmarkClient(protocol, frame_bytes=args.frame_bytes)
+    report = {"transport": transport}
+    try:
+        if not await client.connect():
+            report["error"] = "连接失败: " + "; ".join(client.errors)
+            return report
+
+        await client.measure_rtt(args.rtt_frames, args.rtt_interval_ms)
+        await client.measure_ttfa(args.ttfa_rounds)
+        throughput = await client.measure_throughput(args.throughput_seconds)
+
+        if emulator is not None and emulator.behavior.mcp_storm:
+            # 等待 MCP 风暴完成
+            deadline = time.monotonic() + 15
+            while (
+                emulator.stats.mcp_sent < emulator.behavior.mcp_storm
+                or client.mcp_answered < emulator.stats.mcp_sent
+            ) and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+
+        report.update(
+            {
+                "connect_ms": round(client.connect_ms or 0.0, 3),
+                "rtt": summarize(client.rtts_ms),
+                "rtt_loss": round(1 - len(client.rtts_ms) / max(1, args.rtt_frames), 4),
+                "ttfa": summarize(client.ttfa_ms),
+                "throughput": throughput,
+                "errors": client.errors[:5],
+            }
+        )
+        info = protocol.get_connection_info()
+        report["protocol_version"] = info.get("protocol_version")
+        report["link"] = info.get("telemetry")
+        if emulator is not None:
+            report["server"] = emulator.stats.snapshot()
+        return report
+    finally:
+        await client.close()
+        if server is not None:
+            await server.stop()
+
+
+def print_report(report: dict):
+    print(f"\n===== {report['transport']} =====")
+    if "error" in report:
+        print(f"❌ {report['error']}")
+        return
+    rtt, ttfa, tp = report["rtt"], report["ttfa"], report["throughput"]
+    print(f"建连:     {report['connect_ms']:.1f} ms")
+    print(
+        f"往返:     p50 {rtt['p50_ms']} / p95 {rtt['p95_ms']} / p99 {rtt['p99_ms']} ms"
+        f"  (n={rtt['count']}, 丢失 {report['rtt_loss'] * 100:.1f}%)"
+    )
+    print(
+        f"首帧TTFA: p50 {ttfa['p50_ms']} / p95 {ttfa['p95_ms']} ms (n={ttfa['count']})"
+    )
+    print(
+        f"吞吐:     发送 {tp['sent_fps']} fps ({tp['sent_kbps']} kbps), "
+        f"回显 {tp['echo_fps']} fps, 回显率 {tp['echo_ratio'] * 100:.1f}%"
+    )
+    link = report.get("link")
+    if link:
+        seq, rtt = link["sequence"], link["rtt"]
+        version = report.get("protocol_version")
+        print(
+            f"客户端链路: 到达抖动 {link['jitter_ms']} ms, "
+            f"ping p50 {rtt['p50_ms']} ms (n={rtt['count']})"
+            + (f", 帧头 v{version}" if version else "")
+        )
+        if seq["received"]:
+            print(
+                f"下行序号: 抖动 {seq['jitter_ms']} ms, 丢失 {seq['lost']} "
+                f"({seq['loss_ratio'] * 100:.1f}%), 乱序 {seq['reordered']}"
+            )
+    mcp = report.get("server", {}).get("mcp")
+    if mcp and mcp["sent"]:
+        print(
+            f"MCP:      {mcp['answered']}/{mcp['sent']} 应答, "
+            f"p50 {mcp['p50_ms']} / p95 {mcp['p95_ms']} ms"
+        )
+    if report.get("errors"):
+        print(f"错误:     {report['errors']}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="小智协议端到端基准")
+    parser.add_argument(
+        "--transport", choices=["websocket", "mqtt", "both"], default="both"
+    )
+    parser.add_argument("--url", help="使用外部 WebSocket 服务器而非本地模拟服务器")
+    parser.add_argument("--frame-bytes", type=int, default=120, help="探测帧字节数")
+    parser.add_argument("--rtt-frames", type=int, default=200)
+    parser.add_argument("--rtt-interval-ms", type=float, default=20.0)
+    parser.add_argument("--ttfa-rounds", type=int, default=5)
+    parser.add_argument("--throughput-seconds", type=float, default=3.0)
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    add_behavior_arguments(parser)
+    args = parser.parse_args()
+
+    transports = ["websocket", "mqtt"] if args.transport == "both" else [args.transport]
+    if args.url and "mqtt" in transports:
+        parser.error("--url 仅支持 websocket 传输")
+
+    reports = []
+    for transport in transports:
+        emulator = None if args.url else ProtocolEmulator(behavior_from_args(args))
+        reports.append(await run_transport(transport, args, emulator))
+
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+    else:
+        for report in reports:
+            print_report(report)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,823 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""本地协议模拟服务器 离线替代小智后端，用于端到端延迟测试.
+
+支持两种传输:
+    - WebSocket: hello 握手、listen/abort/tts/stt/mcp 消息、二进制 Opus 帧
+    - MQTT + UDP: 内置最小 MQTT 3.1.1 broker，音频走 AES-CTR 加密的 UDP
+
+可脚本化行为: 音频回显、TTS 回复、下行抖动/丢包注入、MCP tools/list / tools/call 风暴.
+WebSocket 客户端 hello 声明 version 2 时使用带序号/时间戳的二进制帧头
+（可用 --ws-protocol-version 1 模拟旧服务器）.
+
+用法:
+    python scripts/protocol_emulator.py --ws-port 8765 --mqtt-port 1883 \\
+        --tts-frames 25 --jitter-ms 20 --loss 0.02 --mcp-storm 100
+
+客户端配置:
+    WEBSOCKET_URL = ws://127.0.0.1:8765/xiaozhi/v1/
+    MQTT_INFO.endpoint = 127.0.0.1:1883（非 8883 端口不启用 TLS）
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import struct
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import websockets
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+# 添加项目根目录到Python路径 - 必须在导入src模块之前
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.protocols.binary_frame import (  # noqa: E402
+    FRAME_TYPE_AUDIO,
+    PROTOCOL_VERSION_FRAMED,
+    PROTOCOL_VERSION_RAW,
+    BinaryFrameCodec,
+)
+
+SERVER_SAMPLE_RATE = 24000
+FRAME_DURATION_MS = 60
+
+
+# ---------------------------------------------------------------------------
+# 行为配置与统计
+# ---------------------------------------------------------------------------
+
+
+class ServerBehavior:
+    """
+    模拟服务器的可脚本化行为.
+    """
+
+    def __init__(
+        self,
+        echo_audio: bool = True,
+        tts_frames: int = 25,
+        frame_duration: int = FRAME_DURATION_MS,
+        jitter_ms: float = 0.0,
+        loss: float = 0.0,
+        mcp_storm: int = 0,
+        mcp_method: str = "tools/list",
+        mcp_tool: Optional[str] = None,
+        mcp_arguments: Optional[Dict] = None,
+        mcp_concurrency: int = 8,
+        ws_protocol_version: int = PROTOCOL_VERSION_FRAMED,
+        seed: Optional[int] = None,
+    ):
+        # 收到的每个上行音频帧立即原样下发（用于测往返时延）
+        self.echo_audio = echo_audio
+        # listen detect/stop 后回复的 TTS 帧数，0 表示不回复 TTS
+        self.tts_frames = tts_frames
+        self.frame_duration = frame_duration
+        # 下行音频注入：每帧额外延迟 [0, jitter_ms]，按概率丢弃
+        self.jitter_ms = jitter_ms
+        self.loss = loss
+        # 握手后向客户端发起的 MCP 请求数
+        self.mcp_storm = mcp_storm
+        self.mcp_method = mcp_method
+        self.mcp_tool = mcp_tool
+        self.mcp_arguments = mcp_arguments or {}
+        self.mcp_concurrency = max(1, mcp_concurrency)
+        # WebSocket 支持的最高二进制帧版本
+        self.ws_protocol_version = ws_protocol_version
+        self._rng = random.Random(seed)
+
+    def drop(self) -> bool:
+        return self.loss > 0 and self._rng.random() < self.loss
+
+    def delay(self) -> float:
+        if self.jitter_ms <= 0:
+            return 0.0
+        return self._rng.uniform(0, self.jitter_ms) / 1000
+
+
+class EmulatorStats:
+    """
+    模拟服务器侧统计.
+    """
+
+    def __init__(self):
+        self.sessions = 0
+        self.active_sessions = 0
+        self.frames_in = 0
+        self.bytes_in = 0
+        self.frames_out = 0
+        self.bytes_out = 0
+        self.frames_dropped = 0
+        self.text_in: Dict[str, int] = {}
+        self.mcp_sent = 0
+        self.mcp_latencies_ms: List[float] = []
+
+    def snapshot(self) -> Dict[str, Any]:
+        lat = sorted(self.mcp_latencies_ms)
+        return {
+            "sessions": self.sessions,
+            "active_sessions": self.active_sessions,
+            "frames_in": self.frames_in,
+            "bytes_in": self.bytes_in,
+            "frames_out": self.frames_out,
+            "bytes_out": self.bytes_out,
+            "frames_dropped": self.frames_dropped,
+            "text_in": dict(self.text_in),
+            "mcp": {
+                "sent": self.mcp_sent,
+                "answered": len(lat),
+                "p50_ms": percentile(lat, 0.5),
+                "p95_ms": percentile(lat, 0.95),
+                "max_ms": round(lat[-1], 3) if lat else 0.0,
+            },
+        }
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return round(sorted_values[idx], 3)
+
+
+def make_tts_frames(count: int, frame_duration: int) -> List[bytes]:
+    """
+    生成 TTS 下行帧：优先用 opuslib 编码正弦音，缺少 libopus 时退化为固定长度随机负载.
+    """
+    frame_size = SERVER_SAMPLE_RATE * frame_duration // 1000
+    try:
+        import opuslib
+
+        encoder = opuslib.Encoder(SERVER_SAMPLE_RATE, 1, opuslib.APPLICATION_AUDIO)
+        t = np.arange(frame_size * count) / SERVER_SAMPLE_RATE
+        pcm = (0.3 * np.sin(2 * np.pi * 440 * t) * 32767).astype(np.int16)
+        frames = []
+        for i in range(count):
+            chunk = pcm[i * frame_size : (i + 1) * frame_size]
+            frames.append(encoder.encode(chunk.tobytes(), frame_size))
+        return frames
+    except Exception as e:
+        print(f"⚠️ 无法使用 Opus 编码 TTS（{e}），改用随机负载")
+        rng = random.Random(0)
+        return [bytes(rng.getrandbits(8) for _ in range(120)) for _ in range(count)]
+
+
+# ---------------------------------------------------------------------------
+# 协议逻辑（与传输无关）
+# ---------------------------------------------------------------------------
+
+
+class EmulatedSession:
+    """
+    单个客户端会话，具体收发由传输层提供.
+    """
+
+    def __init__(
+        self,
+        emulator: "ProtocolEmulator",
+        send_json: Callable[[dict], Any],
+        send_audio: Callable[[bytes], Any],
+        frame_audio: Optional[Callable[[bytes], bytes]] = None,
+    ):
+        self.emulator = emulator
+        self.session_id = uuid.uuid4().hex[:16]
+        self._send_json = send_json
+        self._send_audio = send_audio
+        # 在丢包/抖动注入之前加帧头，使客户端能从序号和时间戳观察到它们
+        self.frame_audio = frame_audio
+        self.listening = False
+        self.frames_in_turn = 0
+        self._tts_task: Optional[asyncio.Task] = None
+        self._storm_task: Optional[asyncio.Task] = None
+        # 请求 id -> (发送时间, 等待响应的 Future)
+        self._mcp_pending: Dict[int, tuple] = {}
+        self._mcp_next_id = 1
+        self._audio_lock = asyncio.Lock()
+
+    async def send_json(self, message: dict):
+        await self._send_json(message)
+
+    async def send_audio(self, payload: bytes):
+        """
+        下行音频：按行为注入抖动与丢包.
+        """
+        behavior = self.emulator.behavior
+        stats = self.emulator.stats
+        if self.frame_audio is not None:
+            payload = self.frame_audio(payload)
+        if behavior.drop():
+            stats.frames_dropped += 1
+            return
+        delay = behavior.delay()
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            async with self._audio_lock:
+                await self._send_audio(payload)
+        except Exception:
+            # 客户端已断开
+            return
+        stats.frames_out += 1
+        stats.bytes_out += len(payload)
+
+    async def on_json(self, data: dict):
+        stats = self.emulator.stats
+        msg_type = data.get("type", "")
+        stats.text_in[msg_type] = stats.text_in.get(msg_type, 0) + 1
+
+        if msg_type == "listen":
+            await self._on_listen(data)
+        elif msg_type == "abort":
+            self._cancel_tts()
+            await self.send_json(
+                {"session_id": self.session_id, "type": "tts", "state": "stop"}
+            )
+        elif msg_type == "mcp":
+            self._on_mcp_response(data.get("payload") or {})
+
+    async def on_audio(self, payload: bytes):
+        stats = self.emulator.stats
+        stats.frames_in += 1
+        stats.bytes_in += len(payload)
+        self.frames_in_turn += 1
+        if self.emulator.behavior.echo_audio:
+            asyncio.create_task(self.send_audio(payload))
+
+    async def _on_listen(self, data: dict):
+        state = data.get("state")
+        if state == "start":
+            self.listening = True
+            self.frames_in_turn = 0
+        elif state == "stop":
+            self.listening = False
+            self._start_tts(f"收到 {self.frames_in_turn} 帧音频")
+        elif state == "detect":
+            self._start_tts(data.get("text") or "")
+
+    def _start_tts(self, stt_text: str):
+        if self.emulator.behavior.tts_frames <= 0:
+            return
+        self._cancel_tts()
+        self._tts_task = asyncio.create_task(self._play_tts(stt_text))
+
+    def _cancel_tts(self):
+        if self._tts_task and not self._tts_task.done():
+            self._tts_task.cancel()
+        self._tts_task = None
+
+    async def _play_tts(self, stt_text: str):
+        behavior = self.emulator.behavior
+        try:
+            await self.send_json(
+                {"session_id": self.session_id, "type": "stt", "text": stt_text}
+            )
+            await self.send_json(
+                {"session_id": self.session_id, "type": "tts", "state": "start"}
+            )
+            await self.send_json(
+                {
+                    "session_id": self.session_id,
+                    "type": "tts",
+                    "state": "sentence_start",
+                    "text": "这是本地模拟服务器的回复",
+                }
+            )
+            # 按帧时长匀速下发，首帧立即发送
+            started = time.monotonic()
+            for idx, frame in enumerate(self.emulator.tts_frames):
+                target = started + idx * behavior.frame_duration / 1000
+                wait = target - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                asyncio.create_task(self.send_audio(frame))
+            await self.send_json(
+                {"session_id": self.session_id, "type": "tts", "state": "stop"}
+            )
+        except asyncio.CancelledError:
+            pass
+
+    # -------- MCP 风暴 --------
+
+    def start_mcp_storm(self):
+        if self.emulator.behavior.mcp_storm > 0:
+            self._storm_task = asyncio.create_task(self._mcp_storm())
+
+    async def _mcp_storm(self):
+        behavior = self.emulator.behavior
+        sem = asyncio.Semaphore(behavior.mcp_concurrency)
+        done = asyncio.Event()
+        remaining = [behavior.mcp_storm]
+
+        async def one():
+            async with sem:
+                req_id = self._mcp_next_id
+                self._mcp_next_id += 1
+                payload = {
+                    "jsonrpc": "2.0",
+                    "id": req_id,
+                    "method": behavior.mcp_method,
+                }
+                if behavior.mcp_method == "tools/call":
+                    payload["params"] = {
+                        "name": behavior.mcp_tool,
+                        "arguments": behavior.mcp_arguments,
+                    }
+                else:
+                    payload["params"] = {}
+                waiter = asyncio.get_running_loop().create_future()
+                self._mcp_pending[req_id] = (time.perf_counter(), waiter)
+                self.emulator.stats.mcp_sent += 1
+                await self.send_json(
+                    {"session_id": self.session_id, "type": "mcp", "payload": payload}
+                )
+                try:
+                    await asyncio.wait_for(waiter, timeout=10.0)
+                except asyncio.TimeoutError:
+                    self._mcp_pending.pop(req_id, None)
+                remaining[0] -= 1
+                if remaining[0] <= 0:
+                    done.set()
+
+        try:
+            # 先发一次 initialize，模拟真实服务端
+            await self.send_json(
+                {
+                    "session_id": self.session_id,
+                    "type": "mcp",
+                    "payload": {
+                        "jsonrpc": "2.0",
+                        "id": 0,
+                        "method": "initialize",
+                        "params": {"capabilities": {}},
+                    },
+                }
+            )
+            for _ in range(behavior.mcp_storm):
+                asyncio.create_task(one())
+            await done.wait()
+        except asyncio.CancelledError:
+            pass
+
+    def _on_mcp_response(self, payload: dict):
+        entry = self._mcp_pending.pop(payload.get("id"), None)
+        if entry is None:
+            return
+        sent_at, waiter = entry
+        self.emulator.stats.mcp_latencies_ms.append(
+            (time.perf_counter() - sent_at) * 1000
+        )
+        if not waiter.done():
+            waiter.set_result(True)
+
+    def close(self):
+        self._cancel_tts()
+        if self._storm_task and not self._storm_task.done():
+            self._storm_task.cancel()
+
+
+class ProtocolEmulator:
+    """
+    协议逻辑核心，被 WebSocket 与 MQTT+UDP 两种传输共用.
+    """
+
+    def __init__(self, behavior: Optional[ServerBehavior] = None):
+        self.behavior = behavior or ServerBehavior()
+        self.stats = EmulatorStats()
+        self.tts_frames = make_tts_frames(
+            self.behavior.tts_frames, self.behavior.frame_duration
+        )
+
+    def new_session(self, send_json, send_audio, frame_audio=None) -> EmulatedSession:
+        self.stats.sessions += 1
+        self.stats.active_sessions += 1
+        return EmulatedSession(self, send_json, send_audio, frame_audio)
+
+    def end_session(self, session: EmulatedSession):
+        session.close()
+        self.stats.active_sessions -= 1
+
+    def hello_reply(
+        self, session: EmulatedSession, transport: str, version: int = 1
+    ) -> dict:
+        return {
+            "type": "hello",
+            "version": version,
+            "transport": transport,
+            "session_id": session.session_id,
+            "audio_params": {
+                "format": "opus",
+                "sample_rate": SERVER_SAMPLE_RATE,
+                "channels": 1,
+                "frame_duration": self.behavior.frame_duration,
+            },
+        }
+
+
+# ---------------------------------------------------------------------------
+# WebSocket 传输
+# ---------------------------------------------------------------------------
+
+
+class WebSocketEmulator:
+    """
+    WebSocket 传输：文本帧为 JSON，二进制帧为 Opus.
+    """
+
+    def __init__(self, emulator: ProtocolEmulator, host: str = "127.0.0.1", port=0):
+        self.emulator = emulator
+        self.host = host
+        self.port = port
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/xiaozhi/v1/"
+
+    async def start(self):
+        self._server = await websockets.serve(
+            self._handle, self.host, self.port, max_size=10 * 1024 * 1024
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, websocket, path=None):
+        codec = BinaryFrameCodec()
+        session = self.emulator.new_session(
+            lambda msg: websocket.send(json.dumps(msg, ensure_ascii=False)),
+            websocket.send,
+        )
+        try:
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    if session.frame_audio is not None:
+                        frame = codec.unpack(message)
+                        if frame is None or frame.type != FRAME_TYPE_AUDIO:
+                            continue
+                        message = frame.payload
+                    await session.on_audio(message)
+                    continue
+                try:
+                    data = json.loads(message)
+                except json.JSONDecodeError:
+                    continue
+                if data.get("type") == "hello":
+                    version = PROTOCOL_VERSION_RAW
+                    if (
+                        data.get("version") == PROTOCOL_VERSION_FRAMED
+                        and self.emulator.behavior.ws_protocol_version
+                        >= PROTOCOL_VERSION_FRAMED
+                    ):
+                        version = PROTOCOL_VERSION_FRAMED
+                        session.frame_audio = codec.pack
+                    await session.send_json(
+                        self.emulator.hello_reply(session, "websocket", version)
+                    )
+                    session.start_mcp_storm()
+                else:
+                    await session.on_json(data)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.emulator.end_session(session)
+
+
+# ---------------------------------------------------------------------------
+# MQTT + UDP 传输
+# ---------------------------------------------------------------------------
+
+
+def aes_ctr(key: bytes, nonce: bytes, data: bytes) -> bytes:
+    cipher = Cipher(algorithms.AES(key), modes.CTR(nonce), backend=default_backend())
+    ctx = cipher.encryptor()
+    return ctx.update(data) + ctx.finalize()
+
+
+def _encode_remaining_length(length: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        if length:
+            byte |= 0x80
+        out.append(byte)
+        if not length:
+            return bytes(out)
+
+
+def _mqtt_string(value: str) -> bytes:
+    raw = value.encode("utf-8")
+    return struct.pack("!H", len(raw)) + raw
+
+
+class _UdpAudioSession:
+    """
+    单个 MQTT 会话对应的 UDP 加密参数.
+    """
+
+    def __init__(self):
+        self.key = os.urandom(16)
+        # 与客户端一致的 16 字节 nonce 模板: 01 000000 | 长度 | 8字节随机 | 序列号
+        self.nonce_hex = "01000000" + os.urandom(8).hex() + "00000000"
+        self.sequence = 0
+        self.addr = None
+
+    @property
+    def nonce_id(self) -> bytes:
+        return bytes.fromhex(self.nonce_hex[8:24])
+
+    def seal(self, payload: bytes) -> bytes:
+        self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+        nonce = bytes.fromhex(
+            self.nonce_hex[:4]
+            + format(len(payload), "04x")
+            + self.nonce_hex[8:24]
+            + format(self.sequence, "08x")
+        )
+        return nonce + aes_ctr(self.key, nonce, payload)
+
+    def open(self, packet: bytes) -> bytes:
+        return aes_ctr(self.key, packet[:16], packet[16:])
+
+
+class MqttUdpEmulator(asyncio.DatagramProtocol):
+    """
+    最小 MQTT 3.1.1 broker + UDP 音频通道.
+
+    只实现客户端用到的报文: CONNECT/PUBLISH(QoS 0-2)/SUBSCRIBE/PINGREQ/DISCONNECT，
+    客户端发布到任意主题的 JSON 都交给模拟逻辑处理，回复发往客户端订阅的主题。
+    """
+
+    def __init__(
+        self,
+        emulator: ProtocolEmulator,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        udp_port: int = 0,
+    ):
+        self.emulator = emulator
+        self.host = host
+        self.port = port
+        self.udp_port = udp_port
+        self._server = None
+        self._transport = None
+        self._udp_sessions: Dict[bytes, tuple] = {}
+        self._writers = set()
+
+    def client_config(self, client_id: str = "emulated-device") -> dict:
+        """
+        客户端 SYSTEM_OPTIONS.NETWORK.MQTT_INFO 对应的配置.
+        """
+        return {
+            "endpoint": f"{self.host}:{self.port}",
+            "client_id": client_id,
+            "username": "emulator",
+            "password": "emulator",
+            "publish_topic": "device-server",
+            "subscribe_topic": f"devices/p2p/{client_id}",
+        }
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: self, local_addr=(self.host, self.udp_port), family=socket.AF_INET
+        )
+        self.udp_port = self._transport.get_extra_info("sockname")[1]
+        return self
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+        # 主动断开仍在线的客户端，让连接处理协程自然退出
+        for writer in list(self._writers):
+            writer.close()
+        if self._server:
+            await self._server.wait_closed()
+        if self._transport:
+            self._transport.close()
+
+    # -------- UDP --------
+
+    def datagram_received(self, data: bytes, addr):
+        if len(data) < 16:
+            return
+        entry = self._udp_sessions.get(data[4:12])
+        if entry is None:
+            return
+        udp, session = entry
+        udp.addr = addr
+        try:
+            payload = udp.open(data)
+        except Exception:
+            return
+        asyncio.ensure_future(session.on_audio(payload))
+
+    def _udp_sender(self, udp: _UdpAudioSession):
+        async def send(payload: bytes):
+            # 客户端发出第一个 UDP 包之前不知道其地址，只能丢弃
+            if udp.addr is not None and self._transport is not None:
+                self._transport.sendto(payload, udp.addr)
+
+        return send
+
+    # -------- MQTT --------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer):
+        state = {"topic": None}
+        write_lock = asyncio.Lock()
+        self._writers.add(writer)
+
+        async def publish(message: dict):
+            if not state["topic"]:
+                return
+            payload = json.dumps(message, ensure_ascii=False).encode("utf-8")
+            body = _mqtt_string(state["topic"]) + payload
+            async with write_lock:
+                writer.write(b"\x30" + _encode_remaining_length(len(body)) + body)
+                await writer.drain()
+
+        udp = _UdpAudioSession()
+        # 先加密编号再注入丢包，客户端可从 nonce 序号观察到丢失
+        session = self.emulator.new_session(
+            publish, self._udp_sender(udp), frame_audio=udp.seal
+        )
+        self._udp_sessions[udp.nonce_id] = (udp, session)
+
+        async def reply(packet: bytes):
+            async with write_lock:
+                writer.write(packet)
+                await writer.drain()
+
+        try:
+            while True:
+                header = await reader.readexactly(1)
+                length, multiplier = 0, 1
+                while True:
+                    byte = (await reader.readexactly(1))[0]
+                    length += (byte & 0x7F) * multiplier
+                    multiplier *= 128
+                    if not byte & 0x80:
+                        break
+                body = await reader.readexactly(length) if length else b""
+                packet_type, flags = header[0] >> 4, header[0] & 0x0F
+
+                if packet_type == 1:  # CONNECT
+                    await reply(b"\x20\x02\x00\x00")
+                elif packet_type == 3:  # PUBLISH
+                    qos = (flags >> 1) & 0x03
+                    topic_len = struct.unpack("!H", body[:2])[0]
+                    offset = 2 + topic_len
+                    packet_id = None
+                    if qos:
+                        packet_id = body[offset : offset + 2]
+                        offset += 2
+                    if qos == 1:
+                        await reply(b"\x40\x02" + packet_id)
+                    elif qos == 2:
+                        await reply(b"\x50\x02" + packet_id)
+                    await self._on_publish(session, udp, body[offset:])
+                elif packet_type == 6:  # PUBREL
+                    await reply(b"\x70\x02" + body[:2])
+                elif packet_type == 8:  # SUBSCRIBE
+                    packet_id = body[:2]
+                    offset, granted = 2, bytearray()
+                    while offset < len(body):
+                        topic_len = struct.unpack("!H", body[offset : offset + 2])[0]
+                        topic = body[offset + 2 : offset + 2 + topic_len].decode()
+                        granted.append(min(body[offset + 2 + topic_len], 1))
+                        offset += 3 + topic_len
+                        state["topic"] = topic
+                    payload = packet_id + bytes(granted)
+                    await reply(
+                        b"\x90" + _encode_remaining_length(len(payload)) + payload
+                    )
+                elif packet_type == 12:  # PINGREQ
+                    await reply(b"\xd0\x00")
+                elif packet_type == 14:  # DISCONNECT
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._udp_sessions.pop(udp.nonce_id, None)
+            self._writers.discard(writer)
+            self.emulator.end_session(session)
+            writer.close()
+
+    async def _on_publish(self, session: EmulatedSession, udp, payload: bytes):
+        try:
+            data = json.loads(payload.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return
+        msg_type = data.get("type")
+        if msg_type == "hello":
+            reply = self.emulator.hello_reply(session, "udp")
+            reply["udp"] = {
+                "server": self.host,
+                "port": self.udp_port,
+                "key": udp.key.hex(),
+                "nonce": udp.nonce_hex,
+            }
+            await session.send_json(reply)
+            session.start_mcp_storm()
+        elif msg_type == "goodbye":
+            session.close()
+        else:
+            await session.on_json(data)
+
+
+# ---------------------------------------------------------------------------
+# 命令行
+# ---------------------------------------------------------------------------
+
+
+def add_behavior_arguments(parser: argparse.ArgumentParser):
+    """
+    模拟服务器行为参数（供基准脚本复用）.
+    """
+    parser.add_argument("--no-echo", action="store_true", help="不回显上行音频")
+    parser.add_argument("--tts-frames", type=int, default=25, help="每次回复的TTS帧数")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="下行抖动上限")
+    parser.add_argument("--loss", type=float, default=0.0, help="下行丢包率 0-1")
+    parser.add_argument("--mcp-storm", type=int, default=0, help="握手后MCP请求数")
+    parser.add_argument(
+        "--mcp-method", default="tools/list", choices=["tools/list", "tools/call"]
+    )
+    parser.add_argument("--mcp-tool", default="self.get_device_status")
+    parser.add_argument("--mcp-concurrency", type=int, default=8)
+    parser.add_argument(
+        "--ws-protocol-version",
+        type=int,
+        choices=[PROTOCOL_VERSION_RAW, PROTOCOL_VERSION_FRAMED],
+        default=PROTOCOL_VERSION_FRAMED,
+        help="WebSocket 二进制帧版本，1 模拟不支持帧头的旧服务器",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def behavior_from_args(args) -> ServerBehavior:
+    return ServerBehavior(
+        echo_audio=not args.no_echo,
+        tts_frames=args.tts_frames,
+        jitter_ms=args.jitter_ms,
+        loss=args.loss,
+        mcp_storm=args.mcp_storm,
+        mcp_method=args.mcp_method,
+        mcp_tool=args.mcp_tool,
+        mcp_concurrency=args.mcp_concurrency,
+        ws_protocol_version=args.ws_protocol_version,
+        seed=args.seed,
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="小智协议本地模拟服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--ws-port", type=int, default=8765)
+    parser.add_argument("--mqtt-port", type=int, default=1883, help="0 表示不启动")
+    parser.add_argument("--udp-port", type=int, default=0)
+    add_behavior_arguments(parser)
+    args = parser.parse_args()
+
+    emulator = ProtocolEmulator(behavior_from_args(args))
+    servers = []
+    if args.ws_port:
+        ws = await WebSocketEmulator(emulator, args.host, args.ws_port).start()
+        servers.append(ws)
+        print(f"WebSocket: {ws.url}")
+    if args.mqtt_port:
+        mqtt = await MqttUdpEmulator(
+            emulator, args.host, args.mqtt_port, args.udp_port
+        ).start()
+        servers.append(mqtt)
+        print(f"MQTT: {args.host}:{mqtt.port}  UDP: {args.host}:{mqtt.udp_port}")
+        print(f"MQTT_INFO: {json.dumps(mqtt.client_config(), ensure_ascii=False)}")
+
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(json.dumps(emulator.stats.snapshot(), ensure_ascii=False))
+    finally:
+        for server in servers:
+            await server.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n👋 模拟服务器已停止")
+        sys.exit(0)
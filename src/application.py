@@ -13,11 +13,13 @@ except Exception:
     pass
 
 from src.constants.constants import DeviceState, ListeningMode
+from src.core.connection_manager import ConnectionManager
 from src.plugins.calendar import CalendarPlugin
 from src.plugins.iot import IoTPlugin
 from src.plugins.manager import PluginManager
 from src.plugins.mcp import McpPlugin
 from src.plugins.shortcuts import ShortcutsPlugin
+from src.plugins.timer import TimerPlugin
 from src.plugins.ui import UIPlugin
 from src.plugins.wake_word import WakeWordPlugin
 from src.protocols.mqtt_protocol import MqttProtocol
@@ -56,6 +58,8 @@ class Application:
         # Trạng thái
         self.running = False
         self.protocol = None
+        # Quản lý kết nối giữ ấm (tạo trong run)
+        self.connection_manager: ConnectionManager | None = None
 
         # Trạng thái thiết bị (chỉ chương trình chính có thể sửa đổi, plugin chỉ đọc)
         self.device_state = DeviceState.IDLE
@@ -99,13 +103,14 @@ class Application:
             # Plugin: setup (hoãn nhập AudioPlugin, đảm bảo setup_opus đã thực thi)
             from src.plugins.audio import AudioPlugin
 
-            # Đăng ký plugin âm thanh, UI, MCP, IoT, từ khóa đánh thức, phím tắt và lịch (chế độ UI từ tham số run)
+            # Đăng ký plugin âm thanh, UI, MCP, IoT, từ khóa đánh thức, phím tắt, lịch và hẹn giờ (chế độ UI từ tham số run)
             self.plugins.register(
                 McpPlugin(),
                 IoTPlugin(),
                 AudioPlugin(),
                 WakeWordPlugin(),
                 CalendarPlugin(),
+                TimerPlugin(),
                 UIPlugin(mode=mode),
                 ShortcutsPlugin(),
             )
@@ -115,7 +120,9 @@ class Application:
                 await self.plugins.notify_device_state_changed(self.device_state)
             except Exception:
                 pass
-            # await self.connect_protocol()
+            # Kết nối trước và giữ ấm kênh, tránh bắt tay khi đánh thức
+            self.connection_manager = ConnectionManager(self)
+            self.connection_manager.start()
             # Plugin: start
             await self.plugins.start_all()
             # Chờ dừng
@@ -185,9 +192,11 @@ class Application:
     # -------------------------
     async def start_listening_manual(self) -> None:
         try:
+            self._mark_wake()
             ok = await self.connect_protocol()
             if not ok:
                 return
+            self._mark_channel_ready()
             self.keep_listening = False
 
             # Nếu đang nói thì gửi yêu cầu ngắt
@@ -212,9 +221,11 @@ class Application:
     # -------------------------
     async def start_auto_conversation(self) -> None:
         try:
+            self._mark_wake()
             ok = await self.connect_protocol()
             if not ok:
                 return
+            self._mark_channel_ready()
 
             mode = (
                 ListeningMode.REALTIME if self.aec_enabled else ListeningMode.AUTO_STOP
@@ -226,6 +237,14 @@ class Application:
         except Exception:
             pass
 
+    def _mark_wake(self) -> None:
+        if self.connection_manager:
+            self.connection_manager.mark_wake()
+
+    def _mark_channel_ready(self) -> None:
+        if self.connection_manager:
+            self.connection_manager.mark_channel_ready()
+
     def _setup_protocol_callbacks(self) -> None:
         self.protocol.on_network_error(self._on_network_error)
         self.protocol.on_incoming_json(self._on_incoming_json)
@@ -292,6 +311,8 @@ class Application:
 
     def _on_incoming_audio(self, data: bytes):
         logger.debug(f"Nhận tin nhắn nhị phân, độ dài: {len(data)}")
+        if self.connection_manager:
+            self.connection_manager.mark_first_audio()
         # Chuyển tiếp cho plugin
         self.spawn(self.plugins.notify_incoming_audio(data), "plugin:on_audio")
 
@@ -348,12 +369,14 @@ class Application:
             logger.info("Nhận tin nhắn JSON")
 
     async def _on_audio_channel_opened(self):
+        # Kênh có thể được mở trước (giữ ấm) khi chưa có ai nói, nên không tự
+        # chuyển sang LISTENING; các luồng nghe tự đặt trạng thái sau listen/start
         logger.info("Kênh giao thức đã mở")
-        # Sau khi kênh mở vào LISTENING (đơn giản hóa thành đọc và ghi trực tiếp)
-        await self.set_device_state(DeviceState.LISTENING)
 
     async def _on_audio_channel_closed(self):
         logger.info("Kênh giao thức đã đóng")
+        if self.connection_manager:
+            self.connection_manager.notify_disconnected()
         # Sau khi kênh đóng quay về IDLE
         await self.set_device_state(DeviceState.IDLE)
 
@@ -495,6 +518,9 @@ class Application:
             except Exception:
                 pass
 
+            # Ghi các thay đổi cấu hình còn chờ ghi đĩa
+            self.config.flush()
+
             logger.info("Đóng Application hoàn tất")
         except Exception as e:
             logger.error(f"Lỗi khi đóng ứng dụng: {e}", exc_info=True)
@@ -1,7 +1,9 @@
 import asyncio
 import gc
+import threading
 import time
 from collections import deque
+from itertools import islice
 from typing import Optional
 
 import numpy as np
@@ -10,28 +12,35 @@ import sounddevice as sd
 import soxr
 
 from src.audio_codecs.aec_processor import AECProcessor
+from src.audio_codecs.audio_stats import AudioStats
+from src.audio_codecs.encoder_controller import OpusEncoderController
 from src.constants.constants import AudioConfig
 from src.utils.config_manager import ConfigManager
 from src.utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# OPUS_BANDWIDTH_WIDEBAND（8kHz音频带宽，对应16kHz采样）
+OPUS_BANDWIDTH_WIDEBAND = 1103
+
 
 class AudioCodec:
     """
     音频编解码器，负责录音编码和播放解码
     主要功能：
     1. 录音：麦克风 -> 重采样16kHz -> Opus编码 -> 发送
-    2. 播放：接收 -> Opus解码24kHz -> 播放队列 -> 扬声器
+    2. 播放：接收 -> Opus解码（优先直接解码到设备采样率） -> 播放队列 -> 扬声器
     """
 
     def __init__(self):
         # 获取配置管理器
         self.config = ConfigManager.get_instance()
 
-        # Opus编解码器：录音16kHz编码，播放24kHz解码
+        # Opus编解码器：采样率由 _select_codec_rates() 按设备选择
         self.opus_encoder = None
         self.opus_decoder = None
+        # 编码器自适应控制（复杂度/码率/FEC）
+        self.encoder_controller: Optional[OpusEncoderController] = None
 
         # 设备信息
         self.device_input_sample_rate = None
@@ -39,9 +48,18 @@ class AudioCodec:
         self.mic_device_id = None  # 麦克风设备ID（固定索引，一经写入配置不再覆盖）
         self.speaker_device_id = None  # 扬声器设备ID（固定索引）
 
+        # 编解码采样率：设备采样率为 Opus 原生采样率时直接按设备采样率编解码，
+        # 否则录音按16kHz编码、播放按协商的输出采样率解码再重采样
+        self._encode_sample_rate = AudioConfig.INPUT_SAMPLE_RATE
+        self._encode_frame_size = AudioConfig.INPUT_FRAME_SIZE
+        self._decode_sample_rate = AudioConfig.OUTPUT_SAMPLE_RATE
+        self._decode_frame_size = AudioConfig.OUTPUT_FRAME_SIZE
+        # 原生采样率编码时不再产生16kHz PCM，唤醒词队列不喂数据
+        self._feed_wakeword = True
+
         # 重采样器：录音重采样到16kHz，播放重采样到设备采样率
         self.input_resampler = None  # 设备采样率 -> 16kHz
-        self.output_resampler = None  # 24kHz -> 设备采样率(播放用)
+        self.output_resampler = None  # 解码采样率 -> 设备采样率(播放用，非Opus采样率时)
 
         # 重采样缓冲区
         self._resample_input_buffer = deque()
@@ -58,13 +76,45 @@ class AudioCodec:
         self._wakeword_buffer = asyncio.Queue(maxsize=100)
         self._output_buffer = asyncio.Queue(maxsize=500)
 
+        # 打断播放：代数计数器 + 换新缓冲区，O(1) 失效所有待播放数据
+        # 播放回调发现代数变化后，对旧缓冲区的开头做一次淡出，再输出新代数据
+        self._playback_generation = 0
+        self._playing_generation = 0
+        self._fade_source = None
+        self._interrupt_started = None
+
         # 实时编码回调（直接发送，不走队列）
         self._encoded_audio_callback = None
 
+        # 唤醒预录：检测到唤醒词时才开始截留（不是常驻的环形缓冲），唤醒后到
+        # 通道打开之间的编码帧暂存于此，通道就绪后按顺序发送；满了就停止截留，
+        # 保留命令开头而不是覆盖最早的帧
+        self._preroll_frames = deque(maxlen=self._preroll_capacity())
+        self._preroll_armed = False
+        self._preroll_lock = threading.Lock()
+        self._preroll_overflow = 0
+        self._preroll_flushed = 0
+
         # AEC处理器
         self.aec_processor = AECProcessor()
         self._aec_enabled = False
 
+        # 运行指标（回调线程单写，get_stats() 读取快照）
+        self._stats = AudioStats()
+
+    def _preroll_capacity(self) -> int:
+        """
+        根据配置计算预录缓冲可容纳的帧数（0.5-15秒，0表示关闭）.
+        """
+        try:
+            seconds = float(self.config.get_config("AUDIO.PREROLL_SECONDS", 12.0))
+        except (TypeError, ValueError):
+            seconds = 12.0
+        if seconds <= 0:
+            return 0
+        seconds = min(15.0, max(0.5, seconds))
+        return int(seconds * 1000 / AudioConfig.FRAME_DURATION + 0.999)
+
     # -----------------------
     # 自动选择设备的辅助方法
     # -----------------------
@@ -184,6 +234,7 @@ class AudioCodec:
                 f"输入采样率: {self.device_input_sample_rate}Hz, 输出: {self.device_output_sample_rate}Hz"
             )
 
+            self._select_codec_rates()
             await self._create_resamplers()
 
             # 不强行改全局默认，让每个流自己带 device / samplerate
@@ -195,13 +246,25 @@ class AudioCodec:
 
             # Opus 编解码器
             self.opus_encoder = opuslib.Encoder(
-                AudioConfig.INPUT_SAMPLE_RATE,
+                self._encode_sample_rate,
                 AudioConfig.CHANNELS,
                 opuslib.APPLICATION_AUDIO,
             )
+            if self._encode_sample_rate > AudioConfig.INPUT_SAMPLE_RATE:
+                # 高采样率输入仍限制为宽带编码，码流与16kHz编码时一致
+                try:
+                    self.opus_encoder.max_bandwidth = OPUS_BANDWIDTH_WIDEBAND
+                except Exception as e:
+                    logger.warning(f"限制Opus编码带宽失败: {e}")
             self.opus_decoder = opuslib.Decoder(
-                AudioConfig.OUTPUT_SAMPLE_RATE, AudioConfig.CHANNELS
+                self._decode_sample_rate, AudioConfig.CHANNELS
+            )
+            self.encoder_controller = OpusEncoderController(
+                self.opus_encoder,
+                AudioConfig.FRAME_DURATION,
+                self.config.get_config("AUDIO.ADAPTIVE_ENCODER", {}) or {},
             )
+            self.encoder_controller.apply_initial()
 
             # 初始化AEC处理器
             try:
@@ -218,12 +281,48 @@ class AudioCodec:
             await self.close()
             raise
 
+    def _select_codec_rates(self):
+        """
+        按设备采样率选择 Opus 编解码采样率，仅在非 Opus 采样率（如44.1kHz）时回退到重采样.
+        """
+        native = self.config.get_config("AUDIO.NATIVE_RATE_CODEC", False)
+        frame_duration_sec = AudioConfig.FRAME_DURATION / 1000
+
+        # 播放：直接解码到设备采样率
+        if native and self.device_output_sample_rate in AudioConfig.OPUS_SAMPLE_RATES:
+            self._decode_sample_rate = self.device_output_sample_rate
+        else:
+            self._decode_sample_rate = AudioConfig.OUTPUT_SAMPLE_RATE
+        self._decode_frame_size = int(self._decode_sample_rate * frame_duration_sec)
+
+        # 录音：唤醒词检测与 macOS AEC 都需要16kHz PCM，此时仍重采样
+        needs_16k = (
+            self.config.get_config("WAKE_WORD_OPTIONS.USE_WAKE_WORD", False)
+            or self.aec_processor._is_macos
+        )
+        if (
+            native
+            and not needs_16k
+            and self.device_input_sample_rate in AudioConfig.OPUS_SAMPLE_RATES
+        ):
+            self._encode_sample_rate = self.device_input_sample_rate
+            self._feed_wakeword = False
+        else:
+            self._encode_sample_rate = AudioConfig.INPUT_SAMPLE_RATE
+            self._feed_wakeword = True
+        self._encode_frame_size = int(self._encode_sample_rate * frame_duration_sec)
+
+        logger.info(
+            f"Opus编码采样率: {self._encode_sample_rate}Hz, "
+            f"解码采样率: {self._decode_sample_rate}Hz"
+        )
+
     async def _create_resamplers(self):
         """
-        创建重采样器 输入：设备采样率 -> 16kHz（用于编码） 输出：24kHz -> 设备采样率（播放用）
+        创建重采样器 输入：设备采样率 -> 16kHz（用于编码） 输出：解码采样率 -> 设备采样率（播放用）
         """
         # 输入重采样器：设备采样率 -> 16kHz（用于编码）
-        if self.device_input_sample_rate != AudioConfig.INPUT_SAMPLE_RATE:
+        if self.device_input_sample_rate != self._encode_sample_rate:
             self.input_resampler = soxr.ResampleStream(
                 self.device_input_sample_rate,
                 AudioConfig.INPUT_SAMPLE_RATE,
@@ -233,17 +332,17 @@ class AudioCodec:
             )
             logger.info(f"输入重采样: {self.device_input_sample_rate}Hz -> 16kHz")
 
-        # 输出重采样器：24kHz -> 设备采样率
-        if self.device_output_sample_rate != AudioConfig.OUTPUT_SAMPLE_RATE:
+        # 输出重采样器：解码采样率 -> 设备采样率
+        if self.device_output_sample_rate != self._decode_sample_rate:
             self.output_resampler = soxr.ResampleStream(
-                AudioConfig.OUTPUT_SAMPLE_RATE,
+                self._decode_sample_rate,
                 self.device_output_sample_rate,
                 AudioConfig.CHANNELS,
                 dtype="int16",
                 quality="QQ",
             )
             logger.info(
-                f"输出重采样: {AudioConfig.OUTPUT_SAMPLE_RATE}Hz -> {self.device_output_sample_rate}Hz"
+                f"输出重采样: {self._decode_sample_rate}Hz -> {self.device_output_sample_rate}Hz"
             )
 
     async def _select_audio_devices(self):
@@ -430,17 +529,11 @@ class AudioCodec:
                 latency="low",
             )
 
-            # 根据设备支持的采样率选择输出采样率
-            if self.device_output_sample_rate == AudioConfig.OUTPUT_SAMPLE_RATE:
-                # 设备支持24kHz，直接使用
-                output_sample_rate = AudioConfig.OUTPUT_SAMPLE_RATE
-                device_output_frame_size = AudioConfig.OUTPUT_FRAME_SIZE
-            else:
-                # 设备不支持24kHz，使用设备默认采样率并启用重采样
-                output_sample_rate = self.device_output_sample_rate
-                device_output_frame_size = int(
-                    self.device_output_sample_rate * (AudioConfig.FRAME_DURATION / 1000)
-                )
+            # 输出流始终使用设备采样率（与解码采样率不同时由重采样器衔接）
+            output_sample_rate = self.device_output_sample_rate
+            device_output_frame_size = int(
+                self.device_output_sample_rate * (AudioConfig.FRAME_DURATION / 1000)
+            )
 
             self.output_stream = sd.OutputStream(
                 device=self.speaker_device_id,  # None=系统默认；或固定索引
@@ -466,12 +559,15 @@ class AudioCodec:
         """
         录音回调，硬件驱动调用 处理流程：原始音频 -> 重采样16kHz -> 编码发送 + 唤醒词检测.
         """
-        if status and "overflow" not in str(status).lower():
-            logger.warning(f"输入流状态: {status}")
+        if status:
+            self._stats.record_input_status(status)
+            if "overflow" not in str(status).lower():
+                logger.warning(f"输入流状态: {status}")
 
         if self._is_closing:
             return
 
+        started = time.perf_counter()
         try:
             audio_data = indata.copy().flatten()
 
@@ -495,30 +591,40 @@ class AudioCodec:
             # 实时编码并发送（不走队列，减少延迟）
             if (
                 self._encoded_audio_callback
-                and len(audio_data) == AudioConfig.INPUT_FRAME_SIZE
+                and len(audio_data) == self._encode_frame_size
             ):
                 try:
                     pcm_data = audio_data.astype(np.int16).tobytes()
+                    encode_started = time.perf_counter()
                     encoded_data = self.opus_encoder.encode(
-                        pcm_data, AudioConfig.INPUT_FRAME_SIZE
+                        pcm_data, self._encode_frame_size
                     )
-                    if encoded_data:
+                    encode_ms = (time.perf_counter() - encode_started) * 1000
+                    self._stats.encode.observe(encode_ms)
+                    if self.encoder_controller:
+                        self.encoder_controller.on_frame_encoded(encode_ms)
+                    if encoded_data and not self._capture_preroll(encoded_data):
                         self._encoded_audio_callback(encoded_data)
                 except Exception as e:
                     logger.warning(f"实时录音编码失败: {e}")
 
             # 同时提供给唤醒词检测（走队列）
-            self._put_audio_data_safe(self._wakeword_buffer, audio_data.copy())
+            if self._feed_wakeword:
+                self._put_audio_data_safe(self._wakeword_buffer, audio_data.copy())
 
         except Exception as e:
             logger.error(f"输入回调错误: {e}")
+        finally:
+            self._stats.input_callback.observe((time.perf_counter() - started) * 1000)
 
     def _process_input_resampling(self, audio_data):
         """
         输入重采样到16kHz.
         """
         try:
+            started = time.perf_counter()
             resampled_data = self.input_resampler.resample_chunk(audio_data, last=False)
+            self._stats.input_resample.observe((time.perf_counter() - started) * 1000)
             if len(resampled_data) > 0:
                 self._resample_input_buffer.extend(resampled_data.astype(np.int16))
 
@@ -543,6 +649,9 @@ class AudioCodec:
         try:
             queue.put_nowait(audio_data)
         except asyncio.QueueFull:
+            self._stats.record_drop(
+                "wakeword" if queue is self._wakeword_buffer else "output"
+            )
             try:
                 queue.get_nowait()
                 queue.put_nowait(audio_data)
@@ -554,24 +663,31 @@ class AudioCodec:
         播放回调，硬件驱动调用 从播放队列取数据输出到扬声器.
         """
         if status:
+            self._stats.record_output_status(status)
             if "underflow" not in str(status).lower():
                 logger.warning(f"输出流状态: {status}")
 
+        started = time.perf_counter()
         try:
-            if self.output_resampler is not None:
+            if self._playing_generation != self._playback_generation:
+                # 刚被打断：淡出旧数据，本次回调不播放新数据
+                self._output_fade_out(outdata, frames)
+            elif self.output_resampler is not None:
                 # 需要重采样：24kHz -> 设备采样率
                 self._output_callback_with_resample(outdata, frames)
             else:
-                # 直接播放：24kHz
+                # 直接播放：解码采样率即设备采样率
                 self._output_callback_direct(outdata, frames)
 
         except Exception as e:
             logger.error(f"输出回调错误: {e}")
             outdata.fill(0)
+        finally:
+            self._stats.output_callback.observe((time.perf_counter() - started) * 1000)
 
     def _output_callback_direct(self, outdata: np.ndarray, frames: int):
         """
-        直接播放24kHz数据（设备支持24kHz时）
+        直接播放解码数据（解码采样率与设备一致时）
         """
         try:
             # 从播放队列获取音频数据
@@ -597,27 +713,30 @@ class AudioCodec:
         """
         重采样播放（24kHz -> 设备采样率）
         """
+        # 打断时缓冲区会被整体替换，这里固定住本次回调使用的对象
+        output_buffer = self._output_buffer
+        resampled = self._resample_output_buffer
         try:
             # 持续处理24kHz数据进行重采样
-            while len(self._resample_output_buffer) < frames * AudioConfig.CHANNELS:
+            while len(resampled) < frames * AudioConfig.CHANNELS:
                 try:
-                    audio_data = self._output_buffer.get_nowait()
+                    audio_data = output_buffer.get_nowait()
                     # 24kHz -> 设备采样率重采样
+                    started = time.perf_counter()
                     resampled_data = self.output_resampler.resample_chunk(
                         audio_data, last=False
                     )
+                    self._stats.output_resample.observe(
+                        (time.perf_counter() - started) * 1000
+                    )
                     if len(resampled_data) > 0:
-                        self._resample_output_buffer.extend(
-                            resampled_data.astype(np.int16)
-                        )
+                        resampled.extend(resampled_data.astype(np.int16))
                 except asyncio.QueueEmpty:
                     break
 
             need = frames * AudioConfig.CHANNELS
-            if len(self._resample_output_buffer) >= need:
-                frame_data = [
-                    self._resample_output_buffer.popleft() for _ in range(need)
-                ]
+            if len(resampled) >= need:
+                frame_data = [resampled.popleft() for _ in range(need)]
                 output_array = np.array(frame_data, dtype=np.int16)
                 outdata[:] = output_array.reshape(-1, AudioConfig.CHANNELS)
             else:
@@ -628,6 +747,54 @@ class AudioCodec:
             logger.warning(f"重采样输出失败: {e}")
             outdata.fill(0)
 
+    def _output_fade_out(self, outdata: np.ndarray, frames: int):
+        """
+        打断后的第一次播放回调：对被丢弃数据的开头做短淡出，避免爆音.
+        """
+        self._playing_generation = self._playback_generation
+        source, self._fade_source = self._fade_source, None
+        outdata.fill(0)
+
+        resampling = self.output_resampler is not None
+        if resampling:
+            # 重采样器内部还残留旧音频的延迟线
+            try:
+                self.output_resampler.clear()
+            except Exception:
+                pass
+
+        rate = (
+            self.device_output_sample_rate if resampling else self._decode_sample_rate
+        )
+        fade_frames = min(frames, int(rate * AudioConfig.FADE_OUT_MS / 1000))
+        chunk = None
+        if source is not None and fade_frames > 0:
+            old_queue, old_resampled = source
+            need = fade_frames * AudioConfig.CHANNELS
+            if old_resampled:
+                chunk = np.fromiter(
+                    islice(old_resampled, need), dtype=np.int16, count=-1
+                )
+            elif not resampling:
+                try:
+                    chunk = old_queue.get_nowait()[:need]
+                except asyncio.QueueEmpty:
+                    pass
+
+        fade_ms = 0.0
+        if chunk is not None and len(chunk) >= AudioConfig.CHANNELS:
+            n = len(chunk) // AudioConfig.CHANNELS
+            ramp = np.linspace(1.0, 0.0, n, endpoint=False, dtype=np.float32)
+            faded = chunk[: n * AudioConfig.CHANNELS].reshape(-1, AudioConfig.CHANNELS)
+            outdata[:n] = (faded * ramp[:, None]).astype(np.int16)
+            fade_ms = n * 1000.0 / rate
+
+        if self._interrupt_started is not None:
+            self._stats.interrupt_to_silence.observe(
+                (time.perf_counter() - self._interrupt_started) * 1000 + fade_ms
+            )
+            self._interrupt_started = None
+
     def _input_finished_callback(self):
         """
         输入流结束.
@@ -677,18 +844,11 @@ class AudioCodec:
                     self.output_stream.stop()
                     self.output_stream.close()
 
-                # 根据设备支持的采样率选择输出采样率
-                if self.device_output_sample_rate == AudioConfig.OUTPUT_SAMPLE_RATE:
-                    # 设备支持24kHz，直接使用
-                    output_sample_rate = AudioConfig.OUTPUT_SAMPLE_RATE
-                    device_output_frame_size = AudioConfig.OUTPUT_FRAME_SIZE
-                else:
-                    # 设备不支持24kHz，使用设备默认采样率并启用重采样
-                    output_sample_rate = self.device_output_sample_rate
-                    device_output_frame_size = int(
-                        self.device_output_sample_rate
-                        * (AudioConfig.FRAME_DURATION / 1000)
-                    )
+                # 输出流始终使用设备采样率（与解码采样率不同时由重采样器衔接）
+                output_sample_rate = self.device_output_sample_rate
+                device_output_frame_size = int(
+                    self.device_output_sample_rate * (AudioConfig.FRAME_DURATION / 1000)
+                )
 
                 self.output_stream = sd.OutputStream(
                     device=self.speaker_device_id,  # 指定扬声器设备ID
@@ -734,6 +894,62 @@ class AudioCodec:
             logger.error(f"获取唤醒词音频数据失败: {e}")
             return None
 
+    def _capture_preroll(self, encoded_data: bytes) -> bool:
+        """
+        预录已启用时截留编码帧，返回 True 表示该帧已被预录接管（缓冲已满时丢弃）.
+        """
+        if not self._preroll_armed:
+            return False
+        with self._preroll_lock:
+            if not self._preroll_armed:
+                return False
+            if len(self._preroll_frames) == self._preroll_frames.maxlen:
+                # 不覆盖最早的帧（命令开头），丢弃新帧；仍返回 True 以免其越过
+                # 预录帧先走实时发送
+                self._preroll_overflow += 1
+            else:
+                self._preroll_frames.append(encoded_data)
+        return True
+
+    def arm_preroll(self) -> bool:
+        """开始预录：此后的编码帧暂存到预录缓冲，直到被取空（drain_preroll）或丢弃（take_preroll）.
+
+        Returns:
+            bool: 预录是否已启用（容量为0时不启用）
+        """
+        if not self._preroll_frames.maxlen:
+            return False
+        with self._preroll_lock:
+            self._preroll_frames.clear()
+            self._preroll_armed = True
+        return True
+
+    def take_preroll(self) -> list:
+        """
+        取出预录帧并恢复实时回调，之后的编码帧直接走实时发送.
+        """
+        with self._preroll_lock:
+            frames = list(self._preroll_frames)
+            self._preroll_frames.clear()
+            self._preroll_armed = False
+        self._preroll_flushed += len(frames)
+        return frames
+
+    def drain_preroll(self) -> list:
+        """
+        取出当前已截留的预录帧；缓冲为空时才恢复实时回调，保证预录帧先于实时帧发送.
+        """
+        with self._preroll_lock:
+            frames = list(self._preroll_frames)
+            self._preroll_frames.clear()
+            if not frames:
+                self._preroll_armed = False
+        self._preroll_flushed += len(frames)
+        return frames
+
+    def is_preroll_armed(self) -> bool:
+        return self._preroll_armed
+
     def set_encoded_audio_callback(self, callback):
         """
         设置编码回调.
@@ -784,19 +1000,61 @@ class AudioCodec:
         logger.info(f"AEC状态: {'启用' if self._aec_enabled else '禁用'}")
         return self._aec_enabled
 
+    def get_stats(self) -> dict:
+        """获取音频层运行指标.
+
+        Returns:
+            dict: 回调耗时直方图、xrun 计数、队列深度、重采样耗时与丢帧数
+        """
+        stats = self._stats.snapshot()
+        stats["queues"] = {
+            "wakeword": self._wakeword_buffer.qsize(),
+            "wakeword_max": self._wakeword_buffer.maxsize,
+            "output": self._output_buffer.qsize(),
+            "output_max": self._output_buffer.maxsize,
+            "resample_input_samples": len(self._resample_input_buffer),
+            "resample_output_samples": len(self._resample_output_buffer),
+        }
+        stats["devices"] = {
+            "input_sample_rate": self.device_input_sample_rate,
+            "output_sample_rate": self.device_output_sample_rate,
+            "encode_sample_rate": self._encode_sample_rate,
+            "decode_sample_rate": self._decode_sample_rate,
+            "input_resampling": self.input_resampler is not None,
+            "output_resampling": self.output_resampler is not None,
+        }
+        if self.encoder_controller:
+            stats["encoder"] = self.encoder_controller.snapshot()
+        stats["preroll"] = {
+            "capacity_frames": self._preroll_frames.maxlen,
+            "armed": self._preroll_armed,
+            "buffered_frames": len(self._preroll_frames),
+            "flushed_frames": self._preroll_flushed,
+            "overflow_frames": self._preroll_overflow,
+        }
+        return stats
+
+    def reset_stats(self):
+        """
+        重置运行指标.
+        """
+        self._stats.reset()
+        self._preroll_flushed = 0
+        self._preroll_overflow = 0
+
     async def write_audio(self, opus_data: bytes):
         """
-        解码音频并播放 网络接收的Opus数据 -> 解码24kHz -> 播放队列.
+        解码音频并播放 网络接收的Opus数据 -> 按解码采样率解码 -> 播放队列.
         """
         try:
-            # Opus解码为24kHz PCM数据
-            pcm_data = self.opus_decoder.decode(
-                opus_data, AudioConfig.OUTPUT_FRAME_SIZE
-            )
+            # Opus解码为PCM数据（设备为Opus原生采样率时直接解码到设备采样率）
+            started = time.perf_counter()
+            pcm_data = self.opus_decoder.decode(opus_data, self._decode_frame_size)
+            self._stats.decode.observe((time.perf_counter() - started) * 1000)
 
             audio_array = np.frombuffer(pcm_data, dtype=np.int16)
 
-            expected_length = AudioConfig.OUTPUT_FRAME_SIZE * AudioConfig.CHANNELS
+            expected_length = self._decode_frame_size * AudioConfig.CHANNELS
             if len(audio_array) != expected_length:
                 logger.warning(
                     f"解码音频长度异常: {len(audio_array)}, 期望: {expected_length}"
@@ -826,39 +1084,46 @@ class AudioCodec:
             output_remaining = self._output_buffer.qsize()
             logger.warning(f"音频播放超时，剩余队列 - 输出: {output_remaining} 帧")
 
-    async def clear_audio_queue(self):
-        """
-        清空音频队列.
-        """
-        cleared_count = 0
+    def interrupt_playback(self) -> int:
+        """打断播放（常数时间）.
 
-        queues_to_clear = [
-            self._wakeword_buffer,
-            self._output_buffer,
-        ]
+        换上新的播放队列与重采样缓冲区并递增播放代数，旧数据由引用计数
+        释放，不逐帧出队、不触发 GC。解码器状态在此重置，重采样器状态与
+        淡出由下一次播放回调完成（两者只在回调线程中使用）。
 
-        for queue in queues_to_clear:
-            while not queue.empty():
-                try:
-                    queue.get_nowait()
-                    cleared_count += 1
-                except asyncio.QueueEmpty:
-                    break
+        Returns:
+            int: 新的播放代数
+        """
+        old_queue = self._output_buffer
+        old_resampled = self._resample_output_buffer
+        dropped = old_queue.qsize()
 
-        if self._resample_input_buffer:
-            cleared_count += len(self._resample_input_buffer)
-            self._resample_input_buffer.clear()
+        self._output_buffer = asyncio.Queue(maxsize=old_queue.maxsize)
+        self._resample_output_buffer = deque()
+        self._fade_source = (old_queue, old_resampled)
+        self._interrupt_started = time.perf_counter()
+        # 最后递增代数，回调看到新代数时淡出源一定已就绪
+        self._playback_generation += 1
 
-        if self._resample_output_buffer:
-            cleared_count += len(self._resample_output_buffer)
-            self._resample_output_buffer.clear()
+        if self.opus_decoder is not None:
+            try:
+                self.opus_decoder.reset_state()
+            except Exception as e:
+                logger.debug(f"重置Opus解码器失败: {e}")
 
-        if cleared_count > 0:
-            logger.info(f"清空音频队列，丢弃 {cleared_count} 帧音频数据")
+        self._stats.interrupts += 1
+        self._stats.interrupt_dropped_frames += dropped
+        if dropped:
+            logger.info(f"打断播放，丢弃 {dropped} 帧音频数据")
+        return self._playback_generation
 
-        if cleared_count > 100:
-            gc.collect()
-            logger.debug("执行垃圾回收以释放内存")
+    async def clear_audio_queue(self):
+        """
+        清空音频队列（打断播放并丢弃待检测的唤醒词音频）.
+        """
+        self.interrupt_playback()
+        self._wakeword_buffer = asyncio.Queue(maxsize=self._wakeword_buffer.maxsize)
+        self._resample_input_buffer.clear()
 
     async def start_streams(self):
         """
@@ -965,6 +1230,7 @@ class AudioCodec:
 
             # 3. 清空回调引用（打破闭包引用链）
             self._encoded_audio_callback = None
+            self.take_preroll()
 
             # 4. 清空所有队列和缓冲区（关键！必须在清理 resampler 之前）
             # 这些缓冲区可能间接持有 resampler 处理过的数据或引用
@@ -1003,6 +1269,7 @@ class AudioCodec:
                     self.aec_processor = None
 
             # 10. 释放编解码器
+            self.encoder_controller = None
             self.opus_encoder = None
             self.opus_decoder = None
 
@@ -0,0 +1,196 @@
+"""
+音频层运行指标.
+
+音频回调运行在 PortAudio 线程中，这里的统计对象只做整数累加（单写者），
+不加锁、不分配对象，读取方通过 snapshot() 获取近似一致的快照即可。
+"""
+
+import time
+from bisect import bisect_right
+from typing import Dict, Sequence
+
+# 回调耗时分桶上界（毫秒），最后一个桶收纳所有超出上界的样本
+DEFAULT_BUCKETS_MS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0)
+
+# 打断到静音的耗时分桶（毫秒），包含等待下一次播放回调与淡出时长
+INTERRUPT_BUCKETS_MS = (5.0, 10.0, 20.0, 40.0, 60.0, 80.0, 120.0, 200.0, 500.0)
+
+
+class LatencyHistogram:
+    """
+    固定分桶的耗时直方图.
+    """
+
+    __slots__ = ("_bounds", "_counts", "count", "total_ms", "max_ms")
+
+    def __init__(self, bounds_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self._bounds = tuple(bounds_ms)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float):
+        """
+        记录一个样本（毫秒）.
+        """
+        self._counts[bisect_right(self._bounds, value_ms)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+
+    def percentile(self, q: float) -> float:
+        """
+        按分桶上界估算分位数（毫秒），超出最大上界时返回观测到的最大值.
+        """
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for idx, c in enumerate(self._counts):
+            seen += c
+            if seen >= target:
+                return self._bounds[idx] if idx < len(self._bounds) else self.max_ms
+        return self.max_ms
+
+    def reset(self):
+        for i in range(len(self._counts)):
+            self._counts[i] = 0
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def snapshot(self) -> Dict:
+        labels = [f"<={b:g}ms" for b in self._bounds] + [f">{self._bounds[-1]:g}ms"]
+        count = self.count
+        return {
+            "count": count,
+            "avg_ms": round(self.total_ms / count, 3) if count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": dict(zip(labels, list(self._counts))),
+        }
+
+
+class AudioStats:
+    """
+    AudioCodec 的指标集合：回调耗时、xrun 计数、重采样耗时、丢帧计数.
+    """
+
+    def __init__(self):
+        self.input_callback = LatencyHistogram()
+        self.output_callback = LatencyHistogram()
+        self.input_resample = LatencyHistogram()
+        self.output_resample = LatencyHistogram()
+        self.encode = LatencyHistogram()
+        self.decode = LatencyHistogram()
+        self.interrupt_to_silence = LatencyHistogram(INTERRUPT_BUCKETS_MS)
+
+        self.interrupts = 0
+        self.interrupt_dropped_frames = 0
+        self.input_overflows = 0
+        self.output_underflows = 0
+        self.input_status_other = 0
+        self.output_status_other = 0
+
+        # 由 _put_audio_data_safe 在队列满时丢弃的旧帧
+        self.dropped_frames: Dict[str, int] = {"wakeword": 0, "output": 0}
+
+        self._started_at = time.monotonic()
+
+    def record_input_status(self, status):
+        """
+        统计输入流状态标志（sounddevice.CallbackFlags）.
+        """
+        if getattr(status, "input_overflow", False):
+            self.input_overflows += 1
+        else:
+            self.input_status_other += 1
+
+    def record_output_status(self, status):
+        """
+        统计输出流状态标志（sounddevice.CallbackFlags）.
+        """
+        if getattr(status, "output_underflow", False):
+            self.output_underflows += 1
+        else:
+            self.output_status_other += 1
+
+    def record_drop(self, name: str):
+        self.dropped_frames[name] = self.dropped_frames.get(name, 0) + 1
+
+    def reset(self):
+        for hist in (
+            self.input_callback,
+            self.output_callback,
+            self.input_resample,
+            self.output_resample,
+            self.encode,
+            self.decode,
+            self.interrupt_to_silence,
+        ):
+            hist.reset()
+        self.interrupts = 0
+        self.interrupt_dropped_frames = 0
+        self.input_overflows = 0
+        self.output_underflows = 0
+        self.input_status_other = 0
+        self.output_status_other = 0
+        for k in self.dropped_frames:
+            self.dropped_frames[k] = 0
+        self._started_at = time.monotonic()
+
+    def snapshot(self) -> Dict:
+        return {
+            "uptime_s": round(time.monotonic() - self._started_at, 1),
+            "xruns": {
+                "input_overflow": self.input_overflows,
+                "output_underflow": self.output_underflows,
+                "input_other": self.input_status_other,
+                "output_other": self.output_status_other,
+            },
+            "dropped_frames": dict(self.dropped_frames),
+            "callbacks": {
+                "input": self.input_callback.snapshot(),
+                "output": self.output_callback.snapshot(),
+            },
+            "resampler": {
+                "input": self.input_resample.snapshot(),
+                "output": self.output_resample.snapshot(),
+            },
+            "codec": {
+                "encode": self.encode.snapshot(),
+                "decode": self.decode.snapshot(),
+            },
+            "interrupt": {
+                "count": self.interrupts,
+                "dropped_frames": self.interrupt_dropped_frames,
+                "to_silence": self.interrupt_to_silence.snapshot(),
+            },
+        }
+
+
+def summarize_audio_stats(stats: Dict) -> str:
+    """
+    将 AudioCodec.get_stats() 结果压缩为一行，供 CLI 仪表盘显示.
+    """
+    try:
+        xruns = stats.get("xruns", {})
+        cb = stats.get("callbacks", {})
+        queues = stats.get("queues", {})
+        dropped = stats.get("dropped_frames", {})
+        interrupt = stats.get("interrupt", {})
+        return (
+            f"in {cb.get('input', {}).get('p95_ms', 0)}ms/p95 "
+            f"out {cb.get('output', {}).get('p95_ms', 0)}ms/p95 | "
+            f"xrun in={xruns.get('input_overflow', 0)} "
+            f"out={xruns.get('output_underflow', 0)} | "
+            f"q kws={queues.get('wakeword', 0)} play={queues.get('output', 0)} | "
+            f"drop={sum(dropped.values())} | "
+            f"barge-in {interrupt.get('to_silence', {}).get('p95_ms', 0)}ms/p95"
+        )
+    except Exception:
+        return ""
@@ -0,0 +1,207 @@
+"""
+Opus 编码器自适应控制.
+
+- 复杂度：根据每帧实测编码耗时调整，保证弱 ARM 核心上编码始终实时
+- 码率/FEC/丢包率：根据发送积压与协议层观测到的丢包调整（AIMD）
+
+编码器只在录音回调线程中使用，所以对编码器的修改也都放在
+on_frame_encoded() 中（同一线程）完成；网络侧只写入观测值。
+"""
+
+from typing import Any, Dict, Optional
+
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_ENCODER_OPTIONS = {
+    "ENABLED": True,
+    "MIN_COMPLEXITY": 0,
+    "MAX_COMPLEXITY": 10,
+    "INITIAL_COMPLEXITY": 5,
+    "MIN_BITRATE": 12000,
+    "MAX_BITRATE": 32000,
+    "INITIAL_BITRATE": 24000,
+    # 编码耗时占帧长的比例阈值：超过上限降复杂度，低于下限升复杂度
+    "ENCODE_BUDGET_HIGH": 0.25,
+    "ENCODE_BUDGET_LOW": 0.08,
+    # 发送积压（待发送帧数）超过该值视为拥塞
+    "BACKPRESSURE_FRAMES": 3,
+    # 每隔多少帧评估一次
+    "EVAL_INTERVAL_FRAMES": 50,
+}
+
+
+class OpusEncoderController:
+    """
+    Opus 编码器工作点控制器.
+    """
+
+    def __init__(
+        self, encoder: Any, frame_duration_ms: int, options: Optional[Dict] = None
+    ):
+        self._encoder = encoder
+        self._frame_ms = float(frame_duration_ms)
+
+        opts = dict(DEFAULT_ENCODER_OPTIONS)
+        opts.update(options or {})
+        self.enabled = bool(opts["ENABLED"])
+        self._min_complexity = int(opts["MIN_COMPLEXITY"])
+        self._max_complexity = int(opts["MAX_COMPLEXITY"])
+        self._min_bitrate = int(opts["MIN_BITRATE"])
+        self._max_bitrate = int(opts["MAX_BITRATE"])
+        self._budget_high = float(opts["ENCODE_BUDGET_HIGH"])
+        self._budget_low = float(opts["ENCODE_BUDGET_LOW"])
+        self._backpressure_frames = int(opts["BACKPRESSURE_FRAMES"])
+        self._eval_interval = max(1, int(opts["EVAL_INTERVAL_FRAMES"]))
+
+        self.complexity = self._clamp(
+            int(opts["INITIAL_COMPLEXITY"]),
+            self._min_complexity,
+            self._max_complexity,
+        )
+        self.bitrate = self._clamp(
+            int(opts["INITIAL_BITRATE"]), self._min_bitrate, self._max_bitrate
+        )
+        self.fec = False
+        self.packet_loss_perc = 0
+
+        # 录音线程写入
+        self._ewma_encode_ms = 0.0
+        self._frames_since_eval = 0
+
+        # 网络侧写入（事件循环线程），录音线程读取
+        self._max_backpressure = 0
+        self._loss_ratio = 0.0
+
+        self.adjustments = 0
+        # 设置失败的编码器参数（每项只告警一次，不影响其他参数）
+        self._failed_ctls = set()
+
+    @staticmethod
+    def _clamp(value, low, high):
+        return max(low, min(high, value))
+
+    def apply_initial(self):
+        """
+        将初始工作点写入编码器；未启用时保持编码器默认参数.
+        """
+        if not self.enabled:
+            return
+        self._apply(force=True)
+
+    # -------- 网络侧观测（事件循环线程） --------
+
+    def report_backpressure(self, pending_frames: int):
+        """
+        上报当前待发送的音频帧数.
+        """
+        if pending_frames > self._max_backpressure:
+            self._max_backpressure = pending_frames
+
+    def report_packet_loss(self, loss_ratio: float):
+        """
+        上报协议层观测到的丢包率（0.0 - 1.0）.
+        """
+        self._loss_ratio = self._clamp(float(loss_ratio), 0.0, 1.0)
+
+    # -------- 录音线程 --------
+
+    def on_frame_encoded(self, encode_ms: float):
+        """
+        每帧编码后调用，定期评估并调整工作点.
+        """
+        self._ewma_encode_ms += 0.1 * (encode_ms - self._ewma_encode_ms)
+        self._frames_since_eval += 1
+        if not self.enabled or self._frames_since_eval < self._eval_interval:
+            return
+        self._frames_since_eval = 0
+        self._evaluate()
+
+    def _evaluate(self):
+        changed = False
+
+        # 1. 复杂度跟随 CPU 余量
+        ratio = self._ewma_encode_ms / self._frame_ms if self._frame_ms else 0.0
+        if ratio > self._budget_high and self.complexity > self._min_complexity:
+            self.complexity = max(self._min_complexity, self.complexity - 2)
+            changed = True
+        elif ratio < self._budget_low and self.complexity < self._max_complexity:
+            self.complexity += 1
+            changed = True
+
+        # 2. 码率：拥塞时乘性降低，空闲时加性恢复
+        backpressure = self._max_backpressure
+        self._max_backpressure = 0
+        if backpressure >= self._backpressure_frames:
+            new_bitrate = max(self._min_bitrate, int(self.bitrate * 0.75))
+        else:
+            new_bitrate = min(self._max_bitrate, self.bitrate + 2000)
+        if new_bitrate != self.bitrate:
+            self.bitrate = new_bitrate
+            changed = True
+
+        # 3. FEC 与丢包率提示跟随观测丢包
+        loss_perc = int(round(self._loss_ratio * 100))
+        loss_perc = self._clamp(loss_perc, 0, 30)
+        fec = loss_perc >= 2
+        if loss_perc != self.packet_loss_perc or fec != self.fec:
+            self.packet_loss_perc = loss_perc
+            self.fec = fec
+            changed = True
+
+        if changed:
+            self._apply()
+
+    def _apply(self, force: bool = False):
+        settings = (
+            ("complexity", self.complexity),
+            ("bitrate", self.bitrate),
+            ("inband_fec", 1 if self.fec else 0),
+            ("packet_loss_perc", self.packet_loss_perc),
+        )
+        for name, value in settings:
+            try:
+                self._set_ctl(name, value)
+                self._failed_ctls.discard(name)
+            except Exception as e:
+                if name not in self._failed_ctls:
+                    logger.warning(f"设置Opus编码器参数 {name} 失败: {e}")
+                    self._failed_ctls.add(name)
+        if not force:
+            self.adjustments += 1
+            logger.debug(
+                f"Opus编码器调整: complexity={self.complexity}, "
+                f"bitrate={self.bitrate}, fec={self.fec}, "
+                f"loss={self.packet_loss_perc}%"
+            )
+
+    def _set_ctl(self, name: str, value: int):
+        if name == "inband_fec":
+            # opuslib 3.0.1 的 inband_fec setter 漏传了参数，直接调用 encoder_ctl
+            import opuslib.api.ctl
+            import opuslib.api.encoder
+
+            opuslib.api.encoder.encoder_ctl(
+                self._encoder.encoder_state, opuslib.api.ctl.set_inband_fec, value
+            )
+        else:
+            setattr(self._encoder, name, value)
+
+    def snapshot(self) -> Dict:
+        return {
+            "adaptive": self.enabled,
+            "complexity": self.complexity,
+            "bitrate": self.bitrate,
+            "fec": self.fec,
+            "packet_loss_perc": self.packet_loss_perc,
+            "encode_ms_ewma": round(self._ewma_encode_ms, 3),
+            "encode_budget_ratio": (
+                round(self._ewma_encode_ms / self._frame_ms, 3)
+                if self._frame_ms
+                else 0.0
+            ),
+            "observed_loss": round(self._loss_ratio, 4),
+            "adjustments": self.adjustments,
+            "failed_ctls": sorted(self._failed_ctls),
+        }
@@ -106,3 +106,9 @@ class AudioConfig:
     INPUT_FRAME_SIZE = int(INPUT_SAMPLE_RATE * (FRAME_DURATION / 1000))
     # Linux系统使用固定帧大小以减少PCM打印，其他系统动态计算
     OUTPUT_FRAME_SIZE = int(OUTPUT_SAMPLE_RATE * (FRAME_DURATION / 1000))
+
+    # Opus 原生支持的编解码采样率，设备采样率在此列表中时可免重采样
+    OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+    # 打断播放时的淡出时长（毫秒）
+    FADE_OUT_MS = 10
@@ -0,0 +1,215 @@
+"""
+Quản lý kết nối giữ ấm: kết nối trước khi khởi động, tự kết nối lại nền khi rảnh
+và đo độ trễ từ lúc đánh thức đến khung âm thanh TTS đầu tiên.
+
+Đồng thời định kỳ đọc chỉ số chất lượng đường truyền của giao thức, báo tỉ lệ
+mất gói cho bộ điều khiển Opus và ghi nhật ký tóm tắt.
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Dict, Optional
+
+from src.audio_codecs.audio_stats import LatencyHistogram
+from src.protocols.link_telemetry import summarize_link_stats
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Phân nhóm độ trễ tương tác (mili giây)
+INTERACTION_BUCKETS_MS = (50, 100, 200, 300, 500, 800, 1200, 2000, 3000, 5000)
+
+
+class ConnectionManager:
+    """
+    Giữ kênh giao thức luôn mở để lần tương tác đầu tiên không phải chờ bắt tay.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+        cfg = app.config.get_config("SYSTEM_OPTIONS.NETWORK.CONNECTION", {}) or {}
+        self.enabled = bool(cfg.get("PREWARM", True))
+        self._base_delay = float(cfg.get("RECONNECT_BASE_DELAY", 1.0))
+        self._max_delay = float(cfg.get("RECONNECT_MAX_DELAY", 60.0))
+        self._check_interval = float(cfg.get("CHECK_INTERVAL", 5.0))
+
+        telemetry_cfg = (
+            app.config.get_config("SYSTEM_OPTIONS.NETWORK.TELEMETRY", {}) or {}
+        )
+        self._report_interval = float(telemetry_cfg.get("REPORT_INTERVAL", 5.0))
+        self._log_interval = float(telemetry_cfg.get("LOG_INTERVAL", 60.0))
+        self._telemetry_task: Optional[asyncio.Task] = None
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._failures = 0
+
+        # Thống kê kết nối
+        self.connect_attempts = 0
+        self.connect_successes = 0
+        self.last_error: Optional[str] = None
+        self.connected_since: Optional[float] = None
+        self.connect_time = LatencyHistogram(INTERACTION_BUCKETS_MS)
+
+        # Độ trễ tương tác: đánh thức -> kênh mở -> khung TTS đầu tiên
+        self._wake_at: Optional[float] = None
+        self._channel_ready_at: Optional[float] = None
+        self.wake_to_channel = LatencyHistogram(INTERACTION_BUCKETS_MS)
+        self.channel_to_first_audio = LatencyHistogram(INTERACTION_BUCKETS_MS)
+        self.wake_to_first_audio = LatencyHistogram(INTERACTION_BUCKETS_MS)
+
+    # -------------------------
+    # Vòng đời
+    # -------------------------
+    def start(self) -> None:
+        """
+        Khởi động nhiệm vụ giữ ấm kết nối (nếu được bật trong cấu hình).
+        """
+        if self._report_interval > 0:
+            self._telemetry_task = self.app.spawn(
+                self._telemetry_loop(), "conn:telemetry"
+            )
+        if not self.enabled:
+            logger.info("Kết nối giữ ấm bị tắt, kết nối theo yêu cầu")
+            return
+        self._wakeup = asyncio.Event()
+        self._task = self.app.spawn(self._keepalive_loop(), "conn:keepalive")
+
+    def notify_disconnected(self) -> None:
+        """
+        Được gọi khi kênh đóng: đánh thức vòng lặp để kết nối lại ngay.
+        """
+        self.connected_since = None
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _keepalive_loop(self) -> None:
+        while self.app.running:
+            if not self.app.is_audio_channel_opened() and self.app.is_idle():
+                ok = await self._try_connect()
+                if not ok:
+                    delay = self._backoff_delay()
+                    logger.info(
+                        f"Kết nối nền thất bại ({self._failures}), thử lại sau {delay:.1f}s"
+                    )
+                    await self._sleep(delay)
+                    continue
+            await self._sleep(self._check_interval)
+
+    async def _try_connect(self) -> bool:
+        self.connect_attempts += 1
+        started = time.monotonic()
+        try:
+            ok = await self.app.connect_protocol()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            ok = False
+            self.last_error = str(e)
+        if ok:
+            self._failures = 0
+            self.connect_successes += 1
+            self.connected_since = time.time()
+            self.connect_time.observe((time.monotonic() - started) * 1000)
+            logger.info("Kết nối giữ ấm đã sẵn sàng")
+        else:
+            self._failures += 1
+        return ok
+
+    def _backoff_delay(self) -> float:
+        """
+        Lùi theo cấp số nhân có jitter, tránh cả đội thiết bị kết nối lại cùng lúc.
+        """
+        exp = min(self._max_delay, self._base_delay * (2 ** min(self._failures, 10)))
+        return random.uniform(exp * 0.5, exp)
+
+    async def _sleep(self, seconds: float) -> None:
+        if self._wakeup is None:
+            await asyncio.sleep(seconds)
+            return
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    # -------------------------
+    # Chất lượng đường truyền
+    # -------------------------
+    def _get_telemetry(self):
+        protocol = getattr(self.app, "protocol", None)
+        return getattr(protocol, "telemetry", None) if protocol else None
+
+    async def _telemetry_loop(self) -> None:
+        last_log = time.monotonic()
+        while self.app.running:
+            await asyncio.sleep(self._report_interval)
+            telemetry = self._get_telemetry()
+            if telemetry is None or not self.app.is_audio_channel_opened():
+                continue
+            try:
+                # Chỉ quan sát được mất gói chiều xuống, dùng làm ước lượng cho
+                # chiều lên khi điều chỉnh FEC của bộ mã hoá
+                codec = getattr(self.app, "audio_codec", None)
+                controller = getattr(codec, "encoder_controller", None)
+                if controller is not None:
+                    controller.report_packet_loss(telemetry.loss_ratio)
+
+                now = time.monotonic()
+                if self._log_interval > 0 and now - last_log >= self._log_interval:
+                    last_log = now
+                    logger.info(
+                        f"Đường truyền: {summarize_link_stats(telemetry.snapshot())}"
+                    )
+            except Exception as e:
+                logger.debug(f"Đọc chỉ số đường truyền thất bại: {e}")
+
+    # -------------------------
+    # Đo độ trễ tương tác
+    # -------------------------
+    def mark_wake(self) -> None:
+        """
+        Đánh dấu thời điểm đánh thức / nhấn nút.
+        """
+        self._wake_at = time.monotonic()
+        self._channel_ready_at = None
+
+    def mark_channel_ready(self) -> None:
+        """
+        Đánh dấu kênh đã sẵn sàng cho lần tương tác hiện tại.
+        """
+        if self._wake_at is None or self._channel_ready_at is not None:
+            return
+        self._channel_ready_at = time.monotonic()
+        self.wake_to_channel.observe((self._channel_ready_at - self._wake_at) * 1000)
+
+    def mark_first_audio(self) -> None:
+        """
+        Đánh dấu khung âm thanh TTS đầu tiên của lần tương tác hiện tại.
+        """
+        if self._wake_at is None:
+            return
+        now = time.monotonic()
+        self.wake_to_first_audio.observe((now - self._wake_at) * 1000)
+        if self._channel_ready_at is not None:
+            self.channel_to_first_audio.observe((now - self._channel_ready_at) * 1000)
+        self._wake_at = None
+        self._channel_ready_at = None
+
+    def get_stats(self) -> Dict:
+        telemetry = self._get_telemetry()
+        return {
+            "prewarm": self.enabled,
+            "connected": self.app.is_audio_channel_opened(),
+            "connected_since": self.connected_since,
+            "connect_attempts": self.connect_attempts,
+            "connect_successes": self.connect_successes,
+            "consecutive_failures": self._failures,
+            "last_error": self.last_error,
+            "connect_time": self.connect_time.snapshot(),
+            "wake_to_channel": self.wake_to_channel.snapshot(),
+            "channel_to_first_audio": self.channel_to_first_audio.snapshot(),
+            "wake_to_first_audio": self.wake_to_first_audio.snapshot(),
+            "link": telemetry.snapshot() if telemetry is not None else None,
+        }
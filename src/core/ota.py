@@ -1,7 +1,11 @@
 import asyncio
 import json
+import os
 import socket
 import ssl
+import time
+from pathlib import Path
+from typing import Dict, Optional
 
 import aiohttp
 
@@ -10,6 +14,9 @@ from src.utils.config_manager import ConfigManager
 from src.utils.device_fingerprint import DeviceFingerprint
 from src.utils.logging_config import get_logger
 
+# Tệp lưu phản hồi OTA hợp lệ gần nhất (nằm trong thư mục cấu hình)
+OTA_CACHE_FILE = "ota_cache.json"
+
 
 class Ota:
     _instance = None
@@ -23,6 +30,12 @@ class Ota:
         self.ota_version_url = None
         self.local_ip = None
         self.system_info = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        cache_cfg = self.config.get_config("SYSTEM_OPTIONS.NETWORK.OTA_CACHE", {}) or {}
+        self.cache_enabled = bool(cache_cfg.get("ENABLED", True))
+        # Quá hạn cứng: bộ đệm cũ hơn mức này thì phải chờ OTA khi khởi động
+        self.cache_hard_expiry = float(cache_cfg.get("HARD_EXPIRY", 7 * 24 * 3600))
 
     @classmethod
     async def get_instance(cls):
@@ -39,6 +52,12 @@ class Ota:
         Khởi tạo thể hiện OTA.
         """
         self.local_ip = await self.get_local_ip()
+        self.load_identity()
+
+    def load_identity(self):
+        """
+        Đọc lại ID thiết bị và URL OTA từ cấu hình (có thể được ghi sau khi khởi tạo).
+        """
         # Lấy ID thiết bị (địa chỉ MAC) từ cấu hình
         self.mac_addr = self.config.get_config("SYSTEM_OPTIONS.DEVICE_ID")
         # Lấy URL OTA
@@ -117,9 +136,14 @@ class Ota:
 
         return headers
 
-    async def get_ota_config(self):
-        """
-        Lấy thông tin cấu hình từ máy chủ OTA (MQTT, WebSocket, v.v.)
+    async def get_ota_config(self, cache: Optional[Dict] = None):
+        """Lấy thông tin cấu hình từ máy chủ OTA (MQTT, WebSocket, v.v.)
+
+        Args:
+            cache: Bộ đệm hiện có; nếu có ETag/Last-Modified thì gửi yêu cầu có điều kiện
+
+        Returns:
+            Dữ liệu phản hồi, hoặc None khi máy chủ trả về 304 (bộ đệm vẫn hợp lệ)
         """
         if not self.mac_addr:
             self.logger.error("ID thiết bị (địa chỉ MAC) chưa được cấu hình")
@@ -131,6 +155,11 @@ class Ota:
 
         headers = self.build_headers()
         payload = self.build_payload()
+        if cache:
+            if cache.get("etag"):
+                headers["If-None-Match"] = cache["etag"]
+            if cache.get("last_modified"):
+                headers["If-Modified-Since"] = cache["last_modified"]
 
         try:
             # Vô hiệu hóa xác thực SSL để hỗ trợ chứng chỉ tự ký
@@ -147,6 +176,10 @@ class Ota:
                 async with session.post(
                     self.ota_version_url, headers=headers, json=payload
                 ) as response:
+                    if response.status == 304 and cache:
+                        self.logger.info("Cấu hình OTA không thay đổi (304)")
+                        return None
+
                     # Kiểm tra mã trạng thái HTTP
                     if response.status != 200:
                         self.logger.error(f"Lỗi từ máy chủ OTA: HTTP {response.status}")
@@ -161,6 +194,11 @@ class Ota:
                         f"{json.dumps(response_data, indent=4, ensure_ascii=False)}"
                     )
 
+                    self.save_cache(
+                        response_data,
+                        etag=response.headers.get("ETag"),
+                        last_modified=response.headers.get("Last-Modified"),
+                    )
                     return response_data
 
         except asyncio.TimeoutError:
@@ -223,26 +261,135 @@ class Ota:
 
         return None
 
-    async def fetch_and_update_config(self):
+    # -------------------------
+    # Bộ đệm OTA (stale-while-revalidate)
+    # -------------------------
+    def _cache_path(self) -> Path:
+        return Path(self.config.config_dir) / OTA_CACHE_FILE
+
+    def load_cache(self) -> Optional[Dict]:
         """
-        Lấy và cập nhật tất cả thông tin cấu hình.
+        Đọc bộ đệm OTA, trả về None nếu không có hoặc không đọc được.
         """
+        if not self.cache_enabled:
+            return None
         try:
-            # Lấy cấu hình OTA
-            response_data = await self.get_ota_config()
+            path = self._cache_path()
+            if not path.exists():
+                return None
+            cache = json.loads(path.read_text(encoding="utf-8"))
+            if not isinstance(cache.get("response"), dict):
+                return None
+            return cache
+        except Exception as e:
+            self.logger.warning(f"Không thể đọc bộ đệm OTA: {e}")
+            return None
+
+    def save_cache(self, response_data: Dict, etag=None, last_modified=None):
+        """
+        Ghi bộ đệm OTA (ghi tệp tạm rồi thay thế để tránh tệp hỏng khi mất điện).
+        """
+        if not self.cache_enabled:
+            return
+        cache = {
+            "fetched_at": time.time(),
+            "url": self.ota_version_url,
+            "device_id": self.mac_addr,
+            "etag": etag,
+            "last_modified": last_modified,
+            "response": response_data,
+        }
+        try:
+            path = self._cache_path()
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(cache, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+        except Exception as e:
+            self.logger.warning(f"Không thể ghi bộ đệm OTA: {e}")
 
+    def is_cache_usable(self, cache: Optional[Dict]) -> bool:
+        """
+        Bộ đệm chỉ dùng được khi cùng URL/thiết bị, chưa quá hạn cứng và
+        không chứa dữ liệu kích hoạt (mã kích hoạt có thời hạn, phải lấy mới).
+        """
+        if not cache:
+            return False
+        if cache.get("url") != self.ota_version_url:
+            return False
+        if cache.get("device_id") != self.mac_addr:
+            return False
+        if "activation" in cache["response"]:
+            return False
+        age = time.time() - float(cache.get("fetched_at", 0))
+        return 0 <= age < self.cache_hard_expiry
+
+    async def _apply_response(self, response_data: Dict) -> Dict:
+        # Ghi MQTT và WebSocket trong một lần
+        with self.config.batch():
             # Cập nhật cấu hình MQTT
             mqtt_config = await self.update_mqtt_config(response_data)
 
             # Cập nhật cấu hình WebSocket
             websocket_config = await self.update_websocket_config(response_data)
 
-            # Trả về dữ liệu phản hồi hoàn chỉnh, phục vụ cho quy trình kích hoạt
-            return {
-                "response_data": response_data,
-                "mqtt_config": mqtt_config,
-                "websocket_config": websocket_config,
-            }
+        # Trả về dữ liệu phản hồi hoàn chỉnh, phục vụ cho quy trình kích hoạt
+        return {
+            "response_data": response_data,
+            "mqtt_config": mqtt_config,
+            "websocket_config": websocket_config,
+        }
+
+    async def _revalidate(self, cache: Dict):
+        """
+        Làm mới bộ đệm ở nền; cấu hình mới có hiệu lực từ lần kết nối sau.
+        """
+        try:
+            response_data = await self.get_ota_config(cache=cache)
+            if response_data is None:
+                # 304: chỉ cập nhật thời điểm lấy
+                self.save_cache(
+                    cache["response"],
+                    etag=cache.get("etag"),
+                    last_modified=cache.get("last_modified"),
+                )
+                return
+            if response_data != cache["response"]:
+                await self._apply_response(response_data)
+                self.logger.info("Cấu hình OTA đã thay đổi, áp dụng từ lần kết nối sau")
+            else:
+                self.logger.info("Đã làm mới bộ đệm OTA ở nền")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.warning(f"Làm mới cấu hình OTA ở nền thất bại, tiếp tục dùng bộ đệm: {e}")
+
+    async def fetch_and_update_config(self, allow_cached: bool = True):
+        """Lấy và cập nhật tất cả thông tin cấu hình.
+
+        Khi có bộ đệm hợp lệ thì dùng ngay và làm mới ở nền, chỉ chờ OTA
+        khi chưa có bộ đệm hoặc bộ đệm đã quá hạn cứng.
+
+        Args:
+            allow_cached: False để bắt buộc chờ phản hồi OTA (ví dụ khi cần kích hoạt)
+        """
+        try:
+            cache = self.load_cache() if allow_cached else None
+            if self.is_cache_usable(cache):
+                age = time.time() - float(cache["fetched_at"])
+                self.logger.info(
+                    f"Dùng cấu hình OTA từ bộ đệm ({age:.0f}s trước), làm mới ở nền"
+                )
+                result = await self._apply_response(cache["response"])
+                if self._refresh_task is None or self._refresh_task.done():
+                    self._refresh_task = asyncio.create_task(self._revalidate(cache))
+                result.update({"source": "cache", "cache_age": age})
+                return result
+
+            # Lấy cấu hình OTA
+            response_data = await self.get_ota_config()
+            result = await self._apply_response(response_data)
+            result.update({"source": "network", "cache_age": 0.0})
+            return result
 
         except Exception as e:
             self.logger.error(f"Không thể lấy và cập nhật cấu hình: {e}")
@@ -7,8 +7,10 @@ Quy trình kích hoạt do người dùng tự thực hiện.
 
 import asyncio
 import json
+import logging
+import time
 from pathlib import Path
-from typing import Dict
+from typing import Awaitable, Callable, Dict, Sequence, Tuple
 
 from src.constants.system import InitializationStage
 from src.core.ota import Ota
@@ -33,6 +35,70 @@ class SystemInitializer:
             "server_activated": False,  # Trạng thái kích hoạt trên máy chủ
             "status_consistent": True,  # Trạng thái có nhất quán hay không
         }
+        # Thời gian từng giai đoạn: tên -> {"start_ms", "duration_ms"}
+        self.stage_timings: Dict[str, Dict[str, float]] = {}
+
+    def _stage_graph(
+        self,
+    ) -> Dict[str, Tuple[Callable[[], Awaitable[None]], Sequence[str]]]:
+        """Đồ thị phụ thuộc giữa các giai đoạn khởi tạo.
+
+        - Dấu vân tay thiết bị (I/O đồng bộ, chạy ngoài vòng lặp), CLIENT_ID và
+          dò IP cục bộ cho OTA không phụ thuộc nhau, chạy song song
+        - DEVICE_ID cần dấu vân tay; yêu cầu OTA cần DEVICE_ID và IP cục bộ
+
+        Returns:
+            tên giai đoạn -> (hàm coroutine, các giai đoạn phụ thuộc); phụ thuộc phải khai báo trước
+        """
+        return {
+            "device_fingerprint": (self.stage_1_device_fingerprint, ()),
+            "client_id": (self._prepare_config_manager, ()),
+            "ota_prepare": (self._prepare_ota, ()),
+            "config_management": (
+                self.stage_2_config_management,
+                ("device_fingerprint", "client_id"),
+            ),
+            "ota_config": (
+                self.stage_3_ota_config,
+                ("config_management", "ota_prepare"),
+            ),
+        }
+
+    async def _run_stage_graph(self, stages) -> None:
+        """
+        Chạy các giai đoạn theo đồ thị phụ thuộc, ghi lại thời gian từng giai đoạn.
+        """
+        origin = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(name, func, deps):
+            if deps:
+                await asyncio.gather(*(tasks[d] for d in deps))
+            started = time.perf_counter()
+            try:
+                await func()
+            finally:
+                self.stage_timings[name] = {
+                    "start_ms": round((started - origin) * 1000, 1),
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                }
+
+        for name, (func, deps) in stages.items():
+            tasks[name] = asyncio.create_task(run_stage(name, func, deps))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            total = (time.perf_counter() - origin) * 1000
+            breakdown = ", ".join(
+                f"{name} +{t['start_ms']:.0f}ms/{t['duration_ms']:.0f}ms"
+                for name, t in self.stage_timings.items()
+            )
+            logger.info(f"Thời gian khởi tạo: tổng {total:.0f}ms ({breakdown})")
 
     async def run_initialization(self) -> Dict:
         """Chạy quy trình khởi tạo hoàn chỉnh.
@@ -43,14 +109,8 @@ class SystemInitializer:
         logger.info("Bắt đầu quy trình khởi tạo hệ thống")
 
         try:
-            # Giai đoạn 1: Chuẩn bị danh tính thiết bị
-            await self.stage_1_device_fingerprint()
-
-            # Giai đoạn 2: Khởi tạo quản lý cấu hình
-            await self.stage_2_config_management()
-
-            # Giai đoạn 3: Lấy cấu hình OTA
-            await self.stage_3_ota_config()
+            # Giai đoạn 1-3 chạy theo đồ thị phụ thuộc, phần độc lập chạy song song
+            await self._run_stage_graph(self._stage_graph())
 
             # Lấy cấu hình phiên bản kích hoạt
             activation_version = self.config_manager.get_config(
@@ -71,12 +131,14 @@ class SystemInitializer:
                     "need_activation_ui": False,
                     "status_message": "Khởi tạo giao thức v1 hoàn thành",
                     "activation_version": activation_version,
+                    "stage_timings": self.stage_timings,
                 }
             else:
                 # Giao thức v2: Cần phân tích trạng thái kích hoạt
                 logger.info("Giao thức v2: Phân tích trạng thái kích hoạt")
                 activation_result = self.analyze_activation_status()
                 activation_result["activation_version"] = activation_version
+                activation_result["stage_timings"] = self.stage_timings
 
                 # Quyết định có cần quy trình kích hoạt hay không dựa trên kết quả phân tích
                 if activation_result["need_activation_ui"]:
@@ -97,41 +159,74 @@ class SystemInitializer:
         self.current_stage = InitializationStage.DEVICE_FINGERPRINT
         logger.info(f"Bắt đầu {self.current_stage.value}")
 
-        # Khởi tạo dấu vân tay thiết bị
-        self.device_fingerprint = DeviceFingerprint.get_instance()
-
-        # Đảm bảo thông tin danh tính thiết bị đầy đủ
+        # Đọc MAC/machine-id, băm và đọc ghi efuse.json đều là I/O đồng bộ,
+        # chạy trong luồng để không chặn các giai đoạn khác trên vòng lặp
+        loop = asyncio.get_running_loop()
         (
             serial_number,
             hmac_key,
             is_activated,
-        ) = self.device_fingerprint.ensure_device_identity()
+            mac_address,
+        ) = await loop.run_in_executor(None, self._load_device_identity)
 
         # Ghi lại trạng thái kích hoạt cục bộ
         self.activation_status["local_activated"] = is_activated
 
-        # Lấy địa chỉ MAC và đảm bảo định dạng chữ thường
-        mac_address = self.device_fingerprint.get_mac_address_from_efuse()
-
         logger.info(f"Số sê-ri thiết bị: {serial_number}")
         logger.info(f"Địa chỉ MAC: {mac_address}")
         logger.info(f"Khóa HMAC: {hmac_key[:8] if hmac_key else None}...")
         logger.info(f"Trạng thái kích hoạt cục bộ: {'Đã kích hoạt' if is_activated else 'Chưa kích hoạt'}")
 
+        logger.info(f"Hoàn thành {self.current_stage.value}")
+
+    def _load_device_identity(self):
+        """
+        Phần đồng bộ của giai đoạn 1 (chạy trong luồng executor).
+        """
+        # Khởi tạo dấu vân tay thiết bị
+        self.device_fingerprint = DeviceFingerprint.get_instance()
+
+        # Đảm bảo thông tin danh tính thiết bị đầy đủ
+        (
+            serial_number,
+            hmac_key,
+            is_activated,
+        ) = self.device_fingerprint.ensure_device_identity()
+
+        # Lấy địa chỉ MAC và đảm bảo định dạng chữ thường
+        mac_address = self.device_fingerprint.get_mac_address_from_efuse()
+
         # Xác minh tệp efuse.json có đầy đủ không
         efuse_file = Path("config/efuse.json")
         if efuse_file.exists():
             logger.info(f"Vị trí tệp efuse.json: {efuse_file.absolute()}")
-            with open(efuse_file, "r", encoding="utf-8") as f:
-                efuse_data = json.load(f)
-            logger.debug(
-                f"Nội dung efuse.json: "
-                f"{json.dumps(efuse_data, indent=2, ensure_ascii=False)}"
-            )
+            # Chỉ đọc lại nội dung khi cần ghi nhật ký gỡ lỗi
+            if logger.isEnabledFor(logging.DEBUG):
+                with open(efuse_file, "r", encoding="utf-8") as f:
+                    efuse_data = json.load(f)
+                logger.debug(
+                    f"Nội dung efuse.json: "
+                    f"{json.dumps(efuse_data, indent=2, ensure_ascii=False)}"
+                )
         else:
             logger.warning("Tệp efuse.json không tồn tại")
 
-        logger.info(f"Hoàn thành {self.current_stage.value}")
+        return serial_number, hmac_key, is_activated, mac_address
+
+    async def _prepare_config_manager(self):
+        """
+        Khởi tạo quản lý cấu hình và CLIENT_ID (không phụ thuộc dấu vân tay).
+        """
+        self.config_manager = ConfigManager.get_instance()
+
+        # Đảm bảo CLIENT_ID tồn tại
+        self.config_manager.initialize_client_id()
+
+    async def _prepare_ota(self):
+        """
+        Khởi tạo OTA (dò IP cục bộ) song song với dấu vân tay thiết bị.
+        """
+        self.ota = await Ota.get_instance()
 
     async def stage_2_config_management(self):
         """
@@ -140,11 +235,8 @@ class SystemInitializer:
         self.current_stage = InitializationStage.CONFIG_MANAGEMENT
         logger.info(f"Bắt đầu {self.current_stage.value}")
 
-        # Khởi tạo quản lý cấu hình
-        self.config_manager = ConfigManager.get_instance()
-
-        # Đảm bảo CLIENT_ID tồn tại
-        self.config_manager.initialize_client_id()
+        if self.config_manager is None:
+            await self._prepare_config_manager()
 
         # Khởi tạo DEVICE_ID từ dấu vân tay thiết bị
         self.config_manager.initialize_device_id_from_fingerprint(
@@ -167,14 +259,26 @@ class SystemInitializer:
         self.current_stage = InitializationStage.OTA_CONFIG
         logger.info(f"Bắt đầu {self.current_stage.value}")
 
-        # Khởi tạo OTA
-        self.ota = await Ota.get_instance()
+        # Khởi tạo OTA; DEVICE_ID có thể vừa được ghi ở giai đoạn 2
+        if self.ota is None:
+            await self._prepare_ota()
+        self.ota.load_identity()
 
         # Lấy và cập nhật cấu hình
         try:
-            config_result = await self.ota.fetch_and_update_config()
+            # Thiết bị v2 chưa kích hoạt cần mã kích hoạt mới, không dùng bộ đệm
+            activation_version = self.config_manager.get_config(
+                "SYSTEM_OPTIONS.NETWORK.ACTIVATION_VERSION", "v1"
+            )
+            allow_cached = (
+                activation_version == "v1" or self.activation_status["local_activated"]
+            )
+            config_result = await self.ota.fetch_and_update_config(
+                allow_cached=allow_cached
+            )
 
-            logger.info("Kết quả lấy cấu hình OTA:")
+            source = "bộ đệm" if config_result.get("source") == "cache" else "mạng"
+            logger.info(f"Kết quả lấy cấu hình OTA (nguồn: {source}):")
             mqtt_status = "Đã lấy" if config_result["mqtt_config"] else "Chưa lấy"
             logger.info(f"- Cấu hình MQTT: {mqtt_status}")
 
@@ -24,6 +24,9 @@ class CliDisplay(BaseDisplay):
         self._dash_connected = False
         self._dash_text = ""
         self._dash_emotion = ""
+        # Dòng chẩn đoán (bật/tắt bằng lệnh "s", làm mới mỗi giây)
+        self._dash_diag = ""
+        self._show_diag = False
         # Bố cục: Chỉ gồm hai khu vực (khu vực hiển thị + khu vực nhập liệu)
         # Dành riêng hai dòng cho khu vực nhập liệu (dòng phân cách + dòng nhập liệu),
         # và thêm một dòng để xóa tràn ký tự tiếng Trung (nếu có)
@@ -47,6 +50,7 @@ class CliDisplay(BaseDisplay):
         self.abort_callback = None
         self.send_text_callback = None
         self.mode_callback = None
+        self.diagnostics_callback = None
 
         # Hàng đợi bất đồng bộ để xử lý lệnh
         self.command_queue = asyncio.Queue()
@@ -63,6 +67,7 @@ class CliDisplay(BaseDisplay):
         auto_callback: Optional[Callable] = None,
         abort_callback: Optional[Callable] = None,
         send_text_callback: Optional[Callable] = None,
+        diagnostics_callback: Optional[Callable] = None,
     ):
         """
         Thiết lập các hàm callback.
@@ -71,6 +76,7 @@ class CliDisplay(BaseDisplay):
         self.abort_callback = abort_callback
         self.send_text_callback = send_text_callback
         self.mode_callback = mode_callback
+        self.diagnostics_callback = diagnostics_callback
 
     async def update_button_status(self, text: str):
         """
@@ -113,9 +119,10 @@ class CliDisplay(BaseDisplay):
         # Khởi động các tác vụ để xử lý lệnh
         command_task = asyncio.create_task(self._command_processor())
         input_task = asyncio.create_task(self._keyboard_input_loop())
+        diag_task = asyncio.create_task(self._diagnostics_loop())
 
         try:
-            await asyncio.gather(command_task, input_task)
+            await asyncio.gather(command_task, input_task, diag_task)
         except KeyboardInterrupt:
             await self.close()
 
@@ -137,6 +144,23 @@ class CliDisplay(BaseDisplay):
             except Exception as e:
                 self.logger.error(f"Lỗi xử lý lệnh: {e}")
 
+    async def _diagnostics_loop(self):
+        """
+        Làm mới dòng chẩn đoán mỗi giây khi chế độ xem chẩn đoán được bật.
+        """
+        try:
+            while self.running:
+                await asyncio.sleep(1.0)
+                if not self._show_diag or not self.diagnostics_callback:
+                    continue
+                try:
+                    self._dash_diag = self.diagnostics_callback() or ""
+                except Exception as e:
+                    self._dash_diag = f"Lỗi: {e}"
+                await self._render_dashboard()
+        except asyncio.CancelledError:
+            pass
+
     async def _keyboard_input_loop(self):
         """
         Vòng lặp nhập từ bàn phím.
@@ -211,6 +235,11 @@ class CliDisplay(BaseDisplay):
         elif cmd == "x":
             if self.abort_callback:
                 await self.command_queue.put(self.abort_callback)
+        elif cmd == "s":
+            self._show_diag = not self._show_diag
+            if not self._show_diag:
+                self._dash_diag = ""
+            await self._render_dashboard()
         else:
             if self.send_text_callback:
                 await self.send_text_callback(cmd)
@@ -226,7 +255,7 @@ class CliDisplay(BaseDisplay):
         """
         Ghi thông tin trợ giúp vào khu vực hiển thị nội dung phía trên thay vì in trực tiếp.
         """
-        help_text = "r: Bắt đầu/Dừng | x: Dừng | q: Thoát | h: Trợ giúp | Khác: Gửi văn bản"
+        help_text = "r: Bắt đầu/Dừng | x: Dừng | s: Chẩn đoán | q: Thoát | h: Trợ giúp | Khác: Gửi văn bản"
         self._dash_text = help_text
 
     async def _init_screen(self):
@@ -333,6 +362,8 @@ class CliDisplay(BaseDisplay):
             f"Biểu cảm: {trunc(self._dash_emotion)}",
             f"Văn bản: {trunc(self._dash_text)}",
         ]
+        if self._show_diag:
+            lines.append(f"Chẩn đoán: {trunc(self._dash_diag, 120)}")
 
         if not self._use_ansi:
             # Chế độ đơn giản: chỉ in dòng trạng thái cuối cùng
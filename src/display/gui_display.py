@@ -17,7 +17,7 @@ from PyQt5.QtWidgets import QApplication, QVBoxLayout, QWidget
 
 from src.display.base_display import BaseDisplay
 from src.display.gui_display_model import GuiDisplayModel
-from src.utils.resource_finder import find_assets_dir
+from src.utils.resource_finder import find_assets_subpath
 
 
 # Tạo metaclass tương thích
@@ -500,28 +500,22 @@ class GuiDisplay(BaseDisplay, QObject, metaclass=CombinedMeta):
         if emotion_name in self._emotion_cache:
             return self._emotion_cache[emotion_name]
 
-        assets_dir = find_assets_dir()
-        if not assets_dir:
-            path = "😊"
-        else:
-            emotion_dir = assets_dir / "emojis"
-            # Thử tìm file biểu cảm, nếu thất bại thì quay lại trạng thái neutral
-            path = (
-                str(self._find_emotion_file(emotion_dir, emotion_name))
-                or str(self._find_emotion_file(emotion_dir, "neutral"))
-                or "😊"
-            )
+        # Thử tìm file biểu cảm, nếu thất bại thì quay lại trạng thái neutral
+        found = self._find_emotion_file(emotion_name) or self._find_emotion_file(
+            "neutral"
+        )
+        path = str(found) if found else "😊"
 
         self._emotion_cache[emotion_name] = path
         return path
 
-    def _find_emotion_file(self, emotion_dir: Path, name: str) -> Optional[Path]:
+    def _find_emotion_file(self, name: str) -> Optional[Path]:
         """
-        Tìm file biểu cảm trong thư mục chỉ định.
+        Tìm file biểu cảm trong assets/emojis qua chỉ mục của resource_finder.
         """
         for ext in self.EMOTION_EXTENSIONS:
-            file_path = emotion_dir / f"{name}{ext}"
-            if file_path.exists():
+            file_path = find_assets_subpath("emojis", f"{name}{ext}")
+            if file_path:
                 return file_path
         return None
 
@@ -14,6 +14,7 @@ from .tools import (
     get_categories,
     get_events_by_date,
     get_upcoming_events,
+    search_events,
     update_event,
 )
 
@@ -31,5 +32,6 @@ __all__ = [
     "get_categories",
     "get_events_by_date",
     "get_upcoming_events",
+    "search_events",
     "update_event",
 ]
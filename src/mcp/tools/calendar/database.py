@@ -1,16 +1,34 @@
 """
 日程管理SQLite数据库操作模块.
+
+所有语句都在专用的数据库线程上通过同一条长连接执行（WAL 模式），
+事件循环侧通过异步接口等待结果，不再阻塞 asyncio.
 """
 
+import asyncio
+import json
 import os
+import re
 import sqlite3
-from contextlib import contextmanager
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import threading
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
 from src.utils.logging_config import get_logger
 from src.utils.resource_finder import get_user_data_dir
 
+from .models import EventSummary
+from .recurrence import (
+    expansion_window,
+    iter_starts,
+    next_occurrence,
+    occurrence_windows,
+    parse_exdates,
+    series_end_ts,
+)
+
 logger = get_logger(__name__)
 
 
@@ -27,23 +45,398 @@ def _get_database_file_path() -> str:
 # 数据库文件路径 - 使用函数获取确保可写
 DATABASE_FILE = _get_database_file_path()
 
+# 长连接的 PRAGMA：WAL 允许读写并发，NORMAL 同步在 WAL 下仍保证一致性
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-4096",
+    "PRAGMA busy_timeout=5000",
+    # INSERT OR REPLACE 删除旧行时也触发删除触发器，保持全文索引同步
+    "PRAGMA recursive_triggers=ON",
+)
+
+# 连接级预编译语句缓存大小；语句文本保持为常量才能命中
+_STATEMENT_CACHE_SIZE = 128
+
+# 常用语句（固定文本，复用连接上的预编译语句）
+_SQL_INSERT_EVENT = """
+    INSERT INTO events (
+        id, title, start_time, end_time, description,
+        category, reminder_minutes, reminder_time, reminder_sent,
+        created_at, updated_at, start_ts, end_ts, reminder_ts,
+        rrule, exdates, series_end_ts
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+# 区间重叠：start < new_end AND end > new_start；再以最长事件时长给 start_ts
+# 加下界，使 (start_ts, end_ts) 索引上的扫描范围有界（只查单次事件）
+_SQL_CONFLICTS = """
+    SELECT title, start_ts, end_ts FROM events
+    WHERE start_ts >= ? AND start_ts < ? AND end_ts > ? AND id != ?
+    AND rrule IS NULL
+"""
+_SQL_MAX_SPAN = "SELECT COALESCE(MAX(end_ts - start_ts), 0) FROM events"
+# 与 [window_start, window_end] 可能有实例重叠的重复系列（走系列的部分索引）
+_SQL_SERIES = """
+    SELECT * FROM events
+    WHERE rrule IS NOT NULL AND start_ts <= ?
+    AND (series_end_ts IS NULL OR series_end_ts >= ?)
+"""
+# 单次事件的范围查询条件（重复系列由调用方按窗口展开）
+_SINGLE_ONLY = " AND rrule IS NULL"
+# 列表/播报用的投影查询：只取 EventSummary 的列，按 (start_ts, id) 游标分页
+_SQL_SUMMARIES = """
+    SELECT start_ts, id, end_ts, title, category, description FROM events
+    WHERE start_ts >= ? AND start_ts <= ? AND rrule IS NULL
+    AND (start_ts > ? OR (start_ts = ? AND id > ?)){category}
+    ORDER BY start_ts, id
+    LIMIT ?
+"""
+_SQL_SUMMARIES_ALL = _SQL_SUMMARIES.format(category="")
+_SQL_SUMMARIES_BY_CATEGORY = _SQL_SUMMARIES.format(category=" AND category = ?")
+_SQL_EVENT_BY_ID = "SELECT * FROM events WHERE id = ?"
+_SQL_INSERT_CATEGORY = "INSERT OR IGNORE INTO categories (name) VALUES (?)"
+_SQL_PENDING_REMINDERS = """
+    SELECT * FROM events
+    WHERE reminder_sent = 0
+    AND reminder_ts <= ?
+    AND (start_ts > ? OR rrule IS NOT NULL)
+    ORDER BY reminder_ts
+"""
+# 提醒调度：取近期到期的提醒与下一个到期时间（均走未发送提醒的部分索引）
+_SQL_UPCOMING_REMINDERS = """
+    SELECT reminder_ts, id FROM events
+    WHERE reminder_sent = 0 AND reminder_ts <= ?
+    ORDER BY reminder_ts
+    LIMIT ?
+"""
+_SQL_NEXT_REMINDER = """
+    SELECT MIN(reminder_ts) FROM events
+    WHERE reminder_sent = 0 AND reminder_ts IS NOT NULL
+"""
+_SQL_MARK_REMINDER_SENT = """
+    UPDATE events
+    SET reminder_sent = 1, updated_at = ?
+    WHERE id = ?
+"""
+
+# 索引：范围查询与冲突检测、未发送提醒（部分索引）、按分类筛选、重复系列
+_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_events_start ON events (start_ts, end_ts)",
+    "CREATE INDEX IF NOT EXISTS idx_events_pending_reminder "
+    "ON events (reminder_ts) WHERE reminder_sent = 0",
+    "CREATE INDEX IF NOT EXISTS idx_events_category ON events (category, start_ts)",
+    "CREATE INDEX IF NOT EXISTS idx_events_series "
+    "ON events (start_ts) WHERE rrule IS NOT NULL",
+)
+
+# 新增重复事件的冲突检查只展开此范围内的实例
+_CONFLICT_HORIZON = timedelta(days=90)
+
+
+def _to_ts(value: Optional[str]) -> Optional[int]:
+    """
+    ISO 时间转为可排序的整数秒（无时区按本地时间）.
+    """
+    if not value:
+        return None
+    return int(datetime.fromisoformat(value).timestamp())
+
+
+# 全文索引：unicode61 会把连续汉字当作一个词，写入前由 fts_segment 把汉字逐字
+# 拆开，查询时汉字按相邻二字短语匹配、其余词按前缀匹配，结果按 bm25 排序
+_CJK_CHAR = re.compile(r"([\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff])")
+_CJK_RUN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+_WORD = re.compile(r"[^\W_]+")
+# 语音查询中常见、对检索无帮助的英文虚词
+_STOPWORDS = frozenset(
+    "a an and are at for from in is it me my of on or the to was what when "
+    "where which who with".split()
+)
+
+_FTS_SCHEMA = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+        title, description, category,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+""",
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts (rowid, title, description, category)
+        VALUES (
+            new.rowid, fts_segment(new.title),
+            fts_segment(new.description), fts_segment(new.category)
+        );
+    END
+""",
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+        DELETE FROM events_fts WHERE rowid = old.rowid;
+    END
+""",
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_update
+    AFTER UPDATE OF title, description, category ON events BEGIN
+        UPDATE events_fts SET
+            title = fts_segment(new.title),
+            description = fts_segment(new.description),
+            category = fts_segment(new.category)
+        WHERE rowid = new.rowid;
+    END
+""",
+)
+_SQL_FTS_REBUILD = """
+    INSERT INTO events_fts (rowid, title, description, category)
+    SELECT rowid, fts_segment(title), fts_segment(description), fts_segment(category)
+    FROM events
+"""
+# 标题命中权重最高，其次描述、分类；单次事件按开始时间过滤，
+# 重复系列按与 _SQL_SERIES 相同的条件保留可能在窗口内有实例的系列
+_SQL_SEARCH = """
+    SELECT e.*, bm25(events_fts, 10.0, 3.0, 1.0) AS score
+    FROM events_fts
+    JOIN events AS e ON e.rowid = events_fts.rowid
+    WHERE events_fts MATCH ?
+    AND (
+        (e.rrule IS NULL AND e.start_ts >= ? AND e.start_ts <= ?)
+        OR (
+            e.rrule IS NOT NULL AND e.start_ts <= ?
+            AND (e.series_end_ts IS NULL OR e.series_end_ts >= ?)
+        )
+    )
+    ORDER BY score
+    LIMIT ?
+"""
+
+
+def fts_segment(text: Optional[str]) -> str:
+    """
+    汉字逐字加空格，使 unicode61 分词后每个汉字为一个词.
+    """
+    if not text:
+        return ""
+    return _CJK_CHAR.sub(r" \1 ", text)
+
+
+def build_fts_query(text: str) -> Optional[str]:
+    """把自然语言查询转换为 FTS5 MATCH 表达式（各词项 OR 连接，由 bm25 排序）.
+
+    汉字串拆成相邻二字短语（单字则为单字），其余词去掉虚词后做前缀匹配；
+    没有可用词项时返回 None。
+    """
+    terms: List[str] = []
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1:
+            terms.append(f'"{run}"')
+        else:
+            terms.extend(f'"{run[i]} {run[i + 1]}"' for i in range(len(run) - 1))
+    for word in _WORD.findall(_CJK_RUN.sub(" ", text).lower()):
+        if word in _STOPWORDS:
+            continue
+        # 两个字符以下的词前缀过宽，只做精确匹配
+        terms.append(f'"{word}"*' if len(word) > 2 else f'"{word}"')
+    # 去重并保持顺序
+    terms = list(dict.fromkeys(terms))
+    return " OR ".join(terms) if terms else None
+
+
+def register_sql_functions(conn: sqlite3.Connection):
+    """
+    注册全文索引触发器依赖的 SQL 函数（直接打开数据库的连接也需调用）.
+    """
+    conn.create_function("fts_segment", 1, fts_segment, deterministic=True)
+
+
+def _series_reminder_time(event_data: Dict[str, Any], after: datetime) -> Optional[str]:
+    """
+    重复系列在 after（含）之后下一个实例的提醒时间，没有后续实例时为 None.
+    """
+    occurrence = next_occurrence(event_data, after, inclusive=True)
+    if occurrence is None:
+        return None
+    minutes = event_data.get("reminder_minutes") or 0
+    return (occurrence - timedelta(minutes=minutes)).isoformat()
+
+
+def _event_row(event_data: Dict[str, Any]) -> tuple:
+    rule = event_data.get("rrule")
+    reminder_time = event_data.get("reminder_time")
+    end_ts = None
+    if rule:
+        # 系列只存一行，提醒指向下一个尚未开始的实例
+        reminder_time = _series_reminder_time(event_data, datetime.now())
+        end_ts = series_end_ts(rule, event_data["start_time"], event_data["end_time"])
+    return (
+        event_data["id"],
+        event_data["title"],
+        event_data["start_time"],
+        event_data["end_time"],
+        event_data.get("description", ""),
+        event_data.get("category", "默认"),
+        event_data.get("reminder_minutes", 15),
+        reminder_time,
+        event_data.get("reminder_sent", False) or (bool(rule) and not reminder_time),
+        event_data["created_at"],
+        event_data["updated_at"],
+        _to_ts(event_data["start_time"]),
+        _to_ts(event_data["end_time"]),
+        _to_ts(reminder_time),
+        rule,
+        json.dumps(event_data.get("exdates") or [], ensure_ascii=False),
+        end_ts,
+    )
+
+
+def _overlaps(windows: List[tuple], start_ts: int, end_ts: int) -> bool:
+    """
+    判断 [start_ts, end_ts) 是否与任一窗口重叠.
+
+    windows 为同一事件的实例区间，按开始时间排序且时长相同（结束时间同样有序），
+    只需检查开始早于 end_ts 的最后一个窗口。
+    """
+    index = bisect_left(windows, (end_ts,))
+    return index > 0 and windows[index - 1][1] > start_ts
+
+
+def _filter_clause(
+    start_date: str = None, end_date: str = None, category: str = None
+) -> tuple:
+    """
+    构建按开始时间范围与分类筛选的 WHERE 子句.
+    """
+    clause = " WHERE 1=1"
+    params = []
+
+    if start_date:
+        clause += " AND start_ts >= ?"
+        params.append(_to_ts(start_date))
+
+    if end_date:
+        clause += " AND start_ts <= ?"
+        params.append(_to_ts(end_date))
+
+    if category:
+        clause += " AND category = ?"
+        params.append(category)
+
+    return clause, params
+
 
 class CalendarDatabase:
     """
     日程管理数据库操作类.
     """
 
-    def __init__(self):
-        self.db_file = DATABASE_FILE
+    def __init__(self, db_file: str = None):
+        self.db_file = db_file or DATABASE_FILE
+        # 单线程执行器即数据库线程，连接只在该线程上创建和使用
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="calendar-db"
+        )
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_thread_id: Optional[int] = None
+        # 已有事件的最长时长（秒），冲突查询的扫描下界；删除事件时不收缩
+        self._max_span: Optional[int] = None
+        # 日程变更监听（提醒调度据此提前醒来），在调用方线程上回调
+        self._change_listeners: List[Callable[[], None]] = []
         self._ensure_database()
 
+    # -------- 数据库线程 --------
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        返回长连接，首次使用时打开并应用 PRAGMA（仅在数据库线程上调用）.
+        """
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.db_file,
+                check_same_thread=False,
+                cached_statements=_STATEMENT_CACHE_SIZE,
+            )
+            conn.row_factory = sqlite3.Row  # 使结果可以按列名访问
+            register_sql_functions(conn)
+            for pragma in _PRAGMAS:
+                conn.execute(pragma)
+            self._conn = conn
+        return self._conn
+
+    def _invoke(self, fn: Callable, args: tuple):
+        self._db_thread_id = threading.get_ident()
+        conn = self._connection()
+        try:
+            return fn(conn, *args)
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            logger.error(f"数据库操作失败: {e}")
+            raise
+
+    def call(self, fn: Callable, *args):
+        """
+        在数据库线程上执行 fn(conn, *args) 并同步等待结果.
+        """
+        if threading.get_ident() == self._db_thread_id:
+            return self._invoke(fn, args)
+        return self._executor.submit(self._invoke, fn, args).result()
+
+    async def run(self, fn: Callable, *args):
+        """
+        在数据库线程上执行 fn(conn, *args)，异步等待结果.
+        """
+        return await asyncio.wrap_future(self._executor.submit(self._invoke, fn, args))
+
+    def close(self):
+        """
+        关闭长连接，下次访问时重新打开.
+        """
+
+        def _close(conn: sqlite3.Connection):
+            try:
+                conn.execute("PRAGMA optimize")
+            finally:
+                conn.close()
+                self._conn = None
+
+        try:
+            if self._conn is not None:
+                self.call(_close)
+        except Exception as e:
+            logger.warning(f"关闭数据库连接失败: {e}")
+
+    def add_change_listener(self, callback: Callable[[], None]):
+        """
+        注册日程变更回调（增删改成功后触发）.
+        """
+        if callback not in self._change_listeners:
+            self._change_listeners.append(callback)
+
+    def remove_change_listener(self, callback: Callable[[], None]):
+        try:
+            self._change_listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def _notify_changed(self):
+        for callback in list(self._change_listeners):
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"日程变更回调失败: {e}")
+
+    # -------- 建表与升级 --------
+
     def _ensure_database(self):
         """
         确保数据库和表存在.
         """
         os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+        self.call(self._create_schema)
+        logger.info("数据库初始化完成")
 
-        with self._get_connection() as conn:
+    def _create_schema(self, conn: sqlite3.Connection):
+        with conn:
             # 创建事件表
             conn.execute(
                 """
@@ -58,7 +451,13 @@ class CalendarDatabase:
                     reminder_time TEXT,
                     reminder_sent BOOLEAN DEFAULT 0,
                     created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
+                    updated_at TEXT NOT NULL,
+                    start_ts INTEGER,
+                    end_ts INTEGER,
+                    reminder_ts INTEGER,
+                    rrule TEXT,
+                    exdates TEXT,
+                    series_end_ts INTEGER
                 )
             """
             )
@@ -75,178 +474,355 @@ class CalendarDatabase:
 
             # 插入默认分类
             default_categories = ["默认", "工作", "个人", "会议", "提醒"]
-            for category in default_categories:
-                conn.execute(
-                    "INSERT OR IGNORE INTO categories (name) VALUES (?)", (category,)
-                )
-
-            conn.commit()
-
-            # 检查并添加新字段（数据库升级）
-            self._upgrade_database(conn)
+            conn.executemany(
+                _SQL_INSERT_CATEGORY, [(name,) for name in default_categories]
+            )
 
-            logger.info("数据库初始化完成")
+        # 检查并添加新字段（数据库升级）
+        self._upgrade_database(conn)
 
-    @contextmanager
-    def _get_connection(self):
+    def _upgrade_database(self, conn: sqlite3.Connection):
         """
-        获取数据库连接的上下文管理器.
+        升级数据库结构.
         """
-        conn = None
         try:
-            conn = sqlite3.connect(self.db_file)
-            conn.row_factory = sqlite3.Row  # 使结果可以按列名访问
-            yield conn
+            # 检查是否存在新字段
+            cursor = conn.execute("PRAGMA table_info(events)")
+            columns = [col[1] for col in cursor.fetchall()]
+
+            with conn:
+                # 添加reminder_time字段
+                if "reminder_time" not in columns:
+                    conn.execute("ALTER TABLE events ADD COLUMN reminder_time TEXT")
+                    logger.info("已添加reminder_time字段")
+
+                # 添加reminder_sent字段
+                if "reminder_sent" not in columns:
+                    conn.execute(
+                        "ALTER TABLE events ADD COLUMN reminder_sent BOOLEAN DEFAULT 0"
+                    )
+                    logger.info("已添加reminder_sent字段")
+
+                # 添加整数时间字段（可排序，供索引与区间查询使用）
+                for column in ("start_ts", "end_ts", "reminder_ts"):
+                    if column not in columns:
+                        conn.execute(f"ALTER TABLE events ADD COLUMN {column} INTEGER")
+                        logger.info(f"已添加{column}字段")
+
+                # 添加重复规则字段：规则、排除的实例、系列结束时间
+                for column, kind in (
+                    ("rrule", "TEXT"),
+                    ("exdates", "TEXT"),
+                    ("series_end_ts", "INTEGER"),
+                ):
+                    if column not in columns:
+                        conn.execute(f"ALTER TABLE events ADD COLUMN {column} {kind}")
+                        logger.info(f"已添加{column}字段")
+
+                # 为现有事件计算并设置reminder_time与整数时间
+                cursor = conn.execute(
+                    "SELECT id, start_time, end_time, reminder_minutes, reminder_time "
+                    "FROM events WHERE reminder_time IS NULL OR start_ts IS NULL "
+                    "OR end_ts IS NULL"
+                )
+                updates = []
+                for row in cursor.fetchall():
+                    event_id, start_time, end_time, minutes, reminder_time = row
+                    try:
+                        if not reminder_time:
+                            start_dt = datetime.fromisoformat(start_time)
+                            reminder_dt = start_dt - timedelta(minutes=minutes)
+                            reminder_time = reminder_dt.isoformat()
+                        updates.append(
+                            (
+                                reminder_time,
+                                _to_ts(start_time),
+                                _to_ts(end_time),
+                                _to_ts(reminder_time),
+                                event_id,
+                            )
+                        )
+                    except Exception as e:
+                        logger.warning(f"计算事件{event_id}的提醒时间失败: {e}")
+
+                if updates:
+                    conn.executemany(
+                        "UPDATE events SET reminder_time = ?, start_ts = ?, "
+                        "end_ts = ?, reminder_ts = ? WHERE id = ?",
+                        updates,
+                    )
+                    logger.info(f"已为{len(updates)}个现有事件设置提醒时间与整数时间")
+
+                for statement in _INDEXES:
+                    conn.execute(statement)
+
+                # 全文索引：首次创建时从现有事件回填
+                has_fts = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'events_fts'"
+                ).fetchone()
+                for statement in _FTS_SCHEMA:
+                    conn.execute(statement)
+                if not has_fts:
+                    conn.execute(_SQL_FTS_REBUILD)
+                    logger.info("已建立日程全文索引")
+
+            # 索引变化后刷新查询规划统计
+            conn.execute("PRAGMA optimize")
+            self._max_span = None
+
         except Exception as e:
-            if conn:
-                conn.rollback()
-            logger.error(f"数据库操作失败: {e}")
-            raise
-        finally:
-            if conn:
-                conn.close()
+            logger.error(f"数据库升级失败: {e}", exc_info=True)
+
+    # -------- 事件 --------
 
-    def add_event(self, event_data: Dict[str, Any]) -> bool:
+    async def add_event(self, event_data: Dict[str, Any]) -> bool:
         """
         添加事件.
         """
         try:
-            with self._get_connection() as conn:
-                # 检查时间冲突
-                if self._has_conflict(conn, event_data):
-                    return False
-
-                conn.execute(
-                    """
-                    INSERT INTO events (
-                        id, title, start_time, end_time, description,
-                        category, reminder_minutes, reminder_time, reminder_sent,
-                        created_at, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                    (
-                        event_data["id"],
-                        event_data["title"],
-                        event_data["start_time"],
-                        event_data["end_time"],
-                        event_data["description"],
-                        event_data["category"],
-                        event_data["reminder_minutes"],
-                        event_data.get("reminder_time"),
-                        event_data.get("reminder_sent", False),
-                        event_data["created_at"],
-                        event_data["updated_at"],
-                    ),
-                )
-                conn.commit()
-                logger.info(f"添加事件成功: {event_data['title']}")
-                return True
+            added = await self.run(self._add_event, event_data)
         except Exception as e:
             logger.error(f"添加事件失败: {e}")
             return False
-
-    def get_events(
+        if added:
+            self._notify_changed()
+        return added
+
+    def _add_event(self, conn: sqlite3.Connection, event_data: Dict[str, Any]):
+        with conn:
+            # 检查时间冲突
+            if self._has_conflict(conn, event_data):
+                return False
+
+            row = _event_row(event_data)
+            conn.execute(_SQL_INSERT_EVENT, row)
+            self._extend_span(row[11], row[12])
+        logger.info(f"添加事件成功: {event_data['title']}")
+        return True
+
+    async def add_events(self, events: Iterable[Dict[str, Any]]) -> int:
+        """批量添加事件（单个事务，不做冲突检查），返回写入数量.
+
+        用于导入与批量生成，逐条添加请使用 add_event.
+        """
+        rows = [_event_row(event_data) for event_data in events]
+        if not rows:
+            return 0
+        try:
+            written = await self.run(self._add_events, rows)
+        except Exception as e:
+            logger.error(f"批量添加事件失败: {e}")
+            return 0
+        self._notify_changed()
+        return written
+
+    def _add_events(self, conn: sqlite3.Connection, rows: List[tuple]) -> int:
+        with conn:
+            conn.executemany(_SQL_INSERT_EVENT, rows)
+        for row in rows:
+            self._extend_span(row[11], row[12])
+        logger.info(f"批量添加事件成功，共 {len(rows)} 个")
+        return len(rows)
+
+    async def get_events(
         self, start_date: str = None, end_date: str = None, category: str = None
     ) -> List[Dict[str, Any]]:
         """
         获取事件列表.
         """
         try:
-            with self._get_connection() as conn:
-                query = "SELECT * FROM events WHERE 1=1"
-                params = []
-
-                if start_date:
-                    query += " AND start_time >= ?"
-                    params.append(start_date)
-
-                if end_date:
-                    query += " AND start_time <= ?"
-                    params.append(end_date)
+            return await self.run(self._get_events, start_date, end_date, category)
+        except Exception as e:
+            logger.error(f"获取事件失败: {e}")
+            return []
 
-                if category:
-                    query += " AND category = ?"
-                    params.append(category)
+    def _get_events(
+        self,
+        conn: sqlite3.Connection,
+        start_date: str = None,
+        end_date: str = None,
+        category: str = None,
+    ) -> List[Dict[str, Any]]:
+        clause, params = _filter_clause(start_date, end_date, category)
+        cursor = conn.execute(
+            "SELECT * FROM events" + clause + _SINGLE_ONLY + " ORDER BY start_ts",
+            params,
+        )
+        return [dict(row) for row in cursor.fetchall()]
 
-                query += " ORDER BY start_time"
+    async def get_event_summaries(
+        self,
+        start_date: str = None,
+        end_date: str = None,
+        category: str = None,
+        after: tuple = None,
+        limit: int = 20,
+    ) -> List[EventSummary]:
+        """获取单次事件的精简记录（投影查询，不构造完整行）.
 
-                cursor = conn.execute(query, params)
-                rows = cursor.fetchall()
+        Args:
+            after: 分页游标 (start_ts, id)，只返回排在其后的事件
+            limit: 最多返回的数量
+        """
+        after_ts, after_id = after or (-(2**62), "")
+        params = [
+            _to_ts(start_date) if start_date else -(2**62),
+            _to_ts(end_date) if end_date else 2**62,
+            after_ts,
+            after_ts,
+            after_id,
+        ]
+        query = _SQL_SUMMARIES_ALL
+        if category:
+            query = _SQL_SUMMARIES_BY_CATEGORY
+            params.append(category)
+        params.append(max(1, int(limit)))
+        try:
+            return await self.run(self._fetch_summaries, query, tuple(params))
+        except Exception as e:
+            logger.error(f"获取事件摘要失败: {e}")
+            return []
 
-                events = []
-                for row in rows:
-                    events.append(dict(row))
+    def _fetch_summaries(
+        self, conn: sqlite3.Connection, query: str, params: tuple
+    ) -> List[EventSummary]:
+        # 直接取元组，跳过 sqlite3.Row 与字典转换
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        return list(map(EventSummary._make, cursor.execute(query, params)))
 
-                return events
+    async def get_series(
+        self, start_date: str = None, end_date: str = None, category: str = None
+    ) -> List[Dict[str, Any]]:
+        """
+        获取可能在 [start_date, end_date] 内有实例的重复系列（未展开）.
+        """
+        params = (
+            _to_ts(end_date) if end_date else 2**62,
+            _to_ts(start_date) if start_date else -(2**62),
+        )
+        query = _SQL_SERIES
+        if category:
+            query += " AND category = ?"
+            params += (category,)
+        try:
+            return await self.run(self._fetch_dicts, query, params)
         except Exception as e:
-            logger.error(f"获取事件失败: {e}")
+            logger.error(f"获取重复日程失败: {e}")
             return []
 
-    def update_event(self, event_id: str, **kwargs) -> bool:
+    async def update_event(self, event_id: str, **kwargs) -> bool:
         """
         更新事件.
         """
         try:
-            with self._get_connection() as conn:
-                # 构建更新查询
-                set_clauses = []
-                params = []
-
-                for key, value in kwargs.items():
-                    if key in [
-                        "title",
-                        "start_time",
-                        "end_time",
-                        "description",
-                        "category",
-                        "reminder_minutes",
-                    ]:
-                        set_clauses.append(f"{key} = ?")
-                        params.append(value)
-
-                if not set_clauses:
-                    return False
-
-                # 添加更新时间
-                set_clauses.append("updated_at = ?")
-                params.append(datetime.now().isoformat())
-                params.append(event_id)
-
-                query = f"UPDATE events SET {', '.join(set_clauses)} WHERE id = ?"
-
-                cursor = conn.execute(query, params)
-                conn.commit()
-
-                if cursor.rowcount > 0:
-                    logger.info(f"更新事件成功: {event_id}")
-                    return True
-                else:
-                    logger.warning(f"事件不存在: {event_id}")
-                    return False
+            updated = await self.run(self._update_event, event_id, kwargs)
         except Exception as e:
             logger.error(f"更新事件失败: {e}")
             return False
+        if updated:
+            self._notify_changed()
+        return updated
+
+    def _update_event(
+        self, conn: sqlite3.Connection, event_id: str, fields: Dict[str, Any]
+    ) -> bool:
+        updates = {
+            key: value
+            for key, value in fields.items()
+            if key
+            in [
+                "title",
+                "start_time",
+                "end_time",
+                "description",
+                "category",
+                "reminder_minutes",
+                "rrule",
+            ]
+        }
+
+        if not updates:
+            return False
+
+        # 时间相关字段变化时同步整数时间与提醒时间，提醒时间变化则重新允许提醒
+        if {"start_time", "end_time", "reminder_minutes", "rrule"} & updates.keys():
+            current = conn.execute(_SQL_EVENT_BY_ID, (event_id,)).fetchone()
+            if current is None:
+                logger.warning(f"事件不存在: {event_id}")
+                return False
+            merged = {**dict(current), **updates}
+            start_time = merged["start_time"]
+            end_time = merged["end_time"]
+            if merged["rrule"]:
+                # 重复系列：提醒指向下一个尚未开始的实例
+                reminder_time = _series_reminder_time(merged, datetime.now())
+                end_ts = series_end_ts(merged["rrule"], start_time, end_time)
+            else:
+                reminder_dt = datetime.fromisoformat(start_time) - timedelta(
+                    minutes=merged["reminder_minutes"]
+                )
+                reminder_time = reminder_dt.isoformat()
+                end_ts = None
+            updates.update(
+                start_ts=_to_ts(start_time),
+                end_ts=_to_ts(end_time),
+                reminder_time=reminder_time,
+                reminder_ts=_to_ts(reminder_time),
+                series_end_ts=end_ts,
+            )
+            if reminder_time is None:
+                updates["reminder_sent"] = 1
+            elif reminder_time != current["reminder_time"]:
+                updates["reminder_sent"] = 0
+            self._extend_span(updates["start_ts"], updates["end_ts"])
+
+        # 构建更新查询
+        set_clauses = [f"{key} = ?" for key in updates]
+        params = list(updates.values())
 
-    def delete_event(self, event_id: str) -> bool:
+        # 添加更新时间
+        set_clauses.append("updated_at = ?")
+        params.append(datetime.now().isoformat())
+        params.append(event_id)
+
+        query = f"UPDATE events SET {', '.join(set_clauses)} WHERE id = ?"
+
+        with conn:
+            cursor = conn.execute(query, params)
+
+        if cursor.rowcount > 0:
+            logger.info(f"更新事件成功: {event_id}")
+            return True
+        else:
+            logger.warning(f"事件不存在: {event_id}")
+            return False
+
+    async def delete_event(self, event_id: str) -> bool:
         """
         删除事件.
         """
         try:
-            with self._get_connection() as conn:
-                cursor = conn.execute("DELETE FROM events WHERE id = ?", (event_id,))
-                conn.commit()
-
-                if cursor.rowcount > 0:
-                    logger.info(f"删除事件成功: {event_id}")
-                    return True
-                else:
-                    logger.warning(f"事件不存在: {event_id}")
-                    return False
+            deleted = await self.run(self._delete_event, event_id)
         except Exception as e:
             logger.error(f"删除事件失败: {e}")
             return False
+        if deleted:
+            self._notify_changed()
+        return deleted
 
-    def delete_events_batch(
+    def _delete_event(self, conn: sqlite3.Connection, event_id: str) -> bool:
+        with conn:
+            cursor = conn.execute("DELETE FROM events WHERE id = ?", (event_id,))
+
+        if cursor.rowcount > 0:
+            logger.info(f"删除事件成功: {event_id}")
+            return True
+        else:
+            logger.warning(f"事件不存在: {event_id}")
+            return False
+
+    async def delete_events_batch(
         self,
         start_date: str = None,
         end_date: str = None,
@@ -265,92 +841,12 @@ class CalendarDatabase:
             包含删除结果的字典
         """
         try:
-            with self._get_connection() as conn:
-                if delete_all:
-                    # 删除所有事件
-                    cursor = conn.execute("SELECT COUNT(*) FROM events")
-                    total_count = cursor.fetchone()[0]
-
-                    if total_count == 0:
-                        return {
-                            "success": True,
-                            "deleted_count": 0,
-                            "message": "没有事件需要删除",
-                        }
-
-                    cursor = conn.execute("DELETE FROM events")
-                    conn.commit()
-
-                    logger.info(f"删除所有事件成功，共删除 {total_count} 个事件")
-                    return {
-                        "success": True,
-                        "deleted_count": total_count,
-                        "message": f"成功删除所有 {total_count} 个事件",
-                    }
-
-                else:
-                    # 按条件删除事件
-                    # 首先查询符合条件的事件
-                    query = "SELECT id, title FROM events WHERE 1=1"
-                    params = []
-
-                    if start_date:
-                        query += " AND start_time >= ?"
-                        params.append(start_date)
-
-                    if end_date:
-                        query += " AND start_time <= ?"
-                        params.append(end_date)
-
-                    if category:
-                        query += " AND category = ?"
-                        params.append(category)
-
-                    cursor = conn.execute(query, params)
-                    events_to_delete = cursor.fetchall()
-
-                    if not events_to_delete:
-                        return {
-                            "success": True,
-                            "deleted_count": 0,
-                            "message": "没有符合条件的事件需要删除",
-                        }
-
-                    # 执行删除
-                    delete_query = "DELETE FROM events WHERE 1=1"
-                    delete_params = []
-
-                    if start_date:
-                        delete_query += " AND start_time >= ?"
-                        delete_params.append(start_date)
-
-                    if end_date:
-                        delete_query += " AND start_time <= ?"
-                        delete_params.append(end_date)
-
-                    if category:
-                        delete_query += " AND category = ?"
-                        delete_params.append(category)
-
-                    cursor = conn.execute(delete_query, delete_params)
-                    deleted_count = cursor.rowcount
-                    conn.commit()
-
-                    # 记录删除的事件标题
-                    deleted_titles = [event[1] for event in events_to_delete]
-                    logger.info(
-                        f"批量删除事件成功，共删除 {deleted_count} 个事件: "
-                        f"{', '.join(deleted_titles[:3])}"
-                        f"{'...' if len(deleted_titles) > 3 else ''}"
-                    )
-
-                    return {
-                        "success": True,
-                        "deleted_count": deleted_count,
-                        "deleted_titles": deleted_titles,
-                        "message": f"成功删除 {deleted_count} 个事件",
-                    }
-
+            result = await self.run(
+                self._delete_events_batch, start_date, end_date, category, delete_all
+            )
+            if result.get("deleted_count"):
+                self._notify_changed()
+            return result
         except Exception as e:
             logger.error(f"批量删除事件失败: {e}")
             return {
@@ -359,159 +855,580 @@ class CalendarDatabase:
                 "message": f"批量删除失败: {str(e)}",
             }
 
-    def get_event_by_id(self, event_id: str) -> Optional[Dict[str, Any]]:
+    def _delete_events_batch(
+        self,
+        conn: sqlite3.Connection,
+        start_date: str,
+        end_date: str,
+        category: str,
+        delete_all: bool,
+    ) -> Dict[str, Any]:
+        if delete_all:
+            # 删除所有事件
+            with conn:
+                cursor = conn.execute("DELETE FROM events")
+            total_count = cursor.rowcount
+
+            if total_count == 0:
+                return {
+                    "success": True,
+                    "deleted_count": 0,
+                    "message": "没有事件需要删除",
+                }
+
+            logger.info(f"删除所有事件成功，共删除 {total_count} 个事件")
+            return {
+                "success": True,
+                "deleted_count": total_count,
+                "message": f"成功删除所有 {total_count} 个事件",
+            }
+
+        # 按条件删除事件：先查询标题，再在同一事务内删除
+        clause, params = _filter_clause(start_date, end_date, category)
+        # 按时间范围删除时重复系列只排除窗口内的实例；仅按分类删除时整个系列删除
+        by_range = bool(start_date or end_date)
+        if by_range:
+            clause += _SINGLE_ONLY
+        with conn:
+            cursor = conn.execute("SELECT id, title FROM events" + clause, params)
+            deleted_titles = [event[1] for event in cursor.fetchall()]
+            cursor = conn.execute("DELETE FROM events" + clause, params)
+            deleted_count = cursor.rowcount
+            if by_range:
+                excluded = self._exclude_series_in_window(
+                    conn, start_date, end_date, category
+                )
+                deleted_titles.extend(excluded)
+                deleted_count += len(excluded)
+
+        if not deleted_count:
+            return {
+                "success": True,
+                "deleted_count": 0,
+                "message": "没有符合条件的事件需要删除",
+            }
+
+        # 记录删除的事件标题
+        logger.info(
+            f"批量删除事件成功，共删除 {deleted_count} 个事件: "
+            f"{', '.join(deleted_titles[:3])}"
+            f"{'...' if len(deleted_titles) > 3 else ''}"
+        )
+
+        return {
+            "success": True,
+            "deleted_count": deleted_count,
+            "deleted_titles": deleted_titles,
+            "message": f"成功删除 {deleted_count} 个事件",
+        }
+
+    def _exclude_series_in_window(
+        self,
+        conn: sqlite3.Connection,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        category: Optional[str],
+    ) -> List[str]:
+        """
+        把窗口内各重复系列的实例写入 exdates（不自行提交），返回被排除实例的标题.
+        """
+        params = (
+            _to_ts(end_date) if end_date else 2**62,
+            _to_ts(start_date) if start_date else -(2**62),
+        )
+        query = _SQL_SERIES
+        if category:
+            query += " AND category = ?"
+            params += (category,)
+        window_start = datetime.fromisoformat(start_date) if start_date else None
+        window_end = datetime.fromisoformat(end_date) if end_date else None
+
+        titles = []
+        for row in conn.execute(query, params).fetchall():
+            series = dict(row)
+            lo, hi = expansion_window(series, window_start, window_end)
+            for occurrence in list(iter_starts(series, lo, hi)):
+                if self._exclude_occurrence(conn, series["id"], occurrence.isoformat()):
+                    titles.append(series["title"])
+        return titles
+
+    async def get_event_by_id(self, event_id: str) -> Optional[Dict[str, Any]]:
         """
         根据ID获取事件.
         """
         try:
-            with self._get_connection() as conn:
-                cursor = conn.execute("SELECT * FROM events WHERE id = ?", (event_id,))
-                row = cursor.fetchone()
-
-                if row:
-                    return dict(row)
-                return None
+            return await self.run(self._get_event_by_id, event_id)
         except Exception as e:
             logger.error(f"获取事件失败: {e}")
             return None
 
-    def get_categories(self) -> List[str]:
+    def _get_event_by_id(
+        self, conn: sqlite3.Connection, event_id: str
+    ) -> Optional[Dict[str, Any]]:
+        row = conn.execute(_SQL_EVENT_BY_ID, (event_id,)).fetchone()
+        return dict(row) if row else None
+
+    async def search_events(
+        self,
+        query: str,
+        start_date: str = None,
+        end_date: str = None,
+        limit: int = 10,
+    ) -> List[Dict[str, Any]]:
+        """
+        全文搜索事件（标题/描述/分类），可按开始时间范围过滤，按相关度排序.
+
+        重复系列以系列行返回（未展开），由调用方按窗口取实例.
+        """
+        match = build_fts_query(query or "")
+        if not match:
+            return []
+        start_ts = _to_ts(start_date) if start_date else -(2**62)
+        end_ts = _to_ts(end_date) if end_date else 2**62
+        params = (match, start_ts, end_ts, end_ts, start_ts, max(1, int(limit)))
+        try:
+            return await self.run(self._fetch_dicts, _SQL_SEARCH, params)
+        except Exception as e:
+            logger.error(f"搜索事件失败: {e}")
+            return []
+
+    def _has_conflict(
+        self, conn: sqlite3.Connection, event_data: Dict[str, Any]
+    ) -> bool:
+        """检查时间冲突.
+
+        新事件为重复系列时只检查 _CONFLICT_HORIZON 内的实例；已有重复系列只在
+        新事件所覆盖的时间窗内展开。
+        """
+        if event_data.get("rrule"):
+            start = datetime.fromisoformat(event_data["start_time"])
+            windows = occurrence_windows(event_data, start, start + _CONFLICT_HORIZON)
+            if not windows:
+                return False
+        else:
+            windows = [
+                (_to_ts(event_data["start_time"]), _to_ts(event_data["end_time"]))
+            ]
+        window_start = windows[0][0]
+        window_end = max(end for _, end in windows)
+
+        if self._max_span is None:
+            self._max_span = conn.execute(_SQL_MAX_SPAN).fetchone()[0] or 0
+        cursor = conn.execute(
+            _SQL_CONFLICTS,
+            (
+                window_start - self._max_span,
+                window_end,
+                window_start,
+                event_data["id"],
+            ),
+        )
+        conflicting_events = [
+            row[0] for row in cursor if _overlaps(windows, row[1], row[2])
+        ]
+
+        cursor = conn.execute(
+            _SQL_SERIES + " AND id != ?", (window_end, window_start, event_data["id"])
+        )
+        for series in cursor.fetchall():
+            for start_ts, end_ts in occurrence_windows(
+                dict(series),
+                datetime.fromtimestamp(window_start),
+                datetime.fromtimestamp(window_end),
+            ):
+                if _overlaps(windows, start_ts, end_ts):
+                    conflicting_events.append(series["title"])
+                    break
+
+        for title in conflicting_events:
+            logger.warning(f"时间冲突: 与事件 '{title}' 冲突")
+        return bool(conflicting_events)
+
+    def _extend_span(self, start_ts: Optional[int], end_ts: Optional[int]):
+        if self._max_span is not None and start_ts is not None and end_ts is not None:
+            self._max_span = max(self._max_span, end_ts - start_ts)
+
+    # -------- 分类 --------
+
+    async def get_categories(self) -> List[str]:
         """
         获取所有分类.
         """
         try:
-            with self._get_connection() as conn:
-                cursor = conn.execute("SELECT name FROM categories ORDER BY name")
-                rows = cursor.fetchall()
-                return [row[0] for row in rows]
+            return await self.run(self._get_categories)
         except Exception as e:
             logger.error(f"获取分类失败: {e}")
             return ["默认"]
 
-    def add_category(self, category_name: str) -> bool:
+    def _get_categories(self, conn: sqlite3.Connection) -> List[str]:
+        cursor = conn.execute("SELECT name FROM categories ORDER BY name")
+        return [row[0] for row in cursor.fetchall()]
+
+    async def add_category(self, category_name: str) -> bool:
         """
         添加新分类.
         """
         try:
-            with self._get_connection() as conn:
-                conn.execute(
-                    "INSERT OR IGNORE INTO categories (name) VALUES (?)",
-                    (category_name,),
-                )
-                conn.commit()
-                logger.info(f"添加分类成功: {category_name}")
-                return True
+            await self.run(self._add_category, category_name)
+            logger.info(f"添加分类成功: {category_name}")
+            return True
         except Exception as e:
             logger.error(f"添加分类失败: {e}")
             return False
 
-    def delete_category(self, category_name: str) -> bool:
+    def _add_category(self, conn: sqlite3.Connection, category_name: str):
+        with conn:
+            conn.execute(_SQL_INSERT_CATEGORY, (category_name,))
+
+    async def delete_category(self, category_name: str) -> bool:
         """
         删除分类（如果没有事件使用）
         """
         try:
-            with self._get_connection() as conn:
-                # 检查是否有事件使用该分类
-                cursor = conn.execute(
-                    "SELECT COUNT(*) FROM events WHERE category = ?", (category_name,)
-                )
-                count = cursor.fetchone()[0]
-
-                if count > 0:
-                    logger.warning(f"分类 '{category_name}' 正在使用中，无法删除")
-                    return False
-
-                cursor = conn.execute(
-                    "DELETE FROM categories WHERE name = ?", (category_name,)
-                )
-                conn.commit()
-
-                if cursor.rowcount > 0:
-                    logger.info(f"删除分类成功: {category_name}")
-                    return True
-                else:
-                    logger.warning(f"分类不存在: {category_name}")
-                    return False
+            return await self.run(self._delete_category, category_name)
         except Exception as e:
             logger.error(f"删除分类失败: {e}")
             return False
 
-    def _has_conflict(
-        self, conn: sqlite3.Connection, event_data: Dict[str, Any]
-    ) -> bool:
+    def _delete_category(self, conn: sqlite3.Connection, category_name: str) -> bool:
+        with conn:
+            # 检查是否有事件使用该分类
+            cursor = conn.execute(
+                "SELECT COUNT(*) FROM events WHERE category = ?", (category_name,)
+            )
+            count = cursor.fetchone()[0]
+
+            if count > 0:
+                logger.warning(f"分类 '{category_name}' 正在使用中，无法删除")
+                return False
+
+            cursor = conn.execute(
+                "DELETE FROM categories WHERE name = ?", (category_name,)
+            )
+
+        if cursor.rowcount > 0:
+            logger.info(f"删除分类成功: {category_name}")
+            return True
+        else:
+            logger.warning(f"分类不存在: {category_name}")
+            return False
+
+    # -------- 提醒 --------
+
+    async def get_pending_reminders(
+        self, now: str, not_started_after: str
+    ) -> List[Dict[str, Any]]:
         """
-        检查时间冲突.
+        查询提醒时间已到、尚未发送且开始时间晚于 not_started_after 的事件.
         """
-        cursor = conn.execute(
-            """
-            SELECT title FROM events
-            WHERE id != ? AND (
-                (start_time < ? AND end_time > ?) OR
-                (start_time < ? AND end_time > ?)
+        try:
+            return await self.run(
+                self._fetch_dicts,
+                _SQL_PENDING_REMINDERS,
+                (_to_ts(now), _to_ts(not_started_after)),
             )
-        """,
-            (
-                event_data["id"],
-                event_data["end_time"],
-                event_data["start_time"],
-                event_data["start_time"],
-                event_data["end_time"],
-            ),
+        except Exception as e:
+            logger.error(f"查询待发送提醒失败: {e}")
+            return []
+
+    async def get_upcoming_reminders(self, until: float, limit: int) -> List[tuple]:
+        """
+        返回提醒时间不晚于 until（时间戳）的未发送提醒 (reminder_ts, id)，按时间升序.
+        """
+        return await self.run(
+            self._fetch_rows, _SQL_UPCOMING_REMINDERS, (int(until), limit)
         )
 
-        conflicting_events = cursor.fetchall()
+    async def get_next_reminder_ts(self) -> Optional[int]:
+        """
+        返回最早的未发送提醒时间戳，没有时为 None.
+        """
+        rows = await self.run(self._fetch_rows, _SQL_NEXT_REMINDER, ())
+        return rows[0][0] if rows else None
+
+    async def mark_reminder_sent(self, event_id: str, skip_before: str = None) -> bool:
+        """标记提醒已发送.
 
-        if conflicting_events:
-            for event in conflicting_events:
-                logger.warning(f"时间冲突: 与事件 '{event[0]}' 冲突")
+        重复系列不标记，而是把提醒推进到下一个实例；开始时间早于 skip_before 的
+        实例一并跳过（离线期间错过的实例）。
+        """
+        try:
+            await self.run(self._mark_reminder_sent, event_id, skip_before)
             return True
+        except Exception as e:
+            logger.error(f"标记提醒已发送失败: {e}")
+            return False
 
-        return False
+    def _mark_reminder_sent(
+        self, conn: sqlite3.Connection, event_id: str, skip_before: Optional[str]
+    ):
+        now = datetime.now().isoformat()
+        row = conn.execute(_SQL_EVENT_BY_ID, (event_id,)).fetchone()
+        if row is None or not row["rrule"] or not row["reminder_time"]:
+            self._execute_write(conn, _SQL_MARK_REMINDER_SENT, (now, event_id))
+            return
+
+        minutes = timedelta(minutes=row["reminder_minutes"] or 0)
+        after = datetime.fromisoformat(row["reminder_time"]) + minutes
+        if skip_before:
+            after = max(after, datetime.fromisoformat(skip_before))
+        occurrence = next_occurrence(dict(row), after)
+        reminder_time = (occurrence - minutes).isoformat() if occurrence else None
+        with conn:
+            self._set_reminder(conn, event_id, reminder_time, now)
+
+    def _set_reminder(
+        self,
+        conn: sqlite3.Connection,
+        event_id: str,
+        reminder_time: Optional[str],
+        now: str,
+        **fields,
+    ):
+        """
+        改写重复系列的提醒时间（None 表示系列已无后续实例），可同时更新其他字段.
 
-    def get_statistics(self) -> Dict[str, Any]:
+        不自行提交，由调用方的事务包裹.
         """
-        获取统计信息.
+        fields.update(
+            reminder_time=reminder_time,
+            reminder_ts=_to_ts(reminder_time),
+            reminder_sent=0 if reminder_time else 1,
+            updated_at=now,
+        )
+        set_clause = ", ".join(f"{key} = ?" for key in fields)
+        conn.execute(
+            f"UPDATE events SET {set_clause} WHERE id = ?",
+            (*fields.values(), event_id),
+        )
+
+    async def add_exdate(self, series_id: str, occurrence_start: str) -> bool:
+        """
+        排除重复系列中的一个实例（按实例开始时间）.
         """
         try:
-            with self._get_connection() as conn:
-                # 总事件数
-                cursor = conn.execute("SELECT COUNT(*) FROM events")
-                total_events = cursor.fetchone()[0]
+            excluded = await self.run(self._add_exdate, series_id, occurrence_start)
+        except Exception as e:
+            logger.error(f"排除重复实例失败: {e}")
+            return False
+        if excluded:
+            self._notify_changed()
+        return excluded
 
-                # 按分类统计
-                cursor = conn.execute(
-                    """
-                    SELECT category, COUNT(*)
-                    FROM events
-                    GROUP BY category
-                    ORDER BY COUNT(*) DESC
-                """
-                )
-                category_stats = dict(cursor.fetchall())
+    def _add_exdate(
+        self, conn: sqlite3.Connection, series_id: str, occurrence_start: str
+    ) -> bool:
+        with conn:
+            return self._exclude_occurrence(conn, series_id, occurrence_start)
 
-                # 今天的事件数
-                today = datetime.now().strftime("%Y-%m-%d")
-                cursor = conn.execute(
-                    """
-                    SELECT COUNT(*) FROM events
-                    WHERE date(start_time) = ?
-                """,
-                    (today,),
-                )
-                today_events = cursor.fetchone()[0]
+    def _exclude_occurrence(
+        self, conn: sqlite3.Connection, series_id: str, occurrence_start: str
+    ) -> bool:
+        """
+        把实例开始时间写入系列的 exdates（不自行提交）.
+        """
+        row = conn.execute(_SQL_EVENT_BY_ID, (series_id,)).fetchone()
+        if row is None or not row["rrule"]:
+            logger.warning(f"重复日程不存在: {series_id}")
+            return False
 
-                return {
-                    "total_events": total_events,
-                    "category_stats": category_stats,
-                    "today_events": today_events,
-                }
+        series = dict(row)
+        occurrence = datetime.fromisoformat(occurrence_start)
+        exdates = parse_exdates(series["exdates"])
+        if occurrence.isoformat() not in exdates:
+            exdates.append(occurrence.isoformat())
+        series["exdates"] = exdates
+
+        # 提醒正指向被排除的实例时推进到下一个实例
+        reminder_time = series["reminder_time"]
+        minutes = timedelta(minutes=series["reminder_minutes"] or 0)
+        pointed = (
+            datetime.fromisoformat(reminder_time) + minutes if reminder_time else None
+        )
+        if pointed == occurrence:
+            following = next_occurrence(series, occurrence)
+            reminder_time = (following - minutes).isoformat() if following else None
+
+        self._set_reminder(
+            conn,
+            series_id,
+            reminder_time,
+            datetime.now().isoformat(),
+            exdates=json.dumps(exdates, ensure_ascii=False),
+        )
+        logger.info(f"已排除重复日程实例: {series['title']} {occurrence_start}")
+        return True
+
+    async def detach_occurrence(
+        self, series_id: str, occurrence_start: str, event_data: Dict[str, Any]
+    ) -> bool:
+        """单独修改重复系列中的一个实例.
+
+        在同一事务内排除该实例并另存为单次事件 event_data，新时间有冲突时整体回滚。
+        """
+        try:
+            detached = await self.run(
+                self._detach_occurrence, series_id, occurrence_start, event_data
+            )
+        except Exception as e:
+            logger.error(f"修改重复实例失败: {e}")
+            return False
+        if detached:
+            self._notify_changed()
+        return detached
+
+    def _detach_occurrence(
+        self,
+        conn: sqlite3.Connection,
+        series_id: str,
+        occurrence_start: str,
+        event_data: Dict[str, Any],
+    ) -> bool:
+        with conn:
+            if not self._exclude_occurrence(conn, series_id, occurrence_start):
+                return False
+            if self._has_conflict(conn, event_data):
+                conn.rollback()
+                return False
+            row = _event_row(event_data)
+            conn.execute(_SQL_INSERT_EVENT, row)
+            self._extend_span(row[11], row[12])
+        logger.info(f"已单独修改重复日程实例: {event_data['title']}")
+        return True
+
+    async def reset_future_reminder_flags(self, now: str) -> int:
+        """
+        重置开始时间在 now 之后事件的提醒标志，返回重置数量.
+        """
+        return await self.run(
+            self._execute_write,
+            """
+            UPDATE events
+            SET reminder_sent = 0, updated_at = ?
+            WHERE start_ts > ? AND reminder_sent = 1 AND rrule IS NULL
+        """,
+            (now, _to_ts(now)),
+        )
+
+    async def mark_expired_reminders(self, now: str, threshold: str) -> int:
+        """
+        将开始时间早于 threshold 且未提醒的单次事件标记为已提醒，返回数量.
+        """
+        return await self.run(
+            self._execute_write,
+            """
+            UPDATE events
+            SET reminder_sent = 1, updated_at = ?
+            WHERE start_ts < ? AND reminder_sent = 0 AND rrule IS NULL
+        """,
+            (now, _to_ts(threshold)),
+        )
+
+    def _fetch_dicts(
+        self, conn: sqlite3.Connection, query: str, params: tuple
+    ) -> List[Dict[str, Any]]:
+        return [dict(row) for row in conn.execute(query, params).fetchall()]
+
+    def _fetch_rows(
+        self, conn: sqlite3.Connection, query: str, params: tuple
+    ) -> List[tuple]:
+        return [tuple(row) for row in conn.execute(query, params).fetchall()]
+
+    def _execute_write(
+        self, conn: sqlite3.Connection, query: str, params: tuple
+    ) -> int:
+        with conn:
+            cursor = conn.execute(query, params)
+        return cursor.rowcount
+
+    # -------- 统计与迁移 --------
+
+    async def get_statistics(self) -> Dict[str, Any]:
+        """
+        获取统计信息.
+        """
+        try:
+            return await self.run(self._get_statistics)
         except Exception as e:
             logger.error(f"获取统计信息失败: {e}")
             return {}
 
+    def _get_statistics(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        # 总事件数
+        cursor = conn.execute("SELECT COUNT(*) FROM events")
+        total_events = cursor.fetchone()[0]
+
+        # 按分类统计
+        cursor = conn.execute(
+            """
+            SELECT category, COUNT(*)
+            FROM events
+            GROUP BY category
+            ORDER BY COUNT(*) DESC
+        """
+        )
+        category_stats = dict(cursor.fetchall())
+
+        # 今天的事件数
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        tomorrow = today + timedelta(days=1)
+        cursor = conn.execute(
+            """
+            SELECT COUNT(*) FROM events
+            WHERE start_ts >= ? AND start_ts < ?
+        """,
+            (int(today.timestamp()), int(tomorrow.timestamp())),
+        )
+        today_events = cursor.fetchone()[0]
+
+        return {
+            "total_events": total_events,
+            "category_stats": category_stats,
+            "today_events": today_events,
+        }
+
+    def query_plans(self) -> Dict[str, List[str]]:
+        """
+        返回热点查询的 EXPLAIN QUERY PLAN 明细，用于确认索引命中.
+        """
+        range_clause, _ = _filter_clause("2024-01-01", "2024-01-02")
+        category_clause, _ = _filter_clause("2024-01-01", "2024-01-02", "工作")
+        queries = {
+            "range": (
+                "SELECT * FROM events"
+                + range_clause
+                + _SINGLE_ONLY
+                + " ORDER BY start_ts",
+                2,
+            ),
+            "range_category": (
+                "SELECT * FROM events"
+                + category_clause
+                + _SINGLE_ONLY
+                + " ORDER BY start_ts",
+                3,
+            ),
+            "conflict": (_SQL_CONFLICTS, 4),
+            "series": (_SQL_SERIES, 2),
+            "summaries": (_SQL_SUMMARIES_ALL, 6),
+            "pending_reminders": (_SQL_PENDING_REMINDERS, 2),
+            "upcoming_reminders": (_SQL_UPCOMING_REMINDERS, 2),
+            "next_reminder": (_SQL_NEXT_REMINDER, 0),
+            "search": (_SQL_SEARCH, 6),
+        }
+
+        def _explain(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+            plans = {}
+            for name, (query, arity) in queries.items():
+                rows = conn.execute("EXPLAIN QUERY PLAN " + query, (0,) * arity)
+                plans[name] = [row[3] for row in rows.fetchall()]
+            return plans
+
+        return self.call(_explain)
+
     def migrate_from_json(self, json_file_path: str) -> bool:
         """
-        从JSON文件迁移数据.
+        从JSON文件迁移数据（启动时同步调用，在数据库线程上单事务批量写入）.
         """
         try:
             import json
@@ -526,97 +1443,51 @@ class CalendarDatabase:
             events_data = data.get("events", [])
             categories_data = data.get("categories", [])
 
-            with self._get_connection() as conn:
-                # 迁移分类
-                for category in categories_data:
-                    conn.execute(
-                        "INSERT OR IGNORE INTO categories (name) VALUES (?)",
-                        (category,),
-                    )
+            now = datetime.now().isoformat()
+            category_rows = [(category,) for category in categories_data]
+            event_rows = [
+                (
+                    event_data["id"],
+                    event_data["title"],
+                    event_data["start_time"],
+                    event_data["end_time"],
+                    event_data.get("description", ""),
+                    event_data.get("category", "默认"),
+                    event_data.get("reminder_minutes", 15),
+                    event_data.get("created_at", now),
+                    event_data.get("updated_at", now),
+                )
+                for event_data in events_data
+            ]
 
-                # 迁移事件
-                for event_data in events_data:
-                    conn.execute(
+            def _migrate(conn: sqlite3.Connection):
+                with conn:
+                    # 迁移分类
+                    conn.executemany(_SQL_INSERT_CATEGORY, category_rows)
+
+                    # 迁移事件
+                    conn.executemany(
                         """
                         INSERT OR REPLACE INTO events (
                             id, title, start_time, end_time, description,
                             category, reminder_minutes, created_at, updated_at
                         ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """,
-                        (
-                            event_data["id"],
-                            event_data["title"],
-                            event_data["start_time"],
-                            event_data["end_time"],
-                            event_data.get("description", ""),
-                            event_data.get("category", "默认"),
-                            event_data.get("reminder_minutes", 15),
-                            event_data.get("created_at", datetime.now().isoformat()),
-                            event_data.get("updated_at", datetime.now().isoformat()),
-                        ),
+                        event_rows,
                     )
+                # 补齐迁移事件的提醒时间
+                self._upgrade_database(conn)
 
-                conn.commit()
-                logger.info(
-                    f"成功迁移 {len(events_data)} 个事件和 {len(categories_data)} 个分类"
-                )
-                return True
+            self.call(_migrate)
+            logger.info(
+                f"成功迁移 {len(events_data)} 个事件和 {len(categories_data)} 个分类"
+            )
+            return True
 
         except Exception as e:
             logger.error(f"数据迁移失败: {e}")
             return False
 
-    def _upgrade_database(self, conn: sqlite3.Connection):
-        """
-        升级数据库结构.
-        """
-        try:
-            # 检查是否存在新字段
-            cursor = conn.execute("PRAGMA table_info(events)")
-            columns = [col[1] for col in cursor.fetchall()]
-
-            # 添加reminder_time字段
-            if "reminder_time" not in columns:
-                conn.execute("ALTER TABLE events ADD COLUMN reminder_time TEXT")
-                logger.info("已添加reminder_time字段")
-
-            # 添加reminder_sent字段
-            if "reminder_sent" not in columns:
-                conn.execute(
-                    "ALTER TABLE events ADD COLUMN reminder_sent BOOLEAN DEFAULT 0"
-                )
-                logger.info("已添加reminder_sent字段")
-
-            # 为现有事件计算并设置reminder_time
-            cursor = conn.execute(
-                "SELECT id, start_time, reminder_minutes "
-                "FROM events WHERE reminder_time IS NULL"
-            )
-            events_to_update = cursor.fetchall()
-
-            for event in events_to_update:
-                event_id, start_time, reminder_minutes = event
-                try:
-                    from datetime import timedelta
-
-                    start_dt = datetime.fromisoformat(start_time)
-                    reminder_dt = start_dt - timedelta(minutes=reminder_minutes)
-
-                    conn.execute(
-                        "UPDATE events SET reminder_time = ? WHERE id = ?",
-                        (reminder_dt.isoformat(), event_id),
-                    )
-                except Exception as e:
-                    logger.warning(f"计算事件{event_id}的提醒时间失败: {e}")
-
-            if events_to_update:
-                logger.info(f"已为{len(events_to_update)}个现有事件设置提醒时间")
-
-            conn.commit()
-
-        except Exception as e:
-            logger.error(f"数据库升级失败: {e}", exc_info=True)
-
 
 # 全局数据库实例
 _calendar_db = None
@@ -2,17 +2,46 @@
 日程管理器 负责日程数据的存储、查询、更新等核心功能.
 """
 
+import heapq
 import os
-from typing import List
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from src.utils.logging_config import get_logger
 
 from .database import get_calendar_database
-from .models import CalendarEvent
+from .models import CalendarEvent, EventSummary
+from .recurrence import (
+    OCCURRENCE_SEPARATOR,
+    expansion_window,
+    iter_occurrences,
+    iter_starts,
+    split_occurrence_id,
+)
 
 logger = get_logger(__name__)
 
 
+def make_cursor(summary: EventSummary) -> str:
+    """
+    由本页最后一条记录生成分页游标.
+    """
+    return f"{summary.start_ts}:{summary.id}"
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[Tuple[int, str]]:
+    """
+    解析分页游标为 (start_ts, id)，空值返回 None，格式错误抛出 ValueError.
+    """
+    if not cursor:
+        return None
+    start_ts, sep, event_id = cursor.partition(":")
+    if not sep:
+        raise ValueError(f"无效的分页游标: {cursor}")
+    return int(start_ts), event_id
+
+
 class CalendarManager:
     """
     日程管理器.
@@ -34,6 +63,7 @@ class CalendarManager:
             get_categories,
             get_events_by_date,
             get_upcoming_events,
+            search_events,
             update_event,
         )
 
@@ -46,6 +76,7 @@ class CalendarManager:
                 Property("description", PropertyType.STRING, default_value=""),
                 Property("category", PropertyType.STRING, default_value="默认"),
                 Property("reminder_minutes", PropertyType.INTEGER, default_value=15),
+                Property("recurrence", PropertyType.STRING, default_value=""),
             ]
         )
         add_tool(
@@ -59,6 +90,12 @@ class CalendarManager:
                 "2. Create reminders or notifications\n"
                 "3. Block time for work, personal activities\n"
                 "4. Set up recurring activities (meetings, breaks, etc.)\n"
+                "\nRecurring Events:\n"
+                "- Set recurrence to 'daily'/'weekly'/'monthly'/'weekdays' or an "
+                "RRULE such as 'FREQ=WEEKLY;BYDAY=MO,WE' or "
+                "'FREQ=MONTHLY;BYMONTHDAY=1;COUNT=6'\n"
+                "- start_time/end_time are the first occurrence; the series is "
+                "stored once and each occurrence gets its own reminder\n"
                 "\nIntelligent Duration Rules:\n"
                 "- '提醒', '休息', '站立' category: 5 minutes\n"
                 "- '会议', '工作' category: 1 hour\n"
@@ -71,7 +108,8 @@ class CalendarManager:
                 "  end_time: End time, auto-calculated if not provided\n"
                 "  description: Event description\n"
                 "  category: Event category (默认/工作/个人/会议/提醒)\n"
-                "  reminder_minutes: Reminder time in minutes before event",
+                "  reminder_minutes: Reminder time in minutes before event\n"
+                "  recurrence: Repeat rule for recurring events (optional)",
                 create_event_props,
                 create_event,
             )
@@ -84,6 +122,14 @@ class CalendarManager:
                 Property("category", PropertyType.STRING, default_value=""),
                 Property("start_date", PropertyType.STRING, default_value=""),
                 Property("end_date", PropertyType.STRING, default_value=""),
+                Property(
+                    "limit",
+                    PropertyType.INTEGER,
+                    default_value=20,
+                    min_value=1,
+                    max_value=100,
+                ),
+                Property("cursor", PropertyType.STRING, default_value=""),
             ]
         )
         add_tool(
@@ -108,7 +154,10 @@ class CalendarManager:
                 "  date_type: Query type (today/tomorrow/week/month)\n"
                 "  category: Filter by category (optional)\n"
                 "  start_date: Custom start date in ISO format (optional)\n"
-                "  end_date: Custom end date in ISO format (optional)",
+                "  end_date: Custom end date in ISO format (optional)\n"
+                "  limit: Page size (default: 20)\n"
+                "  cursor: Pass next_cursor from the previous result to get the "
+                "next page (when has_more is true)",
                 query_events_props,
                 get_events_by_date,
             )
@@ -116,7 +165,17 @@ class CalendarManager:
 
         # 获取即将到来的日程
         upcoming_events_props = PropertyList(
-            [Property("hours", PropertyType.INTEGER, default_value=24)]
+            [
+                Property("hours", PropertyType.INTEGER, default_value=24),
+                Property(
+                    "limit",
+                    PropertyType.INTEGER,
+                    default_value=20,
+                    min_value=1,
+                    max_value=100,
+                ),
+                Property("cursor", PropertyType.STRING, default_value=""),
+            ]
         )
         add_tool(
             (
@@ -136,12 +195,56 @@ class CalendarManager:
                 "- Configurable time range (default 24 hours)\n"
                 "- Excludes past events\n"
                 "\nArgs:\n"
-                "  hours: Time range in hours to look ahead (default: 24)",
+                "  hours: Time range in hours to look ahead (default: 24)\n"
+                "  limit: Page size (default: 20)\n"
+                "  cursor: next_cursor from the previous result (optional)",
                 upcoming_events_props,
                 get_upcoming_events,
             )
         )
 
+        # 全文搜索日程
+        search_events_props = PropertyList(
+            [
+                Property("query", PropertyType.STRING),
+                Property("start_date", PropertyType.STRING, default_value=""),
+                Property("end_date", PropertyType.STRING, default_value=""),
+                Property(
+                    "limit",
+                    PropertyType.INTEGER,
+                    default_value=10,
+                    min_value=1,
+                    max_value=50,
+                ),
+            ]
+        )
+        add_tool(
+            (
+                "self.calendar.search_events",
+                "Full-text search over calendar event titles, descriptions and "
+                "categories across the whole history, ranked by relevance.\n"
+                "Use this tool when user asks about:\n"
+                "1. When a specific event is/was (e.g. 'when is my dentist "
+                "appointment', '家长会是哪天')\n"
+                "2. Finding events by keyword rather than by date\n"
+                "3. Whether something has already been scheduled\n"
+                "\nMatching:\n"
+                "- Chinese text matches by adjacent characters, other words by "
+                "prefix ('dent' matches 'dentist')\n"
+                "- Pass the user's phrasing or its key words; filler words are "
+                "ignored and better matches rank first\n"
+                "\nArgs:\n"
+                "  query: Search text (required)\n"
+                "  start_date: Only events starting at or after this ISO time "
+                "(optional)\n"
+                "  end_date: Only events starting at or before this ISO time "
+                "(optional)\n"
+                "  limit: Maximum number of results (default: 10)",
+                search_events_props,
+                search_events,
+            )
+        )
+
         # 更新日程
         update_event_props = PropertyList(
             [
@@ -152,6 +255,7 @@ class CalendarManager:
                 Property("description", PropertyType.STRING, default_value=""),
                 Property("category", PropertyType.STRING, default_value=""),
                 Property("reminder_minutes", PropertyType.INTEGER, default_value=15),
+                Property("recurrence", PropertyType.STRING, default_value=""),
             ]
         )
         add_tool(
@@ -169,6 +273,8 @@ class CalendarManager:
                 "- Partial updates (only specify fields to change)\n"
                 "- Automatic timestamp updating\n"
                 "- Preserves unchanged fields\n"
+                "- Occurrence ids of recurring events ('<series id>@<start>') "
+                "change only that occurrence; the series id changes all of them\n"
                 "\nArgs:\n"
                 "  event_id: Unique event identifier (required)\n"
                 "  title: New event title (optional)\n"
@@ -176,7 +282,9 @@ class CalendarManager:
                 "  end_time: New end time in ISO format (optional)\n"
                 "  description: New description (optional)\n"
                 "  category: New category (optional)\n"
-                "  reminder_minutes: New reminder time in minutes (optional)",
+                "  reminder_minutes: New reminder time in minutes (optional)\n"
+                "  recurrence: New repeat rule, 'none' to stop repeating "
+                "(series id only, optional)",
                 update_event_props,
                 update_event,
             )
@@ -195,6 +303,8 @@ class CalendarManager:
                 "3. Clear schedule conflicts\n"
                 "4. Delete duplicate events\n"
                 "5. Clean up old events\n"
+                "\nRecurring events: an occurrence id ('<series id>@<start>') "
+                "cancels only that occurrence, the series id deletes the series.\n"
                 "\nArgs:\n"
                 "  event_id: Unique identifier of the event to delete",
                 delete_event_props,
@@ -297,38 +407,202 @@ class CalendarManager:
             else:
                 logger.warning("数据迁移失败，保留原JSON文件")
 
-    def add_event(self, event: CalendarEvent) -> bool:
+    async def add_event(self, event: CalendarEvent) -> bool:
         """
         添加事件.
         """
-        return self.db.add_event(event.to_dict())
+        return await self.db.add_event(event.to_dict())
 
-    def get_events(
+    async def get_events(
         self, start_date: str = None, end_date: str = None, category: str = None
     ) -> List[CalendarEvent]:
         """
-        获取事件列表.
+        获取事件列表，重复日程只展开查询窗口内的实例.
         """
         try:
-            events_data = self.db.get_events(start_date, end_date, category)
-            return [CalendarEvent.from_dict(event_data) for event_data in events_data]
+            events_data = await self.db.get_events(start_date, end_date, category)
+            series = await self.db.get_series(start_date, end_date, category)
+            return list(self.iter_events(events_data, series, start_date, end_date))
         except Exception as e:
             logger.error(f"获取日程失败: {e}")
             return []
 
-    def update_event(self, event_id: str, **kwargs) -> bool:
+    @staticmethod
+    def iter_events(
+        events_data: List[Dict[str, Any]],
+        series: List[Dict[str, Any]],
+        start_date: str = None,
+        end_date: str = None,
+    ) -> Iterator[CalendarEvent]:
         """
-        更新事件.
+        按开始时间合并单次事件与各系列的实例，惰性产出.
         """
-        return self.db.update_event(event_id, **kwargs)
+        window_start = datetime.fromisoformat(start_date) if start_date else None
+        window_end = datetime.fromisoformat(end_date) if end_date else None
+        streams = [iter(events_data)] + [
+            iter_occurrences(item, window_start, window_end) for item in series
+        ]
+        for event_data in heapq.merge(*streams, key=lambda e: e["start_ts"]):
+            yield CalendarEvent.from_dict(event_data)
+
+    async def get_event_page(
+        self,
+        start_date: str = None,
+        end_date: str = None,
+        category: str = None,
+        limit: int = 20,
+        cursor: str = None,
+    ) -> Tuple[List[EventSummary], Optional[str]]:
+        """分页获取精简事件记录（含重复日程在窗口内的实例），按开始时间排序.
 
-    def delete_event(self, event_id: str) -> bool:
+        Returns:
+            (本页记录, 下一页游标)；没有更多时游标为 None
         """
-        删除事件.
+        limit = max(1, int(limit))
+        after = parse_cursor(cursor)
+        try:
+            singles = await self.db.get_event_summaries(
+                start_date, end_date, category, after, limit + 1
+            )
+            series = await self.db.get_series(start_date, end_date, category)
+        except Exception as e:
+            logger.error(f"获取日程失败: {e}")
+            return [], None
+
+        window_start = datetime.fromisoformat(start_date) if start_date else None
+        window_end = datetime.fromisoformat(end_date) if end_date else None
+        streams = [iter(singles)] + [
+            self._iter_series_summaries(item, window_start, window_end, after)
+            for item in series
+        ]
+        # EventSummary 按 (start_ts, id) 比较，与游标顺序一致
+        page = list(islice(heapq.merge(*streams), limit + 1))
+        if len(page) <= limit:
+            return page, None
+        page = page[:limit]
+        return page, make_cursor(page[-1])
+
+    @staticmethod
+    def _iter_series_summaries(
+        series: Dict[str, Any],
+        window_start: Optional[datetime],
+        window_end: Optional[datetime],
+        after: Optional[Tuple[int, str]],
+    ) -> Iterator[EventSummary]:
+        lo, hi = expansion_window(series, window_start, window_end)
+        if after:
+            # 游标之前的实例无需展开
+            lo = max(lo, datetime.fromtimestamp(after[0]))
+        start = datetime.fromisoformat(series["start_time"])
+        duration = int(
+            (datetime.fromisoformat(series["end_time"]) - start).total_seconds()
+        )
+        for occurrence in iter_starts(series, lo, hi):
+            start_ts = int(occurrence.timestamp())
+            summary = EventSummary(
+                start_ts,
+                f"{series['id']}{OCCURRENCE_SEPARATOR}{occurrence.isoformat()}",
+                start_ts + duration,
+                series["title"],
+                series["category"],
+                series["description"],
+            )
+            if after is None or summary[:2] > after:
+                yield summary
+
+    async def search_events(
+        self,
+        query: str,
+        start_date: str = None,
+        end_date: str = None,
+        limit: int = 10,
+    ) -> List[CalendarEvent]:
         """
-        return self.db.delete_event(event_id)
+        全文搜索事件，按相关度排序；指定时间范围时重复日程取窗口内的首个实例.
+        """
+        try:
+            events_data = await self.db.search_events(
+                query, start_date, end_date, limit
+            )
+            if start_date or end_date:
+                window_start = (
+                    datetime.fromisoformat(start_date) if start_date else None
+                )
+                window_end = datetime.fromisoformat(end_date) if end_date else None
+                events_data = [
+                    self._first_in_window(event_data, window_start, window_end)
+                    for event_data in events_data
+                ]
+            return [
+                CalendarEvent.from_dict(event_data)
+                for event_data in events_data
+                if event_data is not None
+            ]
+        except Exception as e:
+            logger.error(f"搜索日程失败: {e}")
+            return []
+
+    @staticmethod
+    def _first_in_window(
+        event_data: Dict[str, Any],
+        window_start: Optional[datetime],
+        window_end: Optional[datetime],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        单次事件原样返回；重复系列返回窗口内的首个实例，没有实例（被排除或落在间隙）时返回 None.
+        """
+        if not event_data.get("rrule"):
+            return event_data
+        return next(iter_occurrences(event_data, window_start, window_end), None)
+
+    async def update_event(self, event_id: str, **kwargs) -> bool:
+        """
+        更新事件；实例 ID 只修改这一次实例（从系列中排除后另存为单次事件）.
+        """
+        series_id, occurrence = split_occurrence_id(event_id)
+        if occurrence is None:
+            return await self.db.update_event(event_id, **kwargs)
 
-    def delete_events_batch(
+        series = await self.db.get_event_by_id(series_id)
+        if not series or not series.get("rrule"):
+            logger.warning(f"重复日程不存在: {series_id}")
+            return False
+        occurrence_dt = datetime.fromisoformat(occurrence)
+        instance = next(iter_occurrences(series, occurrence_dt, occurrence_dt), None)
+        if instance is None:
+            logger.warning(f"重复日程实例不存在: {event_id}")
+            return False
+
+        old_start = datetime.fromisoformat(instance["start_time"])
+        old_end = datetime.fromisoformat(instance["end_time"])
+        instance.update(kwargs)
+        start = datetime.fromisoformat(instance["start_time"])
+        if "end_time" not in kwargs:
+            # 只改开始时间时保持实例时长，结束时间随之平移
+            instance["end_time"] = (old_end + (start - old_start)).isoformat()
+        if datetime.fromisoformat(instance["end_time"]) <= start:
+            logger.warning(f"结束时间必须晚于开始时间: {event_id}")
+            return False
+        event = CalendarEvent(
+            title=instance["title"],
+            start_time=instance["start_time"],
+            end_time=instance["end_time"],
+            description=instance["description"],
+            category=instance["category"],
+            reminder_minutes=instance["reminder_minutes"],
+        )
+        return await self.db.detach_occurrence(series_id, occurrence, event.to_dict())
+
+    async def delete_event(self, event_id: str) -> bool:
+        """
+        删除事件；实例 ID 只取消这一次实例，系列 ID 删除整个系列.
+        """
+        series_id, occurrence = split_occurrence_id(event_id)
+        if occurrence is None:
+            return await self.db.delete_event(event_id)
+        return await self.db.add_exdate(series_id, occurrence)
+
+    async def delete_events_batch(
         self,
         start_date: str = None,
         end_date: str = None,
@@ -338,13 +612,15 @@ class CalendarManager:
         """
         批量删除事件.
         """
-        return self.db.delete_events_batch(start_date, end_date, category, delete_all)
+        return await self.db.delete_events_batch(
+            start_date, end_date, category, delete_all
+        )
 
-    def get_categories(self) -> List[str]:
+    async def get_categories(self) -> List[str]:
         """
         获取所有分类.
         """
-        return self.db.get_categories()
+        return await self.db.get_categories()
 
 
 # 全局管理器实例
@@ -4,7 +4,9 @@
 
 import uuid
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, List, NamedTuple
+
+from .recurrence import parse_exdates
 
 
 class CalendarEvent:
@@ -21,6 +23,8 @@ class CalendarEvent:
         category: str = "默认",
         reminder_minutes: int = 15,
         event_id: str = None,
+        rrule: str = None,
+        exdates: List[str] = None,
     ):
         self.id = event_id or str(uuid.uuid4())
         self.title = title
@@ -29,6 +33,13 @@ class CalendarEvent:
         self.description = description
         self.category = category
         self.reminder_minutes = reminder_minutes
+        # 重复规则（RRULE 子集，如 "FREQ=WEEKLY;BYDAY=MO"），None 为单次事件
+        self.rrule = rrule
+        # 被排除的实例开始时间（ISO）
+        self.exdates = list(exdates or [])
+        # 展开后的实例所属系列与实例开始时间，系列本身为 None
+        self.series_id = None
+        self.recurrence_id = None
         self.reminder_time = self._calculate_reminder_time()
         self.reminder_sent = False
         self.created_at = datetime.now().isoformat()
@@ -50,8 +61,16 @@ class CalendarEvent:
             "reminder_sent": self.reminder_sent,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
+            "rrule": self.rrule,
+            "exdates": self.exdates,
+            "series_id": self.series_id,
+            "recurrence_id": self.recurrence_id,
         }
 
+    @property
+    def is_recurring(self) -> bool:
+        return bool(self.rrule)
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "CalendarEvent":
         """
@@ -65,11 +84,15 @@ class CalendarEvent:
             category=data.get("category", "默认"),
             reminder_minutes=data.get("reminder_minutes", 15),
             event_id=data["id"],
+            rrule=data.get("rrule"),
+            exdates=parse_exdates(data.get("exdates")),
         )
         event.reminder_time = data.get("reminder_time", event.reminder_time)
         event.reminder_sent = data.get("reminder_sent", False)
         event.created_at = data.get("created_at", event.created_at)
         event.updated_at = data.get("updated_at", event.updated_at)
+        event.series_id = data.get("series_id")
+        event.recurrence_id = data.get("recurrence_id")
         return event
 
     def _calculate_reminder_time(self) -> str:
@@ -84,3 +107,17 @@ class CalendarEvent:
             return reminder_dt.isoformat()
         except Exception:
             return self.start_time  # 如果计算失败，返回开始时间
+
+
+class EventSummary(NamedTuple):
+    """列表与播报用的精简事件记录（投影查询结果，时间为整数秒）.
+
+    字段顺序即分页顺序：按 (start_ts, id) 比较。
+    """
+
+    start_ts: int
+    id: str
+    end_ts: int
+    title: str
+    category: str
+    description: str
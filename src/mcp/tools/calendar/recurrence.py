@@ -0,0 +1,203 @@
+"""
+日程重复规则：RRULE 子集（DAILY/WEEKLY/MONTHLY，支持 INTERVAL/COUNT/UNTIL/BYDAY/
+BYMONTHDAY）的校验，以及按查询窗口惰性展开实例.
+
+重复事件在数据库中只存一行（start_time 为首个实例），排除的实例记录在 exdates；
+实例 ID 形如 "<系列ID>@<实例开始时间>"。
+"""
+
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from dateutil.rrule import rrule, rrulestr
+
+SUPPORTED_FREQS = ("DAILY", "WEEKLY", "MONTHLY")
+
+# 常用说法到规则的映射
+RULE_ALIASES = {
+    "daily": "FREQ=DAILY",
+    "weekly": "FREQ=WEEKLY",
+    "monthly": "FREQ=MONTHLY",
+    "weekdays": "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR",
+    "每天": "FREQ=DAILY",
+    "每周": "FREQ=WEEKLY",
+    "每月": "FREQ=MONTHLY",
+    "工作日": "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR",
+}
+
+# 查询未给结束时间时向后展开的范围，以及单个系列单次展开的实例上限
+DEFAULT_WINDOW = timedelta(days=90)
+MAX_OCCURRENCES = 1000
+
+OCCURRENCE_SEPARATOR = "@"
+
+
+def normalize_rule(text: Optional[str]) -> Optional[str]:
+    """
+    校验并规范化重复规则，空值返回 None，不支持的规则抛出 ValueError.
+    """
+    if not text or not text.strip():
+        return None
+    value = text.strip()
+    alias = RULE_ALIASES.get(value.lower())
+    if alias:
+        return alias
+    if value.upper().startswith("RRULE:"):
+        value = value[len("RRULE:") :]
+
+    parts: Dict[str, str] = {}
+    for item in value.upper().split(";"):
+        if not item.strip():
+            continue
+        key, sep, val = item.partition("=")
+        if not sep:
+            raise ValueError(f"无效的重复规则: {text}")
+        key, val = key.strip(), val.strip()
+        # 事件时间均为本地时间，UNTIL 的 UTC 标记按本地时间处理
+        if key == "UNTIL":
+            val = val.rstrip("Z")
+        parts[key] = val
+
+    if parts.get("FREQ") not in SUPPORTED_FREQS:
+        raise ValueError(f"仅支持 {'/'.join(SUPPORTED_FREQS)} 重复: {text}")
+
+    rule = ";".join(f"{key}={val}" for key, val in parts.items())
+    build_rule(rule, datetime.now())
+    return rule
+
+
+def build_rule(rule: str, dtstart: datetime) -> rrule:
+    return rrulestr(rule, dtstart=dtstart)
+
+
+def parse_exdates(value: Any) -> List[str]:
+    """
+    exdates 字段（JSON 文本或列表）转为实例开始时间的 ISO 列表.
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    return [str(item) for item in value]
+
+
+def _excluded(event: Dict[str, Any]) -> Set[datetime]:
+    return {datetime.fromisoformat(x) for x in parse_exdates(event.get("exdates"))}
+
+
+def iter_starts(
+    event: Dict[str, Any], after: datetime, until: datetime
+) -> Iterator[datetime]:
+    """
+    按时间顺序生成开始时间在 [after, until] 内、未被排除的实例开始时间.
+    """
+    start = datetime.fromisoformat(event["start_time"])
+    rule = build_rule(event["rrule"], start)
+    excluded = _excluded(event)
+    produced = 0
+    for occurrence in rule.xafter(max(after, start), inc=True):
+        if occurrence > until or produced >= MAX_OCCURRENCES:
+            return
+        if occurrence in excluded:
+            continue
+        produced += 1
+        yield occurrence
+
+
+def expansion_window(
+    event: Dict[str, Any],
+    window_start: Optional[datetime] = None,
+    window_end: Optional[datetime] = None,
+) -> Tuple[datetime, datetime]:
+    """
+    补全展开窗口：缺省开始为首个实例，缺省结束为开始（不早于现在）后 DEFAULT_WINDOW.
+    """
+    lo = window_start or datetime.fromisoformat(event["start_time"])
+    hi = window_end or max(lo, datetime.now()) + DEFAULT_WINDOW
+    return lo, hi
+
+
+def iter_occurrences(
+    event: Dict[str, Any],
+    window_start: Optional[datetime] = None,
+    window_end: Optional[datetime] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    惰性展开系列在窗口内（按开始时间）的实例，窗口缺省时从首个实例起展开 DEFAULT_WINDOW.
+    """
+    start = datetime.fromisoformat(event["start_time"])
+    duration = datetime.fromisoformat(event["end_time"]) - start
+    reminder = timedelta(minutes=event.get("reminder_minutes") or 0)
+    lo, hi = expansion_window(event, window_start, window_end)
+
+    for occurrence in iter_starts(event, lo, hi):
+        occurrence_start = occurrence.isoformat()
+        instance = dict(event)
+        instance.update(
+            id=f"{event['id']}{OCCURRENCE_SEPARATOR}{occurrence_start}",
+            series_id=event["id"],
+            recurrence_id=occurrence_start,
+            start_time=occurrence_start,
+            end_time=(occurrence + duration).isoformat(),
+            start_ts=int(occurrence.timestamp()),
+            end_ts=int((occurrence + duration).timestamp()),
+            reminder_time=(occurrence - reminder).isoformat(),
+        )
+        yield instance
+
+
+def occurrence_windows(
+    event: Dict[str, Any], after: datetime, until: datetime
+) -> List[Tuple[int, int]]:
+    """
+    返回与 [after, until] 有重叠的实例区间（整数秒），按开始时间排序.
+    """
+    start = datetime.fromisoformat(event["start_time"])
+    duration = datetime.fromisoformat(event["end_time"]) - start
+    return [
+        (int(occurrence.timestamp()), int((occurrence + duration).timestamp()))
+        for occurrence in iter_starts(event, after - duration, until)
+    ]
+
+
+def next_occurrence(
+    event: Dict[str, Any], after: datetime, inclusive: bool = False
+) -> Optional[datetime]:
+    """
+    返回 after 之后（inclusive 时含 after）的下一个实例开始时间.
+    """
+    start = datetime.fromisoformat(event["start_time"])
+    rule = build_rule(event["rrule"], start)
+    excluded = _excluded(event)
+    for occurrence in rule.xafter(max(after, start), inc=inclusive or after < start):
+        if occurrence not in excluded:
+            return occurrence
+    return None
+
+
+def series_end_ts(rule: str, start_time: str, end_time: str) -> Optional[int]:
+    """
+    有 COUNT/UNTIL 时返回最后一个实例的结束时间（整数秒），无限重复返回 None.
+    """
+    if "COUNT=" not in rule and "UNTIL=" not in rule:
+        return None
+    start = datetime.fromisoformat(start_time)
+    duration = datetime.fromisoformat(end_time) - start
+    last = None
+    for last in build_rule(rule, start):
+        pass
+    if last is None:
+        return int(datetime.fromisoformat(end_time).timestamp())
+    return int((last + duration).timestamp())
+
+
+def split_occurrence_id(event_id: str) -> Tuple[str, Optional[str]]:
+    """
+    拆分实例 ID，返回 (系列ID, 实例开始时间)；普通 ID 的实例部分为 None.
+    """
+    series_id, sep, occurrence = event_id.partition(OCCURRENCE_SEPARATOR)
+    return (series_id, occurrence) if sep else (event_id, None)
@@ -1,18 +1,38 @@
 """
-日程提醒服务 定期检查数据库中的事件，当到达提醒时间时通过TTS播报提醒.
+日程提醒服务 按数据库中最近的提醒时间调度，到点时通过TTS播报提醒.
+
+近期（HORIZON_SECONDS 内）待发送的提醒保存在内存小顶堆中，循环精确睡到堆顶时间；
+日程增删改时由数据库变更回调提前唤醒并重建调度，空闲时不查询数据库.
 """
 
 import asyncio
+import heapq
 import json
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from src.utils.logging_config import get_logger
 
 from .database import get_calendar_database
+from .manager import get_calendar_manager
+from .models import EventSummary
+from .recurrence import iter_occurrences
 
 logger = get_logger(__name__)
 
+# 内存调度窗口（秒）与窗口内最多加载的提醒数
+HORIZON_SECONDS = 3600
+HORIZON_LIMIT = 256
+# 单次睡眠上限（秒）：醒来按墙上时钟重算剩余时间，NTP 校时或修改系统时间后
+# 最多延迟这么久即可按新时间触发（不查询数据库）
+MAX_SLEEP_SECONDS = 300
+# 事件开始超过该时长仍未提醒则不再提醒
+REMINDER_GRACE = timedelta(hours=1)
+# 今日摘要最多读取的事件数与播报的事件数（其余只报总数）
+DAILY_SUMMARY_MAX = 200
+DAILY_SUMMARY_SPOKEN = 10
+
 
 class CalendarReminderService:
     """
@@ -23,7 +43,16 @@ class CalendarReminderService:
         self.db = get_calendar_database()
         self.is_running = False
         self._task: Optional[asyncio.Task] = None
-        self.check_interval = 30  # 检查间隔（秒）
+        self.check_interval = 30  # 提醒发送失败后的重试间隔（秒）
+
+        # 调度状态：(提醒时间戳, 事件ID) 小顶堆与窗口外最近的提醒时间
+        self._heap: List[Tuple[float, str]] = []
+        self._next_beyond: Optional[float] = None
+        self._retry_after: Dict[str, float] = {}
+        self._dirty = True
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.db.add_change_listener(self.notify_schedule_changed)
 
     def _get_application(self):
         """
@@ -46,12 +75,16 @@ class CalendarReminderService:
             return
 
         self.is_running = True
-        self._task = asyncio.create_task(self._reminder_loop())
-        logger.info("日程提醒服务已启动")
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._dirty = True
 
         # 程序启动时重置未来事件的提醒标志
         await self.reset_reminder_flags_for_future_events()
 
+        self._task = asyncio.create_task(self._reminder_loop())
+        logger.info("日程提醒服务已启动")
+
     async def stop(self):
         """
         停止提醒服务.
@@ -70,24 +103,126 @@ class CalendarReminderService:
 
         logger.info("日程提醒服务已停止")
 
+    def notify_schedule_changed(self):
+        """
+        日程变更时调用（可在任意线程）：标记调度失效并唤醒循环.
+        """
+        self._dirty = True
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:
+            pass
+
     async def _reminder_loop(self):
         """
-        提醒检查循环.
+        提醒调度循环.
         """
-        logger.info("开始日程提醒检查循环")
+        logger.info("开始日程提醒调度循环")
 
         while self.is_running:
             try:
-                await self._check_and_send_reminders()
-                # 定期清理过期事件的提醒标志
-                await self._cleanup_expired_reminders()
-                await asyncio.sleep(self.check_interval)
+                if self._dirty:
+                    await self._reload_schedule()
+
+                if await self._sleep_until_due():
+                    # 被日程变更唤醒，重建调度
+                    continue
+
+                if self._heap and self._heap[0][0] <= time.time():
+                    await self._fire_due_reminders()
+                else:
+                    # 睡到了窗口外的下一个提醒，重新加载窗口
+                    self._dirty = True
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"提醒检查循环出错: {e}", exc_info=True)
+                logger.error(f"提醒调度循环出错: {e}", exc_info=True)
+                self._dirty = True
                 await asyncio.sleep(self.check_interval)
 
+    async def _reload_schedule(self):
+        """
+        从部分索引加载调度窗口内的提醒到小顶堆.
+        """
+        self._dirty = False
+        now = time.time()
+        rows = await self.db.get_upcoming_reminders(
+            now + HORIZON_SECONDS, HORIZON_LIMIT
+        )
+
+        heap = []
+        for reminder_ts, event_id in rows:
+            # 刚发送失败的提醒延后重试，避免立即重复触发
+            heap.append(
+                (max(reminder_ts, self._retry_after.get(event_id, 0)), event_id)
+            )
+        heapq.heapify(heap)
+        self._heap = heap
+        self._retry_after = {
+            event_id: retry_at
+            for event_id, retry_at in self._retry_after.items()
+            if retry_at > now
+        }
+
+        # 窗口内已装满或为空时，记下窗口外最近的提醒时间
+        self._next_beyond = None
+        if len(rows) >= HORIZON_LIMIT:
+            self._next_beyond = rows[-1][0]
+        elif not rows:
+            self._next_beyond = await self.db.get_next_reminder_ts()
+
+        logger.debug(
+            f"提醒调度已更新: 窗口内 {len(heap)} 个，"
+            f"下一个 {self._format_ts(heap[0][0] if heap else self._next_beyond)}"
+        )
+
+    async def _sleep_until_due(self) -> bool:
+        """
+        睡到堆顶（或窗口外下一个）提醒时间，没有提醒时一直等待；被唤醒返回 True.
+
+        每次最多睡 MAX_SLEEP_SECONDS，醒来后按当前时钟重新判断是否到期.
+        """
+        deadline = self._heap[0][0] if self._heap else self._next_beyond
+
+        self._wakeup.clear()
+        if self._dirty:
+            return True
+        while True:
+            timeout = None
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                timeout = min(remaining, MAX_SLEEP_SECONDS)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                return True
+            except asyncio.TimeoutError:
+                continue
+
+    async def _fire_due_reminders(self):
+        """
+        弹出已到期的堆顶条目并发送提醒.
+        """
+        now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            _, event_id = heapq.heappop(self._heap)
+            self._retry_after[event_id] = now + self.check_interval
+
+        await self._check_and_send_reminders()
+        # 清理超出宽限期、不会再提醒的事件，防止其一直停留在堆顶
+        await self._cleanup_expired_reminders()
+        self._dirty = True
+
+    @staticmethod
+    def _format_ts(ts: Optional[float]) -> str:
+        if ts is None:
+            return "无"
+        return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
     async def _check_and_send_reminders(self):
         """
         检查并发送提醒.
@@ -97,20 +232,9 @@ class CalendarReminderService:
 
             # 查询所有未发送提醒且提醒时间已到的事件
             # 同时确保事件还没有过期（开始时间在当前时间之后或者在合理的过期时间内）
-            with self.db._get_connection() as conn:
-                cursor = conn.execute(
-                    """
-                    SELECT * FROM events
-                    WHERE reminder_sent = 0
-                    AND reminder_time IS NOT NULL
-                    AND reminder_time <= ?
-                    AND start_time > ?
-                    ORDER BY reminder_time
-                """,
-                    (now.isoformat(), (now - timedelta(hours=1)).isoformat()),
-                )
-
-                pending_reminders = cursor.fetchall()
+            pending_reminders = await self.db.get_pending_reminders(
+                now.isoformat(), (now - REMINDER_GRACE).isoformat()
+            )
 
             if not pending_reminders:
                 return
@@ -118,12 +242,35 @@ class CalendarReminderService:
             logger.info(f"发现 {len(pending_reminders)} 个待发送的提醒")
 
             # 处理每个提醒
+            skip_before = now - REMINDER_GRACE
             for reminder in pending_reminders:
-                await self._send_reminder(dict(reminder))
+                if reminder.get("rrule"):
+                    reminder = self._as_occurrence(reminder)
+                    # 离线期间错过的重复实例不再补发，直接推进到下一个实例
+                    if datetime.fromisoformat(reminder["start_time"]) < skip_before:
+                        await self._mark_reminder_sent(
+                            reminder["series_id"], skip_before.isoformat()
+                        )
+                        continue
+                await self._send_reminder(reminder)
 
         except Exception as e:
             logger.error(f"检查提醒失败: {e}", exc_info=True)
 
+    @staticmethod
+    def _as_occurrence(series: dict) -> dict:
+        """
+        重复系列的提醒行转换为当前提醒所对应的实例.
+        """
+        reminder_dt = datetime.fromisoformat(series["reminder_time"])
+        occurrence = reminder_dt + timedelta(minutes=series["reminder_minutes"] or 0)
+        instance = next(iter_occurrences(series, occurrence, occurrence), None)
+        if instance is None:
+            # 实例已被排除或超出规则范围，仍按系列推进提醒
+            instance = dict(series, series_id=series["id"])
+            instance["start_time"] = occurrence.isoformat()
+        return instance
+
     async def _send_reminder(self, event_data: dict):
         """
         发送单个提醒.
@@ -178,8 +325,11 @@ class CalendarReminderService:
             else:
                 logger.warning("无法发送提醒：应用实例或TTS方法不可用")
 
-            # 标记提醒已发送
-            await self._mark_reminder_sent(event_id)
+            # 标记提醒已发送（重复系列推进到下一个实例）
+            await self._mark_reminder_sent(
+                event_data.get("series_id") or event_id,
+                (now - REMINDER_GRACE).isoformat(),
+            )
 
         except Exception as e:
             logger.error(f"发送提醒失败: {e}", exc_info=True)
@@ -202,27 +352,15 @@ class CalendarReminderService:
 
         return message
 
-    async def _mark_reminder_sent(self, event_id: str):
+    async def _mark_reminder_sent(self, event_id: str, skip_before: str = None):
         """
         标记提醒已发送.
         """
-        try:
-            with self.db._get_connection() as conn:
-                conn.execute(
-                    """
-                    UPDATE events
-                    SET reminder_sent = 1, updated_at = ?
-                    WHERE id = ?
-                """,
-                    (datetime.now().isoformat(), event_id),
-                )
-                conn.commit()
-
+        if await self.db.mark_reminder_sent(event_id, skip_before):
+            # 重复系列的下一次提醒不受发送失败的重试延迟影响
+            self._retry_after.pop(event_id, None)
             logger.debug(f"已标记提醒为已发送: {event_id}")
 
-        except Exception as e:
-            logger.error(f"标记提醒已发送失败: {e}", exc_info=True)
-
     async def check_daily_events(self):
         """
         检查今日事件（可在程序启动时调用）
@@ -232,27 +370,31 @@ class CalendarReminderService:
             today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
             today_end = today_start + timedelta(days=1)
 
-            with self.db._get_connection() as conn:
-                cursor = conn.execute(
-                    """
-                    SELECT * FROM events
-                    WHERE start_time >= ? AND start_time < ?
-                    ORDER BY start_time
-                """,
-                    (today_start.isoformat(), today_end.isoformat()),
-                )
-
-                today_events = cursor.fetchall()
+            # 投影查询只取摘要所需的列，重复日程按今天展开为实例
+            today_end_ts = int(today_end.timestamp())
+            events, _ = await get_calendar_manager().get_event_page(
+                today_start.isoformat(), today_end.isoformat(), limit=DAILY_SUMMARY_MAX
+            )
+            today_events = [event for event in events if event.start_ts < today_end_ts]
 
             if today_events:
                 logger.info(f"今日有 {len(today_events)} 个日程")
 
-                # 构建今日日程摘要
+                # 构建今日日程摘要（只附带播报的事件的精简字段）
                 summary_message = {
                     "type": "daily_schedule",
                     "date": today_start.strftime("%Y-%m-%d"),
                     "total_events": len(today_events),
-                    "events": [dict(event) for event in today_events],
+                    "events": [
+                        {
+                            "id": event.id,
+                            "title": event.title,
+                            "time": time.strftime(
+                                "%H:%M", time.localtime(event.start_ts)
+                            ),
+                        }
+                        for event in today_events[:DAILY_SUMMARY_SPOKEN]
+                    ],
                     "message": self._format_daily_summary(today_events),
                 }
 
@@ -270,24 +412,32 @@ class CalendarReminderService:
         except Exception as e:
             logger.error(f"检查今日事件失败: {e}", exc_info=True)
 
-    def _format_daily_summary(self, events) -> str:
+    def _format_daily_summary(self, events: Sequence[EventSummary]) -> str:
         """
         格式化今日日程摘要.
         """
         if not events:
             return "今天没有安排任何日程"
+        return "".join(self._iter_daily_summary(events, len(events)))
 
-        summary = f"今天共有{len(events)}个日程："
-
+    @staticmethod
+    def _iter_daily_summary(
+        events: Iterable[EventSummary], total: int
+    ) -> Iterator[str]:
+        """
+        逐段生成摘要文本，只播报前 DAILY_SUMMARY_SPOKEN 个事件.
+        """
+        yield f"今天共有{total}个日程："
+        spoken = min(total, DAILY_SUMMARY_SPOKEN)
         for i, event in enumerate(events, 1):
-            start_dt = datetime.fromisoformat(event["start_time"])
-            time_str = start_dt.strftime("%H:%M")
-            summary += f" {i}.{time_str} {event['title']}"
-
-            if i < len(events):
-                summary += "，"
-
-        return summary
+            if i > spoken:
+                break
+            start = time.strftime("%H:%M", time.localtime(event.start_ts))
+            yield f" {i}.{start} {event.title}"
+            if i < spoken:
+                yield "，"
+        if total > spoken:
+            yield f"，等{total}个日程"
 
     async def reset_reminder_flags_for_future_events(self):
         """
@@ -296,19 +446,8 @@ class CalendarReminderService:
         try:
             now = datetime.now()
 
-            with self.db._get_connection() as conn:
-                # 重置所有未来事件的提醒标志
-                cursor = conn.execute(
-                    """
-                    UPDATE events
-                    SET reminder_sent = 0, updated_at = ?
-                    WHERE start_time > ? AND reminder_sent = 1
-                """,
-                    (now.isoformat(), now.isoformat()),
-                )
-
-                reset_count = cursor.rowcount
-                conn.commit()
+            # 重置所有未来事件的提醒标志
+            reset_count = await self.db.reset_future_reminder_flags(now.isoformat())
 
             if reset_count > 0:
                 logger.info(f"已重置 {reset_count} 个未来事件的提醒标志")
@@ -318,24 +457,15 @@ class CalendarReminderService:
 
     async def _cleanup_expired_reminders(self):
         """
-        清理过期事件的提醒标志（超过24小时的过期事件）
+        清理过期事件的提醒标志（开始已超过宽限期、不会再提醒的事件）
         """
         try:
             now = datetime.now()
-            cleanup_threshold = now - timedelta(hours=24)
-
-            with self.db._get_connection() as conn:
-                cursor = conn.execute(
-                    """
-                    UPDATE events
-                    SET reminder_sent = 1, updated_at = ?
-                    WHERE start_time < ? AND reminder_sent = 0
-                """,
-                    (now.isoformat(), cleanup_threshold.isoformat()),
-                )
-
-                cleanup_count = cursor.rowcount
-                conn.commit()
+            cleanup_threshold = now - REMINDER_GRACE
+
+            cleanup_count = await self.db.mark_expired_reminders(
+                now.isoformat(), cleanup_threshold.isoformat()
+            )
 
             if cleanup_count > 0:
                 logger.info(f"已清理 {cleanup_count} 个过期事件的提醒标志")
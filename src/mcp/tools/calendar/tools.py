@@ -3,13 +3,41 @@
 """
 
 import json
+import time
 from datetime import datetime, timedelta
 from typing import Any, Dict
 
 from src.utils.logging_config import get_logger
 
 from .manager import get_calendar_manager
-from .models import CalendarEvent
+from .models import CalendarEvent, EventSummary
+from .recurrence import next_occurrence, normalize_rule
+
+# update_event 中表示取消重复的取值
+_NO_RECURRENCE = ("none", "no", "无", "不重复")
+# 列表类工具每页默认条数
+DEFAULT_PAGE_SIZE = 20
+
+
+def _summary_dict(summary: EventSummary) -> Dict[str, Any]:
+    """
+    精简记录转为工具输出（只含必要字段，描述为空时省略）.
+    """
+    start = time.localtime(summary.start_ts)
+    end = time.localtime(summary.end_ts)
+    item = {
+        "id": summary.id,
+        "title": summary.title,
+        "category": summary.category,
+        "start_time": time.strftime("%Y-%m-%dT%H:%M:%S", start),
+        "display_time": (
+            f"{time.strftime('%m/%d %H:%M', start)} - {time.strftime('%H:%M', end)}"
+        ),
+    }
+    if summary.description:
+        item["description"] = summary.description
+    return item
+
 
 logger = get_logger(__name__)
 
@@ -25,6 +53,7 @@ async def create_event(args: Dict[str, Any]) -> str:
         description = args.get("description", "")
         category = args.get("category", "默认")
         reminder_minutes = args.get("reminder_minutes", 15)
+        rrule = normalize_rule(args.get("recurrence"))
 
         # 如果没有结束时间，根据分类智能设置默认时长
         if not end_time:
@@ -62,10 +91,11 @@ async def create_event(args: Dict[str, Any]) -> str:
             description=description,
             category=category,
             reminder_minutes=reminder_minutes,
+            rrule=rrule,
         )
 
         manager = get_calendar_manager()
-        if manager.add_event(event):
+        if await manager.add_event(event):
             return json.dumps(
                 {
                     "success": True,
@@ -134,28 +164,78 @@ async def get_events_by_date(args: Dict[str, Any]) -> str:
             )
 
         manager = get_calendar_manager()
-        events = manager.get_events(
+        events, next_cursor = await manager.get_event_page(
             start_date=start_date.isoformat() if start_date else None,
             end_date=end_date.isoformat() if end_date else None,
             category=category,
+            limit=args.get("limit", DEFAULT_PAGE_SIZE),
+            cursor=args.get("cursor") or None,
+        )
+
+        return json.dumps(
+            {
+                "success": True,
+                "date_type": date_type,
+                "total_events": len(events),
+                "events": [_summary_dict(event) for event in events],
+                "has_more": next_cursor is not None,
+                "next_cursor": next_cursor,
+            },
+            ensure_ascii=False,
         )
 
-        # 格式化输出
+    except Exception as e:
+        logger.error(f"查询日程失败: {e}")
+        return json.dumps(
+            {"success": False, "message": f"查询日程失败: {str(e)}"}, ensure_ascii=False
+        )
+
+
+async def search_events(args: Dict[str, Any]) -> str:
+    """
+    全文搜索日程.
+    """
+    try:
+        query = (args.get("query") or "").strip()
+        if not query:
+            return json.dumps(
+                {"success": False, "message": "请提供搜索内容"}, ensure_ascii=False
+            )
+        start_date = args.get("start_date") or None
+        end_date = args.get("end_date") or None
+        # 校验时间格式
+        for value in (start_date, end_date):
+            if value:
+                datetime.fromisoformat(value)
+
+        manager = get_calendar_manager()
+        events = await manager.search_events(
+            query, start_date, end_date, args.get("limit", 10)
+        )
+
+        now = datetime.now()
         events_data = []
         for event in events:
             event_dict = event.to_dict()
-            # 添加人性化时间显示
             start_dt = datetime.fromisoformat(event.start_time)
             end_dt = datetime.fromisoformat(event.end_time)
             event_dict["display_time"] = (
-                f"{start_dt.strftime('%m/%d %H:%M')} - {end_dt.strftime('%H:%M')}"
+                f"{start_dt.strftime('%Y/%m/%d %H:%M')} - {end_dt.strftime('%H:%M')}"
             )
+            event_dict["is_past"] = end_dt < now
+            if event.is_recurring:
+                # 重复日程只存首个实例，补充下一次的时间
+                upcoming = next_occurrence(event_dict, now, inclusive=True)
+                event_dict["next_occurrence"] = (
+                    upcoming.isoformat() if upcoming else None
+                )
+                event_dict["is_past"] = upcoming is None
             events_data.append(event_dict)
 
         return json.dumps(
             {
                 "success": True,
-                "date_type": date_type,
+                "query": query,
                 "total_events": len(events_data),
                 "events": events_data,
             },
@@ -164,9 +244,9 @@ async def get_events_by_date(args: Dict[str, Any]) -> str:
         )
 
     except Exception as e:
-        logger.error(f"查询日程失败: {e}")
+        logger.error(f"搜索日程失败: {e}")
         return json.dumps(
-            {"success": False, "message": f"查询日程失败: {str(e)}"}, ensure_ascii=False
+            {"success": False, "message": f"搜索日程失败: {str(e)}"}, ensure_ascii=False
         )
 
 
@@ -189,6 +269,13 @@ async def update_event(args: Dict[str, Any]) -> str:
         ]:
             if field in args:
                 update_fields[field] = args[field]
+        recurrence = (args.get("recurrence") or "").strip()
+        if recurrence:
+            update_fields["rrule"] = (
+                None
+                if recurrence.lower() in _NO_RECURRENCE
+                else normalize_rule(recurrence)
+            )
 
         if not update_fields:
             return json.dumps(
@@ -197,7 +284,7 @@ async def update_event(args: Dict[str, Any]) -> str:
             )
 
         manager = get_calendar_manager()
-        if manager.update_event(event_id, **update_fields):
+        if await manager.update_event(event_id, **update_fields):
             return json.dumps(
                 {
                     "success": True,
@@ -227,7 +314,7 @@ async def delete_event(args: Dict[str, Any]) -> str:
         event_id = args["event_id"]
 
         manager = get_calendar_manager()
-        if manager.delete_event(event_id):
+        if await manager.delete_event(event_id):
             return json.dumps(
                 {"success": True, "message": "日程删除成功"}, ensure_ascii=False
             )
@@ -291,7 +378,7 @@ async def delete_events_batch(args: Dict[str, Any]) -> str:
                 end_date = end_date.isoformat()
 
         manager = get_calendar_manager()
-        result = manager.delete_events_batch(
+        result = await manager.delete_events_batch(
             start_date=start_date,
             end_date=end_date,
             category=category,
@@ -314,7 +401,7 @@ async def get_categories(args: Dict[str, Any]) -> str:
     """
     try:
         manager = get_calendar_manager()
-        categories = manager.get_categories()
+        categories = await manager.get_categories()
 
         return json.dumps(
             {"success": True, "categories": categories}, ensure_ascii=False
@@ -338,30 +425,32 @@ async def get_upcoming_events(args: Dict[str, Any]) -> str:
         end_time = now + timedelta(hours=hours)
 
         manager = get_calendar_manager()
-        events = manager.get_events(
-            start_date=now.isoformat(), end_date=end_time.isoformat()
+        events, next_cursor = await manager.get_event_page(
+            start_date=now.isoformat(),
+            end_date=end_time.isoformat(),
+            limit=args.get("limit", DEFAULT_PAGE_SIZE),
+            cursor=args.get("cursor") or None,
         )
 
-        # 计算提醒时间
+        # 计算距离开始的时间
+        now_ts = now.timestamp()
         upcoming_events = []
         for event in events:
-            event_dict = event.to_dict()
-            start_dt = datetime.fromisoformat(event.start_time)
-
-            # 计算距离开始的时间
-            time_until = start_dt - now
-            if time_until.total_seconds() > 0:
-                hours_until = int(time_until.total_seconds() // 3600)
-                minutes_until = int((time_until.total_seconds() % 3600) // 60)
-
-                if hours_until > 0:
-                    time_display = f"{hours_until}小时{minutes_until}分钟后"
-                else:
-                    time_display = f"{minutes_until}分钟后"
+            seconds_until = event.start_ts - now_ts
+            if seconds_until <= 0:
+                continue
+            hours_until = int(seconds_until // 3600)
+            minutes_until = int((seconds_until % 3600) // 60)
+
+            if hours_until > 0:
+                time_display = f"{hours_until}小时{minutes_until}分钟后"
+            else:
+                time_display = f"{minutes_until}分钟后"
 
-                event_dict["time_until"] = time_display
-                event_dict["time_until_minutes"] = int(time_until.total_seconds() // 60)
-                upcoming_events.append(event_dict)
+            event_dict = _summary_dict(event)
+            event_dict["time_until"] = time_display
+            event_dict["time_until_minutes"] = int(seconds_until // 60)
+            upcoming_events.append(event_dict)
 
         return json.dumps(
             {
@@ -369,9 +458,10 @@ async def get_upcoming_events(args: Dict[str, Any]) -> str:
                 "query_hours": hours,
                 "total_events": len(upcoming_events),
                 "events": upcoming_events,
+                "has_more": next_cursor is not None,
+                "next_cursor": next_cursor,
             },
             ensure_ascii=False,
-            indent=2,
         )
 
     except Exception as e:
@@ -0,0 +1,410 @@
+"""
+本地音乐库索引.
+
+缓存目录中曲目的元数据持久化到 SQLite（按文件 ID 记录大小与修改时间），
+重新扫描时只为新增或变化的文件读取标签；扫描、建搜索索引和数据库访问都在
+专用线程上执行，不阻塞事件循环.
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.utils.logging_config import get_logger
+
+from .search_index import DEFAULT_LIMIT, MusicSearchIndex
+
+# 尝试导入音乐元数据库
+try:
+    from mutagen import File as MutagenFile
+    from mutagen.id3 import ID3NoHeaderError
+
+    MUTAGEN_AVAILABLE = True
+except ImportError:
+    MUTAGEN_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+# 支持的扩展名，同一文件 ID 有多个格式时优先靠前的
+AUDIO_EXTENSIONS = (".mp3", ".m4a", ".flac", ".wav", ".ogg")
+
+LIBRARY_DB_NAME = "library.db"
+
+# 索引结构版本（PRAGMA user_version），不一致时重建索引表
+SCHEMA_VERSION = 1
+
+# 列表/搜索复用内存中的索引，超过此间隔（秒）才重新比对目录
+SCAN_INTERVAL = 300
+
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+)
+_SQL_CREATE = """
+    CREATE TABLE IF NOT EXISTS tracks (
+        file_id TEXT PRIMARY KEY,
+        filename TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        title TEXT,
+        artist TEXT,
+        album TEXT,
+        duration REAL
+    )
+"""
+_SQL_ALL_TRACKS = """
+    SELECT file_id, filename, size, mtime_ns, title, artist, album, duration
+    FROM tracks
+"""
+_SQL_UPSERT_TRACK = """
+    INSERT OR REPLACE INTO tracks (
+        file_id, filename, size, mtime_ns, title, artist, album, duration
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_SQL_DELETE_TRACK = "DELETE FROM tracks WHERE file_id = ?"
+
+
+class MusicMetadata:
+    """
+    音乐元数据类.
+    """
+
+    def __init__(self, file_path: Path, file_size: Optional[int] = None):
+        self.file_path = file_path
+        self.filename = file_path.name
+        self.file_id = file_path.stem  # 文件名去掉扩展名，即歌曲ID
+        self.file_size = (
+            file_size if file_size is not None else file_path.stat().st_size
+        )
+        self.mtime_ns = 0
+
+        # 从文件提取的元数据
+        self.title = None
+        self.artist = None
+        self.album = None
+        self.duration = None  # 秒数
+
+    @classmethod
+    def from_row(cls, music_dir: Path, row: tuple) -> "MusicMetadata":
+        """
+        由索引行还原元数据，不访问文件.
+        """
+        _, filename, size, mtime_ns, title, artist, album, duration = row
+        metadata = cls(music_dir / filename, size)
+        metadata.mtime_ns = mtime_ns
+        metadata.title = title
+        metadata.artist = artist
+        metadata.album = album
+        metadata.duration = duration
+        return metadata
+
+    def to_row(self) -> tuple:
+        return (
+            self.file_id,
+            self.filename,
+            self.file_size,
+            self.mtime_ns,
+            self.title,
+            self.artist,
+            self.album,
+            self.duration,
+        )
+
+    def extract_metadata(self) -> bool:
+        """
+        提取音乐文件元数据.
+        """
+        if not MUTAGEN_AVAILABLE:
+            return False
+
+        try:
+            audio_file = MutagenFile(self.file_path)
+            if audio_file is None:
+                return False
+
+            # 基本信息
+            if hasattr(audio_file, "info"):
+                self.duration = getattr(audio_file.info, "length", None)
+
+            # ID3标签信息
+            tags = audio_file.tags if audio_file.tags else {}
+
+            # 标题
+            self.title = self._get_tag_value(tags, ["TIT2", "TITLE", "\xa9nam"])
+
+            # 艺术家
+            self.artist = self._get_tag_value(tags, ["TPE1", "ARTIST", "\xa9ART"])
+
+            # 专辑
+            self.album = self._get_tag_value(tags, ["TALB", "ALBUM", "\xa9alb"])
+
+            return True
+
+        except ID3NoHeaderError:
+            # 没有ID3标签，不是错误
+            return True
+        except Exception as e:
+            logger.debug(f"提取元数据失败 {self.filename}: {e}")
+            return False
+
+    def _get_tag_value(self, tags: dict, tag_names: List[str]) -> Optional[str]:
+        """
+        从多个可能的标签名中获取值.
+        """
+        for tag_name in tag_names:
+            if tag_name in tags:
+                value = tags[tag_name]
+                if isinstance(value, list) and value:
+                    return str(value[0])
+                elif value:
+                    return str(value)
+        return None
+
+    def format_duration(self) -> str:
+        """
+        格式化播放时长.
+        """
+        if self.duration is None:
+            return "未知"
+
+        minutes = int(self.duration) // 60
+        seconds = int(self.duration) % 60
+        return f"{minutes:02d}:{seconds:02d}"
+
+
+def _sort_key(metadata: MusicMetadata) -> Tuple[str, str]:
+    # 按艺术家和标题排序
+    return (metadata.artist or "Unknown", metadata.title or metadata.filename)
+
+
+def _extension_rank(filename: str) -> int:
+    ext = os.path.splitext(filename)[1].lower()
+    return AUDIO_EXTENSIONS.index(ext) if ext in AUDIO_EXTENSIONS else -1
+
+
+class MusicLibrary:
+    """
+    本地音乐缓存目录的持久化索引.
+    """
+
+    def __init__(self, music_dir: Path, db_file: Optional[Path] = None):
+        self.music_dir = Path(music_dir)
+        self.db_file = Path(db_file) if db_file else self.music_dir / LIBRARY_DB_NAME
+        # 单线程执行器：连接只在该线程上使用，扫描也在这里进行
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="music-library"
+        )
+        self._conn: Optional[sqlite3.Connection] = None
+
+        # 内存中的歌单（已排序）、按文件 ID 的查找表与搜索索引，只在事件循环侧替换
+        self._tracks: Optional[List[MusicMetadata]] = None
+        self._by_id: Dict[str, MusicMetadata] = {}
+        self._index = MusicSearchIndex()
+        self._last_scan_time = 0.0
+
+    # -------- 索引线程 --------
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        返回长连接，首次使用时打开并建表（仅在索引线程上调用）.
+        """
+        if self._conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+            for pragma in _PRAGMAS:
+                conn.execute(pragma)
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            with conn:
+                if version != SCHEMA_VERSION:
+                    conn.execute("DROP TABLE IF EXISTS tracks")
+                    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                conn.execute(_SQL_CREATE)
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, fn: Callable, *args):
+        """
+        在索引线程上执行 fn(conn, *args)，异步等待结果.
+        """
+
+        def _invoke():
+            return fn(self._connection(), *args)
+
+        return await asyncio.wrap_future(self._executor.submit(_invoke))
+
+    def _scan(
+        self, conn: sqlite3.Connection, reuse: bool
+    ) -> Optional[Tuple[List[MusicMetadata], MusicSearchIndex]]:
+        """
+        比对目录与索引：未变化的文件直接用索引行，新增/变化的文件重新读取标签，
+        已删除的文件移出索引。reuse 为真且没有任何变化时返回 None（沿用内存歌单），
+        否则返回排序后的歌单与新建的搜索索引.
+        """
+        started = time.perf_counter()
+        known = {row[0]: row for row in conn.execute(_SQL_ALL_TRACKS)}
+
+        # 同一文件 ID 保留优先级最高的格式
+        entries: Dict[str, Tuple[str, os.stat_result]] = {}
+        if self.music_dir.exists():
+            with os.scandir(self.music_dir) as it:
+                for entry in it:
+                    rank = _extension_rank(entry.name)
+                    if rank < 0 or not entry.is_file():
+                        continue
+                    file_id = os.path.splitext(entry.name)[0]
+                    current = entries.get(file_id)
+                    if current and _extension_rank(current[0]) <= rank:
+                        continue
+                    entries[file_id] = (entry.name, entry.stat())
+        else:
+            logger.warning(f"缓存目录不存在: {self.music_dir}")
+
+        tracks: List[MusicMetadata] = []
+        changed: List[tuple] = []
+        for file_id, (filename, stat) in entries.items():
+            row = known.get(file_id)
+            if (
+                row is not None
+                and row[1] == filename
+                and row[2] == stat.st_size
+                and row[3] == stat.st_mtime_ns
+            ):
+                tracks.append(MusicMetadata.from_row(self.music_dir, row))
+                continue
+            try:
+                metadata = self._read_file(self.music_dir / filename, stat)
+            except Exception as e:
+                logger.debug(f"处理音乐文件失败 {filename}: {e}")
+                continue
+            tracks.append(metadata)
+            changed.append(metadata.to_row())
+
+        removed = [(file_id,) for file_id in known.keys() - entries.keys()]
+        if changed or removed:
+            with conn:
+                conn.executemany(_SQL_UPSERT_TRACK, changed)
+                conn.executemany(_SQL_DELETE_TRACK, removed)
+        elif reuse:
+            return None
+
+        tracks.sort(key=_sort_key)
+        index = MusicSearchIndex(tracks)
+        logger.info(
+            f"音乐库扫描完成: {len(tracks)} 首，更新 {len(changed)}，"
+            f"移除 {len(removed)}，耗时 {time.perf_counter() - started:.3f}s"
+        )
+        return tracks, index
+
+    def _read_file(self, file_path: Path, stat: os.stat_result) -> MusicMetadata:
+        metadata = MusicMetadata(file_path, stat.st_size)
+        metadata.mtime_ns = stat.st_mtime_ns
+        if MUTAGEN_AVAILABLE:
+            metadata.extract_metadata()
+        return metadata
+
+    def _index_file(
+        self, conn: sqlite3.Connection, file_path: Path
+    ) -> Optional[MusicMetadata]:
+        """
+        读取单个文件的标签并写入索引.
+        """
+        if _extension_rank(file_path.name) < 0 or not file_path.is_file():
+            return None
+        metadata = self._read_file(file_path, file_path.stat())
+        with conn:
+            conn.execute(_SQL_UPSERT_TRACK, metadata.to_row())
+        return metadata
+
+    # -------- 事件循环侧接口 --------
+
+    def _replace(self, tracks: List[MusicMetadata], index: MusicSearchIndex):
+        self._tracks = tracks
+        self._by_id = {metadata.file_id: metadata for metadata in tracks}
+        self._index = index
+
+    async def get_tracks(self, force_refresh: bool = False) -> List[MusicMetadata]:
+        """
+        返回按艺术家、标题排序的歌单；距上次比对超过 SCAN_INTERVAL 或强制刷新时
+        增量扫描目录.
+        """
+        now = time.time()
+        if (
+            not force_refresh
+            and self._tracks is not None
+            and (now - self._last_scan_time) < SCAN_INTERVAL
+        ):
+            return self._tracks
+
+        result = await self._run(self._scan, self._tracks is not None)
+        if result is not None:
+            self._replace(*result)
+        self._last_scan_time = now
+        return self._tracks
+
+    async def search(
+        self, query: str, limit: int = DEFAULT_LIMIT
+    ) -> List[Tuple[MusicMetadata, float]]:
+        """
+        模糊搜索歌单，返回按相关度排序的 (曲目, 得分).
+        """
+        await self.get_tracks()
+        return self._index.search(query, limit)
+
+    async def get_track(self, file_id: str) -> Optional[MusicMetadata]:
+        """
+        按文件 ID 查找曲目，索引中没有时按扩展名探测文件并补入索引.
+        """
+        if self._tracks is None:
+            await self.get_tracks()
+
+        metadata = self._by_id.get(file_id)
+        if metadata is not None and metadata.file_path.exists():
+            return metadata
+
+        for ext in AUDIO_EXTENSIONS:
+            file_path = self.music_dir / f"{file_id}{ext}"
+            if file_path.exists():
+                return await self.add_file(file_path)
+        return None
+
+    async def add_file(self, file_path: Path) -> Optional[MusicMetadata]:
+        """
+        将新下载的文件加入索引和内存歌单.
+        """
+        try:
+            metadata = await self._run(self._index_file, Path(file_path))
+        except Exception as e:
+            logger.warning(f"音乐库索引文件失败 {file_path}: {e}")
+            return None
+        if metadata is None:
+            return None
+
+        if self._tracks is not None:
+            tracks = [t for t in self._tracks if t.file_id != metadata.file_id]
+            tracks.append(metadata)
+            tracks.sort(key=_sort_key)
+            self._tracks = tracks
+            self._by_id[metadata.file_id] = metadata
+            # 搜索索引原地增量更新，不重建
+            self._index.add(metadata)
+        return metadata
+
+    def close(self):
+        """
+        关闭索引连接.
+        """
+
+        def _close():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+        try:
+            self._executor.submit(_close).result()
+        except Exception as e:
+            logger.warning(f"关闭音乐库索引失败: {e}")
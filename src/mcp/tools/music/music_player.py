@@ -4,110 +4,25 @@
 """
 
 import asyncio
-import shutil
 import tempfile
 import time
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import pygame
 import requests
 
 from src.constants.constants import AudioConfig
+from src.utils.config_manager import ConfigManager
 from src.utils.logging_config import get_logger
 from src.utils.resource_finder import get_user_cache_dir
 
-# 尝试导入音乐元数据库
-try:
-    from mutagen import File as MutagenFile
-    from mutagen.id3 import ID3NoHeaderError
-
-    MUTAGEN_AVAILABLE = True
-except ImportError:
-    MUTAGEN_AVAILABLE = False
+from .library import MusicLibrary, MusicMetadata
+from .streaming import PART_MAX_AGE, STALL_TIMEOUT, StreamingDownload, StreamReader
 
 logger = get_logger(__name__)
 
 
-class MusicMetadata:
-    """
-    音乐元数据类.
-    """
-
-    def __init__(self, file_path: Path):
-        self.file_path = file_path
-        self.filename = file_path.name
-        self.file_id = file_path.stem  # 文件名去掉扩展名，即歌曲ID
-        self.file_size = file_path.stat().st_size
-
-        # 从文件提取的元数据
-        self.title = None
-        self.artist = None
-        self.album = None
-        self.duration = None  # 秒数
-
-    def extract_metadata(self) -> bool:
-        """
-        提取音乐文件元数据.
-        """
-        if not MUTAGEN_AVAILABLE:
-            return False
-
-        try:
-            audio_file = MutagenFile(self.file_path)
-            if audio_file is None:
-                return False
-
-            # 基本信息
-            if hasattr(audio_file, "info"):
-                self.duration = getattr(audio_file.info, "length", None)
-
-            # ID3标签信息
-            tags = audio_file.tags if audio_file.tags else {}
-
-            # 标题
-            self.title = self._get_tag_value(tags, ["TIT2", "TITLE", "\xa9nam"])
-
-            # 艺术家
-            self.artist = self._get_tag_value(tags, ["TPE1", "ARTIST", "\xa9ART"])
-
-            # 专辑
-            self.album = self._get_tag_value(tags, ["TALB", "ALBUM", "\xa9alb"])
-
-            return True
-
-        except ID3NoHeaderError:
-            # 没有ID3标签，不是错误
-            return True
-        except Exception as e:
-            logger.debug(f"提取元数据失败 {self.filename}: {e}")
-            return False
-
-    def _get_tag_value(self, tags: dict, tag_names: List[str]) -> Optional[str]:
-        """
-        从多个可能的标签名中获取值.
-        """
-        for tag_name in tag_names:
-            if tag_name in tags:
-                value = tags[tag_name]
-                if isinstance(value, list) and value:
-                    return str(value[0])
-                elif value:
-                    return str(value)
-        return None
-
-    def format_duration(self) -> str:
-        """
-        格式化播放时长.
-        """
-        if self.duration is None:
-            return "未知"
-
-        minutes = int(self.duration) // 60
-        seconds = int(self.duration) % 60
-        return f"{minutes:02d}:{seconds:02d}"
-
-
 class MusicPlayer:
     """音乐播放器 - 专为IoT设备设计
 
@@ -138,6 +53,21 @@ class MusicPlayer:
         self.temp_cache_dir = self.cache_dir / "temp"
         self._init_cache_dirs()
 
+        # 本地音乐库索引（持久化元数据，增量扫描）
+        self.library = MusicLibrary(self.cache_dir)
+
+        # 边下边播：预缓冲后即开始解码，下载在后台继续写缓存
+        config = ConfigManager.get_instance()
+        self.streaming = bool(config.get_config("MUSIC.STREAMING", True))
+        self.prebuffer_bytes = int(config.get_config("MUSIC.PREBUFFER_KB", 64)) * 1024
+        self._stream: Optional[StreamingDownload] = None
+        # 已取消但下载线程可能仍在运行的下载（按缓存文件），复用其 .part 前须等线程退出
+        self._retired_streams: Dict[Path, StreamingDownload] = {}
+        self._stream_reader: Optional[StreamReader] = None
+        # 最近一次在线播放的首音时间等指标
+        self._playback_metrics: Dict[str, Any] = {}
+        self._metrics_stream: Optional[StreamingDownload] = None
+
         # API配置
         self.config = {
             "SEARCH_URL": "http://search.kuwo.cn/r.s",
@@ -159,10 +89,6 @@ class MusicPlayer:
         self.app = None
         self._initialize_app_reference()
 
-        # 本地歌单缓存
-        self._local_playlist = None
-        self._last_scan_time = 0
-
         logger.info("音乐播放器单例初始化完成")
 
     def _init_pygame_mixer(self):
@@ -225,15 +151,22 @@ class MusicPlayer:
 
     def _clean_temp_cache(self):
         """
-        清理临时缓存文件.
+        清理临时缓存文件（未完成的 .part 保留以便续传，过期后才删除）.
         """
         try:
-            # 清空临时缓存目录中的所有文件
+            expired_before = time.time() - PART_MAX_AGE
             for file_path in self.temp_cache_dir.glob("*"):
                 try:
-                    if file_path.is_file():
-                        file_path.unlink()
-                        logger.debug(f"已删除临时缓存文件: {file_path.name}")
+                    if not file_path.is_file():
+                        continue
+                    # .part 及其校验值文件（.part.json）
+                    if (
+                        ".part" in file_path.suffixes
+                        and file_path.stat().st_mtime > expired_before
+                    ):
+                        continue
+                    file_path.unlink()
+                    logger.debug(f"已删除临时缓存文件: {file_path.name}")
                 except Exception as e:
                     logger.warning(f"删除临时缓存文件失败: {file_path.name}, {e}")
 
@@ -241,63 +174,20 @@ class MusicPlayer:
         except Exception as e:
             logger.error(f"清理临时缓存目录失败: {e}")
 
-    def _scan_local_music(self, force_refresh: bool = False) -> List[MusicMetadata]:
+    async def _scan_local_music(
+        self, force_refresh: bool = False
+    ) -> List[MusicMetadata]:
         """
-        扫描本地音乐缓存，返回歌单.
+        获取本地音乐歌单（由音乐库索引提供，必要时增量扫描）.
         """
-        current_time = time.time()
-
-        # 如果不强制刷新且缓存未过期（5分钟），直接返回缓存
-        if (
-            not force_refresh
-            and self._local_playlist is not None
-            and (current_time - self._last_scan_time) < 300
-        ):
-            return self._local_playlist
-
-        playlist = []
-
-        if not self.cache_dir.exists():
-            logger.warning(f"缓存目录不存在: {self.cache_dir}")
-            return playlist
-
-        # 查找所有音乐文件
-        music_files = []
-        for pattern in ["*.mp3", "*.m4a", "*.flac", "*.wav", "*.ogg"]:
-            music_files.extend(self.cache_dir.glob(pattern))
-
-        logger.debug(f"找到 {len(music_files)} 个音乐文件")
-
-        # 扫描每个文件
-        for file_path in music_files:
-            try:
-                metadata = MusicMetadata(file_path)
-
-                # 尝试提取元数据
-                if MUTAGEN_AVAILABLE:
-                    metadata.extract_metadata()
-
-                playlist.append(metadata)
-
-            except Exception as e:
-                logger.debug(f"处理音乐文件失败 {file_path.name}: {e}")
-
-        # 按艺术家和标题排序
-        playlist.sort(key=lambda x: (x.artist or "Unknown", x.title or x.filename))
-
-        # 更新缓存
-        self._local_playlist = playlist
-        self._last_scan_time = current_time
-
-        logger.info(f"扫描完成，找到 {len(playlist)} 首本地音乐")
-        return playlist
+        return await self.library.get_tracks(force_refresh)
 
     async def get_local_playlist(self, force_refresh: bool = False) -> dict:
         """
         获取本地音乐歌单.
         """
         try:
-            playlist = self._scan_local_music(force_refresh)
+            playlist = await self._scan_local_music(force_refresh)
 
             if not playlist:
                 return {
@@ -336,7 +226,7 @@ class MusicPlayer:
         搜索本地音乐.
         """
         try:
-            playlist = self._scan_local_music()
+            playlist = await self._scan_local_music()
 
             if not playlist:
                 return {
@@ -346,34 +236,19 @@ class MusicPlayer:
                     "found_count": 0,
                 }
 
-            query = query.lower()
+            # 模糊/拼音索引检索，结果按相关度排序
             results = []
-
-            for metadata in playlist:
-                # 在标题、艺术家、文件名中搜索
-                searchable_text = " ".join(
-                    filter(
-                        None,
-                        [
-                            metadata.title,
-                            metadata.artist,
-                            metadata.album,
-                            metadata.filename,
-                        ],
-                    )
-                ).lower()
-
-                if query in searchable_text:
-                    title = metadata.title or "未知标题"
-                    artist = metadata.artist or "未知艺术家"
-                    song_info = f"{title} - {artist}"
-                    results.append(
-                        {
-                            "song_info": song_info,
-                            "file_id": metadata.file_id,
-                            "duration": metadata.format_duration(),
-                        }
-                    )
+            for metadata, score in await self.library.search(query):
+                title = metadata.title or "未知标题"
+                artist = metadata.artist or "未知艺术家"
+                results.append(
+                    {
+                        "song_info": f"{title} - {artist}",
+                        "file_id": metadata.file_id,
+                        "duration": metadata.format_duration(),
+                        "score": score,
+                    }
+                )
 
             return {
                 "status": "success",
@@ -396,27 +271,16 @@ class MusicPlayer:
         根据文件ID播放本地歌曲.
         """
         try:
-            # 构建文件路径
-            file_path = self.cache_dir / f"{file_id}.mp3"
-
-            if not file_path.exists():
-                # 尝试其他格式
-                for ext in [".m4a", ".flac", ".wav", ".ogg"]:
-                    alt_path = self.cache_dir / f"{file_id}{ext}"
-                    if alt_path.exists():
-                        file_path = alt_path
-                        break
-                else:
-                    return {"status": "error", "message": f"本地文件不存在: {file_id}"}
-
-            # 获取歌曲信息
-            metadata = MusicMetadata(file_path)
-            if MUTAGEN_AVAILABLE:
-                metadata.extract_metadata()
+            # 从音乐库索引查找文件与元数据
+            metadata = await self.library.get_track(file_id)
+            if metadata is None:
+                return {"status": "error", "message": f"本地文件不存在: {file_id}"}
+            file_path = metadata.file_path
 
             # 停止当前播放
             if self.is_playing:
                 pygame.mixer.music.stop()
+            self._close_stream_reader()
 
             # 加载并播放
             pygame.mixer.music.load(str(file_path))
@@ -492,6 +356,7 @@ class MusicPlayer:
         if self.is_playing:
             logger.info(f"歌曲播放完成: {self.current_song}")
             pygame.mixer.music.stop()
+            self._close_stream_reader()
             self.is_playing = False
             self.paused = False
             self.current_position = self.total_duration
@@ -588,6 +453,7 @@ class MusicPlayer:
                 return {"status": "info", "message": "没有正在播放的歌曲"}
 
             pygame.mixer.music.stop()
+            self._close_stream_reader()
             current_song = self.current_song
             self.is_playing = False
             self.paused = False
@@ -668,8 +534,19 @@ class MusicPlayer:
             "position": position,
             "progress": progress,
             "has_lyrics": len(self.lyrics) > 0,
+            "playback": self.get_playback_metrics(),
         }
 
+    def get_playback_metrics(self) -> Dict[str, Any]:
+        """
+        最近一次在线播放的指标：模式（cache/stream/download）、首音时间、
+        预缓冲与完整下载耗时、续传次数.
+        """
+        metrics = dict(self._playback_metrics)
+        if self._metrics_stream is not None:
+            metrics.update(self._metrics_stream.metrics)
+        return metrics
+
     # 内部方法
     async def _search_song(self, song_name: str) -> Tuple[str, str]:
         """
@@ -757,22 +634,35 @@ class MusicPlayer:
             return "", ""
 
     async def _play_url(self, url: str) -> bool:
-        """
-        播放指定URL.
+        """播放指定URL.
+
+        缓存命中直接播放；开启边下边播时预缓冲完成即开始解码，下载在后台继续
         """
         try:
+            started = time.perf_counter()
+
             # 停止当前播放
             if self.is_playing:
                 pygame.mixer.music.stop()
-
-            # 检查缓存或下载
-            file_path = await self._get_or_download_file(url)
-            if not file_path:
-                return False
+            self._close_stream_reader()
+
+            cache_path = self.cache_dir / f"{self.song_id}.mp3"
+            cached = cache_path.exists()
+            if self.streaming and not cached:
+                mode = await self._load_stream(url, cache_path)
+                if not mode:
+                    return False
+            else:
+                # 检查缓存或下载
+                file_path = await self._get_or_download_file(url)
+                if not file_path:
+                    return False
+                pygame.mixer.music.load(str(file_path))
+                mode = "cache" if cached else "download"
 
             # 加载并播放
-            pygame.mixer.music.load(str(file_path))
             pygame.mixer.music.play()
+            self._record_playback_metrics(mode, started)
 
             self.current_url = url
             self.is_playing = True
@@ -796,6 +686,94 @@ class MusicPlayer:
             logger.error(f"播放失败: {e}")
             return False
 
+    async def _load_stream(self, url: str, cache_path: Path) -> Optional[str]:
+        """
+        边下边播：预缓冲完成后把读取端交给解码器，返回播放模式，失败返回 None.
+        """
+        stream = await self._get_stream(url, cache_path)
+        if not await asyncio.to_thread(stream.wait_prebuffered, STALL_TIMEOUT):
+            logger.error(f"下载失败: {stream.error or '预缓冲超时'}")
+            return None
+
+        if stream.total is None:
+            # 服务器未给出文件大小，无法边下边播，下载完成后按普通文件播放
+            if not await asyncio.to_thread(stream.wait_done):
+                return None
+            pygame.mixer.music.load(str(stream.file_path))
+            return "download"
+
+        reader = stream.open_reader()
+        try:
+            # 加载时解码器可能等待尚未到达的数据，放到线程里不阻塞事件循环
+            await asyncio.to_thread(pygame.mixer.music.load, reader, "mp3")
+        except Exception:
+            reader.close()
+            raise
+        reader.opening = False
+        self._stream_reader = reader
+        return "stream"
+
+    async def _get_stream(self, url: str, cache_path: Path) -> StreamingDownload:
+        """
+        返回该缓存文件的下载：同一首仍在下载时复用，否则取消上一首未完成的下载.
+        """
+        stream = self._stream
+        if stream is not None:
+            if stream.cache_path == cache_path and not (
+                stream.cancelled or stream.error
+            ):
+                return stream
+            if not stream.done:
+                stream.cancel()
+            self._retired_streams[stream.cache_path] = stream
+
+        # 同一个 .part 不能有两个写入者：旧下载线程可能正阻塞在读取上（最长
+        # STALL_TIMEOUT），必须等它真正退出后才能续传
+        retired = self._retired_streams.pop(cache_path, None)
+        if retired is not None:
+            await asyncio.to_thread(retired.wait_done)
+        for path, old in list(self._retired_streams.items()):
+            if not old.is_alive():
+                del self._retired_streams[path]
+
+        loop = asyncio.get_running_loop()
+
+        def on_complete(path: Path):
+            # 下载线程回调：在事件循环上把新缓存文件加入音乐库
+            asyncio.run_coroutine_threadsafe(self.library.add_file(path), loop)
+
+        self._stream = StreamingDownload(
+            url,
+            self.temp_cache_dir / f"{cache_path.name}.part",
+            cache_path,
+            headers=self.config["HEADERS"],
+            prebuffer_bytes=self.prebuffer_bytes,
+            on_complete=on_complete,
+        ).start()
+        return self._stream
+
+    def _close_stream_reader(self):
+        """
+        让解码器释放边下边播的读取端（下载本身继续）.
+        """
+        reader, self._stream_reader = self._stream_reader, None
+        if reader is None:
+            return
+        try:
+            pygame.mixer.music.unload()
+        except Exception:
+            pass
+        reader.close()
+
+    def _record_playback_metrics(self, mode: str, started: float):
+        """
+        记录首音时间（从开始处理到 pygame 开始播放）.
+        """
+        ttfs = round((time.perf_counter() - started) * 1000, 1)
+        self._playback_metrics = {"mode": mode, "time_to_first_sound_ms": ttfs}
+        self._metrics_stream = self._stream if mode != "cache" else None
+        logger.info(f"首音时间: {ttfs}ms（{mode}）")
+
     async def _get_or_download_file(self, url: str) -> Optional[Path]:
         """获取或下载文件.
 
@@ -821,45 +799,16 @@ class MusicPlayer:
     async def _download_file(self, url: str, filename: str) -> Optional[Path]:
         """下载文件到缓存目录.
 
-        先下载到临时目录，下载完成后移动到正式缓存目录
+        先下载到临时目录的 .part 文件（中断时按 Range 续传），完成后原子替换为正式缓存文件
         """
-        temp_path = None
         try:
-            # 创建临时文件路径
-            temp_path = self.temp_cache_dir / f"temp_{int(time.time())}_{filename}"
-
-            # 异步下载
-            response = await asyncio.to_thread(
-                requests.get,
-                url,
-                headers=self.config["HEADERS"],
-                stream=True,
-                timeout=30,
-            )
-            response.raise_for_status()
-
-            # 写入临时文件
-            with open(temp_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-
-            # 下载完成，移动到正式缓存目录
-            cache_path = self.cache_dir / filename
-            shutil.move(str(temp_path), str(cache_path))
-
-            logger.info(f"音乐下载完成并缓存: {cache_path}")
-            return cache_path
+            stream = await self._get_stream(url, self.cache_dir / filename)
+            if not await asyncio.to_thread(stream.wait_done):
+                return None
+            return stream.file_path
 
         except Exception as e:
             logger.error(f"下载失败: {e}")
-            # 清理临时文件
-            if temp_path and temp_path.exists():
-                try:
-                    temp_path.unlink()
-                    logger.debug(f"已清理临时下载文件: {temp_path}")
-                except Exception:
-                    pass
             return None
 
     async def _fetch_lyrics(self, song_id: str):
@@ -0,0 +1,215 @@
+"""
+本地音乐的内存搜索索引.
+
+标题/艺术家/专辑/文件名经归一化（全角转半角、去音调符号、小写、去标点）后
+切成字符二元组建立倒排索引，中文单字另建一元组；安装了 pypinyin 时再为含中文的
+字段加入全拼与首字母键，语音识别出的同音错字或拼音也能命中。
+查询按 IDF 加权的二元组覆盖率排序，容忍少量错拼；增删曲目只更新其自身的倒排项.
+"""
+
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# 拼音为可选依赖
+try:
+    from pypinyin import lazy_pinyin
+
+    PYPINYIN_AVAILABLE = True
+except ImportError:
+    PYPINYIN_AVAILABLE = False
+
+# 至少命中查询二元组（按 IDF 加权）的比例，低于此视为不匹配
+MIN_COVERAGE = 0.6
+
+# 同时至少命中的查询二元组个数比例（不加权，防止只剩个别二元组在曲库中出现时误中）
+MIN_GRAM_HITS = 0.5
+
+# 默认返回条数
+DEFAULT_LIMIT = 20
+
+# NFKD 不会拆分的拉丁字母
+_EXTRA_FOLDS = str.maketrans({"đ": "d", "ø": "o", "ł": "l", "ß": "ss", "æ": "ae"})
+_NON_WORD = re.compile(r"[\W_]+")
+_CJK = re.compile(r"[\u3400-\u9fff]")
+
+
+def normalize(text: Optional[str]) -> str:
+    """
+    归一化为紧凑的检索键：全角转半角、去音调符号、小写，去掉空白和标点.
+    """
+    if not text:
+        return ""
+    folded = unicodedata.normalize("NFKD", text.casefold())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return _NON_WORD.sub("", folded.translate(_EXTRA_FOLDS))
+
+
+def pinyin_keys(text: str) -> List[str]:
+    """
+    含中文时返回 [全拼, 首字母]，否则或未安装 pypinyin 时返回空列表.
+    """
+    if not PYPINYIN_AVAILABLE or not _CJK.search(text):
+        return []
+    syllables = [normalize(s) for s in lazy_pinyin(text)]
+    syllables = [s for s in syllables if s]
+    return ["".join(syllables), "".join(s[0] for s in syllables)]
+
+
+def grams(key: str) -> Set[str]:
+    """
+    检索键的字符二元组，中文字符另加一元组（单字查询）.
+    """
+    result = {key[i : i + 2] for i in range(len(key) - 1)}
+    result.update(ch for ch in key if _CJK.match(ch))
+    if len(key) == 1:
+        result.add(key)
+    return result
+
+
+def query_variants(query: str) -> List[Set[str]]:
+    """
+    查询的二元组集合：按词切分后归一化（不产生跨词二元组），含中文时再加一组
+    逐词全拼（同音字也能命中）.
+    """
+    words = [word for word in query.split() if normalize(word)]
+    if not words:
+        return []
+    variants = [set().union(*(grams(normalize(word)) for word in words))]
+    spelled = [key for word in words for key in pinyin_keys(word)[:1]]
+    if spelled:
+        variants.append(set().union(*(grams(key) for key in spelled)))
+    return variants
+
+
+class MusicSearchIndex:
+    """
+    曲目的 n-gram 倒排索引（文档编号即插入顺序）.
+    """
+
+    def __init__(self, tracks: Iterable[Any] = ()):
+        self._reset()
+        for track in tracks:
+            self.add(track)
+
+    def _reset(self):
+        self._tracks: List[Optional[Any]] = []
+        self._texts: List[str] = []
+        self._gram_counts: List[int] = []
+        self._postings: Dict[str, Set[int]] = {}
+        self._doc_by_id: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._doc_by_id)
+
+    @staticmethod
+    def _keys(track: Any) -> List[str]:
+        """
+        曲目的检索键：各字段归一化文本及其拼音键.
+        """
+        keys = []
+        for field in (track.title, track.artist, track.album, track.filename):
+            if not field:
+                continue
+            keys.append(normalize(field))
+            keys.extend(pinyin_keys(field))
+        return [key for key in keys if key]
+
+    def add(self, track: Any):
+        """
+        加入或替换一首曲目，只触及它自己的倒排项.
+        """
+        self.remove(track.file_id)
+        keys = self._keys(track)
+        doc_grams = self._grams(keys)
+
+        doc = len(self._tracks)
+        self._tracks.append(track)
+        # 各键用不会出现在归一化文本中的分隔符拼接，供整串包含判断
+        self._texts.append("|".join(keys))
+        self._gram_counts.append(len(doc_grams))
+        self._doc_by_id[track.file_id] = doc
+        for gram in doc_grams:
+            self._postings.setdefault(gram, set()).add(doc)
+
+    @staticmethod
+    def _grams(keys: List[str]) -> Set[str]:
+        doc_grams: Set[str] = set()
+        for key in keys:
+            doc_grams |= grams(key)
+        return doc_grams
+
+    def remove(self, file_id: str) -> bool:
+        """
+        删除曲目，从它的倒排项中移除（文档编号不复用）.
+        """
+        doc = self._doc_by_id.pop(file_id, None)
+        if doc is None:
+            return False
+        for gram in self._grams(self._texts[doc].split("|")):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(doc)
+                if not posting:
+                    del self._postings[gram]
+        self._tracks[doc] = None
+        self._texts[doc] = ""
+        return True
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[Tuple[Any, float]]:
+        """
+        返回按相关度降序的 (曲目, 得分).
+
+        得分 = 加权覆盖率 + 全部二元组命中时的 1 分加分 + 0.1 × 曲目自身二元组的命中比例
+        （偏向更短、更贴近查询的标题）.
+        """
+        docs = len(self._doc_by_id)
+        best: Dict[int, float] = {}
+        for query_grams in query_variants(query):
+            # 曲库中没有的二元组（错拼、口误）不参与计分；其余按 IDF 加权，
+            # 由稀有到常见排序
+            weighted = sorted(
+                (
+                    (math.log(docs / len(self._postings[gram])) + 1.0, gram)
+                    for gram in query_grams
+                    if gram in self._postings
+                ),
+                reverse=True,
+            )
+            if not weighted:
+                continue
+            total = sum(weight for weight, _ in weighted)
+
+            # 前缀过滤：取最稀有的几个二元组，直到剩余权重不足 required；
+            # 不含其中任何一个的曲目最多只能命中剩余权重，不可能达标，无需计分
+            required = total * MIN_COVERAGE
+            candidates: Set[int] = set()
+            remaining = total
+            for weight, gram in weighted:
+                candidates |= self._postings[gram]
+                remaining -= weight
+                if remaining < required:
+                    break
+
+            scores: Dict[int, float] = dict.fromkeys(candidates, 0.0)
+            hits = Counter()
+            for weight, gram in weighted:
+                for doc in candidates & self._postings[gram]:
+                    scores[doc] += weight
+                    hits[doc] += 1
+
+            full = len(query_grams)
+            for doc, score in scores.items():
+                if score < required or hits[doc] < full * MIN_GRAM_HITS:
+                    continue
+                score = score / total + 0.1 * hits[doc] / self._gram_counts[doc]
+                if hits[doc] == full:
+                    score += 1.0
+                if score > best.get(doc, 0.0):
+                    best[doc] = score
+
+        ranked = heapq.nlargest(limit, best.items(), key=lambda item: item[1])
+        return [(self._tracks[doc], round(score, 3)) for doc, score in ranked]
@@ -0,0 +1,454 @@
+"""
+边下边播.
+
+后台线程把歌曲下载到临时目录的 .part 文件（连接中断时按 HTTP Range 续传，以 If-Range 校验远端未变），
+读取端是给 pygame 解码器用的类文件对象：已下载的部分直接读，未到的部分等待；
+下载完成后 .part 原子替换为正式缓存文件，供下次直接播放.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import requests
+
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 开始解码前至少下载的字节数（不含开头的 ID3v2 标签），128kbps 约 4 秒
+PREBUFFER_BYTES = 64 * 1024
+
+# 加载时解码器会探测文件尾部的 ID3v1/APE 等标签；尚未下载的尾部按全零返回（视为无标签）
+TAIL_PROBE_BYTES = 64 * 1024
+
+# 读取端等待新数据的最长时间（秒），超时按文件结束处理
+STALL_TIMEOUT = 30
+
+# 连接中断后的续传次数
+MAX_RESUME_ATTEMPTS = 3
+
+CHUNK_SIZE = 16 * 1024
+
+# 未完成下载（.part）的保留时间（秒），超过后清理临时目录时删除
+PART_MAX_AGE = 7 * 24 * 3600
+
+
+def id3v2_size(header: bytes) -> int:
+    """
+    返回文件开头 ID3v2 标签的总字节数，没有标签时为 0.
+    """
+    if len(header) < 10 or header[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in header[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if header[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _validator(response: requests.Response) -> Optional[str]:
+    """
+    响应的强校验值（ETag，缺省时用 Last-Modified），用于续传时的 If-Range.
+    """
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+class SourceChangedError(IOError):
+    """
+    续传时远端文件已变化，已下载的部分不能与新内容拼接.
+    """
+
+
+def _content_total(response: requests.Response) -> Optional[int]:
+    """
+    从响应头得出完整文件大小，未知时返回 None.
+    """
+    if response.status_code == 206:
+        content_range = response.headers.get("Content-Range", "")
+        total = content_range.rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else None
+
+
+class StreamingDownload:
+    """
+    单首歌曲的后台下载，可供多个读取端边下边读.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        part_path: Path,
+        cache_path: Path,
+        headers: Optional[Dict[str, str]] = None,
+        prebuffer_bytes: int = PREBUFFER_BYTES,
+        on_complete: Optional[Callable[[Path], None]] = None,
+    ):
+        self.url = url
+        self.part_path = Path(part_path)
+        self.cache_path = Path(cache_path)
+        # .part 对应的远端校验值，与 .part 一同保留，重启后续传时校验
+        self.meta_path = self.part_path.with_name(self.part_path.name + ".json")
+        self.validator: Optional[str] = None
+        self.headers = dict(headers or {})
+        # 字节数需与 Content-Length/Range 一致，不接受压缩传输
+        self.headers["Accept-Encoding"] = "identity"
+        self.prebuffer_bytes = prebuffer_bytes
+        self._on_complete = on_complete
+
+        self.size = 0  # 已写入 .part 的字节数
+        self.total: Optional[int] = None  # 完整大小（Content-Length），未知为 None
+        self.done = False
+        self.error: Optional[Exception] = None
+        self.cancelled = False
+
+        self._cond = threading.Condition()
+        self._prebuffered = threading.Event()
+        self._readers = 0
+        self._finalized = False
+        self._prebuffer_target: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self.started_at = time.perf_counter()
+        self.metrics: Dict[str, float] = {"resumes": 0}
+
+    # -------- 下载线程 --------
+
+    def start(self) -> "StreamingDownload":
+        self._thread = threading.Thread(
+            target=self._run, name="music-stream", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def _run(self):
+        # 上次中断留下的 .part 从末尾续传；没有校验值时无法确认远端未变，从头下载
+        if self.part_path.exists():
+            self.size = self.part_path.stat().st_size
+            self.validator = self._load_validator()
+            if self.size and self.validator:
+                logger.info(f"发现未完成的下载，从 {self.size} 字节处续传")
+            elif self.size:
+                self._restart()
+
+        attempts = 0
+        while not self.cancelled:
+            try:
+                if self._download_once():
+                    self._complete()
+                    return
+                raise IOError("连接提前结束")
+            except SourceChangedError as e:
+                logger.error(f"下载失败: {e}")
+                self._fail(e)
+                return
+            except Exception as e:
+                attempts += 1
+                if self.cancelled:
+                    break
+                if attempts > MAX_RESUME_ATTEMPTS:
+                    logger.error(f"下载失败: {e}")
+                    self._fail(e)
+                    return
+                self.metrics["resumes"] = attempts
+                logger.warning(
+                    f"下载中断（{e}），{attempts}/{MAX_RESUME_ATTEMPTS} 次续传，"
+                    f"已下载 {self.size} 字节"
+                )
+                time.sleep(min(2**attempts, 5))
+
+        # 取消：保留 .part，下次播放同一首时续传
+        with self._cond:
+            self._cond.notify_all()
+        self._prebuffered.set()
+
+    def _download_once(self) -> bool:
+        """
+        发起一次请求并写入 .part，返回是否下载完整.
+        """
+        offset = self.size
+        headers = dict(self.headers)
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            # 远端文件变化时服务器返回完整的新文件（200）而不是 206
+            headers["If-Range"] = self.validator
+
+        with requests.get(
+            self.url, headers=headers, stream=True, timeout=(10, STALL_TIMEOUT)
+        ) as response:
+            if response.status_code == 416 and offset:
+                # 已有部分不被服务器接受（文件已变化），从头下载
+                self._restart()
+                return False
+            response.raise_for_status()
+
+            validator = _validator(response)
+            skip = 0
+            if offset and response.status_code != 206:
+                if validator == self.validator:
+                    # 服务器忽略 Range、返回同一文件的全部内容：跳过已有部分
+                    # （都没有校验值时只可能是本次运行中的重连，视为同一文件）
+                    skip = offset
+                elif self._readers:
+                    # 正在播放的数据来自旧文件，不能换成新内容
+                    raise SourceChangedError("远端文件已变化")
+                else:
+                    logger.info("远端文件已变化，丢弃未完成的下载并从头下载")
+                    self._restart()
+                    offset = 0
+            if not offset:
+                self.validator = validator
+                self._save_validator()
+            total = _content_total(response)
+            with self._cond:
+                self.total = total
+            if total is None:
+                # 大小未知时无法给解码器报告文件长度，调用方改为等待下载完成
+                self._prebuffered.set()
+
+            self.part_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.part_path, "ab") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if self.cancelled:
+                        return False
+                    if skip:
+                        dropped = min(skip, len(chunk))
+                        chunk, skip = chunk[dropped:], skip - dropped
+                    if not chunk:
+                        continue
+                    f.write(chunk)
+                    f.flush()
+                    with self._cond:
+                        self.size += len(chunk)
+                        self._cond.notify_all()
+                    self._check_prebuffer()
+
+        return self.total is None or self.size >= self.total
+
+    def _restart(self):
+        with self._cond:
+            self.size = 0
+            self._prebuffer_target = None
+        self.validator = None
+        for path in (self.part_path, self.meta_path):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _load_validator(self) -> Optional[str]:
+        try:
+            return json.loads(self.meta_path.read_text(encoding="utf-8"))["validator"]
+        except Exception:
+            return None
+
+    def _save_validator(self):
+        try:
+            if self.validator:
+                self.meta_path.parent.mkdir(parents=True, exist_ok=True)
+                self.meta_path.write_text(
+                    json.dumps({"url": self.url, "validator": self.validator}),
+                    encoding="utf-8",
+                )
+            else:
+                self.meta_path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"保存下载校验值失败: {e}")
+
+    def _check_prebuffer(self):
+        if self._prebuffered.is_set() or self.total is None or self.size < 10:
+            return
+        if self._prebuffer_target is None:
+            # 解码器先跳过开头的 ID3v2 标签（可能含封面图），预缓冲从标签之后算起
+            with open(self.part_path, "rb") as f:
+                header = f.read(10)
+            self._prebuffer_target = min(
+                self.total, id3v2_size(header) + self.prebuffer_bytes
+            )
+        if self.size >= self._prebuffer_target:
+            self.metrics["prebuffer_ms"] = self.elapsed_ms()
+            self._prebuffered.set()
+
+    def _complete(self):
+        with self._cond:
+            self.done = True
+            self.total = self.size
+            self._cond.notify_all()
+        self.metrics["download_ms"] = self.elapsed_ms()
+        self.metrics["bytes"] = self.size
+        self._prebuffered.set()
+        self._finalize()
+
+    def _fail(self, error: Exception):
+        with self._cond:
+            self.error = error
+            self._cond.notify_all()
+        self._prebuffered.set()
+
+    def _finalize(self):
+        """
+        .part 原子替换为缓存文件；Windows 上仍有读取端打开时推迟到读取端关闭.
+        """
+        with self._cond:
+            if self._finalized or not self.done:
+                return
+            try:
+                os.replace(self.part_path, self.cache_path)
+            except OSError as e:
+                if self._readers:
+                    return
+                logger.error(f"保存缓存文件失败: {e}")
+                return
+            self._finalized = True
+            self.meta_path.unlink(missing_ok=True)
+
+        logger.info(f"音乐下载完成并缓存: {self.cache_path}")
+        if self._on_complete:
+            try:
+                self._on_complete(self.cache_path)
+            except Exception as e:
+                logger.warning(f"下载完成回调失败: {e}")
+
+    # -------- 调用方接口 --------
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started_at) * 1000, 1)
+
+    def wait_prebuffered(self, timeout: Optional[float] = None) -> bool:
+        """
+        阻塞等待预缓冲完成（或得知大小未知、下载结束），失败、取消或超时返回 False.
+        """
+        if not self._prebuffered.wait(timeout):
+            return False
+        return self.error is None and not self.cancelled
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait_done(self, timeout: Optional[float] = None) -> bool:
+        """
+        阻塞等待下载完成，返回是否成功.
+        """
+        if self._thread:
+            self._thread.join(timeout)
+        return self.done and self.error is None
+
+    @property
+    def file_path(self) -> Path:
+        """
+        当前完整数据所在的文件（完成并替换后为缓存文件）.
+        """
+        return self.cache_path if self._finalized else self.part_path
+
+    def open_reader(self) -> "StreamReader":
+        with self._cond:
+            self._readers += 1
+        return StreamReader(self)
+
+    def _reader_closed(self):
+        with self._cond:
+            self._readers -= 1
+        self._finalize()
+
+    def cancel(self):
+        """
+        停止下载（保留 .part 以便续传），唤醒所有读取端.
+        """
+        self.cancelled = True
+        with self._cond:
+            self._cond.notify_all()
+
+
+class StreamReader:
+    """
+    pygame.mixer.music.load 使用的类文件对象.
+
+    在解码线程上被调用：读到尚未下载的位置时等待下载线程写入；
+    opening 期间（加载时的标签探测）尚未下载的尾部返回全零.
+    """
+
+    def __init__(self, stream: StreamingDownload):
+        self._stream = stream
+        self._file = open(stream.part_path, "rb")
+        self._pos = 0
+        self._lock = threading.Lock()
+        self.opening = True
+        self.closed = False
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self._stream.total or self._stream.size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def _wait_for_data(self) -> int:
+        """
+        等到当前位置之后有数据，返回可读字节数；结束、失败或超时返回 0.
+        """
+        stream = self._stream
+        deadline = time.monotonic() + STALL_TIMEOUT
+        with stream._cond:
+            while stream.size <= self._pos:
+                if stream.done or stream.error or stream.cancelled or self.closed:
+                    return 0
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning("等待音乐数据超时，按文件结束处理")
+                    return 0
+                stream._cond.wait(remaining)
+            return stream.size - self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        stream = self._stream
+        total = stream.total or 0
+        if size is None or size < 0:
+            size = max(total - self._pos, 0) or CHUNK_SIZE
+
+        if (
+            self.opening
+            and stream.size <= self._pos < total
+            and self._pos >= total - TAIL_PROBE_BYTES
+        ):
+            data = bytes(min(size, total - self._pos))
+            self._pos += len(data)
+            return data
+
+        available = self._wait_for_data()
+        if not available:
+            return b""
+        with self._lock:
+            if self.closed:
+                return b""
+            self._file.seek(self._pos)
+            data = self._file.read(min(size, available))
+        self._pos += len(data)
+        return data
+
+    def close(self):
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._file.close()
+        with self._stream._cond:
+            self._stream._cond.notify_all()
+        self._stream._reader_closed()
@@ -5,12 +5,13 @@
 
 from .device_status import get_device_status
 from .manager import SystemToolsManager, get_system_tools_manager
-from .tools import get_system_status, set_volume
+from .tools import get_diagnostics, get_system_status, set_volume
 
 __all__ = [
     "SystemToolsManager",
     "get_system_tools_manager",
     "get_device_status",
+    "get_diagnostics",
     "get_system_status",
     "set_volume",
 ]
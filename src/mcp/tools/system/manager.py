@@ -10,7 +10,7 @@ from src.utils.logging_config import get_logger
 from .app_management.killer import kill_application, list_running_applications
 from .app_management.launcher import launch_application
 from .app_management.scanner import scan_installed_applications
-from .tools import get_system_status, set_volume
+from .tools import get_diagnostics, get_system_status, set_volume
 
 logger = get_logger(__name__)
 
@@ -37,6 +37,11 @@ class SystemToolsManager:
             # 注册获取设备状态工具
             self._register_device_status_tool(add_tool, PropertyList)
 
+            # 注册运行诊断工具
+            self._register_diagnostics_tool(
+                add_tool, PropertyList, Property, PropertyType
+            )
+
             # 注册音量控制工具
             self._register_volume_control_tool(
                 add_tool, PropertyList, Property, PropertyType
@@ -85,6 +90,33 @@ class SystemToolsManager:
         )
         logger.debug("[SystemManager] 注册设备状态工具成功")
 
+    def _register_diagnostics_tool(
+        self, add_tool, PropertyList, Property, PropertyType
+    ):
+        """
+        注册运行诊断工具.
+        """
+        diag_props = PropertyList(
+            [Property("reset", PropertyType.BOOLEAN, default_value=False)]
+        )
+        add_tool(
+            (
+                "self.get_diagnostics",
+                "Report low-level runtime diagnostics of this client: audio callback "
+                "duration histograms (p50/p95/p99), microphone overflow and speaker "
+                "underflow counts, wake-word/playback queue depths, resampler and "
+                "Opus encode/decode timings, and frames dropped due to full queues.\n"
+                "Use this tool when:\n"
+                "1. User reports choppy, stuttering or delayed audio\n"
+                "2. User asks about audio performance or health of the device\n\n"
+                "Parameters:\n"
+                "- reset: Set to true to clear counters after reading (default: false)",
+                diag_props,
+                get_diagnostics,
+            )
+        )
+        logger.debug("[SystemManager] 注册运行诊断工具成功")
+
     def _register_volume_control_tool(
         self, add_tool, PropertyList, Property, PropertyType
     ):
@@ -253,9 +285,10 @@ class SystemToolsManager:
         """
         return {
             "initialized": self._initialized,
-            "tools_count": 6,  # 当前注册的工具数量
+            "tools_count": 7,  # 当前注册的工具数量
             "available_tools": [
                 "get_device_status",
+                "get_diagnostics",
                 "set_volume",
                 "launch_application",
                 "scan_installed_applications",
@@ -80,6 +80,67 @@ async def set_volume(args: Dict[str, Any]) -> bool:
         return False
 
 
+async def get_diagnostics(args: Dict[str, Any]) -> str:
+    """
+    获取运行诊断指标（音频回调耗时、xrun、队列深度等）.
+    """
+    try:
+        diagnostics = {
+            "audio": _get_audio_diagnostics(),
+            "connection": _get_connection_diagnostics(),
+        }
+
+        if args.get("reset"):
+            codec = _get_audio_codec()
+            if codec:
+                codec.reset_stats()
+
+        return json.dumps(diagnostics, ensure_ascii=False)
+
+    except Exception as e:
+        logger.error(f"[SystemTools] 获取诊断信息失败: {e}", exc_info=True)
+        return json.dumps({"error": str(e)}, ensure_ascii=False)
+
+
+def _get_audio_codec():
+    """
+    获取当前应用的音频编解码器，未启用音频时返回None.
+    """
+    try:
+        from src.application import Application
+
+        app = Application.get_instance()
+        audio_plugin = app.plugins.get_plugin("audio")
+        return getattr(audio_plugin, "codec", None) if audio_plugin else None
+    except Exception:
+        return None
+
+
+def _get_connection_diagnostics() -> Dict[str, Any]:
+    """
+    获取连接保活与交互延迟（唤醒 -> 通道就绪 -> 首个TTS音频帧）指标.
+    """
+    try:
+        from src.application import Application
+
+        manager = Application.get_instance().connection_manager
+        if manager is None:
+            return {"available": False}
+        return {"available": True, **manager.get_stats()}
+    except Exception as e:
+        return {"available": False, "error": str(e)}
+
+
+def _get_audio_diagnostics() -> Dict[str, Any]:
+    """
+    获取音频层运行指标.
+    """
+    codec = _get_audio_codec()
+    if codec is None:
+        return {"available": False, "reason": "Audio codec not initialized"}
+    return {"available": True, **codec.get_stats()}
+
+
 async def _get_audio_status() -> Dict[str, Any]:
     """
     获取音频状态.
@@ -4,5 +4,6 @@
 """
 
 from .manager import get_timer_manager
+from .timer_service import get_timer_service
 
-__all__ = ["get_timer_manager"]
+__all__ = ["get_timer_manager", "get_timer_service"]
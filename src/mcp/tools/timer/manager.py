@@ -9,6 +9,7 @@ from src.utils.logging_config import get_logger
 
 from .tools import (
     cancel_countdown_timer,
+    cancel_matching_countdown_timers,
     get_active_countdown_timers,
     start_countdown_timer,
 )
@@ -45,6 +46,11 @@ class TimerToolsManager:
                 add_tool, PropertyList, Property, PropertyType
             )
 
+            # 注册批量取消倒计时工具
+            self._register_cancel_matching_tool(
+                add_tool, PropertyList, Property, PropertyType
+            )
+
             # 注册获取活动倒计时工具
             self._register_get_active_timers_tool(add_tool, PropertyList)
 
@@ -128,6 +134,35 @@ class TimerToolsManager:
         )
         logger.debug("[TimerManager] 注册取消倒计时工具成功")
 
+    def _register_cancel_matching_tool(
+        self, add_tool, PropertyList, Property, PropertyType
+    ):
+        """
+        注册批量取消倒计时工具.
+        """
+        cancel_props = PropertyList(
+            [
+                Property("description", PropertyType.STRING, default_value=""),
+                Property("tool_name", PropertyType.STRING, default_value=""),
+            ]
+        )
+
+        add_tool(
+            (
+                "timer.cancel_matching_countdowns",
+                "Cancel all active countdown timers whose description contains the "
+                "given text and/or whose command calls the given MCP tool name. "
+                "Use this when the user wants to: \n"
+                "1. Cancel timers by what they do (e.g. all volume timers) \n"
+                "2. Cancel several timers at once without knowing their IDs \n"
+                "At least one of description or tool_name is required; when both "
+                "are given a timer must match both.",
+                cancel_props,
+                cancel_matching_countdown_timers,
+            )
+        )
+        logger.debug("[TimerManager] 注册批量取消倒计时工具成功")
+
     def _register_get_active_timers_tool(self, add_tool, PropertyList):
         """
         注册获取活动倒计时工具.
@@ -161,10 +196,11 @@ class TimerToolsManager:
         """
         return {
             "initialized": self._initialized,
-            "tools_count": 3,  # 当前注册的工具数量
+            "tools_count": 4,  # 当前注册的工具数量
             "available_tools": [
                 "start_countdown",
                 "cancel_countdown",
+                "cancel_matching_countdowns",
                 "get_active_timers",
             ],
         }
@@ -0,0 +1,64 @@
+"""倒计时持久化存储.
+
+未到期的倒计时以 JSON 保存在用户数据目录，程序重启后由 TimerService 恢复。
+截止时间按墙上时钟（epoch 秒）保存，单调时钟跨重启无意义。
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.utils.logging_config import get_logger
+from src.utils.resource_finder import get_user_data_dir
+
+logger = get_logger(__name__)
+
+STORE_VERSION = 1
+
+
+class TimerStore:
+    """
+    倒计时记录的 JSON 文件存储（写临时文件后原子替换）.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else get_user_data_dir() / "timers.json"
+        # 写盘在工作线程中执行，串行化以免并发写同一个临时文件
+        self._write_lock = threading.Lock()
+
+    def load(self) -> List[Dict[str, Any]]:
+        """
+        读取保存的倒计时记录，文件不存在或损坏时返回空列表.
+        """
+        try:
+            if not self.path.exists():
+                return []
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") != STORE_VERSION:
+                logger.warning(f"倒计时存储版本不匹配，忽略: {self.path}")
+                return []
+            return list(data.get("timers", []))
+        except Exception as e:
+            logger.warning(f"读取倒计时存储失败: {e}")
+            return []
+
+    def save(self, records: List[Dict[str, Any]]) -> bool:
+        """
+        覆盖保存全部未到期的倒计时记录.
+        """
+        try:
+            text = json.dumps(
+                {"version": STORE_VERSION, "timers": records}, ensure_ascii=False
+            )
+            with self._write_lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = self.path.with_suffix(".json.tmp")
+                tmp_file.write_text(text, encoding="utf-8")
+                os.replace(tmp_file, self.path)
+            logger.debug(f"已保存 {len(records)} 个倒计时到: {self.path}")
+            return True
+        except Exception as e:
+            logger.error(f"保存倒计时存储失败: {e}")
+            return False
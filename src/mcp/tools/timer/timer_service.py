@@ -1,25 +1,36 @@
 """倒计时器服务.
 
-管理倒计时任务的创建、执行、取消和状态查询
+管理倒计时任务的创建、执行、取消和状态查询。所有倒计时共用一个调度任务：
+截止时间（单调时钟）放在小顶堆中，调度任务只睡到堆顶，增删为 O(log n)；
+未到期的倒计时可持久化到本地，程序重启后恢复。
 """
 
 import asyncio
+import heapq
 import json
-from asyncio import Task
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
+from src.utils.config_manager import ConfigManager
 from src.utils.logging_config import get_logger
 
+from .store import TimerStore
+
 logger = get_logger(__name__)
 
+# 持久化写盘的防抖间隔（秒）
+SAVE_DELAY = 0.5
+# 堆中已取消条目超过有效条目的倍数时重建堆
+HEAP_COMPACT_RATIO = 2
+
 
 class TimerService:
     """
     倒计时器服务，管理所有倒计时任务.
     """
 
-    def __init__(self):
+    def __init__(self, store: Optional[TimerStore] = None):
         # 使用字典存储活动的计时器，键是 timer_id，值是 TimerTask 对象
         self._timers: Dict[int, "TimerTask"] = {}
         self._next_timer_id = 0
@@ -27,6 +38,182 @@ class TimerService:
         self._lock = asyncio.Lock()
         self.DEFAULT_DELAY = 5  # 默认延迟秒数
 
+        # 调度状态：(截止时间, timer_id) 小顶堆；取消时只从字典删除，出堆时跳过
+        self._heap: List[Tuple[float, int]] = []
+        self._driver: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        # 正在执行命令的任务（执行较慢的工具不阻塞调度）
+        self._executing: Set[asyncio.Task] = set()
+
+        config = ConfigManager.get_instance()
+        self._persist = bool(config.get_config("TIMER.PERSIST", True))
+        # 重启后超过截止时间多久以内仍补执行（秒），更早到期的直接丢弃
+        self._restore_grace = float(config.get_config("TIMER.RESTORE_GRACE", 60))
+        self._store = store or (TimerStore() if self._persist else None)
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        # 正在进行的写盘（同一时间最多一个，避免旧快照覆盖新快照）
+        self._save_task: Optional[asyncio.Task] = None
+        self._restored = False
+
+    # -------- 生命周期 --------
+
+    async def start(self):
+        """
+        恢复持久化的倒计时并启动调度任务（应用启动时调用，重复调用无副作用）.
+        """
+        async with self._lock:
+            if not self._restored:
+                self._restored = True
+                await self._restore()
+            self._ensure_driver()
+
+    async def shutdown(self):
+        """
+        停止调度并把未到期的倒计时写盘，下次启动时恢复（应用关闭时调用）.
+        """
+        async with self._lock:
+            if self._driver:
+                self._driver.cancel()
+                try:
+                    await self._driver
+                except asyncio.CancelledError:
+                    pass
+                self._driver = None
+            if self._save_handle:
+                self._save_handle.cancel()
+                self._save_handle = None
+            if self._save_task:
+                # 等防抖写盘结束，最后一次写入必须在它之后
+                await asyncio.gather(self._save_task, return_exceptions=True)
+                self._save_task = None
+            if self._store and self._restored:
+                records = self._snapshot()
+                await asyncio.to_thread(self._store.save, records)
+            self._timers.clear()
+            self._heap.clear()
+            self._restored = False
+        logger.info("倒计时服务已停止")
+
+    def _ensure_driver(self):
+        if self._driver is None or self._driver.done():
+            self._wakeup = asyncio.Event()
+            self._driver = asyncio.get_running_loop().create_task(self._drive())
+
+    async def _restore(self):
+        if not self._store:
+            return
+        records = await asyncio.to_thread(self._store.load)
+        now_wall = time.time()
+        now_mono = time.monotonic()
+        restored = dropped = 0
+        for record in records:
+            try:
+                overdue = now_wall - float(record["deadline"])
+                timer_id = int(record["timer_id"])
+                if overdue > self._restore_grace:
+                    dropped += 1
+                    logger.warning(
+                        f"倒计时 {timer_id} 已过期 {int(overdue)} 秒，不再执行: "
+                        f"{record.get('description') or record['command']}"
+                    )
+                    continue
+                timer_task = TimerTask(
+                    timer_id=timer_id,
+                    command=record["command"],
+                    delay=int(record["delay"]),
+                    description=record.get("description", ""),
+                    service=self,
+                )
+                timer_task.start_time = datetime.fromisoformat(record["start_time"])
+                timer_task.execution_time = datetime.fromtimestamp(record["deadline"])
+                timer_task.deadline = now_mono + max(0.0, -overdue)
+                self._add(timer_task)
+                self._next_timer_id = max(self._next_timer_id, timer_id + 1)
+                restored += 1
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"忽略无效的倒计时记录 {record}: {e}")
+        if restored or dropped:
+            logger.info(f"已恢复 {restored} 个倒计时，丢弃 {dropped} 个过期倒计时")
+            self._schedule_save()
+
+    # -------- 调度 --------
+
+    def _add(self, timer_task: "TimerTask"):
+        self._timers[timer_task.timer_id] = timer_task
+        heapq.heappush(self._heap, (timer_task.deadline, timer_task.timer_id))
+        # 新条目成为堆顶时唤醒调度任务重新计算睡眠时长
+        if self._heap[0][1] == timer_task.timer_id and self._wakeup:
+            self._wakeup.set()
+
+    def _remove(self, timer_id: int) -> Optional["TimerTask"]:
+        timer_task = self._timers.pop(timer_id, None)
+        if len(self._heap) > HEAP_COMPACT_RATIO * len(self._timers) + 64:
+            self._heap = [(d, i) for d, i in self._heap if i in self._timers]
+            heapq.heapify(self._heap)
+        return timer_task
+
+    async def _drive(self):
+        """
+        调度任务：睡到最早的截止时间，弹出所有到期倒计时并执行.
+        """
+        while True:
+            # 跳过已取消的条目（取消时堆可能被重建，每轮重新取引用）
+            heap = self._heap
+            while heap and heap[0][1] not in self._timers:
+                heapq.heappop(heap)
+
+            timeout = max(0.0, heap[0][0] - time.monotonic()) if heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                continue
+            except asyncio.TimeoutError:
+                pass
+
+            now = time.monotonic()
+            due = []
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                _, timer_id = heapq.heappop(heap)
+                timer_task = self._timers.pop(timer_id, None)
+                if timer_task:
+                    due.append(timer_task)
+            if not due:
+                continue
+
+            self._schedule_save()
+            for timer_task in due:
+                task = asyncio.create_task(timer_task.execute())
+                self._executing.add(task)
+                task.add_done_callback(self._executing.discard)
+
+    # -------- 持久化 --------
+
+    def _snapshot(self) -> List[Dict[str, Any]]:
+        return [timer_task.to_record() for timer_task in self._timers.values()]
+
+    def _schedule_save(self):
+        """
+        防抖写盘：SAVE_DELAY 内的多次增删只写一次.
+        """
+        if not self._store or self._save_handle is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._save_handle = loop.call_later(SAVE_DELAY, self._save_now)
+
+    def _save_now(self):
+        self._save_handle = None
+        if self._save_task and not self._save_task.done():
+            # 上一次写盘尚未完成，稍后再写入最新快照
+            self._schedule_save()
+            return
+        records = self._snapshot()
+        self._save_task = asyncio.create_task(
+            asyncio.to_thread(self._store.save, records)
+        )
+
+    # -------- 对外接口 --------
+
     async def start_countdown(
         self, command: str, delay: int = None, description: str = ""
     ) -> Dict[str, Any]:
@@ -67,8 +254,8 @@ class TimerService:
                 "message": f"命令格式错误，无法解析JSON: {command}",
             }
 
-        # 获取当前事件循环
-        loop = asyncio.get_running_loop()
+        # 未经插件启动时（如单独使用工具）在首次创建时恢复并启动调度
+        await self.start()
 
         async with self._lock:
             timer_id = self._next_timer_id
@@ -82,12 +269,8 @@ class TimerService:
                 description=description,
                 service=self,
             )
-
-            # 创建异步任务
-            task = loop.create_task(timer_task.run())
-            timer_task.task = task
-
-            self._timers[timer_id] = timer_task
+            self._add(timer_task)
+            self._schedule_save()
 
         logger.info(f"启动倒计时 {timer_id}，将在 {delay} 秒后执行命令: {command}")
 
@@ -98,10 +281,8 @@ class TimerService:
             "delay": delay,
             "command": command,
             "description": description,
-            "start_time": datetime.now().isoformat(),
-            "estimated_execution_time": (
-                datetime.now() + timedelta(seconds=delay)
-            ).isoformat(),
+            "start_time": timer_task.start_time.isoformat(),
+            "estimated_execution_time": timer_task.execution_time.isoformat(),
         }
 
     async def cancel_countdown(self, timer_id: int) -> Dict[str, Any]:
@@ -120,11 +301,8 @@ class TimerService:
             return {"success": False, "message": f"无效的 timer_id: {timer_id}"}
 
         async with self._lock:
-            if timer_id in self._timers:
-                timer_task = self._timers.pop(timer_id)
-                if timer_task.task:
-                    timer_task.task.cancel()
-
+            if self._remove(timer_id):
+                self._schedule_save()
                 logger.info(f"倒计时 {timer_id} 已成功取消")
                 return {
                     "success": True,
@@ -140,22 +318,61 @@ class TimerService:
                     "timer_id": timer_id,
                 }
 
+    async def cancel_matching(
+        self, description: str = "", tool_name: str = ""
+    ) -> Dict[str, Any]:
+        """批量取消倒计时.
+
+        Args:
+            description: 描述中包含该文本的倒计时（不区分大小写）
+            tool_name: 要执行的MCP工具名等于该名称的倒计时
+
+        Returns:
+            Dict[str, Any]: 取消结果，两个条件都给出时需同时满足
+        """
+        description = (description or "").strip().lower()
+        tool_name = (tool_name or "").strip()
+        if not description and not tool_name:
+            return {"success": False, "message": "请提供描述或工具名作为取消条件"}
+
+        async with self._lock:
+            matched = [
+                timer_id
+                for timer_id, timer_task in self._timers.items()
+                if (not description or description in timer_task.description.lower())
+                and (not tool_name or timer_task.tool_name == tool_name)
+            ]
+            for timer_id in matched:
+                self._remove(timer_id)
+            if matched:
+                self._schedule_save()
+
+        logger.info(f"批量取消倒计时 {len(matched)} 个: {matched}")
+        return {
+            "success": True,
+            "message": f"已取消 {len(matched)} 个倒计时",
+            "cancelled_count": len(matched),
+            "timer_ids": matched,
+            "cancelled_at": datetime.now().isoformat(),
+        }
+
     async def get_active_timers(self) -> Dict[str, Any]:
         """获取所有活动的倒计时任务状态.
 
         Returns:
-            Dict[str, Any]: 活动计时器列表
+            Dict[str, Any]: 活动计时器列表，按剩余时间升序
         """
         async with self._lock:
             active_timers = []
             current_time = datetime.now()
 
-            for timer_id, timer_task in self._timers.items():
+            timers = sorted(self._timers.values(), key=lambda t: t.deadline)
+            for timer_task in timers:
                 remaining_time = timer_task.get_remaining_time()
                 if remaining_time > 0:
                     active_timers.append(
                         {
-                            "timer_id": timer_id,
+                            "timer_id": timer_task.timer_id,
                             "command": timer_task.command,
                             "description": timer_task.description,
                             "delay": timer_task.delay,
@@ -173,28 +390,17 @@ class TimerService:
                 "current_time": current_time.isoformat(),
             }
 
-    async def cleanup_timer(self, timer_id: int):
-        """
-        从管理器中移除已完成的计时器.
-        """
-        async with self._lock:
-            if timer_id in self._timers:
-                del self._timers[timer_id]
-                logger.debug(f"已清理完成的倒计时 {timer_id}")
-
     async def cleanup_all(self):
         """
-        清理所有倒计时任务（应用关闭时调用）
+        取消所有倒计时任务（同时清空持久化记录）
         """
         logger.info("正在清理所有倒计时任务...")
         async with self._lock:
-            active_timer_ids = list(self._timers.keys())
-            for timer_id in active_timer_ids:
-                if timer_id in self._timers:
-                    timer_task = self._timers.pop(timer_id)
-                    if timer_task.task:
-                        timer_task.task.cancel()
-                    logger.info(f"已取消倒计时任务 {timer_id}")
+            for timer_id in list(self._timers.keys()):
+                self._remove(timer_id)
+                logger.info(f"已取消倒计时任务 {timer_id}")
+            self._heap.clear()
+            self._schedule_save()
         logger.info("倒计时任务清理完成")
 
 
@@ -218,26 +424,39 @@ class TimerTask:
         self.service = service
         self.start_time = datetime.now()
         self.execution_time = self.start_time + timedelta(seconds=delay)
-        self.task: Optional[Task] = None
+        # 调度用的截止时间（单调时钟，不受系统时间调整影响）
+        self.deadline = time.monotonic() + delay
 
-    async def run(self):
+    @property
+    def tool_name(self) -> str:
+        try:
+            return json.loads(self.command).get("name", "")
+        except (ValueError, AttributeError):
+            return ""
+
+    def to_record(self) -> Dict[str, Any]:
         """
-        执行倒计时任务.
+        持久化记录，截止时间换算为墙上时钟.
         """
-        try:
-            # 等待延迟时间
-            await asyncio.sleep(self.delay)
+        return {
+            "timer_id": self.timer_id,
+            "command": self.command,
+            "delay": self.delay,
+            "description": self.description,
+            "start_time": self.start_time.isoformat(),
+            "deadline": time.time() + self.get_remaining_time(),
+        }
 
-            # 执行命令
+    async def execute(self):
+        """
+        到期后由调度任务调用，执行命令.
+        """
+        try:
             await self._execute_command()
-
         except asyncio.CancelledError:
-            logger.info(f"倒计时 {self.timer_id} 被取消")
+            logger.info(f"倒计时 {self.timer_id} 执行被取消")
         except Exception as e:
             logger.error(f"倒计时 {self.timer_id} 执行过程中出错: {e}", exc_info=True)
-        finally:
-            # 清理自己
-            await self.service.cleanup_timer(self.timer_id)
 
     async def _execute_command(self):
         """
@@ -323,16 +542,13 @@ class TimerTask:
         """
         获取剩余时间（秒）
         """
-        now = datetime.now()
-        remaining = (self.execution_time - now).total_seconds()
-        return max(0, remaining)
+        return max(0.0, self.deadline - time.monotonic())
 
     def get_progress(self) -> float:
         """
         获取进度（0-1之间的浮点数）
         """
-        elapsed = (datetime.now() - self.start_time).total_seconds()
-        return min(1.0, elapsed / self.delay)
+        return min(1.0, 1.0 - self.get_remaining_time() / self.delay)
 
 
 # 全局服务实例
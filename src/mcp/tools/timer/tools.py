@@ -81,6 +81,39 @@ async def cancel_countdown_timer(args: Dict[str, Any]) -> str:
         return json.dumps({"success": False, "message": error_msg}, ensure_ascii=False)
 
 
+async def cancel_matching_countdown_timers(args: Dict[str, Any]) -> str:
+    """按描述或工具名批量取消倒计时.
+
+    Args:
+        args: 包含以下参数的字典
+            - description: 描述中包含的文本，可选
+            - tool_name: 要执行的MCP工具名，可选
+
+    Returns:
+        str: JSON格式的结果字符串
+    """
+    try:
+        description = args.get("description", "")
+        tool_name = args.get("tool_name", "")
+
+        logger.info(
+            f"[TimerTools] 批量取消倒计时 - 描述: {description}, 工具: {tool_name}"
+        )
+
+        timer_service = get_timer_service()
+        result = await timer_service.cancel_matching(
+            description=description, tool_name=tool_name
+        )
+
+        logger.info(f"[TimerTools] 批量取消结果: {result.get('cancelled_count', 0)}")
+        return json.dumps(result, ensure_ascii=False, indent=2)
+
+    except Exception as e:
+        error_msg = f"批量取消倒计时失败: {str(e)}"
+        logger.error(f"[TimerTools] {error_msg}", exc_info=True)
+        return json.dumps({"success": False, "message": error_msg}, ensure_ascii=False)
+
+
 async def get_active_countdown_timers(args: Dict[str, Any]) -> str:
     """获取所有活动的倒计时任务状态.
 
@@ -19,6 +19,8 @@ class AudioPlugin(Plugin):
         self.codec: AudioCodec | None = None
         self._loop = None
         self._send_sem = asyncio.Semaphore(4)
+        # 已调度但尚未发送完成的音频帧数（发送积压）
+        self._pending_sends = 0
 
     async def setup(self, app: Any) -> None:
         self.app = app
@@ -104,6 +106,52 @@ class AudioPlugin(Plugin):
             except Exception:
                 pass
 
+    # -------------------------
+    # 唤醒预录
+    # -------------------------
+    def arm_preroll(self) -> bool:
+        """
+        唤醒时调用：开始截留编码帧，避免通道建立期间的语音丢失.
+        """
+        if not self.codec:
+            return False
+        try:
+            return self.codec.arm_preroll()
+        except Exception:
+            return False
+
+    async def flush_preroll(self) -> int:
+        """
+        开始监听后调用：按顺序发送预录帧，全部发出后再恢复实时发送，返回发送帧数.
+        """
+        if not self.codec:
+            return 0
+        protocol = getattr(self.app, "protocol", None)
+        if not (
+            protocol
+            and protocol.is_audio_channel_opened()
+            and self._should_send_microphone_audio()
+        ):
+            self.codec.take_preroll()
+            return 0
+        sent = 0
+        try:
+            # 发送期间新编码的帧继续进入预录缓冲，直到缓冲取空才切换到实时发送
+            while True:
+                frames = self.codec.drain_preroll()
+                if not frames:
+                    break
+                for frame in frames:
+                    await protocol.send_audio(frame)
+                    sent += 1
+        except Exception:
+            pass
+        finally:
+            # 发送失败或被取消时丢弃剩余预录帧，恢复实时发送
+            if self.codec and self.codec.is_preroll_armed():
+                self.codec.take_preroll()
+        return sent
+
     # -------------------------
     # 内部：发送麦克风音频
     # -------------------------
@@ -123,21 +171,28 @@ class AudioPlugin(Plugin):
             return
 
         async def _send():
-            async with self._send_sem:
-                # 仅在允许的设备状态下发送麦克风音频
-                try:
-                    if not (
-                        self.app.protocol
-                        and self.app.protocol.is_audio_channel_opened()
-                    ):
-                        return
-                    if self._should_send_microphone_audio():
-                        await self.app.protocol.send_audio(encoded_data)
-                except Exception:
-                    pass
+            try:
+                async with self._send_sem:
+                    # 仅在允许的设备状态下发送麦克风音频
+                    try:
+                        if not (
+                            self.app.protocol
+                            and self.app.protocol.is_audio_channel_opened()
+                        ):
+                            return
+                        if self._should_send_microphone_audio():
+                            await self.app.protocol.send_audio(encoded_data)
+                    except Exception:
+                        pass
+            finally:
+                self._pending_sends -= 1
 
         # 交给应用的任务管理
-        self.app.spawn(_send(), name="audio:send")
+        self._pending_sends += 1
+        if self.codec and self.codec.encoder_controller:
+            self.codec.encoder_controller.report_backpressure(self._pending_sends)
+        if self.app.spawn(_send(), name="audio:send") is None:
+            self._pending_sends -= 1
 
     def _should_send_microphone_audio(self) -> bool:
         """与应用状态机对齐：
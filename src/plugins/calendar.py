@@ -1,3 +1,4 @@
+import asyncio
 from typing import Any
 
 from src.plugins.base import Plugin
@@ -85,3 +86,10 @@ class CalendarPlugin(Plugin):
                 await self._service.stop()
         except Exception:
             pass
+        try:
+            # 关闭日程数据库长连接（落盘 WAL 并更新查询统计）
+            from src.mcp.tools.calendar import get_calendar_database
+
+            await asyncio.to_thread(get_calendar_database().close)
+        except Exception:
+            pass
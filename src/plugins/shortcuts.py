@@ -154,7 +154,7 @@ class PluginShortcutManager:
 
     async def reload_from_config(self):
         try:
-            self.config.reload_config()
+            # 内存中的配置即为最新，无需从文件重新读取
             self.shortcuts_config = self.config.get_config("SHORTCUTS", {}) or {}
             self.enabled = bool(self.shortcuts_config.get("ENABLED", True))
             self._load_shortcuts()
@@ -302,11 +302,24 @@ class ShortcutsPlugin(Plugin):
         self.app: Any = None
         self._manager: Optional[PluginShortcutManager] = None
         self._adapter: Optional[_AppAdapter] = None
+        self._unsubscribe = None
 
     async def setup(self, app: Any) -> None:
         self.app = app
         self._adapter = _AppAdapter(app)
         self._manager = PluginShortcutManager(getattr(app, "_main_loop", None))
+        # 设置页保存快捷键后自动重新加载，无需手动 reload
+        self._unsubscribe = ConfigManager.get_instance().subscribe(
+            "SHORTCUTS", self._on_shortcuts_changed
+        )
+
+    def _on_shortcuts_changed(self, path: str, value: Any) -> None:
+        loop = getattr(self.app, "_main_loop", None)
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(
+            lambda: self.app.spawn(self.reload_from_config(), "shortcuts:reload")
+        )
 
     async def start(self) -> None:
         if not self._manager:
@@ -329,6 +342,9 @@ class ShortcutsPlugin(Plugin):
             await self._manager.stop()
 
     async def shutdown(self) -> None:
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
         if self._manager:
             await self._manager.stop()
 
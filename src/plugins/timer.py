@@ -0,0 +1,42 @@
+from typing import Any
+
+from src.plugins.base import Plugin
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class TimerPlugin(Plugin):
+    name = "timer"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.app: Any = None
+        self._service = None
+
+    async def setup(self, app: Any) -> None:
+        self.app = app
+        try:
+            from src.mcp.tools.timer import get_timer_service
+
+            self._service = get_timer_service()
+        except Exception as e:
+            logger.error(f"初始化倒计时服务失败: {e}")
+            self._service = None
+
+    async def start(self) -> None:
+        if not self._service:
+            return
+        try:
+            # 恢复上次退出时未到期的倒计时并启动调度
+            await self._service.start()
+        except Exception as e:
+            logger.error(f"启动倒计时服务失败: {e}")
+
+    async def shutdown(self) -> None:
+        try:
+            if self._service:
+                # 停止调度，未到期的倒计时写盘供下次启动恢复
+                await self._service.shutdown()
+        except Exception:
+            pass
@@ -84,6 +84,7 @@ class UIPlugin(Plugin):
                 "auto_callback": self._auto_toggle,
                 "abort_callback": self._abort,
                 "send_text_callback": self._send_text,
+                "diagnostics_callback": self._diagnostics_text,
             }
 
         await self.display.set_callbacks(**callbacks)
@@ -152,6 +153,27 @@ class UIPlugin(Plugin):
         if await self.app.connect_protocol():
             await self.app.protocol.send_wake_word_detected(text)
 
+    def _diagnostics_text(self) -> str:
+        """
+        Tóm tắt chỉ số chẩn đoán thành một dòng cho bảng điều khiển CLI.
+        """
+        from src.audio_codecs.audio_stats import summarize_audio_stats
+        from src.protocols.link_telemetry import summarize_link_stats
+
+        audio_plugin = self.app.plugins.get_plugin("audio")
+        codec = getattr(audio_plugin, "codec", None) if audio_plugin else None
+        if codec is None:
+            return "Âm thanh chưa khởi tạo"
+        text = summarize_audio_stats(codec.get_stats())
+        conn = getattr(self.app, "connection_manager", None)
+        if conn is not None:
+            ttfa = conn.wake_to_first_audio
+            text += f" | ttfa p50={ttfa.percentile(0.5):g}ms n={ttfa.count}"
+        telemetry = getattr(self.app.protocol, "telemetry", None)
+        if telemetry is not None:
+            text += f" | {summarize_link_stats(telemetry.snapshot())}"
+        return text
+
     async def _press(self):
         """
         Chế độ thủ công: Nhấn để bắt đầu ghi âm.
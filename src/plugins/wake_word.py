@@ -67,7 +67,18 @@ class WakeWordPlugin(Plugin):
                     if audio_plugin:
                         await audio_plugin.codec.clear_audio_queue()
                 else:
-                    await self.app.start_auto_conversation()
+                    # 空闲时先开启预录，通道建立期间说的话在开始监听后补发
+                    audio_plugin = self.app.plugins.get_plugin("audio")
+                    armed = bool(
+                        audio_plugin
+                        and self.app.is_idle()
+                        and audio_plugin.arm_preroll()
+                    )
+                    try:
+                        await self.app.start_auto_conversation()
+                    finally:
+                        if armed:
+                            await audio_plugin.flush_preroll()
         except Exception:
             pass
 
@@ -0,0 +1,194 @@
+"""
+WebSocket 二进制帧头（Protocol-Version 2）.
+
+帧格式（网络字节序，16 字节头 + 负载）:
+    uint16 version       协议版本，固定为 2
+    uint16 type          负载类型，0 = Opus 音频，1 = JSON
+    uint32 sequence      发送方逐帧递增的序号（设备固件中该字段为保留字段）
+    uint32 timestamp     发送方单调时钟毫秒数，用于抖动计算与音频/文本对齐
+    uint32 payload_size  负载字节数
+
+服务器 hello 未回应版本 2 时回退为裸 Opus 帧（版本 1）.
+"""
+
+import struct
+import time
+from typing import Dict, NamedTuple, Optional
+
+PROTOCOL_VERSION_RAW = 1
+PROTOCOL_VERSION_FRAMED = 2
+
+FRAME_TYPE_AUDIO = 0
+FRAME_TYPE_JSON = 1
+
+FRAME_HEADER = struct.Struct("!HHIII")
+FRAME_HEADER_SIZE = FRAME_HEADER.size
+
+# 序号回绕/重置判定窗口：向后跳变超过该值视为对端重新计数
+SEQUENCE_RESET_WINDOW = 0x8000
+
+
+class FrameReceiveStats:
+    """
+    接收方向的帧统计：按序号推算丢包，按 RFC 3550 计算到达间隔抖动.
+
+    对端把序号当保留字段（恒为同一个值，通常是 0）时不推算丢包与乱序，
+    只按到达顺序统计抖动.
+    """
+
+    __slots__ = (
+        "received",
+        "lost",
+        "reordered",
+        "resets",
+        "jitter_ms",
+        "sequenced",
+        "_base_seq",
+        "_highest_seq",
+        "_received_since_base",
+        "_lost_before_base",
+        "_last_transit",
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.received = 0
+        self.lost = 0
+        self.reordered = 0
+        self.resets = 0
+        self.jitter_ms = 0.0
+        # 是否见过序号前进；在此之前序号视为缺失
+        self.sequenced = False
+        self._base_seq: Optional[int] = None
+        self._highest_seq = 0
+        self._received_since_base = 0
+        self._lost_before_base = 0
+        self._last_transit: Optional[float] = None
+
+    def observe(self, sequence: int, timestamp_ms: int, arrival_ms: float):
+        """
+        记录一帧.
+        """
+        self.received += 1
+        if self._base_seq is None or self._is_restart(sequence):
+            if self._base_seq is not None:
+                self.resets += 1
+                self._lost_before_base = self.lost
+            self._base_seq = sequence
+            self._highest_seq = sequence
+            self._received_since_base = 1
+            self._last_transit = arrival_ms - timestamp_ms
+            return
+
+        self._received_since_base += 1
+        if not self.sequenced:
+            if sequence == self._highest_seq:
+                # 序号从未前进：对端没有填写序号，回退为按时间戳/到达时间统计
+                self._update_jitter(arrival_ms - timestamp_ms)
+                return
+            self.sequenced = True
+        if sequence <= self._highest_seq:
+            # 乱序或重复帧不参与抖动计算
+            self.reordered += 1
+        else:
+            self._highest_seq = sequence
+            self._update_jitter(arrival_ms - timestamp_ms)
+
+        expected = self._highest_seq - self._base_seq + 1
+        self.lost = self._lost_before_base + max(
+            0, expected - self._received_since_base
+        )
+
+    def _update_jitter(self, transit: float):
+        if self._last_transit is not None:
+            d = abs(transit - self._last_transit)
+            self.jitter_ms += (d - self.jitter_ms) / 16.0
+        self._last_transit = transit
+
+    def _is_restart(self, sequence: int) -> bool:
+        return sequence + SEQUENCE_RESET_WINDOW < self._highest_seq
+
+    @property
+    def loss_ratio(self) -> float:
+        total = self.received + self.lost
+        return self.lost / total if total else 0.0
+
+    def snapshot(self) -> Dict:
+        return {
+            "received": self.received,
+            "lost": self.lost,
+            "loss_ratio": round(self.loss_ratio, 4),
+            "reordered": self.reordered,
+            "resets": self.resets,
+            "jitter_ms": round(self.jitter_ms, 3),
+            "sequenced": self.sequenced,
+        }
+
+
+class Frame(NamedTuple):
+    type: int
+    sequence: int
+    timestamp: int
+    payload: bytes
+
+
+class BinaryFrameCodec:
+    """
+    版本 2 帧的编解码，发送序号与时间戳基准随连接重置.
+    """
+
+    def __init__(self):
+        self.malformed = 0
+        self.last_timestamp: Optional[int] = None
+        self._send_sequence = 0
+        self._epoch = time.monotonic()
+
+    def reset(self):
+        self.malformed = 0
+        self.last_timestamp = None
+        self._send_sequence = 0
+        self._epoch = time.monotonic()
+
+    def _now_ms(self) -> float:
+        return (time.monotonic() - self._epoch) * 1000
+
+    def pack(self, payload: bytes, frame_type: int = FRAME_TYPE_AUDIO) -> bytearray:
+        """
+        一次分配写入帧头与负载，避免 header + payload 的拼接拷贝.
+        """
+        size = len(payload)
+        frame = bytearray(FRAME_HEADER_SIZE + size)
+        FRAME_HEADER.pack_into(
+            frame,
+            0,
+            PROTOCOL_VERSION_FRAMED,
+            frame_type,
+            self._send_sequence,
+            int(self._now_ms()) & 0xFFFFFFFF,
+            size,
+        )
+        frame[FRAME_HEADER_SIZE:] = payload
+        self._send_sequence = (self._send_sequence + 1) & 0xFFFFFFFF
+        return frame
+
+    def unpack(self, data: bytes) -> Optional[Frame]:
+        """
+        解析帧头，格式不符返回 None.
+        """
+        if len(data) < FRAME_HEADER_SIZE:
+            self.malformed += 1
+            return None
+        version, frame_type, sequence, timestamp, size = FRAME_HEADER.unpack_from(data)
+        if version != PROTOCOL_VERSION_FRAMED or FRAME_HEADER_SIZE + size > len(data):
+            self.malformed += 1
+            return None
+
+        self.last_timestamp = timestamp
+        return Frame(
+            frame_type,
+            sequence,
+            timestamp,
+            data[FRAME_HEADER_SIZE : FRAME_HEADER_SIZE + size],
+        )
@@ -0,0 +1,256 @@
+"""
+链路质量遥测：RTT、下行音频到达抖动、双向吞吐、发送积压与丢包.
+
+计数在协议的收发路径上累加（UDP 接收线程或事件循环，各自单写），
+速率与丢包按固定数量的 1 秒槽位滚动统计，读取方通过 snapshot() 获取快照。
+"""
+
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from src.audio_codecs.audio_stats import LatencyHistogram
+from src.protocols.binary_frame import FrameReceiveStats
+
+# 链路往返时延分桶（毫秒）
+RTT_BUCKETS_MS = (10, 20, 50, 100, 150, 200, 300, 500, 1000, 2000)
+
+# 滚动窗口的秒数与保留的最近 RTT 样本数
+DEFAULT_WINDOW_SECONDS = 10
+DEFAULT_RTT_SAMPLES = 32
+
+# 槽位内各计数的下标
+_FRAMES_IN, _BYTES_IN, _FRAMES_OUT, _BYTES_OUT, _LOST = range(5)
+
+
+class RollingCounters:
+    """
+    固定槽位的按秒滚动计数器.
+    """
+
+    __slots__ = ("_seconds", "_slots", "_stamps")
+
+    def __init__(self, seconds: int = DEFAULT_WINDOW_SECONDS, width: int = 5):
+        self._seconds = max(1, int(seconds))
+        self._slots = [[0] * width for _ in range(self._seconds)]
+        self._stamps = [-1] * self._seconds
+
+    def add(self, index: int, value: int, now: Optional[float] = None):
+        second = int(time.monotonic() if now is None else now)
+        pos = second % self._seconds
+        slot = self._slots[pos]
+        if self._stamps[pos] != second:
+            for i in range(len(slot)):
+                slot[i] = 0
+            self._stamps[pos] = second
+        slot[index] += value
+
+    def totals(self, now: Optional[float] = None):
+        """
+        返回窗口内（不含当前未满的一秒）各计数之和与有效秒数.
+        """
+        second = int(time.monotonic() if now is None else now)
+        sums = [0] * len(self._slots[0])
+        for stamp, slot in zip(self._stamps, self._slots):
+            if second - self._seconds <= stamp < second:
+                for i, v in enumerate(slot):
+                    sums[i] += v
+        return sums, self._seconds
+
+    def reset(self):
+        for pos in range(self._seconds):
+            self._stamps[pos] = -1
+
+
+class LinkTelemetry:
+    """
+    单条协议连接的链路指标.
+    """
+
+    def __init__(
+        self,
+        window_seconds: int = DEFAULT_WINDOW_SECONDS,
+        rtt_samples: int = DEFAULT_RTT_SAMPLES,
+    ):
+        self.rtt = LatencyHistogram(RTT_BUCKETS_MS)
+        self.recent_rtt: Deque[float] = deque(maxlen=max(1, rtt_samples))
+        # 按序号推算的下行丢包（WebSocket v2 帧头或 UDP nonce）
+        self.frames = FrameReceiveStats()
+        self.window = RollingCounters(window_seconds)
+
+        self.frames_in = 0
+        self.bytes_in = 0
+        self.frames_out = 0
+        self.bytes_out = 0
+        # 发送积压按来源分开记：MQTT 为待发消息条数，WebSocket 为传输层写缓冲字节数
+        self.send_queue = 0
+        self.max_send_queue = 0
+        self.send_buffer_bytes = 0
+        self.max_send_buffer_bytes = 0
+        # 下行音频到达间隔抖动（到达间隔变化量的 EWMA，单位毫秒）
+        self.arrival_jitter_ms = 0.0
+        self._last_arrival: Optional[float] = None
+        self._last_interval: Optional[float] = None
+        self._started_at = time.monotonic()
+
+    def reset(self):
+        self.rtt.reset()
+        self.recent_rtt.clear()
+        self.frames.reset()
+        self.window.reset()
+        self.frames_in = 0
+        self.bytes_in = 0
+        self.frames_out = 0
+        self.bytes_out = 0
+        self.send_queue = 0
+        self.max_send_queue = 0
+        self.send_buffer_bytes = 0
+        self.max_send_buffer_bytes = 0
+        self.arrival_jitter_ms = 0.0
+        self._last_arrival = None
+        self._last_interval = None
+        self._started_at = time.monotonic()
+
+    # -------- 采样 --------
+
+    def observe_rtt(self, rtt_ms: float):
+        self.rtt.observe(rtt_ms)
+        self.recent_rtt.append(rtt_ms)
+
+    def record_out(self, nbytes: int):
+        """
+        记录一个上行音频帧.
+        """
+        self.frames_out += 1
+        self.bytes_out += nbytes
+        now = time.monotonic()
+        self.window.add(_FRAMES_OUT, 1, now)
+        self.window.add(_BYTES_OUT, nbytes, now)
+
+    def record_in(
+        self,
+        nbytes: int,
+        sequence: Optional[int] = None,
+        timestamp_ms: Optional[int] = None,
+    ):
+        """
+        记录一个下行音频帧，带序号时同时推算丢包.
+
+        没有发送方时间戳（UDP nonce）时按到达时间计，序号统计中的抖动为 0，
+        以 arrival_jitter_ms 为准.
+        """
+        now = time.monotonic()
+        self.frames_in += 1
+        self.bytes_in += nbytes
+        self.window.add(_FRAMES_IN, 1, now)
+        self.window.add(_BYTES_IN, nbytes, now)
+
+        if self._last_arrival is not None:
+            interval = (now - self._last_arrival) * 1000
+            # 超过 1 秒的间隔视为两段 TTS 之间的停顿，不计入抖动
+            if interval < 1000:
+                if self._last_interval is not None:
+                    d = abs(interval - self._last_interval)
+                    self.arrival_jitter_ms += (d - self.arrival_jitter_ms) / 16.0
+                self._last_interval = interval
+            else:
+                self._last_interval = None
+        self._last_arrival = now
+
+        if sequence is not None:
+            lost_before = self.frames.lost
+            arrival_ms = now * 1000
+            self.frames.observe(
+                sequence,
+                arrival_ms if timestamp_ms is None else timestamp_ms,
+                arrival_ms,
+            )
+            if self.frames.lost > lost_before:
+                self.window.add(_LOST, self.frames.lost - lost_before, now)
+
+    def record_send_queue(self, depth: int):
+        """
+        记录待发送的消息条数.
+        """
+        self.send_queue = depth
+        if depth > self.max_send_queue:
+            self.max_send_queue = depth
+
+    def record_send_buffer(self, nbytes: int):
+        """
+        记录传输层写缓冲中尚未发出的字节数.
+        """
+        self.send_buffer_bytes = nbytes
+        if nbytes > self.max_send_buffer_bytes:
+            self.max_send_buffer_bytes = nbytes
+
+    # -------- 读取 --------
+
+    @staticmethod
+    def _loss_of(sums) -> float:
+        total = sums[_FRAMES_IN] + sums[_LOST]
+        return sums[_LOST] / total if total else 0.0
+
+    @property
+    def loss_ratio(self) -> float:
+        """
+        滚动窗口内的下行丢包率.
+        """
+        sums, _ = self.window.totals()
+        return self._loss_of(sums)
+
+    def rates(self) -> Dict:
+        sums, seconds = self.window.totals()
+        return {
+            "window_s": seconds,
+            "in_fps": round(sums[_FRAMES_IN] / seconds, 2),
+            "in_kbps": round(sums[_BYTES_IN] * 8 / seconds / 1000, 2),
+            "out_fps": round(sums[_FRAMES_OUT] / seconds, 2),
+            "out_kbps": round(sums[_BYTES_OUT] * 8 / seconds / 1000, 2),
+            "loss_ratio": round(self._loss_of(sums), 4),
+        }
+
+    def snapshot(self) -> Dict:
+        recent = sorted(self.recent_rtt)
+        return {
+            "uptime_s": round(time.monotonic() - self._started_at, 1),
+            "rtt": {
+                **self.rtt.snapshot(),
+                "last_ms": (round(self.recent_rtt[-1], 3) if self.recent_rtt else None),
+                "recent_median_ms": (
+                    round(recent[len(recent) // 2], 3) if recent else None
+                ),
+            },
+            "jitter_ms": round(self.arrival_jitter_ms, 3),
+            "rates": self.rates(),
+            "totals": {
+                "frames_in": self.frames_in,
+                "bytes_in": self.bytes_in,
+                "frames_out": self.frames_out,
+                "bytes_out": self.bytes_out,
+            },
+            "send_queue": {"current": self.send_queue, "max": self.max_send_queue},
+            "send_buffer_bytes": {
+                "current": self.send_buffer_bytes,
+                "max": self.max_send_buffer_bytes,
+            },
+            "sequence": self.frames.snapshot(),
+        }
+
+
+def summarize_link_stats(stats: Dict) -> str:
+    """
+    将 LinkTelemetry.snapshot() 结果压缩为一行，供 CLI 仪表盘与日志使用.
+    """
+    try:
+        rtt = stats.get("rtt", {})
+        rates = stats.get("rates", {})
+        last = rtt.get("recent_median_ms")
+        return (
+            f"rtt {last if last is not None else '-'}ms "
+            f"jit {stats.get('jitter_ms', 0)}ms "
+            f"loss {rates.get('loss_ratio', 0) * 100:.1f}% | "
+            f"in {rates.get('in_kbps', 0)}kbps out {rates.get('out_kbps', 0)}kbps"
+        )
+    except Exception:
+        return ""
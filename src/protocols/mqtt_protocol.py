@@ -16,12 +16,26 @@ from src.utils.logging_config import get_logger
 # 配置日志
 logger = get_logger(__name__)
 
+# 发布参数默认值，可在 SYSTEM_OPTIONS.NETWORK.MQTT_PUBLISH 中覆盖
+DEFAULT_PUBLISH_OPTIONS = {
+    # 按消息 type 选择 QoS，未列出的类型使用 default
+    "QOS": {"default": 0, "hello": 1, "goodbye": 1, "mcp": 1},
+    # 同时等待 broker 确认的最大消息数
+    "MAX_INFLIGHT": 8,
+    # 发送队列长度，满时直接失败而不是阻塞调用方
+    "QUEUE_SIZE": 128,
+    # 等待发布确认的超时（秒）
+    "TIMEOUT": 10.0,
+}
+
 
 class MqttProtocol(Protocol):
-    def __init__(self, loop):
+    def __init__(self, loop, mqtt_info=None):
         super().__init__()
         self.loop = loop
         self.config = ConfigManager.get_instance()
+        # 显式传入的 MQTT 配置（压测/本地模拟服务器用），优先于配置文件
+        self._mqtt_info = mqtt_info
         self.mqtt_client = None
         self.udp_socket = None
         self.udp_thread = None
@@ -57,6 +71,25 @@ class MqttProtocol(Protocol):
         # 事件
         self.server_hello_event = asyncio.Event()
 
+        # 异步发布：发送队列 + 按 mid 等待 on_publish 确认
+        publish_options = dict(DEFAULT_PUBLISH_OPTIONS)
+        publish_options.update(
+            self.config.get_config("SYSTEM_OPTIONS.NETWORK.MQTT_PUBLISH", {}) or {}
+        )
+        self._qos_by_type = dict(DEFAULT_PUBLISH_OPTIONS["QOS"])
+        self._qos_by_type.update(publish_options.get("QOS") or {})
+        self._max_inflight = max(1, int(publish_options["MAX_INFLIGHT"]))
+        self._publish_queue_size = max(1, int(publish_options["QUEUE_SIZE"]))
+        self._publish_timeout = float(publish_options["TIMEOUT"])
+        self._publish_queue = None
+        self._publish_task = None
+        self._inflight_sem = None
+        # mid -> Future，由 paho 网络线程通过 call_soon_threadsafe 完成
+        self._pending_publishes = {}
+        # on_publish 可能早于 publish() 返回 mid 触发，先记下已确认的 mid
+        self._early_acks = set()
+        self._publish_lock = threading.RLock()
+
     def _parse_endpoint(self, endpoint: str) -> tuple[str, int]:
         """解析endpoint字符串，提取主机和端口.
 
@@ -97,11 +130,14 @@ class MqttProtocol(Protocol):
 
         # 重置hello事件
         self.server_hello_event = asyncio.Event()
+        self.telemetry.reset()
 
         # 首先尝试获取MQTT配置
         try:
             # 尝试从OTA服务器获取MQTT配置
-            mqtt_config = self.config.get_config("SYSTEM_OPTIONS.NETWORK.MQTT_INFO")
+            mqtt_config = self._mqtt_info or self.config.get_config(
+                "SYSTEM_OPTIONS.NETWORK.MQTT_INFO"
+            )
 
             print(mqtt_config)
 
@@ -159,6 +195,7 @@ class MqttProtocol(Protocol):
         # 创建新的MQTT客户端
         self.mqtt_client = mqtt.Client(client_id=self.client_id)
         self.mqtt_client.username_pw_set(self.username, self.password)
+        self.mqtt_client.max_inflight_messages_set(self._max_inflight)
 
         # 根据端口决定是否配置TLS加密连接
         if use_tls:
@@ -265,11 +302,12 @@ class MqttProtocol(Protocol):
             except Exception as e:
                 logger.error(f"处理MQTT断开连接失败: {e}")
 
-        def on_publish_callback(client, userdata, mid):
+        def on_publish_callback(client, userdata, mid, *args):
             """
-            MQTT消息发布回调.
+            MQTT消息发布回调（paho网络线程）.
             """
             self._last_activity_time = time.time()  # 更新活动时间
+            self._on_publish_ack(mid)
 
         def on_subscribe_callback(client, userdata, mid, granted_qos):
             """
@@ -296,6 +334,9 @@ class MqttProtocol(Protocol):
             # 等待连接完成
             await asyncio.wait_for(connect_future, timeout=10.0)
 
+            # 启动发送队列
+            self._start_publisher()
+
             # 订阅主题
             if self.subscribe_topic:
                 self.mqtt_client.subscribe(self.subscribe_topic, qos=1)
@@ -469,6 +510,9 @@ class MqttProtocol(Protocol):
                     # 分离nonce和加密数据
                     received_nonce = data[:16]
                     encrypted_audio = data[16:]
+                    # nonce 末 4 字节为序列号，用于推算下行丢包
+                    self.remote_sequence = int.from_bytes(received_nonce[12:16], "big")
+                    self.telemetry.record_in(len(encrypted_audio), self.remote_sequence)
 
                     # 使用AES-CTR解密
                     decrypted = self.aes_ctr_decrypt(
@@ -509,18 +553,169 @@ class MqttProtocol(Protocol):
 
         logger.info("UDP接收线程已停止")
 
+    def _qos_for(self, message) -> int:
+        """
+        根据消息 type 选择 QoS.
+        """
+        msg_type = None
+        try:
+            msg_type = json.loads(message).get("type")
+        except Exception:
+            pass
+        qos = self._qos_by_type.get(msg_type, self._qos_by_type.get("default", 0))
+        return max(0, min(2, int(qos)))
+
+    def _start_publisher(self):
+        """
+        启动发送队列任务（每次连接重建，旧队列中的消息视为失败）.
+        """
+        self._stop_publisher()
+        self._publish_queue = asyncio.Queue(maxsize=self._publish_queue_size)
+        self._inflight_sem = asyncio.Semaphore(self._max_inflight)
+        self._publish_task = asyncio.create_task(self._publish_worker())
+
+    def _stop_publisher(self):
+        """
+        停止发送队列，未完成的发布全部以失败结束.
+        """
+        if self._publish_task and not self._publish_task.done():
+            self._publish_task.cancel()
+        self._publish_task = None
+
+        if self._publish_queue is not None:
+            while not self._publish_queue.empty():
+                _, _, future = self._publish_queue.get_nowait()
+                if not future.done():
+                    future.set_result(False)
+        self._publish_queue = None
+
+        with self._publish_lock:
+            pending = list(self._pending_publishes.values())
+            self._pending_publishes.clear()
+            self._early_acks.clear()
+        for future in pending:
+            if not future.done():
+                future.set_result(False)
+
+    def publish(self, message, qos=None) -> asyncio.Future:
+        """发布文本消息，不等待 broker 确认.
+
+        Args:
+            message: 要发布的文本
+            qos: 指定 QoS，为 None 时按消息 type 选择
+
+        Returns:
+            asyncio.Future: 收到 on_publish 确认后结果为 True，失败为 False
+        """
+        future = self.loop.create_future()
+        if self._publish_queue is None or not self.mqtt_client:
+            logger.error("MQTT客户端未初始化")
+            future.set_result(False)
+            return future
+
+        if qos is None:
+            qos = self._qos_for(message)
+        try:
+            self._publish_queue.put_nowait((message, qos, future))
+            self.telemetry.record_send_queue(self._publish_queue.qsize())
+        except asyncio.QueueFull:
+            logger.warning("MQTT发送队列已满，丢弃消息")
+            future.set_result(False)
+        return future
+
+    async def _publish_worker(self):
+        """
+        按入队顺序发布消息，受在途确认数量限制.
+        """
+        try:
+            while True:
+                message, qos, future = await self._publish_queue.get()
+                if future.done():
+                    continue
+                sem = self._inflight_sem
+                await sem.acquire()
+                if future.done():
+                    sem.release()
+                    continue
+                future.add_done_callback(lambda _f, sem=sem: sem.release())
+                try:
+                    self._publish_now(message, qos, future)
+                except Exception as e:
+                    logger.error(f"发送MQTT消息失败: {e}")
+                    if not future.done():
+                        future.set_result(False)
+        except asyncio.CancelledError:
+            pass
+
+    def _publish_now(self, message, qos, future):
+        client = self.mqtt_client
+        if not client:
+            future.set_result(False)
+            return
+
+        sent_at = time.monotonic()
+        # publish() 内部会获取 paho 的锁，而网络线程持有该锁时会回调
+        # _on_publish_ack，因此不能在 _publish_lock 内调用
+        info = client.publish(self.publish_topic, message, qos=qos)
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            logger.error(f"发送MQTT消息失败，返回码: {info.rc}")
+            future.set_result(False)
+            return
+        with self._publish_lock:
+            # 确认可能在 publish() 返回前已到达
+            if info.mid in self._early_acks:
+                self._early_acks.discard(info.mid)
+                future.set_result(True)
+                return
+            self._pending_publishes[info.mid] = future
+
+        # 超时或被取消时移除等待项；QoS>0 的确认耗时作为 broker 往返时延
+        future.add_done_callback(
+            lambda _f, mid=info.mid: self._forget_publish(
+                mid, _f, sent_at if qos > 0 else None
+            )
+        )
+
+    def _forget_publish(self, mid, future, sent_at=None):
+        with self._publish_lock:
+            if self._pending_publishes.get(mid) is future:
+                del self._pending_publishes[mid]
+        if sent_at is not None and not future.cancelled() and future.result():
+            self.telemetry.observe_rtt((time.monotonic() - sent_at) * 1000)
+
+    def _on_publish_ack(self, mid):
+        """
+        paho 网络线程中调用：完成对应 mid 的 Future.
+        """
+        with self._publish_lock:
+            future = self._pending_publishes.pop(mid, None)
+            if future is None:
+                # publish() 尚未返回，或等待方已超时
+                if len(self._early_acks) > 256:
+                    self._early_acks.clear()
+                self._early_acks.add(mid)
+                return
+
+        def _resolve():
+            if not future.done():
+                future.set_result(True)
+
+        self.loop.call_soon_threadsafe(_resolve)
+
     async def send_text(self, message):
         """
-        发送文本消息.
+        发送文本消息（不阻塞事件循环）.
         """
         if not self.mqtt_client:
             logger.error("MQTT客户端未初始化")
             return False
 
         try:
-            result = self.mqtt_client.publish(self.publish_topic, message)
-            result.wait_for_publish()
-            return True
+            future = self.publish(message)
+            return await asyncio.wait_for(future, timeout=self._publish_timeout)
+        except asyncio.TimeoutError:
+            logger.error("等待MQTT发布确认超时")
+            return False
         except Exception as e:
             logger.error(f"发送MQTT消息失败: {e}")
             if self._on_network_error:
@@ -556,6 +751,7 @@ class MqttProtocol(Protocol):
 
             # 发送数据包
             self.udp_socket.sendto(packet, (self.udp_server, self.udp_port))
+            self.telemetry.record_out(len(audio_data))
 
             # 每发送10个包打印一次日志
             if self.local_sequence % 10 == 0:
@@ -669,6 +865,9 @@ class MqttProtocol(Protocol):
                     logger.error(f"关闭UDP套接字失败: {e}")
                 self.udp_socket = None
 
+            # 停止发送队列
+            self._stop_publisher()
+
             # 停止MQTT客户端
             if self.mqtt_client:
                 try:
@@ -904,6 +1103,11 @@ class MqttProtocol(Protocol):
                 f"{self.udp_server}:{self.udp_port}" if self.udp_server else None
             ),
             "session_id": self.session_id,
+            "publish_queue": (
+                self._publish_queue.qsize() if self._publish_queue is not None else 0
+            ),
+            "publish_inflight": len(self._pending_publishes),
+            "telemetry": self.telemetry.snapshot(),
         }
 
     async def _cleanup_connection(self):
@@ -923,6 +1127,9 @@ class MqttProtocol(Protocol):
         # 停止UDP接收线程
         self._stop_udp_receiver()
 
+        # 停止发送队列
+        self._stop_publisher()
+
         # 停止MQTT客户端
         if self.mqtt_client:
             try:
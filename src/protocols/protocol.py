@@ -1,6 +1,7 @@
 import json
 
 from src.constants.constants import AbortReason, ListeningMode
+from src.protocols.link_telemetry import LinkTelemetry
 from src.utils.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -18,6 +19,8 @@ class Protocol:
         # 新增连接状态变化回调
         self._on_connection_state_changed = None
         self._on_reconnecting = None
+        # 链路质量遥测（RTT、抖动、吞吐、丢包）
+        self.telemetry = LinkTelemetry()
 
     def on_incoming_json(self, callback):
         """
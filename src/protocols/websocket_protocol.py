@@ -6,6 +6,12 @@ import time
 import websockets
 
 from src.constants.constants import AudioConfig
+from src.protocols.binary_frame import (
+    FRAME_TYPE_AUDIO,
+    PROTOCOL_VERSION_FRAMED,
+    PROTOCOL_VERSION_RAW,
+    BinaryFrameCodec,
+)
 from src.protocols.protocol import Protocol
 from src.utils.config_manager import ConfigManager
 from src.utils.logging_config import get_logger
@@ -31,6 +37,13 @@ class WebsocketProtocol(Protocol):
         self._last_pong_time = None
         self._ping_interval = 30.0  # 心跳间隔（秒）
         self._ping_timeout = 10.0  # ping超时时间（秒）
+        # RTT 探测间隔（秒），由连接监控任务发送，不替代 websockets 内置心跳
+        self._rtt_probe_interval = float(
+            self.config.get_config(
+                "SYSTEM_OPTIONS.NETWORK.TELEMETRY.PING_INTERVAL", 10.0
+            )
+            or 0
+        )
         self._heartbeat_task = None
         self._connection_monitor_task = None
 
@@ -49,9 +62,20 @@ class WebsocketProtocol(Protocol):
         device_id = self.config.get_config("SYSTEM_OPTIONS.DEVICE_ID")
         client_id = self.config.get_config("SYSTEM_OPTIONS.CLIENT_ID")
 
+        # 二进制帧协议版本：请求的版本与服务器 hello 协商后的实际版本
+        self.requested_protocol_version = int(
+            self.config.get_config(
+                "SYSTEM_OPTIONS.NETWORK.WEBSOCKET_PROTOCOL_VERSION",
+                PROTOCOL_VERSION_RAW,
+            )
+            or PROTOCOL_VERSION_RAW
+        )
+        self.protocol_version = PROTOCOL_VERSION_RAW
+        self.frame_codec = BinaryFrameCodec()
+
         self.HEADERS = {
             "Authorization": f"Bearer {access_token}",
-            "Protocol-Version": "1",
+            "Protocol-Version": str(self.requested_protocol_version),
             "Device-Id": device_id,  # 获取设备MAC地址
             "Client-Id": client_id,
         }
@@ -67,6 +91,10 @@ class WebsocketProtocol(Protocol):
         try:
             # 在连接时创建 Event，确保在正确的事件循环中
             self.hello_received = asyncio.Event()
+            # 新连接先按裸帧处理，等服务器 hello 确认版本
+            self.protocol_version = PROTOCOL_VERSION_RAW
+            self.frame_codec.reset()
+            self.telemetry.reset()
 
             # 判断是否应该使用 SSL
             current_ssl_context = None
@@ -111,7 +139,7 @@ class WebsocketProtocol(Protocol):
             # 发送客户端hello消息
             hello_message = {
                 "type": "hello",
-                "version": 1,
+                "version": self.requested_protocol_version,
                 "features": {
                     "mcp": True,
                 },
@@ -221,11 +249,40 @@ class WebsocketProtocol(Protocol):
                         await self._handle_connection_loss("连接已关闭")
                         break
 
+                if self._rtt_probe_interval > 0 and (
+                    self._last_ping_time is None
+                    or time.time() - self._last_ping_time >= self._rtt_probe_interval
+                ):
+                    await self._probe_rtt()
+
         except asyncio.CancelledError:
             logger.debug("连接监控任务被取消")
         except Exception as e:
             logger.error(f"连接监控异常: {e}")
 
+    async def _probe_rtt(self):
+        """
+        发送一次 ping 并记录往返时延，超时只记日志，断线由连接监控处理.
+        """
+        websocket = self.websocket
+        if not websocket:
+            return
+        self._last_ping_time = time.time()
+        started = time.monotonic()
+        try:
+            pong_waiter = await websocket.ping()
+            await asyncio.wait_for(pong_waiter, timeout=self._ping_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("RTT探测ping响应超时")
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"RTT探测失败: {e}")
+            return
+        self._last_pong_time = time.time()
+        self.telemetry.observe_rtt((time.monotonic() - started) * 1000)
+
     async def _handle_connection_loss(self, reason: str):
         """
         处理连接丢失.
@@ -349,6 +406,9 @@ class WebsocketProtocol(Protocol):
             "last_ping_time": self._last_ping_time,
             "last_pong_time": self._last_pong_time,
             "websocket_url": self.WEBSOCKET_URL,
+            "protocol_version": self.protocol_version,
+            "malformed_frames": self.frame_codec.malformed,
+            "telemetry": self.telemetry.snapshot(),
         }
 
     async def _message_handler(self):
@@ -375,6 +435,19 @@ class WebsocketProtocol(Protocol):
                             logger.error(f"无效的JSON消息: {message}, 错误: {e}")
                     elif isinstance(message, bytes):
                         # 二进制消息，可能是音频
+                        if self.protocol_version == PROTOCOL_VERSION_FRAMED:
+                            frame = self.frame_codec.unpack(message)
+                            if frame is None:
+                                logger.debug(f"丢弃无效的二进制帧: {len(message)} 字节")
+                                continue
+                            if frame.type != FRAME_TYPE_AUDIO:
+                                continue
+                            message = frame.payload
+                            self.telemetry.record_in(
+                                len(message), frame.sequence, frame.timestamp
+                            )
+                        else:
+                            self.telemetry.record_in(len(message))
                         if self._on_incoming_audio:
                             self._on_incoming_audio(message)
                 except Exception as e:
@@ -413,8 +486,14 @@ class WebsocketProtocol(Protocol):
         if not self.is_audio_channel_opened():
             return
 
+        size = len(data)
+        if self.protocol_version == PROTOCOL_VERSION_FRAMED:
+            data = self.frame_codec.pack(data)
+
         try:
             await self.websocket.send(data)
+            self.telemetry.record_out(size)
+            self._record_send_buffer()
         except websockets.ConnectionClosed as e:
             logger.warning(f"发送音频时连接已关闭: {e}")
             await self._handle_connection_loss(f"发送音频失败: {e.code} {e.reason}")
@@ -426,6 +505,16 @@ class WebsocketProtocol(Protocol):
             # 不要在这里调用网络错误回调，让连接处理器处理
             await self._handle_connection_loss(f"发送音频异常: {str(e)}")
 
+    def _record_send_buffer(self):
+        """
+        以传输层写缓冲字节数作为发送积压.
+        """
+        try:
+            transport = self.websocket.transport
+            self.telemetry.record_send_buffer(transport.get_write_buffer_size())
+        except Exception:
+            pass
+
     async def send_text(self, message: str):
         """
         发送文本消息.
@@ -482,6 +571,8 @@ class WebsocketProtocol(Protocol):
                 logger.error(f"不支持的传输方式: {transport}")
                 return
 
+            self._negotiate_protocol_version(data.get("version"))
+
             # 设置 hello 接收事件
             self.hello_received.set()
 
@@ -496,6 +587,26 @@ class WebsocketProtocol(Protocol):
             if self._on_network_error:
                 self._on_network_error(f"处理服务器响应失败: {str(e)}")
 
+    def _negotiate_protocol_version(self, server_version):
+        """
+        按服务器 hello 中的版本决定二进制帧格式，旧服务器回退为裸 Opus 帧.
+        """
+        try:
+            server_version = int(server_version or PROTOCOL_VERSION_RAW)
+        except (TypeError, ValueError):
+            server_version = PROTOCOL_VERSION_RAW
+
+        if (
+            self.requested_protocol_version == PROTOCOL_VERSION_FRAMED
+            and server_version == PROTOCOL_VERSION_FRAMED
+        ):
+            self.protocol_version = PROTOCOL_VERSION_FRAMED
+            logger.info("已启用二进制帧协议 v2（序号/时间戳帧头）")
+        else:
+            self.protocol_version = PROTOCOL_VERSION_RAW
+            if self.requested_protocol_version != PROTOCOL_VERSION_RAW:
+                logger.info(f"服务器协议版本为 {server_version}，回退为裸音频帧")
+
     async def _cleanup_connection(self):
         """
         清理连接相关资源.
@@ -1,15 +1,49 @@
+import atexit
+import copy
 import json
+import os
+import threading
 import uuid
-from typing import Any, Dict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Tuple
 
 from src.utils.logging_config import get_logger
 from src.utils.resource_finder import resource_finder
 
 logger = get_logger(__name__)
 
+# 写盘防抖时间（秒）：连续更新合并为一次写入
+SAVE_DEBOUNCE_SECONDS = 0.5
+
+_MISSING = object()
+
+
+class _Batch:
+    """
+    一个线程/协程上下文中进行中的 batch()：嵌套深度、修改过的路径与回滚用的原值.
+    """
+
+    __slots__ = ("depth", "changes", "undo", "open")
+
+    def __init__(self):
+        self.depth = 0
+        self.changes: List[str] = []
+        self.undo: Dict[str, Any] = {}
+        self.open = True
+
+
+# batch 状态按上下文隔离：其他线程或协程的更新不会被并入或回滚
+_current_batch: ContextVar = ContextVar("config_batch", default=None)
+
 
 class ConfigManager:
-    """配置管理器 - 单例模式"""
+    """配置管理器 - 单例模式.
+
+    - update_config 只修改内存并安排防抖写盘（临时文件 + 原子替换，在定时器线程中执行）
+    - batch() 内的多次更新合并为一次写盘与一次通知，异常时回滚
+    - subscribe() 按点分路径订阅变更，路径本身、其父路径或子路径被修改时回调
+    """
 
     _instance = None
 
@@ -22,9 +56,38 @@ class ConfigManager:
                 "OTA_VERSION_URL": "https://api.tenclass.net/xiaozhi/ota/",
                 "WEBSOCKET_URL": None,
                 "WEBSOCKET_ACCESS_TOKEN": None,
+                # 2 = 带序号/时间戳的二进制帧头，服务器不支持时自动回退为 1
+                "WEBSOCKET_PROTOCOL_VERSION": 2,
                 "MQTT_INFO": None,
                 "ACTIVATION_VERSION": "v2",  # 可选值: v1, v2
                 "AUTHORIZATION_URL": "https://xiaozhi.me/",
+                # MQTT 文本消息异步发布：按消息类型选择 QoS，限制在途确认数
+                "MQTT_PUBLISH": {
+                    "QOS": {"default": 0, "hello": 1, "goodbye": 1, "mcp": 1},
+                    "MAX_INFLIGHT": 8,
+                    "QUEUE_SIZE": 128,
+                    "TIMEOUT": 10.0,
+                },
+                # OTA 响应缓存：启动时直接使用，后台条件请求刷新
+                "OTA_CACHE": {
+                    "ENABLED": True,
+                    # 硬过期（秒），超过后启动必须等待 OTA 响应
+                    "HARD_EXPIRY": 604800,
+                },
+                "TELEMETRY": {
+                    # WebSocket RTT 探测间隔（秒），0 关闭
+                    "PING_INTERVAL": 10.0,
+                    # 向自适应编码器上报丢包的间隔（秒）
+                    "REPORT_INTERVAL": 5.0,
+                    # 链路摘要日志间隔（秒），0 关闭
+                    "LOG_INTERVAL": 60.0,
+                },
+                # 启动时预连接并保持会话，空闲断线后后台抖动退避重连
+                "CONNECTION": {
+                    "PREWARM": True,
+                    "RECONNECT_BASE_DELAY": 1.0,
+                    "RECONNECT_MAX_DELAY": 60.0,
+                },
             },
         },
         "WAKE_WORD_OPTIONS": {
@@ -65,6 +128,31 @@ class ConfigManager:
             "FILTER_LENGTH_RATIO": 0.4,
             "ENABLE_PREPROCESS": True,
         },
+        "AUDIO": {
+            # 唤醒后预录缓冲时长（秒，0.5-15），0 表示关闭；检测到唤醒词才开始截留，
+            # 需覆盖最坏情况下的通道打开时间（open_audio_channel 超时 12 秒）
+            "PREROLL_SECONDS": 12.0,
+            # 设备为 Opus 原生采样率（8/12/16/24/48kHz）时直接按设备采样率编解码；
+            # scripts/opus_rate_benchmark.py 实测 48kHz 下并不比重采样省 CPU，默认关闭
+            "NATIVE_RATE_CODEC": False,
+            "ADAPTIVE_ENCODER": {
+                "ENABLED": True,
+                "MIN_COMPLEXITY": 0,
+                "MAX_COMPLEXITY": 10,
+                "MIN_BITRATE": 12000,
+                "MAX_BITRATE": 32000,
+            },
+        },
+        # 倒计时：未到期的倒计时写入本地，重启后恢复；过期超过 RESTORE_GRACE 秒的丢弃
+        "TIMER": {
+            "PERSIST": True,
+            "RESTORE_GRACE": 60,
+        },
+        # 在线音乐：边下边播，预缓冲 PREBUFFER_KB 后开始播放；关闭则完整下载后再播放
+        "MUSIC": {
+            "STREAMING": True,
+            "PREBUFFER_KB": 64,
+        },
         "AUDIO_DEVICES": {
             "input_device_id": None,
             "input_device_name": None,
@@ -92,6 +180,14 @@ class ConfigManager:
             return
         self._initialized = True
 
+        # 可重入锁：保护内存配置、写盘状态与订阅表
+        self._lock = threading.RLock()
+        # 点分路径 -> 键元组 缓存，避免热点 get_config 重复 split
+        self._path_cache: Dict[str, Tuple[str, ...]] = {}
+        self._subscribers: Dict[str, List[Callable[[str, Any], None]]] = {}
+        self._save_timer = None
+        self._dirty = False
+
         # 初始化配置文件路径
         self._init_config_paths()
 
@@ -101,6 +197,9 @@ class ConfigManager:
         # 加载配置
         self._config = self._load_config()
 
+        # 进程退出前写入尚未落盘的修改
+        atexit.register(self.flush)
+
     def _init_config_paths(self):
         """
         初始化配置文件路径.
@@ -112,6 +211,7 @@ class ConfigManager:
             project_root = resource_finder.get_project_root()
             self.config_dir = project_root / "config"
             self.config_dir.mkdir(parents=True, exist_ok=True)
+            resource_finder.invalidate("config")
             logger.info(f"创建配置目录: {self.config_dir.absolute()}")
 
         self.config_file = self.config_dir / "config.json"
@@ -130,6 +230,7 @@ class ConfigManager:
         models_dir = project_root / "models"
         if not models_dir.exists():
             models_dir.mkdir(parents=True, exist_ok=True)
+            resource_finder.invalidate("models")
             logger.info(f"创建模型目录: {models_dir.absolute()}")
 
         # 创建 cache 目录
@@ -160,24 +261,24 @@ class ConfigManager:
                 # 创建默认配置文件
                 logger.info("配置文件不存在，创建默认配置")
                 self._save_config(self.DEFAULT_CONFIG)
-                return self.DEFAULT_CONFIG.copy()
+                return copy.deepcopy(self.DEFAULT_CONFIG)
 
         except Exception as e:
             logger.error(f"配置加载错误: {e}")
-            return self.DEFAULT_CONFIG.copy()
+            return copy.deepcopy(self.DEFAULT_CONFIG)
 
     def _save_config(self, config: dict) -> bool:
         """
-        保存配置到文件.
+        保存配置到文件（写临时文件后原子替换，避免中途断电留下半个文件）.
         """
         try:
             # 确保配置目录存在
             self.config_dir.mkdir(parents=True, exist_ok=True)
 
-            # 保存配置文件
-            self.config_file.write_text(
-                json.dumps(config, indent=2, ensure_ascii=False), encoding="utf-8"
-            )
+            text = json.dumps(config, indent=2, ensure_ascii=False)
+            tmp_file = self.config_file.with_suffix(".json.tmp")
+            tmp_file.write_text(text, encoding="utf-8")
+            os.replace(tmp_file, self.config_file)
             logger.debug(f"配置已保存到: {self.config_file}")
             return True
 
@@ -185,12 +286,44 @@ class ConfigManager:
             logger.error(f"配置保存错误: {e}")
             return False
 
+    def _schedule_save(self):
+        """
+        标记为待写盘并（重新）启动防抖定时器.
+        """
+        with self._lock:
+            self._dirty = True
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(SAVE_DEBOUNCE_SECONDS, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self) -> bool:
+        """
+        立即写入尚未落盘的修改.
+        """
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty:
+                return True
+            self._dirty = False
+            # 在锁内序列化，保证写入的是一致的快照
+            snapshot = copy.deepcopy(self._config)
+        ok = self._save_config(snapshot)
+        if not ok:
+            with self._lock:
+                self._dirty = True
+        return ok
+
     @staticmethod
     def _merge_configs(default: dict, custom: dict) -> dict:
         """
         递归合并配置字典.
         """
-        result = default.copy()
+        # 深拷贝默认值，避免原地修改配置时污染 DEFAULT_CONFIG
+        result = copy.deepcopy(default)
         for key, value in custom.items():
             if (
                 key in result
@@ -202,6 +335,13 @@ class ConfigManager:
                 result[key] = value
         return result
 
+    def _split_path(self, path: str) -> Tuple[str, ...]:
+        keys = self._path_cache.get(path)
+        if keys is None:
+            keys = tuple(path.split("."))
+            self._path_cache[path] = keys
+        return keys
+
     def get_config(self, path: str, default: Any = None) -> Any:
         """
         通过路径获取配置值
@@ -209,7 +349,7 @@ class ConfigManager:
         """
         try:
             value = self._config
-            for key in path.split("."):
+            for key in self._split_path(path):
                 value = value[key]
             return value
         except (KeyError, TypeError):
@@ -217,26 +357,161 @@ class ConfigManager:
 
     def update_config(self, path: str, value: Any) -> bool:
         """
-        更新特定配置项
+        更新特定配置项（内存立即生效，写盘防抖合并）
         path: 点分隔的配置路径，如 "SYSTEM_OPTIONS.NETWORK.MQTT_INFO"
         """
         try:
-            current = self._config
-            *parts, last = path.split(".")
-            for part in parts:
-                current = current.setdefault(part, {})
-            current[last] = value
-            return self._save_config(self._config)
+            with self._lock:
+                current = self._config
+                *parts, last = self._split_path(path)
+                for part in parts:
+                    current = current.setdefault(part, {})
+                existing = current.get(last, _MISSING)
+                # 值未变化时不写盘；同一个 dict/list 可能已被调用方原地修改，仍视为变化
+                in_place = existing is value and isinstance(value, (dict, list))
+                if not in_place and existing == value:
+                    return True
+                batch = _current_batch.get()
+                if batch is not None and batch.open:
+                    if path not in batch.undo:
+                        batch.undo[path] = (
+                            existing
+                            if existing is _MISSING
+                            else copy.deepcopy(existing)
+                        )
+                    batch.changes.append(path)
+                    current[last] = value
+                    return True
+                current[last] = value
+            self._schedule_save()
+            self._notify([path])
+            return True
         except Exception as e:
             logger.error(f"配置更新错误 {path}: {e}")
             return False
 
+    @contextmanager
+    def batch(self):
+        """批量更新：退出时只写盘一次、通知一次；块内抛出异常则回滚本批次的修改.
+
+        批次只收集当前线程/协程中的更新，其他上下文的并发更新照常生效.
+
+        用法:
+            with config.batch():
+                config.update_config("A.B", 1)
+                config.update_config("A.C", 2)
+        """
+        batch = _current_batch.get()
+        token = None
+        if batch is None or not batch.open:
+            batch = _Batch()
+            token = _current_batch.set(batch)
+        batch.depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._end_batch(batch):
+                self._rollback(batch)
+            raise
+        else:
+            if self._end_batch(batch) and batch.changes:
+                self._schedule_save()
+                self._notify(batch.changes)
+        finally:
+            if token is not None:
+                _current_batch.reset(token)
+
+    @staticmethod
+    def _end_batch(batch: _Batch) -> bool:
+        """
+        退出一层 batch()，返回是否为最外层（批次就此结束）.
+        """
+        batch.depth -= 1
+        if batch.depth:
+            return False
+        batch.open = False
+        return True
+
+    def _rollback(self, batch: _Batch):
+        """
+        按修改的逆序恢复批次内改动过的路径.
+        """
+        with self._lock:
+            for path in reversed(list(batch.undo)):
+                *parts, last = self._split_path(path)
+                current = self._config
+                for part in parts:
+                    current = current.setdefault(part, {})
+                old = batch.undo[path]
+                if old is _MISSING:
+                    current.pop(last, None)
+                else:
+                    current[last] = old
+
+    def subscribe(
+        self, path: str, callback: Callable[[str, Any], None]
+    ) -> Callable[[], None]:
+        """订阅配置路径的变更.
+
+        Args:
+            path: 点分路径；该路径、其父路径或子路径被修改时触发
+            callback: callback(path, new_value)，在修改方所在线程同步调用，
+                需要切换到事件循环的订阅者请自行 call_soon_threadsafe
+
+        Returns:
+            取消订阅的函数
+        """
+        with self._lock:
+            self._subscribers.setdefault(path, []).append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                callbacks = self._subscribers.get(path, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+                if not callbacks:
+                    self._subscribers.pop(path, None)
+
+        return unsubscribe
+
+    def _notify(self, changed_paths: List[str]):
+        with self._lock:
+            if not self._subscribers:
+                return
+            targets = [
+                (path, list(callbacks))
+                for path, callbacks in self._subscribers.items()
+                if any(self._paths_overlap(path, c) for c in changed_paths)
+            ]
+        for path, callbacks in targets:
+            value = self.get_config(path)
+            for callback in callbacks:
+                try:
+                    callback(path, value)
+                except Exception as e:
+                    logger.error(f"配置变更回调失败 {path}: {e}", exc_info=True)
+
+    @staticmethod
+    def _paths_overlap(a: str, b: str) -> bool:
+        return a == b or a.startswith(b + ".") or b.startswith(a + ".")
+
     def reload_config(self) -> bool:
         """
-        重新加载配置文件.
+        重新加载配置文件（先写入待落盘的修改，再通知值发生变化的订阅者）.
         """
         try:
-            self._config = self._load_config()
+            self.flush()
+            with self._lock:
+                old_values = {
+                    path: copy.deepcopy(self.get_config(path))
+                    for path in self._subscribers
+                }
+                self._config = self._load_config()
+            changed = [
+                path for path, old in old_values.items() if self.get_config(path) != old
+            ]
+            if changed:
+                self._notify(changed)
             logger.info("配置文件已重新加载")
             return True
         except Exception as e:
@@ -5,12 +5,20 @@ import json
 import os
 import plistlib
 import sys
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 PathLike = Union[str, Path]
 _MANIFEST_CANDIDATES = ("unifypy.json", "app.json", "package.json")
 
+# 目录索引与查找结果的复核间隔（秒）：间隔内直接信任缓存，过期后按目录 mtime 校验
+_REVALIDATE_SECONDS = 5.0
+# 启动预热的常用资源根
+_WARM_ROOTS = ("config", "assets", "models", "libs")
+# 大小写不敏感的文件系统上，索引未命中时再按忽略大小写比对
+_CASE_INSENSITIVE = sys.platform in ("darwin", "win32")
+
 
 class ResourceFinder:
     """
@@ -39,6 +47,13 @@ class ResourceFinder:
         # 构建搜索路径（有序、去重）
         self._search_dirs = self._build_search_dirs()
 
+        # 目录索引：目录 → (mtime_ns, 校验时刻, {名称: 是否目录})，目录不存在时条目为 None
+        self._dir_index: Dict[Path, Tuple[int, float, Optional[Dict[str, bool]]]] = {}
+        # 查找结果（含未命中）：(相对路径各段, want_dir) → (结果, 校验时刻, 未解析的候选路径)
+        self._lookup_cache: Dict[
+            Tuple[Tuple[str, ...], bool], Tuple[Optional[Path], float, Optional[Path]]
+        ] = {}
+
     # -------------- 公共 API --------------
 
     def get_app_meta(self) -> Dict:
@@ -119,6 +134,44 @@ class ResourceFinder:
         rel = Path(root, *parts)
         return self._find(rel, want_dir=want_dir)
 
+    # -------------- 查找缓存 --------------
+
+    def warm(
+        self, roots: Iterable[PathLike] = _WARM_ROOTS, depth: int = 2
+    ) -> Dict[str, Optional[Path]]:
+        """
+        启动时批量预热：索引各搜索根及常用资源根下 depth 层目录，返回各资源根的定位结果。
+        """
+        for base in self._search_dirs:
+            self._listing(base)
+        found: Dict[str, Optional[Path]] = {}
+        for root in roots:
+            path = self.find_directory(root)
+            found[str(root)] = path
+            if path is not None:
+                self._index_tree(path, depth)
+        return found
+
+    def invalidate(self, relpath: Optional[PathLike] = None) -> None:
+        """
+        丢弃缓存；指定相对路径时只丢弃该路径（含其下级）的查找结果与沿途目录索引。
+        """
+        if relpath is None or Path(relpath).is_absolute():
+            self._lookup_cache.clear()
+            self._dir_index.clear()
+            return
+        parts = Path(relpath).parts
+        n = len(parts)
+        for key in list(self._lookup_cache):
+            if key[0][:n] == parts:
+                self._lookup_cache.pop(key, None)
+        for base in self._search_dirs:
+            current = base
+            self._dir_index.pop(current, None)
+            for name in parts:
+                current = current / name
+                self._dir_index.pop(current, None)
+
     # -------------- 兼容老签名的便捷函数 --------------
 
     def find_libs_dir_compat(
@@ -329,6 +382,31 @@ class ResourceFinder:
                 ok = False
             return rp if ok else None
 
+        parts = rp.parts
+        if not parts or ".." in parts:
+            return self._find_uncached(rp, want_dir)
+
+        key = (parts, want_dir)
+        now = time.monotonic()
+        cached = self._lookup_cache.get(key)
+        if cached is not None and now - cached[1] < _REVALIDATE_SECONDS:
+            return cached[0]
+
+        result: Optional[Path] = None
+        candidate: Optional[Path] = None
+        for base in self._search_dirs:
+            if self._probe(base, parts, want_dir):
+                candidate = base.joinpath(*parts)
+                # 候选未变时沿用上次解析结果，省去 resolve() 的逐级 lstat
+                if cached is not None and cached[2] == candidate:
+                    result = cached[0]
+                else:
+                    result = candidate.resolve()
+                break
+        self._lookup_cache[key] = (result, now, candidate)
+        return result
+
+    def _find_uncached(self, rp: Path, want_dir: bool) -> Optional[Path]:
         for base in self._search_dirs:
             p = (base / rp).resolve()
             try:
@@ -339,6 +417,73 @@ class ResourceFinder:
                 return p
         return None
 
+    def _probe(self, base: Path, parts: Tuple[str, ...], want_dir: bool) -> bool:
+        """
+        沿目录索引逐级判断 base/parts 是否存在且类型匹配。
+        """
+        current = base
+        last = len(parts) - 1
+        for i, name in enumerate(parts):
+            entries = self._listing(current)
+            if entries is None:
+                return False
+            is_dir = entries.get(name)
+            if is_dir is None and _CASE_INSENSITIVE:
+                folded = name.lower()
+                is_dir = next(
+                    (v for k, v in entries.items() if k.lower() == folded), None
+                )
+            if is_dir is None:
+                return False
+            if i == last:
+                return is_dir == want_dir
+            if not is_dir:
+                return False
+            current = current / name
+        return False
+
+    def _listing(self, directory: Path) -> Optional[Dict[str, bool]]:
+        """
+        返回目录的一级条目；复核间隔内直接用缓存，过期后 mtime 未变则只多一次 stat。
+        """
+        now = time.monotonic()
+        cached = self._dir_index.get(directory)
+        if cached is not None and now - cached[1] < _REVALIDATE_SECONDS:
+            return cached[2]
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            self._dir_index[directory] = (-1, now, None)
+            return None
+        if cached is not None and cached[0] == mtime and cached[2] is not None:
+            self._dir_index[directory] = (mtime, now, cached[2])
+            return cached[2]
+
+        entries: Dict[str, bool] = {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            entries[entry.name] = True
+                        elif entry.is_file():
+                            entries[entry.name] = False
+                    except OSError:
+                        continue
+        except OSError:
+            self._dir_index[directory] = (-1, now, None)
+            return None
+        self._dir_index[directory] = (mtime, now, entries)
+        return entries
+
+    def _index_tree(self, directory: Path, depth: int) -> None:
+        entries = self._listing(directory)
+        if entries is None or depth <= 1:
+            return
+        for name, is_dir in entries.items():
+            if is_dir:
+                self._index_tree(directory / name, depth - 1)
+
 
 # --------- 单例与便捷函数（含兼容） ---------
 resource_finder = ResourceFinder()
@@ -384,6 +529,16 @@ def find_config_dir() -> Optional[Path]:
     return resource_finder.find_config_dir()
 
 
+def warm_resource_cache(
+    roots: Iterable[PathLike] = _WARM_ROOTS, depth: int = 2
+) -> Dict[str, Optional[Path]]:
+    return resource_finder.warm(roots, depth)
+
+
+def invalidate_resource_cache(relpath: Optional[PathLike] = None) -> None:
+    resource_finder.invalidate(relpath)
+
+
 # 兼容老签名：find_libs_dir(f"libopus/{system_dir}", arch_name) / find_libs_dir(system='Darwin', arch='arm64')
 def find_libs_dir(
     *parts: PathLike, system: str = None, arch: str = None
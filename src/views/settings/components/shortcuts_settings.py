@@ -137,21 +137,21 @@ class ShortcutsSettingsWidget(QWidget):
         Áp dụng cài đặt.
         """
         try:
-            # Cập nhật trạng thái kích hoạt
-            self.config.update_config(
-                "SHORTCUTS.ENABLED", self.enable_checkbox.isChecked()
-            )
+            with self.config.batch():
+                # Cập nhật trạng thái kích hoạt
+                self.config.update_config(
+                    "SHORTCUTS.ENABLED", self.enable_checkbox.isChecked()
+                )
 
-            # Cập nhật các cấu hình phím tắt
-            for key, widget in self.shortcut_widgets.items():
-                modifier = widget.modifier_combo.currentText().lower()
-                key_value = widget.key_combo.currentText().lower()
+                # Cập nhật các cấu hình phím tắt
+                for key, widget in self.shortcut_widgets.items():
+                    modifier = widget.modifier_combo.currentText().lower()
+                    key_value = widget.key_combo.currentText().lower()
 
-                self.config.update_config(f"SHORTCUTS.{key}.modifier", modifier)
-                self.config.update_config(f"SHORTCUTS.{key}.key", key_value)
+                    self.config.update_config(f"SHORTCUTS.{key}.modifier", modifier)
+                    self.config.update_config(f"SHORTCUTS.{key}.key", key_value)
 
-            # Tải lại cấu hình
-            self.config.reload_config()
+            # Cấu hình trong bộ nhớ đã cập nhật, không cần tải lại từ tệp
             self.shortcuts_config = self.config.get_config("SHORTCUTS", {})
 
             logger.info("Cài đặt phím tắt đã được lưu")
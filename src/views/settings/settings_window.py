@@ -205,9 +205,15 @@ class SettingsWindow(QDialog):
                 # Component phím tắt có phương thức lưu riêng
                 self.shortcuts_tab.apply_settings()
 
-            # Cập nhật cấu hình hàng loạt
-            for config_path, value in all_config_data.items():
-                self.config_manager.update_config(config_path, value)
+            # Cập nhật cấu hình hàng loạt (ghi đĩa một lần)
+            with self.config_manager.batch():
+                for config_path, value in all_config_data.items():
+                    self.config_manager.update_config(config_path, value)
+
+            # Ghi đĩa ngay thay vì chờ bộ hẹn giờ debounce, để báo lỗi ghi file cho người dùng
+            if not self.config_manager.flush():
+                self.logger.error("Ghi file cấu hình thất bại")
+                return False
 
             self.logger.info("Lưu cấu hình thành công")
             return True
@@ -293,6 +299,9 @@ class SettingsWindow(QDialog):
 
             self.logger.info(f"Lệnh khởi động lại: {python} {script} {' '.join(args)}")
 
+            # execv thay thế tiến trình mà không chạy atexit, ghi các thay đổi còn chờ trước
+            self.config_manager.flush()
+
             # Đóng ứng dụng hiện tại
             QApplication.quit()
 